@@ -53,8 +53,8 @@ def add_cache_headers(response):
         # 图片等资源
         elif request.path.endswith(('.png', '.jpg', '.jpeg', '.gif', '.ico', '.svg', '.woff', '.woff2')):
             response.headers['Cache-Control'] = 'public, max-age=31536000'  # 1年
-    # API 响应不缓存
-    elif request.path.startswith('/api/'):
+    # API 响应不缓存（带 ETag 的条件 GET 响应保留 conditional_get 设置的 Cache-Control）
+    elif request.path.startswith('/api/') and 'ETag' not in response.headers:
         response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
     return response
 
@@ -92,6 +92,36 @@ if os.environ.get('WERKZEUG_RUN_MAIN') == 'true' or not app.debug:
     init_scheduler()
 
 
+# 后台工作线程开关：测试等场景导入应用时设置 APP_BACKGROUND_WORKERS=false，避免启动后台线程
+BACKGROUND_WORKERS = os.environ.get('APP_BACKGROUND_WORKERS', 'true').lower() == 'true'
+
+
+# 启动缓存预热：每个 worker 导入应用后在后台线程加载冷启动代价高的缓存
+def init_cache_warmup():
+    """启动后台缓存预热，状态见 /api/health"""
+    try:
+        from services.cache_warmup_service import CacheWarmupService
+        CacheWarmupService.start()
+    except Exception as e:
+        print(f"[App] 缓存预热启动异常: {e}")
+
+if BACKGROUND_WORKERS and (os.environ.get('WERKZEUG_RUN_MAIN') == 'true' or not app.debug):
+    init_cache_warmup()
+
+
+# 每日统计增量更新：任务保存 / 删除后由后台线程把增量写入 daily_statistics
+def init_daily_statistics():
+    """启动每日统计增量更新线程"""
+    try:
+        from services.daily_statistics_service import DailyStatisticsService
+        DailyStatisticsService.start()
+    except Exception as e:
+        print(f"[App] 每日统计增量更新启动异常: {e}")
+
+if BACKGROUND_WORKERS and (os.environ.get('WERKZEUG_RUN_MAIN') == 'true' or not app.debug):
+    init_daily_statistics()
+
+
 if __name__ == '__main__':
     # 开发模式支持热重载
     debug_mode = os.environ.get('FLASK_DEBUG', '0') == '1' or os.environ.get('FLASK_ENV') == 'development'
@@ -0,0 +1,7 @@
+"""
+性能测试与压测工具
+- llm_standin: 本地 OpenAI 兼容的 LLM 替身服务器（录制/回放/合成）
+- bench_evaluation: 评估热路径基准测试（与 baselines/ 中的基线比较）
+- bench_analytics: 看板/分析聚合在 N 个任务文件下的冷/热缓存耗时与 RSS
+- harness / synthetic: 计时、基线比较与合成数据工具
+"""
@@ -0,0 +1,315 @@
+"""
+看板与分析聚合规模基准测试
+
+在临时目录中按指定规模生成批量任务文件（文件存储模式），
+测量各聚合入口的冷缓存 / 热缓存耗时和进程 RSS：
+- DashboardService.get_overview / get_trends / get_drilldown
+- AnalysisService.get_heatmap
+- DrilldownService.get_drilldown_data
+- ErrorCorrelationService.analyze_correlations
+- BatchCompareService.get_batch_trend / compare_periods / get_model_comparison
+- ReportService.generate_daily_report
+
+作业项的 homework_result 和 evaluation 来自对合成页面实际执行 do_evaluation 的结果池，
+错误类型分布与线上评估一致。数据库查询返回空结果（相当于 daily_statistics 等表为空），
+LLM 调用返回固定内容，不访问外部服务。
+
+"冷缓存"指清空进程内缓存（DashboardService._cache）后的首次调用，操作系统文件缓存不做处理。
+
+用法:
+    python -m benchmarks.bench_analytics --tasks 1000
+    python -m benchmarks.bench_analytics --tasks 10000 --items-per-task 20 --output analytics_10k.json
+    python -m benchmarks.bench_analytics --tasks 1000 --save-baseline
+"""
+import os
+import sys
+import json
+import random
+import shutil
+import argparse
+import tempfile
+import contextlib
+from datetime import datetime, timedelta
+from unittest import mock
+
+os.environ.setdefault('USE_DB_STORAGE', 'false')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.harness import BenchResult, current_rss, finish
+from benchmarks.synthetic import SyntheticEvalData, pick_subject_id
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines', 'analytics.json')
+
+SUBJECT_NAMES = {0: '英语', 1: '语文', 2: '数学', 3: '物理', 4: '化学'}
+
+BOOKS_PER_SUBJECT = 3
+PAGES_PER_BOOK = 40
+
+
+@contextlib.contextmanager
+def _silenced(enabled: bool = True):
+    """屏蔽被测函数的调试输出"""
+    if not enabled:
+        yield
+        return
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+@contextlib.contextmanager
+def offline_backends():
+    """数据库返回空结果、LLM 返回固定内容，使各服务走文件存储的计算路径"""
+    from services.database_service import AppDatabaseService
+    from services.llm_service import LLMService
+
+    llm_result = {'success': True, 'content': '今日测试整体表现稳定。'}
+    with mock.patch.object(AppDatabaseService, 'execute_query', return_value=[]), \
+            mock.patch.object(AppDatabaseService, 'execute_one', return_value=None), \
+            mock.patch.object(AppDatabaseService, 'execute_update', return_value=0), \
+            mock.patch.object(AppDatabaseService, 'execute_insert', return_value=None), \
+            mock.patch.object(AppDatabaseService, 'execute_many', return_value=0), \
+            mock.patch.object(LLMService, 'call_deepseek', return_value=llm_result):
+        yield
+
+
+# ========== 数据生成 ==========
+
+class TaskFabricator:
+    """
+    批量任务文件生成器
+
+    每个学科预先生成 pool_size 个页面并执行 do_evaluation，作业项从结果池中抽取，
+    避免在生成 10k 级任务时重复评估。
+    """
+
+    def __init__(self, seed: int = 42, pool_size: int = 60, questions_per_page: int = 12):
+        self.rng = random.Random(seed)
+        self.data = SyntheticEvalData(seed=seed)
+        self.pool_size = pool_size
+        self.questions_per_page = questions_per_page
+        self.books = self._make_books()
+        self.pools = {}
+
+    def _make_books(self):
+        books = {}
+        for subject_id, subject_name in SUBJECT_NAMES.items():
+            books[subject_id] = [
+                {
+                    'book_id': str(1990000000000000000 + subject_id * 100 + k),
+                    'book_name': f'同步导学练.{subject_name}.八{"上" if k % 2 == 0 else "下"}.{k + 1}',
+                    'dataset_id': f'ds{subject_id}{k:02d}',
+                    'pages': sorted(self.rng.sample(range(1, 160), PAGES_PER_BOOK))
+                }
+                for k in range(BOOKS_PER_SUBJECT)
+            ]
+        return books
+
+    def _pool(self, subject_id: int):
+        """按学科生成 (base_effect, homework_result JSON, evaluation) 结果池"""
+        if subject_id not in self.pools:
+            from routes.batch_evaluation import do_evaluation
+            pool = []
+            with _silenced():
+                for pair in self.data.make_pairs(self.pool_size, self.questions_per_page):
+                    evaluation = do_evaluation(pair['base_effect'], pair['homework_result'], subject_id=subject_id)
+                    pool.append((
+                        pair['base_effect'],
+                        json.dumps(pair['homework_result'], ensure_ascii=False),
+                        evaluation
+                    ))
+            self.pools[subject_id] = pool
+        return self.pools[subject_id]
+
+    def make_task(self, task_id: str, created_at: datetime, items_per_task: int):
+        from routes.batch_evaluation import build_overall_report
+
+        subject_id = pick_subject_id(self.rng)
+        book = self.rng.choice(self.books[subject_id])
+        pool = self._pool(subject_id)
+        homework_items = []
+        total_questions = 0
+        total_correct = 0
+        for i in range(items_per_task):
+            _, homework_result, evaluation = self.rng.choice(pool)
+            total_questions += evaluation.get('total_questions', 0)
+            total_correct += evaluation.get('correct_count', 0)
+            homework_items.append({
+                'homework_id': f'{task_id}{i:04d}',
+                'student_id': str(2000000000000000000 + self.rng.randint(0, 9999)),
+                'student_name': f'学生{self.rng.randint(1, 500)}',
+                'book_id': book['book_id'],
+                'book_name': book['book_name'],
+                'page_num': self.rng.choice(book['pages']),
+                'matched_dataset': book['dataset_id'],
+                'homework_result': homework_result,
+                'status': 'completed',
+                'accuracy': evaluation.get('accuracy', 0),
+                'evaluation': evaluation
+            })
+        return {
+            'task_id': task_id,
+            'name': f'{SUBJECT_NAMES[subject_id]}-{created_at.month}/{created_at.day}',
+            'subject_id': subject_id,
+            'subject_name': SUBJECT_NAMES[subject_id],
+            'book_name': book['book_name'],
+            'status': 'completed',
+            'homework_items': homework_items,
+            'overall_report': build_overall_report(homework_items, total_correct, total_questions),
+            'created_at': created_at.isoformat()
+        }
+
+    def make_dataset(self, subject_id: int, book):
+        pool = self._pool(subject_id)
+        return {
+            'dataset_id': book['dataset_id'],
+            'name': f"{book['book_name']} 基准",
+            'book_id': book['book_id'],
+            'book_name': book['book_name'],
+            'subject_id': subject_id,
+            'pages': book['pages'],
+            'base_effects': {str(p): self.rng.choice(pool)[0] for p in book['pages']},
+            'created_at': (datetime.now() - timedelta(days=60)).isoformat()
+        }
+
+    def write(self, root: str, n_tasks: int, items_per_task: int, days: int):
+        """写入 root/batch_tasks 和 root/datasets，创建时间均匀分布在最近 days 天内"""
+        batch_dir = os.path.join(root, 'batch_tasks')
+        datasets_dir = os.path.join(root, 'datasets')
+        os.makedirs(batch_dir, exist_ok=True)
+        os.makedirs(datasets_dir, exist_ok=True)
+
+        for subject_id, books in self.books.items():
+            for book in books:
+                with open(os.path.join(datasets_dir, f"{book['dataset_id']}.json"), 'w', encoding='utf-8') as f:
+                    json.dump(self.make_dataset(subject_id, book), f, ensure_ascii=False, indent=2)
+
+        now = datetime.now()
+        for n in range(n_tasks):
+            created_at = now - timedelta(seconds=self.rng.uniform(0, days * 86400))
+            task_id = f'{n:08x}'
+            with open(os.path.join(batch_dir, f'{task_id}.json'), 'w', encoding='utf-8') as f:
+                json.dump(self.make_task(task_id, created_at, items_per_task), f, ensure_ascii=False, indent=2)
+        return batch_dir, datasets_dir
+
+
+# ========== 入口 ==========
+
+def entry_points(days: int):
+    """(名称, 可调用对象) 列表"""
+    from services.dashboard_service import DashboardService
+    from services.analysis_service import AnalysisService
+    from services.drilldown_service import DrilldownService
+    from services.error_correlation_service import ErrorCorrelationService
+    from services.batch_compare_service import BatchCompareService
+    from services.report_service import ReportService
+
+    today = datetime.now().date()
+    half = days // 2
+    period1 = ((today - timedelta(days=days)).isoformat(), (today - timedelta(days=half)).isoformat())
+    period2 = ((today - timedelta(days=half)).isoformat(), today.isoformat())
+
+    return [
+        ('DashboardService.get_overview', lambda: DashboardService.get_overview('month')),
+        ('DashboardService.get_trends', lambda: DashboardService.get_trends(days)),
+        ('DashboardService.get_drilldown', lambda: DashboardService.get_drilldown('subject')),
+        ('AnalysisService.get_heatmap', lambda: AnalysisService.get_heatmap(None, days)),
+        ('DrilldownService.get_drilldown_data', lambda: DrilldownService.get_drilldown_data('overall')),
+        ('ErrorCorrelationService.analyze_correlations', lambda: ErrorCorrelationService.analyze_correlations()),
+        ('BatchCompareService.get_batch_trend', lambda: BatchCompareService.get_batch_trend(days=days)),
+        ('BatchCompareService.compare_periods', lambda: BatchCompareService.compare_periods(*period1, *period2)),
+        ('BatchCompareService.get_model_comparison', lambda: BatchCompareService.get_model_comparison(days)),
+        ('ReportService.generate_daily_report', lambda: ReportService.generate_daily_report(today.isoformat())),
+    ]
+
+
+def _clear_caches():
+    from services.dashboard_service import DashboardService
+    from services.aggregate_cube_service import AggregateCubeService
+    DashboardService.clear_cache()
+    # 冷启动：清空内存中的立方体，从贡献文件重新加载
+    AggregateCubeService.reset()
+
+
+def run(tasks: int = 1000, items_per_task: int = 20, days: int = 30, cold_repeats: int = 2,
+        warm_repeats: int = 3, seed: int = 42, data_dir: str = None, only: str = None, quiet: bool = True):
+    """
+    生成数据并测量各入口，返回 (params, results)
+
+    Args:
+        data_dir: 数据目录，为空时使用临时目录并在结束后删除
+    """
+    from services.storage_service import StorageService
+    from services.aggregate_cube_service import AggregateCubeService
+
+    params = {'tasks': tasks, 'items_per_task': items_per_task, 'days': days, 'seed': seed}
+    root = data_dir or tempfile.mkdtemp(prefix='bench_analytics_')
+    results = []
+    try:
+        batch_dir = os.path.join(root, 'batch_tasks')
+        if not (data_dir and os.path.isdir(batch_dir) and os.listdir(batch_dir)):
+            print(f"[Bench] 生成 {tasks} 个任务 × {items_per_task} 个作业 -> {root}")
+            TaskFabricator(seed=seed).write(root, tasks, items_per_task, days)
+
+        with mock.patch.object(StorageService, 'BATCH_TASKS_DIR', batch_dir), \
+                mock.patch.object(StorageService, 'DATASETS_DIR', os.path.join(root, 'datasets')), \
+                mock.patch.object(AggregateCubeService, 'CUBE_DIR', os.path.join(root, 'analytics_cube')), \
+                offline_backends(), _silenced(quiet):
+            for name, func in entry_points(days):
+                if only and only not in name:
+                    continue
+                cold = []
+                for _ in range(cold_repeats):
+                    _clear_caches()
+                    cold.append(_timed(func))
+                rss = current_rss()
+                warm = [_timed(func) for _ in range(warm_repeats)]
+                results.append(BenchResult(f'{name}[cold]', 1, cold, 0, rss_bytes=rss))
+                results.append(BenchResult(f'{name}[warm]', 1, warm, 0, rss_bytes=current_rss()))
+        _clear_caches()
+    finally:
+        if not data_dir:
+            shutil.rmtree(root, ignore_errors=True)
+    return params, results
+
+
+def _timed(func) -> float:
+    from time import perf_counter
+    start = perf_counter()
+    func()
+    return perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='看板与分析聚合规模基准测试')
+    parser.add_argument('--tasks', type=int, default=1000, help='任务文件数（默认 1000）')
+    parser.add_argument('--items-per-task', type=int, default=20)
+    parser.add_argument('--days', type=int, default=30, help='任务创建时间分布的天数，也用作查询范围')
+    parser.add_argument('--cold-repeats', type=int, default=2)
+    parser.add_argument('--warm-repeats', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--data-dir', help='数据目录，已存在任务文件时直接复用（用于多次对比）')
+    parser.add_argument('--only', help='只运行名称包含该字符串的入口')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--no-compare', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.3)
+    parser.add_argument('--output', help='将本次结果写入 JSON 文件')
+    parser.add_argument('--verbose', action='store_true', help='保留被测函数的调试输出')
+    args = parser.parse_args(argv)
+
+    params, results = run(
+        tasks=args.tasks, items_per_task=args.items_per_task, days=args.days,
+        cold_repeats=args.cold_repeats, warm_repeats=args.warm_repeats, seed=args.seed,
+        data_dir=args.data_dir, only=args.only, quiet=not args.verbose
+    )
+    return finish(
+        'analytics', params, results, args.baseline,
+        save_baseline=args.save_baseline, compare=not args.no_compare,
+        tolerance=args.tolerance, output=args.output
+    )
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""
+任务题目异常检测基准测试
+
+测量 AnomalyService.detect_question_anomalies 对最大的若干个任务文件的耗时：
+- 指定 --data-dir 且其中已有 batch_tasks 时，按文件大小取最大的 --top 个任务
+- 否则由 bench_analytics.TaskFabricator 生成 --tasks 个每个含 --items-per-task 个作业的任务
+
+计时包含从数据集文件加载基准效果（每轮重新加载），不包含读取任务文件；固定使用文件存储模式。
+任一任务的中位耗时超过 --budget 秒时退出码为 1。
+
+用法:
+    python -m benchmarks.bench_anomaly                          # 3 个 200 作业的任务
+    python -m benchmarks.bench_anomaly --data-dir ./ --top 5    # 当前数据目录中最大的 5 个任务
+    python -m benchmarks.bench_anomaly --save-baseline
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+from unittest import mock
+
+os.environ.setdefault('USE_DB_STORAGE', 'false')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.harness import measure, finish
+from benchmarks.bench_analytics import TaskFabricator, _silenced
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines', 'anomaly.json')
+
+
+def largest_tasks(batch_dir: str, top: int):
+    """按文件大小倒序取 top 个任务文件路径"""
+    paths = [os.path.join(batch_dir, name) for name in os.listdir(batch_dir) if name.endswith('.json')]
+    return sorted(paths, key=os.path.getsize, reverse=True)[:top]
+
+
+def run(tasks: int = 3, items_per_task: int = 200, top: int = 5, warmup: int = 1, repeats: int = 5,
+        seed: int = 42, data_dir: str = None, quiet: bool = True):
+    """
+    生成（或复用）任务文件并测量，返回 (params, results)
+
+    Args:
+        data_dir: 数据目录（含 batch_tasks / datasets），为空时使用临时目录并在结束后删除
+    """
+    from services.storage_service import StorageService
+    from services.anomaly_service import AnomalyService
+
+    params = {'tasks': tasks, 'items_per_task': items_per_task, 'top': top, 'seed': seed}
+    root = data_dir or tempfile.mkdtemp(prefix='bench_anomaly_')
+    results = []
+    try:
+        batch_dir = os.path.join(root, 'batch_tasks')
+        if not (data_dir and os.path.isdir(batch_dir) and os.listdir(batch_dir)):
+            print(f"[Bench] 生成 {tasks} 个任务 × {items_per_task} 个作业 -> {root}")
+            TaskFabricator(seed=seed).write(root, tasks, items_per_task, days=1)
+
+        with mock.patch('services.storage_service.USE_DB_STORAGE', False), \
+                mock.patch.object(StorageService, 'DATASETS_DIR', os.path.join(root, 'datasets')), \
+                _silenced(quiet):
+            for rank, path in enumerate(largest_tasks(batch_dir, top), 1):
+                with open(path, 'r', encoding='utf-8') as f:
+                    task_data = json.load(f)
+                n_items = len(task_data.get('homework_items', []))
+                results.append(measure(
+                    f'detect_question_anomalies[#{rank} {n_items} items]',
+                    lambda: AnomalyService.detect_question_anomalies(task_data),
+                    ops=n_items, warmup=warmup, repeats=repeats
+                ))
+    finally:
+        if not data_dir:
+            shutil.rmtree(root, ignore_errors=True)
+    return params, results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='任务题目异常检测基准测试')
+    parser.add_argument('--tasks', type=int, default=3, help='生成的任务数（默认 3）')
+    parser.add_argument('--items-per-task', type=int, default=200)
+    parser.add_argument('--top', type=int, default=5, help='测量最大的任务文件数')
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--data-dir', help='数据目录，已存在任务文件时直接复用')
+    parser.add_argument('--budget', type=float, default=1.0, help='单个任务的耗时上限（秒）')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--no-compare', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.3)
+    parser.add_argument('--output', help='将本次结果写入 JSON 文件')
+    parser.add_argument('--verbose', action='store_true', help='保留被测函数的调试输出')
+    args = parser.parse_args(argv)
+
+    params, results = run(
+        tasks=args.tasks, items_per_task=args.items_per_task, top=args.top, warmup=args.warmup,
+        repeats=args.repeats, seed=args.seed, data_dir=args.data_dir, quiet=not args.verbose
+    )
+    code = finish(
+        'anomaly', params, results, args.baseline,
+        save_baseline=args.save_baseline, compare=not args.no_compare,
+        tolerance=args.tolerance, output=args.output
+    )
+    over = [r for r in results if r.median > args.budget]
+    for r in over:
+        print(f"[Bench] {r.name} 中位耗时 {r.median:.3f}s 超过上限 {args.budget:.3f}s")
+    return 1 if over else code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
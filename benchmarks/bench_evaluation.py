@@ -0,0 +1,171 @@
+"""
+评估热路径基准测试
+
+覆盖批量评估的核心函数：
+- normalize_answer / normalize_answer_strict / calculate_similarity
+- normalize_physics_markdown / normalize_chemistry_markdown
+- classify_error
+- calculate_score_accuracy_by_type
+- do_evaluation（按学科）
+- build_overall_report（batch_evaluate 结束时的汇总）
+
+数据由 benchmarks.synthetic 按真实题目形态合成，使用文件存储模式，不访问数据库和 LLM。
+
+用法:
+    python -m benchmarks.bench_evaluation                    # 运行并与基线比较，回退时退出码为 1
+    python -m benchmarks.bench_evaluation --save-baseline    # 生成/更新基线
+    python -m benchmarks.bench_evaluation --scale 200 --repeats 10 --output result.json
+"""
+import os
+import sys
+import argparse
+import contextlib
+
+os.environ.setdefault('USE_DB_STORAGE', 'false')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.harness import measure, finish
+from benchmarks.synthetic import SyntheticEvalData
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines', 'evaluation.json')
+
+SUBJECTS = {0: 'english', 1: 'chinese', 2: 'math', 3: 'physics', 4: 'chemistry'}
+
+
+@contextlib.contextmanager
+def _silenced(enabled: bool):
+    """do_evaluation 内部有逐题调试输出，默认屏蔽以免终端 IO 主导计时"""
+    if not enabled:
+        yield
+        return
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def build_stages(data: SyntheticEvalData, scale: int, questions_per_page: int):
+    """构造 (阶段名, 可调用对象, 每轮操作数) 列表"""
+    from routes.batch_evaluation import (
+        classify_error, calculate_score_accuracy_by_type, do_evaluation, build_overall_report
+    )
+    from utils.text_utils import normalize_answer, normalize_answer_strict, calculate_similarity
+    from services.physics_eval import normalize_physics_markdown
+    from services.chemistry_eval import normalize_chemistry_markdown
+
+    texts = data.sample_answers(scale * questions_per_page)
+    text_pairs = data.sample_pairs_text(scale * questions_per_page)
+    pairs = data.make_pairs(scale, questions_per_page)
+    question_pairs = [
+        (base, hw)
+        for pair in pairs
+        for base, hw in zip(pair['base_effect'], pair['homework_result'])
+    ]
+
+    def run_normalize():
+        for t in texts:
+            normalize_answer(t)
+
+    def run_normalize_strict():
+        for t in texts:
+            normalize_answer_strict(t)
+
+    def run_similarity():
+        for a, b in text_pairs:
+            calculate_similarity(a, b)
+
+    def run_physics():
+        for t in texts:
+            normalize_physics_markdown(t)
+
+    def run_chemistry():
+        for t in texts:
+            normalize_chemistry_markdown(t)
+
+    def run_classify(is_chinese=False):
+        def run():
+            for base, hw in question_pairs:
+                classify_error(base, hw, is_chinese=is_chinese)
+        return run
+
+    def run_score_accuracy():
+        for pair in pairs:
+            calculate_score_accuracy_by_type(pair['base_effect'], pair['homework_result'])
+
+    evaluations = []
+
+    def run_do_evaluation(subject_id):
+        def run():
+            evaluations.clear()
+            for pair in pairs:
+                evaluations.append(do_evaluation(pair['base_effect'], pair['homework_result'], subject_id=subject_id))
+        return run
+
+    def run_overall_report():
+        items = [{'status': 'completed', 'evaluation': e} for e in evaluations]
+        total_questions = sum(e.get('total_questions', 0) for e in evaluations)
+        total_correct = sum(e.get('correct_count', 0) for e in evaluations)
+        build_overall_report(items, total_correct, total_questions)
+
+    n_texts = len(texts)
+    n_questions = len(question_pairs)
+    stages = [
+        ('normalize_answer', run_normalize, n_texts),
+        ('normalize_answer_strict', run_normalize_strict, n_texts),
+        ('calculate_similarity', run_similarity, len(text_pairs)),
+        ('normalize_physics_markdown', run_physics, n_texts),
+        ('normalize_chemistry_markdown', run_chemistry, n_texts),
+        ('classify_error', run_classify(), n_questions),
+        ('classify_error[chinese]', run_classify(is_chinese=True), n_questions),
+        ('calculate_score_accuracy_by_type', run_score_accuracy, len(pairs)),
+    ]
+    for subject_id, name in SUBJECTS.items():
+        stages.append((f'do_evaluation[{name}]', run_do_evaluation(subject_id), len(pairs)))
+    # 汇总阶段复用最后一次 do_evaluation 的结果
+    stages.append(('build_overall_report', run_overall_report, len(pairs)))
+    return stages
+
+
+def run(scale: int = 100, questions_per_page: int = 12, warmup: int = 1, repeats: int = 5,
+        seed: int = 42, quiet: bool = True, only: str = None):
+    """执行全部阶段，返回 (params, results)"""
+    data = SyntheticEvalData(seed=seed)
+    params = {'scale': scale, 'questions_per_page': questions_per_page, 'seed': seed}
+    results = []
+    with _silenced(quiet):
+        for name, func, ops in build_stages(data, scale, questions_per_page):
+            if only and only not in name:
+                continue
+            results.append(measure(name, func, ops=ops, warmup=warmup, repeats=repeats))
+    return params, results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='评估热路径基准测试')
+    parser.add_argument('--scale', type=int, default=100, help='合成页数（默认 100）')
+    parser.add_argument('--questions-per-page', type=int, default=12)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--only', help='只运行名称包含该字符串的阶段')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--no-compare', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='允许的 ops/sec 相对下降（默认 0.25）')
+    parser.add_argument('--output', help='将本次结果写入 JSON 文件')
+    parser.add_argument('--verbose', action='store_true', help='保留被测函数的调试输出')
+    args = parser.parse_args(argv)
+
+    params, results = run(
+        scale=args.scale, questions_per_page=args.questions_per_page, warmup=args.warmup,
+        repeats=args.repeats, seed=args.seed, quiet=not args.verbose, only=args.only
+    )
+    return finish(
+        'evaluation', params, results, args.baseline,
+        save_baseline=args.save_baseline, compare=not args.no_compare,
+        tolerance=args.tolerance, output=args.output
+    )
+
+
+if __name__ == '__main__':
+    sys.exit(main())
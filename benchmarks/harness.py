@@ -0,0 +1,207 @@
+"""
+基准测试公共工具
+
+- 预热 + 多次重复计时，输出中位数/最优耗时和 ops/sec
+- tracemalloc 单独测量峰值内存（不影响计时），可选记录进程 RSS
+- 与保存的基线 JSON 比较，超出容差时返回非零退出码
+"""
+import gc
+import os
+import json
+import time
+import platform
+import statistics
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, Any, List, Optional
+
+
+class BenchResult:
+    """单个阶段的测量结果"""
+
+    def __init__(self, name: str, ops: int, timings: List[float], peak_bytes: int,
+                 rss_bytes: Optional[int] = None):
+        self.name = name
+        self.ops = ops
+        self.timings = timings
+        self.peak_bytes = peak_bytes
+        self.rss_bytes = rss_bytes
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.timings)
+
+    @property
+    def best(self) -> float:
+        return min(self.timings)
+
+    @property
+    def ops_per_sec(self) -> float:
+        return self.ops / self.median if self.median > 0 else float('inf')
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            'ops': self.ops,
+            'median_s': round(self.median, 6),
+            'best_s': round(self.best, 6),
+            'ops_per_sec': round(self.ops_per_sec, 2),
+            'peak_kb': round(self.peak_bytes / 1024, 1)
+        }
+        if self.rss_bytes is not None:
+            data['rss_mb'] = round(self.rss_bytes / 1024 / 1024, 1)
+        return data
+
+
+def current_rss() -> int:
+    """当前进程常驻内存（字节），非 Linux 平台退化为峰值 RSS"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        # macOS 上 ru_maxrss 单位为字节，Linux 为 KB
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss if platform.system() == 'Darwin' else maxrss * 1024
+
+
+def measure(name: str, func: Callable[[], Any], ops: int = 1,
+            warmup: int = 1, repeats: int = 5, track_memory: bool = True) -> BenchResult:
+    """
+    测量一个阶段
+
+    Args:
+        name: 阶段名称
+        func: 无参可调用对象，执行一轮 ops 次操作
+        ops: 每轮操作数（用于换算 ops/sec）
+        warmup: 预热轮数
+        repeats: 计时轮数
+        track_memory: 是否额外执行一轮测量峰值内存
+    """
+    for _ in range(warmup):
+        func()
+
+    timings = []
+    gc_enabled = gc.isenabled()
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    peak = 0
+    if track_memory:
+        tracemalloc.start()
+        try:
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return BenchResult(name, ops, timings, peak)
+
+
+def format_table(results: List[BenchResult]) -> str:
+    """格式化为文本表格"""
+    width = max([36] + [len(r.name) + 2 for r in results])
+    show_rss = any(r.rss_bytes is not None for r in results)
+    header = f"{'stage':<{width}}{'ops':>8}{'median(ms)':>13}{'best(ms)':>11}{'ops/sec':>14}{'peak(KB)':>11}"
+    if show_rss:
+        header += f"{'rss(MB)':>10}"
+    lines = [header, '-' * len(header)]
+    for r in results:
+        line = (
+            f"{r.name:<{width}}{r.ops:>8}{r.median * 1000:>13.2f}{r.best * 1000:>11.2f}"
+            f"{r.ops_per_sec:>14.1f}{r.peak_bytes / 1024:>11.1f}"
+        )
+        if show_rss:
+            line += f"{r.rss_bytes / 1024 / 1024:>10.1f}" if r.rss_bytes is not None else f"{'-':>10}"
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def build_report(suite: str, params: Dict[str, Any], results: List[BenchResult]) -> Dict[str, Any]:
+    """生成可保存为基线的报告"""
+    return {
+        'suite': suite,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'params': params,
+        'results': {r.name: r.to_dict() for r in results}
+    }
+
+
+def save_report(path: str, report: Dict[str, Any]) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def load_report(path: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare_with_baseline(report: Dict[str, Any], baseline: Dict[str, Any],
+                          tolerance: float = 0.25) -> List[str]:
+    """
+    与基线比较 ops/sec
+
+    Args:
+        tolerance: 允许的相对下降比例（0.25 表示低于基线 75% 视为回退）
+
+    Returns:
+        list: 回退描述，空列表表示通过
+    """
+    regressions = []
+    if baseline.get('params') != report.get('params'):
+        print(f"[Bench] 警告: 基线参数 {baseline.get('params')} 与本次 {report.get('params')} 不一致")
+    for name, current in report['results'].items():
+        base = baseline.get('results', {}).get(name)
+        if not base:
+            continue
+        floor = base['ops_per_sec'] * (1 - tolerance)
+        if current['ops_per_sec'] < floor:
+            regressions.append(
+                f"{name}: {current['ops_per_sec']:.1f} ops/sec < 基线 {base['ops_per_sec']:.1f} "
+                f"(-{(1 - current['ops_per_sec'] / base['ops_per_sec']) * 100:.0f}%)"
+            )
+    return regressions
+
+
+def finish(suite: str, params: Dict[str, Any], results: List[BenchResult],
+           baseline_path: str, save_baseline: bool = False, compare: bool = True,
+           tolerance: float = 0.25, output: str = None) -> int:
+    """打印结果、保存/比较基线，返回进程退出码"""
+    print(format_table(results))
+    report = build_report(suite, params, results)
+    if output:
+        save_report(output, report)
+        print(f"[Bench] 结果已写入 {output}")
+
+    if save_baseline:
+        save_report(baseline_path, report)
+        print(f"[Bench] 基线已保存到 {baseline_path}")
+        return 0
+
+    if compare:
+        baseline = load_report(baseline_path)
+        if baseline is None:
+            print(f"[Bench] 未找到基线 {baseline_path}，使用 --save-baseline 生成")
+            return 0
+        regressions = compare_with_baseline(report, baseline, tolerance)
+        if regressions:
+            print(f"[Bench] 性能回退（容差 {tolerance:.0%}）:")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print(f"[Bench] 与基线相比无回退（容差 {tolerance:.0%}）")
+    return 0
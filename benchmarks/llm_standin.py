@@ -0,0 +1,375 @@
+"""
+LLM 替身服务器
+
+本地 OpenAI 兼容的 chat/completions 服务，用于离线压测和回归测试：
+- record: 转发到真实服务商并把请求/响应对录制到磁盘
+- replay: 按请求指纹回放录制结果，未命中时合成响应（或返回 404）
+- synth: 全部合成响应
+
+支持可配置的延迟分布、流式输出（SSE）、429 限流和超时注入。
+
+使用方式:
+    # 启动替身服务器（合成模式，延迟对数正态分布，5% 限流）
+    python -m benchmarks.llm_standin --mode synth --latency lognormal:6.0,0.5 --rate-429 0.05
+
+    # 应用指向替身服务器（所有服务商统一改写为 {LLM_BASE_URL}/{provider}/chat/completions）
+    LLM_BASE_URL=http://127.0.0.1:8900 python app.py
+
+    # 录制真实调用，之后回放
+    python -m benchmarks.llm_standin --mode record --cassette-dir benchmarks/cassettes
+    python -m benchmarks.llm_standin --mode replay --cassette-dir benchmarks/cassettes --latency recorded
+"""
+import os
+import json
+import math
+import time
+import uuid
+import random
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional, Tuple
+
+import requests
+
+
+# 录制模式下的真实服务商地址（与 ConfigService.LLM_PROVIDER_URLS 默认值一致）
+UPSTREAM_URLS = {
+    'doubao': 'https://ark.cn-beijing.volces.com/api/v3/chat/completions',
+    'gpt': 'https://api.gpt.ge/v1/chat/completions',
+    'deepseek': 'https://api.deepseek.com/chat/completions',
+    'qwen': 'https://dashscope.aliyuncs.com/compatible-mode/v1/chat/completions',
+    'zhipu': 'https://open.bigmodel.cn/api/paas/v4/chat/completions',
+}
+
+DEFAULT_SYNTH_CONTENT = '[]'
+
+
+class LatencyModel:
+    """
+    延迟分布（毫秒）
+
+    规格格式:
+        fixed:200 | uniform:100,800 | normal:500,100 | lognormal:mu,sigma | recorded
+    """
+
+    def __init__(self, spec: str = 'fixed:0', rng: random.Random = None):
+        self.spec = spec
+        self.rng = rng or random.Random()
+        kind, _, params = spec.partition(':')
+        self.kind = kind
+        self.params = [float(p) for p in params.split(',') if p]
+
+    def sample(self, recorded_ms: Optional[float] = None) -> float:
+        """采样一次延迟（毫秒）"""
+        if self.kind == 'recorded':
+            return float(recorded_ms or 0)
+        if self.kind == 'fixed':
+            return self.params[0] if self.params else 0.0
+        if self.kind == 'uniform':
+            return self.rng.uniform(self.params[0], self.params[1])
+        if self.kind == 'normal':
+            return max(0.0, self.rng.gauss(self.params[0], self.params[1]))
+        if self.kind == 'lognormal':
+            return self.rng.lognormvariate(self.params[0], self.params[1])
+        raise ValueError(f'未知的延迟分布: {self.spec}')
+
+
+class Cassette:
+    """录制文件存储：每个请求指纹一个 JSON 文件"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(provider: str, payload: Dict[str, Any]) -> str:
+        """请求指纹：服务商 + 影响输出的请求字段（忽略 stream）"""
+        key = {
+            'provider': provider,
+            'model': payload.get('model'),
+            'messages': payload.get('messages'),
+            'temperature': payload.get('temperature'),
+            'tools': payload.get('tools'),
+        }
+        raw = json.dumps(key, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32]
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.json')
+
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def save(self, key: str, record: Dict[str, Any]) -> None:
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self._path(key), 'w', encoding='utf-8') as f:
+                json.dump(record, f, ensure_ascii=False, indent=2)
+
+
+class StandinConfig:
+    """替身服务器运行配置"""
+
+    def __init__(self, mode: str = 'synth', cassette_dir: str = 'benchmarks/cassettes',
+                 latency: str = 'fixed:0', rate_429: float = 0.0, rate_timeout: float = 0.0,
+                 timeout_seconds: float = 600.0, synth_content: str = DEFAULT_SYNTH_CONTENT,
+                 miss: str = 'synth', seed: int = None):
+        self.mode = mode
+        self.cassette = Cassette(cassette_dir)
+        self.rng = random.Random(seed)
+        self.latency = LatencyModel(latency, self.rng)
+        self.rate_429 = rate_429
+        self.rate_timeout = rate_timeout
+        self.timeout_seconds = timeout_seconds
+        self.synth_content = synth_content
+        self.miss = miss
+        self.stats = {'requests': 0, 'replayed': 0, 'recorded': 0, 'synthesized': 0,
+                      'rate_limited': 0, 'timeouts': 0, 'misses': 0}
+        self._rng_lock = threading.Lock()
+
+    def roll(self, rate: float) -> bool:
+        """按概率注入故障（随机源加锁以保证固定种子下可复现）"""
+        if rate <= 0:
+            return False
+        with self._rng_lock:
+            return self.rng.random() < rate
+
+    def sample_latency(self, recorded_ms: Optional[float] = None) -> float:
+        with self._rng_lock:
+            return self.latency.sample(recorded_ms)
+
+
+def estimate_tokens(value: Any) -> int:
+    """粗略估算 token 数（约 2 字符 1 token），仅用于合成 usage"""
+    text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+    return max(1, math.ceil(len(text) / 2))
+
+
+def synthesize_response(payload: Dict[str, Any], content: str) -> Dict[str, Any]:
+    """合成一个 OpenAI 格式的非流式响应"""
+    prompt_tokens = estimate_tokens(payload.get('messages', []))
+    completion_tokens = estimate_tokens(content)
+    return {
+        'id': f'chatcmpl-standin-{uuid.uuid4().hex[:12]}',
+        'object': 'chat.completion',
+        'created': int(time.time()),
+        'model': payload.get('model', 'standin'),
+        'choices': [{
+            'index': 0,
+            'message': {'role': 'assistant', 'content': content},
+            'finish_reason': 'stop'
+        }],
+        'usage': {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens
+        }
+    }
+
+
+def iter_sse_chunks(response: Dict[str, Any], chunk_size: int = 16):
+    """把完整响应拆成 SSE 流式分片"""
+    message = (response.get('choices') or [{}])[0].get('message', {})
+    content = message.get('content') or ''
+    base = {
+        'id': response.get('id'),
+        'object': 'chat.completion.chunk',
+        'created': response.get('created', int(time.time())),
+        'model': response.get('model')
+    }
+    yield dict(base, choices=[{'index': 0, 'delta': {'role': 'assistant'}, 'finish_reason': None}])
+    for start in range(0, len(content), chunk_size):
+        yield dict(base, choices=[{'index': 0, 'delta': {'content': content[start:start + chunk_size]},
+                                   'finish_reason': None}])
+    yield dict(base, choices=[{'index': 0, 'delta': {}, 'finish_reason': 'stop'}],
+               usage=response.get('usage'))
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    """chat/completions 请求处理"""
+
+    server_version = 'LLMStandin/1.0'
+    config: StandinConfig = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: Dict[str, Any]) -> None:
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_stream(self, response: Dict[str, Any]) -> None:
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        for chunk in iter_sse_chunks(response):
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+        self.wfile.write(b'data: [DONE]\n\n')
+        self.wfile.flush()
+
+    def _parse_provider(self) -> Optional[str]:
+        """路径格式 /{provider}/chat/completions 或 /v1/chat/completions"""
+        path = self.path.split('?', 1)[0].rstrip('/')
+        if not path.endswith('/chat/completions'):
+            return None
+        prefix = path[:-len('/chat/completions')].strip('/')
+        provider = prefix.split('/')[0] if prefix else ''
+        return provider if provider in UPSTREAM_URLS else 'default'
+
+    def do_GET(self):
+        if self.path.rstrip('/') == '/stats':
+            self._send_json(200, self.config.stats)
+        else:
+            self._send_json(404, {'error': {'message': 'not found'}})
+
+    def do_POST(self):
+        config = self.config
+        provider = self._parse_provider()
+        if provider is None:
+            self._send_json(404, {'error': {'message': 'not found'}})
+            return
+
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._send_json(400, {'error': {'message': 'invalid json'}})
+            return
+        config.stats['requests'] += 1
+
+        # 故障注入
+        if config.roll(config.rate_429):
+            config.stats['rate_limited'] += 1
+            self._send_json(429, {'error': {'message': 'Rate limit exceeded (standin)', 'type': 'rate_limit_error'}})
+            return
+        if config.roll(config.rate_timeout):
+            config.stats['timeouts'] += 1
+            time.sleep(config.timeout_seconds)
+            self._send_json(504, {'error': {'message': 'Gateway timeout (standin)'}})
+            return
+
+        status, response, recorded_ms = self._resolve(provider, payload)
+        if response is None:
+            return
+
+        # 录制模式已经历真实延迟，其余模式按延迟分布等待
+        if config.mode != 'record':
+            delay = config.sample_latency(recorded_ms)
+            if delay > 0:
+                time.sleep(delay / 1000.0)
+
+        if payload.get('stream') and status == 200:
+            self._send_stream(response)
+        else:
+            self._send_json(status, response)
+
+    def _resolve(self, provider: str, payload: Dict[str, Any]) -> Tuple[int, Optional[Dict[str, Any]], Optional[float]]:
+        """根据运行模式获取响应：(状态码, 响应体, 录制时延迟)"""
+        config = self.config
+        key = Cassette.fingerprint(provider, payload)
+
+        if config.mode == 'record':
+            upstream = UPSTREAM_URLS.get(provider)
+            if not upstream:
+                self._send_json(400, {'error': {'message': f'录制模式需要服务商路径前缀: {provider}'}})
+                return 0, None, None
+            upstream_payload = dict(payload, stream=False)
+            headers = {'Content-Type': 'application/json'}
+            if self.headers.get('Authorization'):
+                headers['Authorization'] = self.headers['Authorization']
+            start = time.time()
+            try:
+                upstream_resp = requests.post(upstream, json=upstream_payload, headers=headers, timeout=300)
+                body = upstream_resp.json()
+            except (requests.RequestException, ValueError) as e:
+                self._send_json(502, {'error': {'message': f'上游请求失败: {e}'}})
+                return 0, None, None
+            elapsed_ms = (time.time() - start) * 1000
+            if upstream_resp.status_code == 200:
+                config.cassette.save(key, {
+                    'provider': provider,
+                    'request': upstream_payload,
+                    'response': body,
+                    'status': upstream_resp.status_code,
+                    'latency_ms': round(elapsed_ms, 1),
+                    'recorded_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+                })
+                config.stats['recorded'] += 1
+            return upstream_resp.status_code, body, elapsed_ms
+
+        if config.mode == 'replay':
+            record = config.cassette.load(key)
+            if record:
+                config.stats['replayed'] += 1
+                return record.get('status', 200), record['response'], record.get('latency_ms')
+            config.stats['misses'] += 1
+            if config.miss == 'error':
+                self._send_json(404, {'error': {'message': f'录制未命中: {key}'}})
+                return 0, None, None
+
+        config.stats['synthesized'] += 1
+        return 200, synthesize_response(payload, config.synth_content), None
+
+
+def create_server(config: StandinConfig, host: str = '127.0.0.1', port: int = 8900) -> ThreadingHTTPServer:
+    """创建替身服务器（port=0 时自动分配端口）"""
+    handler = type('BoundStandinHandler', (StandinHandler,), {'config': config})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='OpenAI 兼容的 LLM 替身服务器')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--mode', choices=['record', 'replay', 'synth'], default='synth')
+    parser.add_argument('--cassette-dir', default='benchmarks/cassettes', help='录制文件目录')
+    parser.add_argument('--latency', default='fixed:0',
+                        help='延迟分布: fixed:ms | uniform:lo,hi | normal:mean,std | lognormal:mu,sigma | recorded')
+    parser.add_argument('--rate-429', type=float, default=0.0, help='返回 429 的概率')
+    parser.add_argument('--rate-timeout', type=float, default=0.0, help='模拟超时的概率')
+    parser.add_argument('--timeout-seconds', type=float, default=600.0, help='模拟超时时挂起的秒数')
+    parser.add_argument('--synth-content', default=DEFAULT_SYNTH_CONTENT, help='合成响应内容')
+    parser.add_argument('--synth-file', help='从文件读取合成响应内容')
+    parser.add_argument('--miss', choices=['synth', 'error'], default='synth', help='回放未命中时的处理')
+    parser.add_argument('--seed', type=int, help='随机种子（固定后延迟和故障注入可复现）')
+    args = parser.parse_args()
+
+    synth_content = args.synth_content
+    if args.synth_file:
+        with open(args.synth_file, 'r', encoding='utf-8') as f:
+            synth_content = f.read()
+
+    config = StandinConfig(
+        mode=args.mode, cassette_dir=args.cassette_dir, latency=args.latency,
+        rate_429=args.rate_429, rate_timeout=args.rate_timeout,
+        timeout_seconds=args.timeout_seconds, synth_content=synth_content,
+        miss=args.miss, seed=args.seed
+    )
+    server = create_server(config, args.host, args.port)
+    print(f"[Standin] {args.mode} 模式监听 http://{args.host}:{server.server_address[1]}")
+    print(f"[Standin] 设置 LLM_BASE_URL=http://{args.host}:{server.server_address[1]} 使应用指向替身服务器")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"[Standin] 统计: {config.stats}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+"""
+合成测试数据生成
+
+从 batch_tasks/ 和 datasets/ 中采样真实的题目形态（题号、答案、题型、bvalue），
+按指定规模生成基准效果和 AI 批改结果，并按比例注入识别错误、判断错误、缺题和幻觉。
+随机数由种子控制，同样的参数生成同样的数据。
+"""
+import os
+import json
+import random
+from typing import Dict, Any, List, Optional
+
+
+# 没有本地数据时使用的兜底题目形态
+FALLBACK_QUESTIONS = [
+    {'index': '1', 'answer': 'B', 'userAnswer': 'B', 'correct': 'yes', 'bvalue': '1', 'questionType': 'objective'},
+    {'index': '2', 'answer': 'AC', 'userAnswer': 'AC', 'correct': 'yes', 'bvalue': '2', 'questionType': 'objective'},
+    {'index': '3', 'answer': '√', 'userAnswer': '×', 'correct': 'no', 'bvalue': '3', 'questionType': 'objective'},
+    {'index': '4', 'answer': '冷热程度 摄氏度 ℃', 'userAnswer': '冷热程度 摄氏度 ℃', 'correct': 'yes', 'bvalue': '4', 'questionType': 'objective'},
+    {'index': '5(1)', 'answer': '$v=\\frac{s}{t}$ 20m/s', 'userAnswer': 'v=s/t 20m/s', 'correct': 'yes', 'bvalue': '4', 'questionType': 'objective'},
+    {'index': '6', 'answer': '$2H_2+O_2\\xrightarrow{点燃}2H_2O$', 'userAnswer': '2H₂+O₂=2H₂O', 'correct': 'no', 'bvalue': '4', 'questionType': 'objective'},
+    {'index': '7', 'answer': '作者通过对比手法，表达了对故乡的怀念之情。', 'userAnswer': '表达了作者对故乡的思念', 'correct': 'yes', 'bvalue': '5', 'questionType': 'subjective', 'maxScore': 4, 'score': 3},
+    {'index': '8', 'answer': 'It was raining heavily when I got home.', 'userAnswer': 'It was raining heavy when I got home.', 'correct': 'no', 'bvalue': '4', 'questionType': 'objective'},
+]
+
+# 识别错误时使用的替换答案
+NOISE_ANSWERS = ['A', 'D', '×', '温度计', '18', '3.5N', 'H₂O', '不能', '表达了思念之情', 'went']
+
+QUESTION_FIELDS = ('index', 'answer', 'userAnswer', 'correct', 'bvalue', 'questionType', 'maxScore', 'score')
+
+
+def _flatten(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """展开 children"""
+    flat = []
+    for item in items or []:
+        if not isinstance(item, dict):
+            continue
+        children = item.get('children') or []
+        if children:
+            flat.extend(_flatten(children))
+        else:
+            flat.append(item)
+    return flat
+
+
+def _pick_fields(item: Dict[str, Any]) -> Dict[str, Any]:
+    question = {k: item[k] for k in QUESTION_FIELDS if item.get(k) is not None}
+    question.setdefault('bvalue', '4')
+    question.setdefault('questionType', 'objective')
+    question['answer'] = str(question.get('answer', ''))
+    question['userAnswer'] = str(question.get('userAnswer', ''))
+    question['correct'] = question.get('correct') or 'yes'
+    return question
+
+
+def load_question_templates(batch_dir: str = 'batch_tasks', datasets_dir: str = 'datasets',
+                            limit: int = 5000) -> List[Dict[str, Any]]:
+    """从本地数据集和批量任务中采样题目形态，没有数据时返回兜底样本"""
+    templates: List[Dict[str, Any]] = []
+
+    if os.path.isdir(datasets_dir):
+        for filename in sorted(os.listdir(datasets_dir)):
+            if not filename.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(datasets_dir, filename), 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for effects in (data.get('base_effects') or {}).values():
+                templates.extend(_pick_fields(q) for q in _flatten(effects))
+
+    if os.path.isdir(batch_dir):
+        for filename in sorted(os.listdir(batch_dir)):
+            if len(templates) >= limit:
+                break
+            if not filename.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(batch_dir, filename), 'r', encoding='utf-8') as f:
+                    task = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for item in task.get('homework_items', []):
+                try:
+                    result = json.loads(item.get('homework_result') or '[]')
+                except (TypeError, ValueError):
+                    continue
+                templates.extend(_pick_fields(q) for q in _flatten(result))
+                if len(templates) >= limit:
+                    break
+
+    templates = [t for t in templates if t.get('answer') or t.get('userAnswer')]
+    return templates[:limit] or [dict(q) for q in FALLBACK_QUESTIONS]
+
+
+class SyntheticEvalData:
+    """
+    合成评估数据生成器
+
+    Attributes:
+        error_rates: 各类错误注入概率
+            recognition: 识别答案被替换
+            judgment: 判断结果翻转
+            missing: AI 结果缺题
+            hallucination: AI 结果多出题目
+    """
+
+    DEFAULT_ERROR_RATES = {'recognition': 0.08, 'judgment': 0.05, 'missing': 0.02, 'hallucination': 0.01}
+
+    def __init__(self, seed: int = 42, templates: List[Dict[str, Any]] = None,
+                 error_rates: Dict[str, float] = None):
+        self.rng = random.Random(seed)
+        self.templates = templates or load_question_templates()
+        self.error_rates = dict(self.DEFAULT_ERROR_RATES, **(error_rates or {}))
+
+    def make_page(self, n_questions: int) -> List[Dict[str, Any]]:
+        """生成一页基准效果"""
+        page = []
+        for i in range(n_questions):
+            question = dict(self.rng.choice(self.templates))
+            question['index'] = str(i + 1)
+            question['tempIndex'] = i
+            page.append(question)
+        return page
+
+    def make_homework_result(self, base_effect: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """根据基准效果生成 AI 批改结果，并按比例注入错误"""
+        rates = self.error_rates
+        result = []
+        for base in base_effect:
+            if self.rng.random() < rates['missing']:
+                continue
+            item = dict(base, children=[])
+            if self.rng.random() < rates['recognition']:
+                item['userAnswer'] = self.rng.choice(NOISE_ANSWERS)
+            if self.rng.random() < rates['judgment']:
+                item['correct'] = 'no' if item.get('correct') == 'yes' else 'yes'
+            if item.get('maxScore') is not None and self.rng.random() < rates['judgment']:
+                item['score'] = max(0, (item.get('score') or 0) - 1)
+            result.append(item)
+        if self.rng.random() < rates['hallucination']:
+            extra = dict(self.rng.choice(self.templates), children=[])
+            extra['index'] = str(len(base_effect) + 1)
+            extra['tempIndex'] = len(base_effect)
+            result.append(extra)
+        return result
+
+    def make_pairs(self, n_pages: int, questions_per_page: int = 12) -> List[Dict[str, Any]]:
+        """生成 n_pages 组 (base_effect, homework_result)"""
+        pairs = []
+        for _ in range(n_pages):
+            base_effect = self.make_page(questions_per_page)
+            pairs.append({'base_effect': base_effect, 'homework_result': self.make_homework_result(base_effect)})
+        return pairs
+
+    def sample_answers(self, n: int) -> List[str]:
+        """采样 n 个答案文本（用于归一化/相似度类函数）"""
+        texts = [t.get('answer', '') for t in self.templates] + [t.get('userAnswer', '') for t in self.templates]
+        texts = [t for t in texts if t] or ['']
+        return [self.rng.choice(texts) for _ in range(n)]
+
+    def sample_pairs_text(self, n: int) -> List[tuple]:
+        """采样 n 组 (基准答案, AI 识别答案) 文本对"""
+        return [(t.get('userAnswer', ''), self.rng.choice(NOISE_ANSWERS + [t.get('userAnswer', '')]))
+                for t in (self.rng.choice(self.templates) for _ in range(n))]
+
+
+def pick_subject_id(rng: random.Random, weights: Optional[Dict[int, float]] = None) -> int:
+    """按权重随机选择学科"""
+    weights = weights or {0: 0.15, 1: 0.15, 2: 0.3, 3: 0.2, 4: 0.2}
+    subjects = list(weights.keys())
+    return rng.choices(subjects, weights=[weights[s] for s in subjects])[0]
@@ -14,6 +14,7 @@ from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, Border, Side
 import uuid
 
+from services.config_service import ConfigService
 from .models import (
     ParsedQuestion, SimilarQuestion, KnowledgePoint,
     DedupeResult, AgentTask, TaskConfig, DifficultyLevel, QuestionType
@@ -111,7 +112,7 @@ class ModelService:
             模型响应文本
         """
         api_key = self.config.get('api_key', '')
-        api_url = self.config.get('api_url', 'https://ark.cn-beijing.volces.com/api/v3/chat/completions')
+        api_url = ConfigService.get_llm_api_url('doubao', self.config)
         
         headers = {
             "Content-Type": "application/json",
@@ -177,7 +178,7 @@ class ModelService:
     def _call_deepseek(self, prompt: str, timeout: int = 120, max_retries: int = 2) -> str:
         """调用DeepSeek模型"""
         api_key = self.config.get('deepseek_api_key', '')
-        api_url = "https://api.deepseek.com/v1/chat/completions"
+        api_url = ConfigService.get_llm_api_url('deepseek', self.config)
         
         headers = {
             "Content-Type": "application/json",
@@ -215,7 +216,7 @@ class ModelService:
                           timeout: int = 120, max_retries: int = 2) -> str:
         """调用豆包文本模型"""
         api_key = self.config.get('api_key', '')
-        api_url = self.config.get('api_url', 'https://ark.cn-beijing.volces.com/api/v3/chat/completions')
+        api_url = ConfigService.get_llm_api_url('doubao', self.config)
         
         headers = {
             "Content-Type": "application/json",
@@ -265,7 +266,7 @@ class ModelService:
             流式输出的文本片段
         """
         api_key = self.config.get('api_key', '')
-        api_url = self.config.get('api_url', 'https://ark.cn-beijing.volces.com/api/v3/chat/completions')
+        api_url = ConfigService.get_llm_api_url('doubao', self.config)
         
         headers = {
             "Content-Type": "application/json",
@@ -339,7 +340,7 @@ class ModelService:
     def _call_deepseek_stream(self, prompt: str, timeout: int = 180):
         """流式调用DeepSeek模型，最后返回token使用量"""
         api_key = self.config.get('deepseek_api_key', '')
-        api_url = "https://api.deepseek.com/v1/chat/completions"
+        api_url = ConfigService.get_llm_api_url('deepseek', self.config)
         
         headers = {
             "Content-Type": "application/json",
@@ -387,7 +388,7 @@ class ModelService:
     def _call_doubao_text_stream(self, model_name: str, prompt: str, timeout: int = 180):
         """流式调用豆包文本模型，最后返回token使用量"""
         api_key = self.config.get('api_key', '')
-        api_url = self.config.get('api_url', 'https://ark.cn-beijing.volces.com/api/v3/chat/completions')
+        api_url = ConfigService.get_llm_api_url('doubao', self.config)
         
         headers = {
             "Content-Type": "application/json",
@@ -0,0 +1,23 @@
+-- =====================================================
+-- 异常统计汇总表
+-- 由 AnomalyService 写入 / 确认异常时增量维护，get_statistics 只读该表
+-- 重建: AnomalyService.rebuild_summary()
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS `anomaly_log_summary` (
+    `log_date` DATE NOT NULL COMMENT '异常日期',
+    `anomaly_type` VARCHAR(50) NOT NULL COMMENT '异常类型',
+    `severity` VARCHAR(20) NOT NULL DEFAULT '' COMMENT '严重程度',
+    `total` INT NOT NULL DEFAULT 0 COMMENT '异常数',
+    `unacknowledged` INT NOT NULL DEFAULT 0 COMMENT '未确认数',
+    `updated_at` DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (`log_date`, `anomaly_type`, `severity`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='异常统计汇总';
+
+-- 从已有异常日志初始化
+INSERT INTO anomaly_log_summary (log_date, anomaly_type, severity, total, unacknowledged)
+SELECT DATE(created_at), anomaly_type, COALESCE(severity, ''), COUNT(*),
+       SUM(CASE WHEN is_acknowledged = 0 THEN 1 ELSE 0 END)
+FROM anomaly_logs
+GROUP BY 1, 2, 3
+ON DUPLICATE KEY UPDATE total = VALUES(total), unacknowledged = VALUES(unacknowledged);
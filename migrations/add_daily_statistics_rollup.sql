@@ -0,0 +1,38 @@
+-- =====================================================
+-- 每日统计增量维护
+-- 由 DailyStatisticsService 在批量任务保存 / 删除时增量更新
+-- 历史数据回填: python -m services.daily_statistics_service --days 90
+-- =====================================================
+
+-- 各任务对每日统计的贡献（用于计算增量和对账）
+CREATE TABLE IF NOT EXISTS `daily_statistics_tasks` (
+    `task_id` VARCHAR(64) NOT NULL COMMENT '批量任务ID',
+    `stat_date` DATE NOT NULL COMMENT '统计日期',
+    `subject_key` INT NOT NULL DEFAULT -1 COMMENT '学科ID，-1表示整体',
+    `task_count` INT NOT NULL DEFAULT 0 COMMENT '任务数',
+    `homework_count` INT NOT NULL DEFAULT 0 COMMENT '作业数',
+    `question_count` INT NOT NULL DEFAULT 0 COMMENT '题目数',
+    `correct_count` INT NOT NULL DEFAULT 0 COMMENT '正确数',
+    `error_distribution` JSON COMMENT '错误类型分布',
+    `updated_at` DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (`task_id`, `stat_date`, `subject_key`),
+    INDEX `idx_stat_date` (`stat_date`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='每日统计任务贡献表';
+
+-- 整体行 subject_id 为 NULL，唯一键 (stat_date, subject_id) 对 NULL 不生效，
+-- 快照每次运行都会插入新的整体行；先去重，再改为按 COALESCE(subject_id, -1) 唯一
+DELETE t1 FROM daily_statistics t1
+JOIN daily_statistics t2
+  ON t1.stat_date = t2.stat_date AND t1.subject_id IS NULL AND t2.subject_id IS NULL AND t1.id < t2.id;
+
+-- MySQL 5.7 没有 ADD COLUMN IF NOT EXISTS，先查 information_schema.columns，列不存在时才修改，迁移可重复执行
+SET @ddl = (SELECT IF(COUNT(*) = 0,
+    'ALTER TABLE `daily_statistics`
+        ADD COLUMN `subject_key` INT AS (COALESCE(`subject_id`, -1)) STORED COMMENT ''学科键，-1表示整体'',
+        DROP INDEX `uk_date_subject`,
+        ADD UNIQUE KEY `uk_date_subject` (`stat_date`, `subject_key`)', 'SELECT 1')
+    FROM information_schema.columns
+    WHERE table_schema = DATABASE() AND table_name = 'daily_statistics' AND column_name = 'subject_key');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
@@ -0,0 +1,53 @@
+-- =====================================================
+-- 错误样本查询优化
+-- 1. 复合索引：对应样本库实际使用的筛选组合，列表按 id 倒序做 keyset 分页
+--    （InnoDB 二级索引末尾隐含主键 id，等值筛选后可直接按 id 顺序回表）
+-- 2. 计数表：按 状态 x 学科 x 错误类型 预聚合样本数，
+--    由 ErrorSampleService 在收集样本 / 更新状态时增量维护，统计和列表总数只读该表
+--    重建: ErrorSampleService.rebuild_counts()
+-- =====================================================
+
+-- MySQL 5.7 不支持 CREATE INDEX IF NOT EXISTS，先查 information_schema.statistics，索引不存在时才添加
+
+-- 错误类型 + 状态（样本库最常用的组合筛选）
+SET @ddl = (SELECT IF(COUNT(*) = 0,
+    'ALTER TABLE error_samples ADD INDEX idx_type_status (error_type, status)', 'SELECT 1')
+    FROM information_schema.statistics
+    WHERE table_schema = DATABASE() AND table_name = 'error_samples' AND index_name = 'idx_type_status');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- 学科 + 状态
+SET @ddl = (SELECT IF(COUNT(*) = 0,
+    'ALTER TABLE error_samples ADD INDEX idx_subject_status (subject_id, status)', 'SELECT 1')
+    FROM information_schema.statistics
+    WHERE table_schema = DATABASE() AND table_name = 'error_samples' AND index_name = 'idx_subject_status');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- 任务内去重（收集样本时按任务读取已有的 作业 + 题号）
+SET @ddl = (SELECT IF(COUNT(*) = 0,
+    'ALTER TABLE error_samples ADD INDEX idx_task_homework_question (task_id, homework_id, question_index)', 'SELECT 1')
+    FROM information_schema.statistics
+    WHERE table_schema = DATABASE() AND table_name = 'error_samples' AND index_name = 'idx_task_homework_question');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+CREATE TABLE IF NOT EXISTS `error_sample_counts` (
+    `status` VARCHAR(20) NOT NULL COMMENT '样本状态',
+    `subject_id` INT NOT NULL DEFAULT -1 COMMENT '学科ID（-1 表示未识别学科）',
+    `error_type` VARCHAR(50) NOT NULL COMMENT '错误类型',
+    `sample_count` INT NOT NULL DEFAULT 0 COMMENT '样本数',
+    `updated_at` DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (`status`, `subject_id`, `error_type`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='错误样本计数';
+
+-- 从已有样本初始化
+INSERT INTO error_sample_counts (status, subject_id, error_type, sample_count)
+SELECT COALESCE(status, 'pending'), COALESCE(subject_id, -1), error_type, COUNT(*)
+FROM error_samples
+GROUP BY 1, 2, 3
+ON DUPLICATE KEY UPDATE sample_count = VALUES(sample_count);
@@ -0,0 +1,35 @@
+-- =====================================================
+-- LLM token 用量汇总表
+-- 由 TelemetryWriter 刷新 llm_call_logs 时增量维护
+-- 历史数据回填: python -m services.llm_usage_service --days 90
+-- =====================================================
+
+-- 按小时汇总
+CREATE TABLE IF NOT EXISTS `llm_usage_hourly` (
+    `bucket_hour` DATETIME NOT NULL COMMENT '小时桶（整点）',
+    `model` VARCHAR(50) NOT NULL DEFAULT '' COMMENT '模型',
+    `analysis_type` VARCHAR(50) NOT NULL DEFAULT '' COMMENT '分析类型',
+    `status` VARCHAR(20) NOT NULL DEFAULT '' COMMENT '调用状态',
+    `calls` INT NOT NULL DEFAULT 0 COMMENT '调用次数',
+    `prompt_tokens` BIGINT NOT NULL DEFAULT 0 COMMENT 'Prompt token 数',
+    `completion_tokens` BIGINT NOT NULL DEFAULT 0 COMMENT '生成 token 数',
+    `total_tokens` BIGINT NOT NULL DEFAULT 0 COMMENT '总 token 数',
+    `duration_ms` BIGINT NOT NULL DEFAULT 0 COMMENT '累计耗时（毫秒）',
+    `updated_at` DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (`bucket_hour`, `model`, `analysis_type`, `status`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='LLM 用量小时汇总';
+
+-- 按天汇总
+CREATE TABLE IF NOT EXISTS `llm_usage_daily` (
+    `bucket_date` DATE NOT NULL COMMENT '日期桶',
+    `model` VARCHAR(50) NOT NULL DEFAULT '' COMMENT '模型',
+    `analysis_type` VARCHAR(50) NOT NULL DEFAULT '' COMMENT '分析类型',
+    `status` VARCHAR(20) NOT NULL DEFAULT '' COMMENT '调用状态',
+    `calls` INT NOT NULL DEFAULT 0 COMMENT '调用次数',
+    `prompt_tokens` BIGINT NOT NULL DEFAULT 0 COMMENT 'Prompt token 数',
+    `completion_tokens` BIGINT NOT NULL DEFAULT 0 COMMENT '生成 token 数',
+    `total_tokens` BIGINT NOT NULL DEFAULT 0 COMMENT '总 token 数',
+    `duration_ms` BIGINT NOT NULL DEFAULT 0 COMMENT '累计耗时（毫秒）',
+    `updated_at` DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (`bucket_date`, `model`, `analysis_type`, `status`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='LLM 用量日汇总';
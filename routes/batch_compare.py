@@ -73,3 +73,19 @@ def get_model_comparison():
         return jsonify({'success': True, **result})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@batch_compare_bp.route('/api/batch-compare/tasks', methods=['GET'])
+def compare_tasks():
+    """多任务对比（task_ids 逗号分隔，reference 为参照任务）"""
+    try:
+        task_ids = [t.strip() for t in request.args.get('task_ids', '').split(',') if t.strip()]
+        reference = request.args.get('reference')
+
+        result = BatchCompareService.compare_tasks(task_ids, reference)
+        if 'error' in result:
+            return jsonify({'success': False, 'error': result['error']}), 400
+
+        return jsonify({'success': True, **result})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
@@ -5,6 +5,7 @@
 import os
 import io
 import uuid
+import threading
 import json
 from datetime import datetime
 from flask import Blueprint, request, jsonify, Response, send_file
@@ -14,12 +15,17 @@ from openpyxl.styles import Font, PatternFill, Border, Side
 from services.config_service import ConfigService
 from services.database_service import DatabaseService, AppDatabaseService
 from services.storage_service import StorageService
+from services.dashboard_service import DashboardService
 from services.llm_service import LLMService
 from services.semantic_eval_service import SemanticEvalService
 from services.physics_eval import normalize_physics_markdown
 from services.chemistry_eval import normalize_chemistry_markdown
 from services.ai_analysis_service import AIAnalysisService
 from services.prompt_config_service import PromptConfigService
+from services.homework_detail_service import HomeworkDetailService
+from services.homework_query_service import HomeworkQueryService
+from utils.http_cache import conditional_get
+from utils.projection import parse_fields, project, wants, paginate, decode_cursor
 from utils.text_utils import normalize_answer, normalize_answer_science, has_format_diff, calculate_similarity, is_fuzzy_match
 
 batch_evaluation_bp = Blueprint('batch_evaluation', __name__)
@@ -1131,40 +1137,56 @@ def create_test_condition():
 
 # ========== 图书和页码 API ==========
 
+def get_book_list(subject_id=None):
+    """
+    获取 zpsmart 图书列表（按学科分组，带缓存）
+    
+    Returns:
+        dict: subject_id 字符串 -> [{book_id, book_name, subject_id, page_count}]
+    """
+    return DashboardService.get_or_compute(
+        f'zpsmart_books_{subject_id}', lambda: _query_book_list(subject_id)
+    )
+
+
+def _query_book_list(subject_id=None):
+    """查询 zpsmart 图书列表"""
+    sql = """
+        SELECT DISTINCT b.id as book_id, b.book_name as book_name, b.subject_id,
+               COUNT(DISTINCT c.page_num) as page_count
+        FROM zp_make_book b
+        LEFT JOIN zp_book_chapter c ON b.id = c.book_id
+        WHERE 1=1
+    """
+    params = []
+    if subject_id is not None:
+        sql += " AND b.subject_id = %s"
+        params.append(subject_id)
+    sql += " GROUP BY b.id, b.book_name, b.subject_id ORDER BY b.subject_id, b.book_name"
+    
+    rows = DatabaseService.execute_query(sql, tuple(params) if params else None)
+    
+    result = {}
+    for row in rows:
+        sid = str(row['subject_id'])
+        if sid not in result:
+            result[sid] = []
+        result[sid].append({
+            'book_id': str(row['book_id']),
+            'book_name': row['book_name'] or '未知书本',
+            'subject_id': row['subject_id'],
+            'page_count': row['page_count'] or 0
+        })
+    return result
+
+
 @batch_evaluation_bp.route('/books', methods=['GET'])
 def get_books():
     """获取图书列表"""
     subject_id = request.args.get('subject_id', type=int)
     
     try:
-        sql = """
-            SELECT DISTINCT b.id as book_id, b.book_name as book_name, b.subject_id,
-                   COUNT(DISTINCT c.page_num) as page_count
-            FROM zp_make_book b
-            LEFT JOIN zp_book_chapter c ON b.id = c.book_id
-            WHERE 1=1
-        """
-        params = []
-        if subject_id is not None:
-            sql += " AND b.subject_id = %s"
-            params.append(subject_id)
-        sql += " GROUP BY b.id, b.book_name, b.subject_id ORDER BY b.subject_id, b.book_name"
-        
-        rows = DatabaseService.execute_query(sql, tuple(params) if params else None)
-        
-        result = {}
-        for row in rows:
-            sid = str(row['subject_id'])
-            if sid not in result:
-                result[sid] = []
-            result[sid].append({
-                'book_id': str(row['book_id']),
-                'book_name': row['book_name'] or '未知书本',
-                'subject_id': row['subject_id'],
-                'page_count': row['page_count'] or 0
-            })
-        
-        return jsonify({'success': True, 'data': result})
+        return jsonify({'success': True, 'data': get_book_list(subject_id)})
     
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
@@ -1421,6 +1443,7 @@ def get_matching_datasets():
 
 
 @batch_evaluation_bp.route('/datasets', methods=['GET', 'POST'])
+@conditional_get(lambda: StorageService.get_datasets_version(), artifact_tag='datasets')
 def batch_datasets():
     """数据集管理"""
     StorageService.ensure_dir(DATASETS_DIR)
@@ -1530,6 +1553,7 @@ def batch_datasets():
 
 
 @batch_evaluation_bp.route('/datasets/<dataset_id>', methods=['GET', 'DELETE', 'PUT'])
+@conditional_get(StorageService.get_dataset_version, artifact_tag=lambda dataset_id: f'dataset-{dataset_id}')
 def dataset_detail(dataset_id):
     """获取、删除或更新数据集"""
     if request.method == 'DELETE':
@@ -1832,11 +1856,18 @@ def get_homework_tasks():
 
 @batch_evaluation_bp.route('/homework', methods=['GET'])
 def get_batch_homework():
-    """获取可用于批量评估的作业列表"""
+    """
+    获取可用于批量评估的作业列表
+
+    只查询轻量列，题目数量由数据库计算；homework_result 在创建任务时按作业ID加载。
+    支持 limit / cursor 键集分页（按创建时间倒序），响应中的 next_cursor 为下一页游标。
+    """
     subject_id = request.args.get('subject_id', type=int)
     hours = request.args.get('hours', 6, type=int)  # 默认6小时
     hw_publish_id = request.args.get('hw_publish_id')  # 改为字符串，避免大整数精度问题
     hw_publish_ids = request.args.get('hw_publish_ids', '')  # 支持多个ID，逗号分隔
+    limit = request.args.get('limit', HomeworkQueryService.MAX_LIMIT, type=int)
+    cursor = request.args.get('cursor')
     
     try:
         # 解析多个作业任务ID（保持字符串形式，避免大整数精度问题）
@@ -1850,66 +1881,20 @@ def get_batch_homework():
         elif hw_publish_id:
             publish_id_list = [str(hw_publish_id)]
         
-        # 根据是否有hw_publish_id决定查询条件
-        if publish_id_list:
-            placeholders = ','.join(['%s'] * len(publish_id_list))
-            sql = f"""
-                SELECT h.id, h.student_id, h.hw_publish_id, h.subject_id, h.page_num, 
-                       h.pic_path, h.homework_result, h.create_time,
-                       p.content AS homework_name,
-                       s.name AS student_name,
-                       b.id AS book_id,
-                       b.book_name AS book_name
-                FROM zp_homework h
-                LEFT JOIN zp_homework_publish p ON h.hw_publish_id = p.id
-                LEFT JOIN zp_student s ON h.student_id = s.id
-                LEFT JOIN zp_make_book b ON p.book_id = b.id
-                WHERE h.status = 3 
-                  AND h.hw_publish_id IN ({placeholders})
-            """
-            params = list(publish_id_list)
-            
-            if subject_id is not None:
-                sql += " AND h.subject_id = %s"
-                params.append(subject_id)
-            
-            sql += " ORDER BY h.create_time DESC LIMIT 500"
-            print(f"[get_batch_homework] 查询参数: {params}")
-        else:
-            sql = """
-                SELECT h.id, h.student_id, h.hw_publish_id, h.subject_id, h.page_num, 
-                       h.pic_path, h.homework_result, h.create_time,
-                       p.content AS homework_name,
-                       s.name AS student_name,
-                       b.id AS book_id,
-                       b.book_name AS book_name
-                FROM zp_homework h
-                LEFT JOIN zp_homework_publish p ON h.hw_publish_id = p.id
-                LEFT JOIN zp_student s ON h.student_id = s.id
-                LEFT JOIN zp_make_book b ON p.book_id = b.id
-                WHERE h.status = 3 
-                  AND h.create_time >= DATE_SUB(NOW(), INTERVAL %s HOUR)
-            """
-            params = [hours]
-            
-            if subject_id is not None:
-                sql += " AND h.subject_id = %s"
-                params.append(subject_id)
-            
-            sql += " ORDER BY h.create_time DESC LIMIT 500"
-        
-        rows = DatabaseService.execute_query(sql, tuple(params))
+        # 指定作业任务时不限制时间范围
+        try:
+            rows, next_cursor = HomeworkQueryService.list_homework(
+                hours=None if publish_id_list else hours,
+                subject_id=subject_id,
+                publish_ids=publish_id_list,
+                limit=limit,
+                cursor=cursor
+            )
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
         
         data = []
         for row in rows:
-            homework_result = row.get('homework_result', '[]')
-            question_count = 0
-            try:
-                result_json = json.loads(homework_result) if homework_result else []
-                question_count = len(result_json) if isinstance(result_json, list) else 0
-            except:
-                pass
-            
             data.append({
                 'id': row['id'],
                 'student_id': row.get('student_id', ''),
@@ -1921,10 +1906,10 @@ def get_batch_homework():
                 'book_id': str(row.get('book_id', '')) if row.get('book_id') else '',
                 'book_name': row.get('book_name', ''),
                 'create_time': row['create_time'].isoformat() if row.get('create_time') else None,
-                'question_count': question_count
+                'question_count': row['question_count']
             })
         
-        return jsonify({'success': True, 'data': data})
+        return jsonify({'success': True, 'data': data, 'next_cursor': next_cursor})
     
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
@@ -2164,13 +2149,60 @@ def batch_tasks():
             return jsonify({'success': False, 'error': str(e)})
 
 
+def _has_errors(item):
+    """作业是否有错题"""
+    evaluation = item.get('evaluation') or {}
+    return bool(evaluation.get('error_count') or evaluation.get('errors'))
+
+
+def filter_homework_items(homework_items, args):
+    """
+    按查询参数过滤作业列表（only_errors / page_num / status）
+
+    Args:
+        homework_items: 任务中的作业列表
+        args: 请求查询参数
+    """
+    items = homework_items
+    if args.get('only_errors') == '1':
+        items = [item for item in items if _has_errors(item)]
+    page_nums = args.get('page_num')
+    if page_nums:
+        wanted = {p.strip() for p in page_nums.split(',') if p.strip()}
+        items = [item for item in items if str(item.get('page_num')) in wanted]
+    status = args.get('status')
+    if status:
+        items = [item for item in items if item.get('status') == status]
+    return items
+
+
 @batch_evaluation_bp.route('/tasks/<task_id>', methods=['GET', 'DELETE'])
+@conditional_get(StorageService.get_batch_task_version, artifact_tag=lambda task_id: f'task-{task_id}')
 def batch_task_detail(task_id):
-    """获取或删除任务"""
+    """
+    获取或删除任务
+
+    GET 查询参数:
+        slim: 1 时只返回列表展示所需字段
+        fields: 字段投影，逗号分隔，支持嵌套路径（如 name,homework_items.accuracy,homework_items.evaluation.errors）
+        only_errors: 1 时只返回有错题的作业
+        page_num: 只返回指定页码的作业（逗号分隔多个）
+        status: 只返回指定状态的作业
+        limit / cursor: homework_items 游标分页，响应的 paging.next_cursor 为下一页游标
+    """
     if request.method == 'GET':
         try:
             # 支持 slim 模式，只返回精简数据（用于列表展示）
             slim_mode = request.args.get('slim', '0') == '1'
+            try:
+                fields = parse_fields(request.args.get('fields'))
+                limit = request.args.get('limit', type=int)
+                cursor = request.args.get('cursor')
+                decode_cursor(cursor)
+            except ValueError as e:
+                return jsonify({'success': False, 'error': str(e)}), 400
+            if limit is not None and limit <= 0:
+                return jsonify({'success': False, 'error': 'limit 必须为正整数'}), 400
             
             data = StorageService.load_batch_task(task_id)
             if not data:
@@ -2179,10 +2211,16 @@ def batch_task_detail(task_id):
             homework_items = data.get('homework_items', [])
             subject_id = data.get('subject_id')
             
+            # 先过滤、分页，再生成精简数据和投影，避免处理客户端不需要的作业
+            items = filter_homework_items(homework_items, request.args)
+            paging = None
+            if limit or cursor:
+                items, paging = paginate(items, cursor, limit)
+            
             if slim_mode:
                 # 精简模式：不返回 homework_result 和 data_value 大字段
                 slim_items = []
-                for item in homework_items:
+                for item in items:
                     slim_item = {
                         'homework_id': item.get('homework_id'),
                         'student_id': item.get('student_id'),
@@ -2207,11 +2245,15 @@ def batch_task_detail(task_id):
                 # 精简模式下跳过作文解析（耗时操作）
                 data['essay_data'] = {'has_essay': False, 'essays': [], 'stats': None}
             else:
-                # 完整模式：提取作文评分数据
-                essay_data = extract_essay_scores(homework_items, subject_id)
-                data['essay_data'] = essay_data
+                data['homework_items'] = items
+                # 完整模式：提取作文评分数据（按全部作业统计；投影不需要时跳过）
+                if wants(fields, 'essay_data'):
+                    data['essay_data'] = extract_essay_scores(homework_items, subject_id)
             
-            return jsonify({'success': True, 'data': data})
+            response_data = {'success': True, 'data': project(data, fields)}
+            if paging is not None:
+                response_data['paging'] = paging
+            return jsonify(response_data)
         except Exception as e:
             return jsonify({'success': False, 'error': str(e)})
     
@@ -2223,9 +2265,196 @@ def batch_task_detail(task_id):
             return jsonify({'success': False, 'error': str(e)})
 
 
+def resolve_base_effect(homework_item, load_dataset=None):
+    """
+    查找作业的基准效果
+
+    依次尝试：匹配的数据集 -> 按 book_id 和页码遍历数据集 -> 只按页码遍历数据集 -> baseline_effects 文件
+
+    Args:
+        homework_item: 作业数据
+        load_dataset: 数据集加载函数（批量预计算时传入带缓存的加载函数）
+
+    Returns:
+        tuple: (base_effect, source)，source 为 HomeworkDetailService.source_version 使用的基准来源
+    """
+    load_dataset = load_dataset or StorageService.load_dataset
+    page_num = homework_item.get('page_num')
+    page_key = str(page_num)
+    
+    if homework_item.get('matched_dataset'):
+        ds_data = load_dataset(homework_item['matched_dataset'])
+        if ds_data:
+            base_effect = ds_data.get('base_effects', {}).get(page_key, [])
+            if base_effect:
+                return base_effect, {'type': 'dataset', 'id': homework_item['matched_dataset']}
+    
+    # 如果没有匹配数据集，尝试按book_id和page_num从所有数据集中查找
+    book_id = homework_item.get('book_id', '')
+    if book_id and page_num:
+        for filename in StorageService.list_datasets():
+            ds_data = load_dataset(filename.replace('.json', ''))
+            if ds_data and str(ds_data.get('book_id', '')) == str(book_id):
+                if page_key in ds_data.get('base_effects', {}):
+                    base_effect = ds_data['base_effects'][page_key]
+                    if base_effect:
+                        return base_effect, {'type': 'datasets'}
+                    break
+    
+    # 如果还没有，尝试只按page_num从所有数据集中查找
+    if page_num:
+        for filename in StorageService.list_datasets():
+            ds_data = load_dataset(filename.replace('.json', ''))
+            if ds_data and page_key in ds_data.get('base_effects', {}):
+                base_effect = ds_data['base_effects'][page_key]
+                if base_effect:
+                    return base_effect, {'type': 'datasets'}
+                break
+    
+    # 最后尝试从 baseline_effects 获取
+    import re
+    book_name = homework_item.get('book_name', '') or homework_item.get('homework_name', '')
+    if book_name and page_num:
+        safe_name = re.sub(r'[<>:"/\\|?*]', '_', book_name)
+        baseline_filename = f"{safe_name}_{page_num}.json"
+        baseline_data = StorageService.load_baseline_effect(baseline_filename)
+        if baseline_data and baseline_data.get('base_effect'):
+            return baseline_data['base_effect'], {'type': 'baseline', 'file': baseline_filename}
+    
+    # 未找到基准时，任何数据集变化都可能使其可用
+    return [], {'type': 'datasets'}
+
+
+def homework_item_fields(homework_item, homework_id):
+    """作业详情中直接取自作业数据的字段（不缓存，每次从任务数据读取）"""
+    return {
+        'homework_id': homework_id,
+        'book_id': homework_item.get('book_id', ''),
+        'book_name': homework_item.get('book_name', ''),
+        'page_num': homework_item.get('page_num'),
+        'student_id': homework_item.get('student_id', ''),
+        'student_name': homework_item.get('student_name', ''),
+        'status': homework_item.get('status', ''),
+        'matched_dataset': homework_item.get('matched_dataset', ''),
+        'matched_dataset_name': homework_item.get('matched_dataset_name', '')
+    }
+
+
+def build_homework_detail(task_data, homework_item, homework_id, subject_id,
+                          need_base_effect=True, need_evaluation=True, load_dataset=None):
+    """
+    计算作业评估详情（查找基准效果并重新评估）
+
+    Returns:
+        tuple: (详情数据, 基准来源)；未查找基准效果时基准来源为 None
+    """
+    base_effect, source = [], None
+    if need_base_effect:
+        base_effect, source = resolve_base_effect(homework_item, load_dataset)
+    
+    homework_result = []
+    try:
+        homework_result = json.loads(homework_item.get('homework_result', '[]'))
+    except:
+        pass
+    
+    # 获取 data_value（题目类型信息来源）
+    data_value = []
+    try:
+        data_value = json.loads(homework_item.get('data_value', '[]'))
+    except:
+        pass
+    
+    # 获取模糊匹配阈值和忽略题号前缀设置
+    fuzzy_threshold = task_data.get('fuzzy_threshold', 0.85)
+    ignore_index_prefix = task_data.get('ignore_index_prefix', True)
+    
+    # 实时重新计算评估结果（使用正确的学科ID，传递 data_value 获取题目类型）
+    if need_evaluation and base_effect and homework_result:
+        evaluation = do_evaluation(
+            base_effect, 
+            homework_result, 
+            subject_id=subject_id, 
+            fuzzy_threshold=fuzzy_threshold, 
+            ignore_index_prefix=ignore_index_prefix,
+            data_value=data_value
+        )
+    else:
+        evaluation = {
+            'accuracy': 0,
+            'total_questions': 0,
+            'correct_count': 0,
+            'error_count': 0,
+            'errors': []
+        }
+    
+    detail = homework_item_fields(homework_item, homework_id)
+    detail.update({
+        'accuracy': evaluation.get('accuracy', 0),
+        'base_effect': base_effect,
+        'ai_result': homework_result,
+        'evaluation': {
+            'accuracy': evaluation.get('accuracy', 0),
+            'total_questions': evaluation.get('total_questions', 0),
+            'correct_count': evaluation.get('correct_count', 0),
+            'error_count': evaluation.get('error_count', 0),
+            'errors': evaluation.get('errors', [])
+        }
+    })
+    return detail, source
+
+
+def precompute_homework_details(task_id, task_data):
+    """
+    批量预计算任务中所有作业的评估详情（批量评估结束后调用）
+
+    同一次预计算中数据集只加载一次。
+    """
+    subject_id = infer_subject_id_from_homework(task_data)
+    loaded = {}
+    
+    def load_dataset(dataset_id):
+        if dataset_id not in loaded:
+            loaded[dataset_id] = StorageService.load_dataset(dataset_id)
+        return loaded[dataset_id]
+    
+    # 基准来源版本在计算之前获取，计算期间数据变化时缓存会在下次查看时失效
+    versions = {}
+    stored = 0
+    for item in task_data.get('homework_items', []):
+        homework_id = item.get('homework_id')
+        if homework_id is None:
+            continue
+        try:
+            fingerprint = HomeworkDetailService.fingerprint(task_data, item, subject_id)
+            HomeworkDetailService.snapshot_versions(item, versions)
+            detail, source = build_homework_detail(task_data, item, str(homework_id), subject_id,
+                                                   load_dataset=load_dataset)
+            source_version = HomeworkDetailService.version_for(versions, source)
+            if HomeworkDetailService.put(task_id, homework_id, fingerprint, source, detail, source_version):
+                stored += 1
+        except Exception as e:
+            print(f"[HomeworkDetail] 预计算失败 {task_id}/{homework_id}: {e}")
+    print(f"[HomeworkDetail] 任务 {task_id} 预计算完成: {stored} 个作业")
+    return stored
+
+
 @batch_evaluation_bp.route('/tasks/<task_id>/homework/<homework_id>', methods=['GET'])
 def get_homework_detail(task_id, homework_id):
-    """获取任务中某个作业的评估详情（实时重新计算）"""
+    """
+    获取任务中某个作业的评估详情
+
+    优先读取 HomeworkDetailService 缓存（作业指纹和基准来源版本一致时），未命中时重新计算并缓存。
+
+    查询参数 fields 为字段投影（同任务详情），如 fields=base_effect,ai_result；
+    未命中缓存且不需要 accuracy / evaluation 时跳过重新评估，不需要 base_effect 时跳过基准效果查找。
+    """
+    try:
+        fields = parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    need_evaluation = wants(fields, 'accuracy') or wants(fields, 'evaluation')
+    need_base_effect = need_evaluation or wants(fields, 'base_effect')
     try:
         task_data = StorageService.load_batch_task(task_id)
         if not task_data:
@@ -2244,118 +2473,22 @@ def get_homework_detail(task_id, homework_id):
         if not homework_item:
             return jsonify({'success': False, 'error': '作业不存在'})
         
-        # 获取基准效果
-        base_effect = []
-        if homework_item.get('matched_dataset'):
-            ds_data = StorageService.load_dataset(homework_item['matched_dataset'])
-            if ds_data:
-                page_key = str(homework_item.get('page_num'))
-                base_effect = ds_data.get('base_effects', {}).get(page_key, [])
-        
-        # 如果没有匹配数据集，尝试按book_id和page_num从所有数据集中查找
-        if not base_effect:
-            book_id = homework_item.get('book_id', '')
-            page_num = homework_item.get('page_num')
-            if book_id and page_num:
-                for filename in StorageService.list_datasets():
-                    dataset_id = filename.replace('.json', '')
-                    ds_data = StorageService.load_dataset(dataset_id)
-                    if ds_data and str(ds_data.get('book_id', '')) == str(book_id):
-                        page_key = str(page_num)
-                        if page_key in ds_data.get('base_effects', {}):
-                            base_effect = ds_data['base_effects'][page_key]
-                            break
-        
-        # 如果还没有，尝试只按page_num从所有数据集中查找
-        if not base_effect:
-            page_num = homework_item.get('page_num')
-            if page_num:
-                for filename in StorageService.list_datasets():
-                    dataset_id = filename.replace('.json', '')
-                    ds_data = StorageService.load_dataset(dataset_id)
-                    if ds_data:
-                        page_key = str(page_num)
-                        if page_key in ds_data.get('base_effects', {}):
-                            base_effect = ds_data['base_effects'][page_key]
-                            break
-        
-        # 最后尝试从 baseline_effects 获取
-        if not base_effect:
-            import re
-            book_name = homework_item.get('book_name', '') or homework_item.get('homework_name', '')
-            page_num = homework_item.get('page_num')
-            if book_name and page_num:
-                safe_name = re.sub(r'[<>:"/\\|?*]', '_', book_name)
-                baseline_filename = f"{safe_name}_{page_num}.json"
-                baseline_data = StorageService.load_baseline_effect(baseline_filename)
-                if baseline_data:
-                    base_effect = baseline_data.get('base_effect', [])
-        
-        homework_result = []
-        try:
-            homework_result = json.loads(homework_item.get('homework_result', '[]'))
-        except:
-            pass
-        
-        # 获取 data_value（题目类型信息来源）
-        data_value = []
-        try:
-            data_value = json.loads(homework_item.get('data_value', '[]'))
-        except:
-            pass
-        
-        # 获取模糊匹配阈值和忽略题号前缀设置
-        fuzzy_threshold = task_data.get('fuzzy_threshold', 0.85)
-        ignore_index_prefix = task_data.get('ignore_index_prefix', True)
-        
-        # 实时重新计算评估结果（使用正确的学科ID，传递 data_value 获取题目类型）
-        if base_effect and homework_result:
-            print(f"[DEBUG] get_homework_detail: 调用 do_evaluation, base_effect={len(base_effect)}, homework_result={len(homework_result)}")
-            evaluation = do_evaluation(
-                base_effect, 
-                homework_result, 
-                subject_id=task_subject_id, 
-                fuzzy_threshold=fuzzy_threshold, 
-                ignore_index_prefix=ignore_index_prefix,
-                data_value=data_value
-            )
-            print(f"[DEBUG] get_homework_detail: 评估完成, errors={len(evaluation.get('errors', []))}")
-            if evaluation.get('errors'):
-                for err in evaluation['errors'][:2]:
-                    print(f"[DEBUG]   题{err.get('index')}: similarity={err.get('similarity')}")
+        fingerprint = HomeworkDetailService.fingerprint(task_data, homework_item, task_subject_id)
+        detail = HomeworkDetailService.get(task_id, homework_id, fingerprint)
+        if detail is not None:
+            detail.update(homework_item_fields(homework_item, homework_id))
         else:
-            evaluation = {
-                'accuracy': 0,
-                'total_questions': 0,
-                'correct_count': 0,
-                'error_count': 0,
-                'errors': []
-            }
+            if need_evaluation:
+                # 完整计算：先取基准来源版本，计算后缓存
+                versions = HomeworkDetailService.snapshot_versions(homework_item)
+                detail, source = build_homework_detail(task_data, homework_item, homework_id, task_subject_id)
+                source_version = HomeworkDetailService.version_for(versions, source)
+                HomeworkDetailService.put(task_id, homework_id, fingerprint, source, detail, source_version)
+            else:
+                detail, _ = build_homework_detail(task_data, homework_item, homework_id, task_subject_id,
+                                                  need_base_effect=need_base_effect, need_evaluation=False)
         
-        return jsonify({
-            'success': True,
-            'data': {
-                'homework_id': homework_id,
-                'book_id': homework_item.get('book_id', ''),
-                'book_name': homework_item.get('book_name', ''),
-                'page_num': homework_item.get('page_num'),
-                'student_id': homework_item.get('student_id', ''),
-                'student_name': homework_item.get('student_name', ''),
-                'status': homework_item.get('status', ''),
-                'accuracy': evaluation.get('accuracy', 0),
-                'matched_dataset': homework_item.get('matched_dataset', ''),
-                'matched_dataset_name': homework_item.get('matched_dataset_name', ''),
-                'base_effect': base_effect,
-                'ai_result': homework_result,
-                'evaluation': {
-                    'accuracy': evaluation.get('accuracy', 0),
-                    'total_questions': evaluation.get('total_questions', 0),
-                    'correct_count': evaluation.get('correct_count', 0),
-                    'error_count': evaluation.get('error_count', 0),
-                    'errors': evaluation.get('errors', [])
-                }
-            }
-        })
+        return jsonify({'success': True, 'data': project(detail, fields)})
     
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
@@ -2552,124 +2685,20 @@ def batch_evaluate(task_id):
                 item['evaluation'] = {'accuracy': 0, 'total_questions': 0, 'correct_count': 0, 'error_count': 0, 'errors': [], 'by_question_type': {}, 'by_bvalue': {}, 'by_combined': {}, 'score_accuracy_stats': {}}
                 yield f"data: {json.dumps({'type': 'error', 'homework_id': homework_id, 'error': str(e)})}\n\n"
         
-        overall_accuracy = total_correct / total_questions if total_questions > 0 else 0
-        
-        # 汇总所有作业的题目类型统计: 选择题、客观填空题、主观题
-        aggregated_type_stats = {
-            'choice': {'total': 0, 'correct': 0, 'accuracy': 0, 'score_total': 0, 'score_accurate': 0, 'score_higher': 0, 'score_lower': 0, 'score_accuracy': 0},
-            'objective_fill': {'total': 0, 'correct': 0, 'accuracy': 0, 'score_total': 0, 'score_accurate': 0, 'score_higher': 0, 'score_lower': 0, 'score_accuracy': 0},
-            'subjective': {'total': 0, 'correct': 0, 'accuracy': 0, 'score_total': 0, 'score_accurate': 0, 'score_higher': 0, 'score_lower': 0, 'score_accuracy': 0}
-        }
-        
-        # 汇总所有作业的分数比对统计（用于判分准确率图表）
-        aggregated_score_accuracy = {
-            'total': 0,       # 有分数数据的题目总数
-            'accurate': 0,    # 分数一致的题目数
-            'higher': 0,      # AI分数偏高的题目数
-            'lower': 0,       # AI分数偏低的题目数
-            'higher_sum': 0,  # 偏高的总分差
-            'lower_sum': 0    # 偏低的总分差
-        }
-        
-        # 汇总bvalue细分统计
-        aggregated_bvalue_stats = {
-            '1': {'total': 0, 'correct': 0, 'accuracy': 0, 'name': '单选'},
-            '2': {'total': 0, 'correct': 0, 'accuracy': 0, 'name': '多选'},
-            '3': {'total': 0, 'correct': 0, 'accuracy': 0, 'name': '判断'},
-            '4': {'total': 0, 'correct': 0, 'accuracy': 0, 'name': '填空'},
-            '5': {'total': 0, 'correct': 0, 'accuracy': 0, 'name': '解答'}
-        }
-        
-        # 汇总组合统计
-        aggregated_combined_stats = {
-            'objective_1': {'total': 0, 'correct': 0, 'accuracy': 0, 'name': '客观单选'},
-            'objective_2': {'total': 0, 'correct': 0, 'accuracy': 0, 'name': '客观多选'},
-            'objective_3': {'total': 0, 'correct': 0, 'accuracy': 0, 'name': '客观判断'},
-            'objective_4': {'total': 0, 'correct': 0, 'accuracy': 0, 'name': '客观填空'},
-            'objective_5': {'total': 0, 'correct': 0, 'accuracy': 0, 'name': '客观解答'},
-            'subjective_1': {'total': 0, 'correct': 0, 'accuracy': 0, 'name': '主观单选'},
-            'subjective_2': {'total': 0, 'correct': 0, 'accuracy': 0, 'name': '主观多选'},
-            'subjective_3': {'total': 0, 'correct': 0, 'accuracy': 0, 'name': '主观判断'},
-            'subjective_4': {'total': 0, 'correct': 0, 'accuracy': 0, 'name': '主观填空'},
-            'subjective_5': {'total': 0, 'correct': 0, 'accuracy': 0, 'name': '主观解答'}
-        }
-        
-        for item in homework_items:
-            evaluation = item.get('evaluation') or {}
-            by_type = evaluation.get('by_question_type') or {}
-            by_bvalue = evaluation.get('by_bvalue') or {}
-            by_combined = evaluation.get('by_combined') or {}
-            score_stats = evaluation.get('score_accuracy_stats') or {}
-            
-            for key in aggregated_type_stats:
-                if key in by_type:
-                    aggregated_type_stats[key]['total'] += by_type[key].get('total', 0)
-                    aggregated_type_stats[key]['correct'] += by_type[key].get('correct', 0)
-                    # 聚合分数字段
-                    aggregated_type_stats[key]['score_total'] += by_type[key].get('score_total', 0)
-                    aggregated_type_stats[key]['score_accurate'] += by_type[key].get('score_accurate', 0)
-                    aggregated_type_stats[key]['score_higher'] += by_type[key].get('score_higher', 0)
-                    aggregated_type_stats[key]['score_lower'] += by_type[key].get('score_lower', 0)
-            
-            for key in aggregated_bvalue_stats:
-                if key in by_bvalue:
-                    aggregated_bvalue_stats[key]['total'] += by_bvalue[key].get('total', 0)
-                    aggregated_bvalue_stats[key]['correct'] += by_bvalue[key].get('correct', 0)
-            
-            for key in aggregated_combined_stats:
-                if key in by_combined:
-                    aggregated_combined_stats[key]['total'] += by_combined[key].get('total', 0)
-                    aggregated_combined_stats[key]['correct'] += by_combined[key].get('correct', 0)
-            
-            # 聚合分数比对统计
-            for key in aggregated_score_accuracy:
-                aggregated_score_accuracy[key] += score_stats.get(key, 0)
-        
-        # 计算汇总准确率
-        for key in aggregated_type_stats:
-            total_count = aggregated_type_stats[key]['total']
-            correct = aggregated_type_stats[key]['correct']
-            aggregated_type_stats[key]['accuracy'] = correct / total_count if total_count > 0 else 0
-            # 计算分数准确率
-            score_total = aggregated_type_stats[key]['score_total']
-            score_accurate = aggregated_type_stats[key]['score_accurate']
-            aggregated_type_stats[key]['score_accuracy'] = score_accurate / score_total if score_total > 0 else 0
-        
-        for key in aggregated_bvalue_stats:
-            total_count = aggregated_bvalue_stats[key]['total']
-            correct = aggregated_bvalue_stats[key]['correct']
-            aggregated_bvalue_stats[key]['accuracy'] = correct / total_count if total_count > 0 else 0
-        
-        for key in aggregated_combined_stats:
-            total_count = aggregated_combined_stats[key]['total']
-            correct = aggregated_combined_stats[key]['correct']
-            aggregated_combined_stats[key]['accuracy'] = correct / total_count if total_count > 0 else 0
+        overall_report = build_overall_report(homework_items, total_correct, total_questions)
+        overall_accuracy = overall_report['overall_accuracy']
+        aggregated_type_stats = overall_report['by_question_type']
+        aggregated_combined_stats = overall_report['by_combined']
         
         task_data['status'] = 'completed'
-        
-        # 计算 has_score：检查任何一个作业的评估结果是否包含分数数据
-        has_score = False
-        for item in homework_items:
-            evaluation = item.get('evaluation') or {}
-            if evaluation.get('has_score'):
-                has_score = True
-                break
-        task_data['has_score'] = has_score
-        
-        task_data['overall_report'] = {
-            'overall_accuracy': overall_accuracy,
-            'total_homework': len(homework_items),
-            'total_questions': total_questions,
-            'correct_questions': total_correct,
-            'by_question_type': aggregated_type_stats,
-            'by_bvalue': aggregated_bvalue_stats,
-            'by_combined': aggregated_combined_stats,
-            'has_score': has_score,
-            'score_accuracy_stats': aggregated_score_accuracy
-        }
+        task_data['has_score'] = overall_report['has_score']
+        task_data['overall_report'] = overall_report
         
         StorageService.save_batch_task(task_id, task_data)
         
+        # 后台预计算作业详情，查看详情时直接读取
+        threading.Thread(target=precompute_homework_details, args=(task_id, task_data), daemon=True).start()
+        
         # 自动触发 AI 分析
         try:
             analysis_service = get_analysis_service()
@@ -2682,6 +2711,134 @@ def batch_evaluate(task_id):
     return Response(generate(), mimetype='text/event-stream')
 
 
+def build_overall_report(homework_items, total_correct, total_questions):
+    """
+    汇总批量任务整体报告
+    
+    按题目类型、bvalue、组合类型及分数比对统计聚合所有作业的评估结果
+    
+    Args:
+        homework_items: 作业项列表（已写入 evaluation）
+        total_correct: 正确题目总数
+        total_questions: 题目总数
+    
+    Returns:
+        dict: overall_report
+    """
+    overall_accuracy = total_correct / total_questions if total_questions > 0 else 0
+    
+    # 汇总所有作业的题目类型统计: 选择题、客观填空题、主观题
+    aggregated_type_stats = {
+        'choice': {'total': 0, 'correct': 0, 'accuracy': 0, 'score_total': 0, 'score_accurate': 0, 'score_higher': 0, 'score_lower': 0, 'score_accuracy': 0},
+        'objective_fill': {'total': 0, 'correct': 0, 'accuracy': 0, 'score_total': 0, 'score_accurate': 0, 'score_higher': 0, 'score_lower': 0, 'score_accuracy': 0},
+        'subjective': {'total': 0, 'correct': 0, 'accuracy': 0, 'score_total': 0, 'score_accurate': 0, 'score_higher': 0, 'score_lower': 0, 'score_accuracy': 0}
+    }
+    
+    # 汇总所有作业的分数比对统计（用于判分准确率图表）
+    aggregated_score_accuracy = {
+        'total': 0,       # 有分数数据的题目总数
+        'accurate': 0,    # 分数一致的题目数
+        'higher': 0,      # AI分数偏高的题目数
+        'lower': 0,       # AI分数偏低的题目数
+        'higher_sum': 0,  # 偏高的总分差
+        'lower_sum': 0    # 偏低的总分差
+    }
+    
+    # 汇总bvalue细分统计
+    aggregated_bvalue_stats = {
+        '1': {'total': 0, 'correct': 0, 'accuracy': 0, 'name': '单选'},
+        '2': {'total': 0, 'correct': 0, 'accuracy': 0, 'name': '多选'},
+        '3': {'total': 0, 'correct': 0, 'accuracy': 0, 'name': '判断'},
+        '4': {'total': 0, 'correct': 0, 'accuracy': 0, 'name': '填空'},
+        '5': {'total': 0, 'correct': 0, 'accuracy': 0, 'name': '解答'}
+    }
+    
+    # 汇总组合统计
+    aggregated_combined_stats = {
+        'objective_1': {'total': 0, 'correct': 0, 'accuracy': 0, 'name': '客观单选'},
+        'objective_2': {'total': 0, 'correct': 0, 'accuracy': 0, 'name': '客观多选'},
+        'objective_3': {'total': 0, 'correct': 0, 'accuracy': 0, 'name': '客观判断'},
+        'objective_4': {'total': 0, 'correct': 0, 'accuracy': 0, 'name': '客观填空'},
+        'objective_5': {'total': 0, 'correct': 0, 'accuracy': 0, 'name': '客观解答'},
+        'subjective_1': {'total': 0, 'correct': 0, 'accuracy': 0, 'name': '主观单选'},
+        'subjective_2': {'total': 0, 'correct': 0, 'accuracy': 0, 'name': '主观多选'},
+        'subjective_3': {'total': 0, 'correct': 0, 'accuracy': 0, 'name': '主观判断'},
+        'subjective_4': {'total': 0, 'correct': 0, 'accuracy': 0, 'name': '主观填空'},
+        'subjective_5': {'total': 0, 'correct': 0, 'accuracy': 0, 'name': '主观解答'}
+    }
+    
+    for item in homework_items:
+        evaluation = item.get('evaluation') or {}
+        by_type = evaluation.get('by_question_type') or {}
+        by_bvalue = evaluation.get('by_bvalue') or {}
+        by_combined = evaluation.get('by_combined') or {}
+        score_stats = evaluation.get('score_accuracy_stats') or {}
+    
+        for key in aggregated_type_stats:
+            if key in by_type:
+                aggregated_type_stats[key]['total'] += by_type[key].get('total', 0)
+                aggregated_type_stats[key]['correct'] += by_type[key].get('correct', 0)
+                # 聚合分数字段
+                aggregated_type_stats[key]['score_total'] += by_type[key].get('score_total', 0)
+                aggregated_type_stats[key]['score_accurate'] += by_type[key].get('score_accurate', 0)
+                aggregated_type_stats[key]['score_higher'] += by_type[key].get('score_higher', 0)
+                aggregated_type_stats[key]['score_lower'] += by_type[key].get('score_lower', 0)
+    
+        for key in aggregated_bvalue_stats:
+            if key in by_bvalue:
+                aggregated_bvalue_stats[key]['total'] += by_bvalue[key].get('total', 0)
+                aggregated_bvalue_stats[key]['correct'] += by_bvalue[key].get('correct', 0)
+    
+        for key in aggregated_combined_stats:
+            if key in by_combined:
+                aggregated_combined_stats[key]['total'] += by_combined[key].get('total', 0)
+                aggregated_combined_stats[key]['correct'] += by_combined[key].get('correct', 0)
+    
+        # 聚合分数比对统计
+        for key in aggregated_score_accuracy:
+            aggregated_score_accuracy[key] += score_stats.get(key, 0)
+    
+    # 计算汇总准确率
+    for key in aggregated_type_stats:
+        total_count = aggregated_type_stats[key]['total']
+        correct = aggregated_type_stats[key]['correct']
+        aggregated_type_stats[key]['accuracy'] = correct / total_count if total_count > 0 else 0
+        # 计算分数准确率
+        score_total = aggregated_type_stats[key]['score_total']
+        score_accurate = aggregated_type_stats[key]['score_accurate']
+        aggregated_type_stats[key]['score_accuracy'] = score_accurate / score_total if score_total > 0 else 0
+    
+    for key in aggregated_bvalue_stats:
+        total_count = aggregated_bvalue_stats[key]['total']
+        correct = aggregated_bvalue_stats[key]['correct']
+        aggregated_bvalue_stats[key]['accuracy'] = correct / total_count if total_count > 0 else 0
+    
+    for key in aggregated_combined_stats:
+        total_count = aggregated_combined_stats[key]['total']
+        correct = aggregated_combined_stats[key]['correct']
+        aggregated_combined_stats[key]['accuracy'] = correct / total_count if total_count > 0 else 0
+    
+    # 计算 has_score：检查任何一个作业的评估结果是否包含分数数据
+    has_score = False
+    for item in homework_items:
+        evaluation = item.get('evaluation') or {}
+        if evaluation.get('has_score'):
+            has_score = True
+            break
+    
+    return {
+        'overall_accuracy': overall_accuracy,
+        'total_homework': len(homework_items),
+        'total_questions': total_questions,
+        'correct_questions': total_correct,
+        'by_question_type': aggregated_type_stats,
+        'by_bvalue': aggregated_bvalue_stats,
+        'by_combined': aggregated_combined_stats,
+        'has_score': has_score,
+        'score_accuracy_stats': aggregated_score_accuracy
+    }
+
+
 def do_evaluation(base_effect, homework_result, use_ai_compare=False, user_id=None, subject_id=None, fuzzy_threshold=0.85, ignore_index_prefix=True, data_value=None):
     """
     执行评估计算
@@ -3700,6 +3857,7 @@ def export_batch_excel(task_id):
 # ========== AI分析报告 API ==========
 
 @batch_evaluation_bp.route('/tasks/<task_id>/ai-report', methods=['GET'])
+@conditional_get(StorageService.get_batch_task_version, artifact_tag=lambda task_id: f'task-{task_id}')
 def get_ai_report(task_id):
     """获取已缓存的AI分析报告"""
     task_data = StorageService.load_batch_task(task_id)
@@ -4304,109 +4462,21 @@ def batch_ai_evaluate(task_id):
                     item['error'] = result.get('error', '未知错误')
                     yield f"data: {json.dumps({'type': 'error', 'homework_id': result['homework_id'], 'error': result.get('error', ''), 'completed': completed_count, 'total': len(homework_items)})}\n\n"
         
-        overall_accuracy = total_correct / total_questions if total_questions > 0 else 0
-        
-        # 汇总所有作业的题目类型统计: 选择题、客观填空题、主观题
-        aggregated_type_stats = {
-            'choice': {'total': 0, 'correct': 0, 'accuracy': 0, 'score_total': 0, 'score_accurate': 0, 'score_higher': 0, 'score_lower': 0, 'score_accuracy': 0},
-            'objective_fill': {'total': 0, 'correct': 0, 'accuracy': 0, 'score_total': 0, 'score_accurate': 0, 'score_higher': 0, 'score_lower': 0, 'score_accuracy': 0},
-            'subjective': {'total': 0, 'correct': 0, 'accuracy': 0, 'score_total': 0, 'score_accurate': 0, 'score_higher': 0, 'score_lower': 0, 'score_accuracy': 0}
-        }
-        
-        # 汇总bvalue细分统计
-        aggregated_bvalue_stats = {
-            '1': {'total': 0, 'correct': 0, 'accuracy': 0, 'name': '单选'},
-            '2': {'total': 0, 'correct': 0, 'accuracy': 0, 'name': '多选'},
-            '3': {'total': 0, 'correct': 0, 'accuracy': 0, 'name': '判断'},
-            '4': {'total': 0, 'correct': 0, 'accuracy': 0, 'name': '填空'},
-            '5': {'total': 0, 'correct': 0, 'accuracy': 0, 'name': '解答'}
-        }
-        
-        # 汇总组合统计
-        aggregated_combined_stats = {
-            'objective_1': {'total': 0, 'correct': 0, 'accuracy': 0, 'name': '客观单选'},
-            'objective_2': {'total': 0, 'correct': 0, 'accuracy': 0, 'name': '客观多选'},
-            'objective_3': {'total': 0, 'correct': 0, 'accuracy': 0, 'name': '客观判断'},
-            'objective_4': {'total': 0, 'correct': 0, 'accuracy': 0, 'name': '客观填空'},
-            'objective_5': {'total': 0, 'correct': 0, 'accuracy': 0, 'name': '客观解答'},
-            'subjective_1': {'total': 0, 'correct': 0, 'accuracy': 0, 'name': '主观单选'},
-            'subjective_2': {'total': 0, 'correct': 0, 'accuracy': 0, 'name': '主观多选'},
-            'subjective_3': {'total': 0, 'correct': 0, 'accuracy': 0, 'name': '主观判断'},
-            'subjective_4': {'total': 0, 'correct': 0, 'accuracy': 0, 'name': '主观填空'},
-            'subjective_5': {'total': 0, 'correct': 0, 'accuracy': 0, 'name': '主观解答'}
-        }
-        
-        for item in homework_items:
-            evaluation = item.get('evaluation') or {}
-            by_type = evaluation.get('by_question_type') or {}
-            by_bvalue = evaluation.get('by_bvalue') or {}
-            by_combined = evaluation.get('by_combined') or {}
-            
-            for key in aggregated_type_stats:
-                if key in by_type:
-                    aggregated_type_stats[key]['total'] += by_type[key].get('total', 0)
-                    aggregated_type_stats[key]['correct'] += by_type[key].get('correct', 0)
-                    # 聚合分数字段
-                    aggregated_type_stats[key]['score_total'] += by_type[key].get('score_total', 0)
-                    aggregated_type_stats[key]['score_accurate'] += by_type[key].get('score_accurate', 0)
-                    aggregated_type_stats[key]['score_higher'] += by_type[key].get('score_higher', 0)
-                    aggregated_type_stats[key]['score_lower'] += by_type[key].get('score_lower', 0)
-            
-            for key in aggregated_bvalue_stats:
-                if key in by_bvalue:
-                    aggregated_bvalue_stats[key]['total'] += by_bvalue[key].get('total', 0)
-                    aggregated_bvalue_stats[key]['correct'] += by_bvalue[key].get('correct', 0)
-            
-            for key in aggregated_combined_stats:
-                if key in by_combined:
-                    aggregated_combined_stats[key]['total'] += by_combined[key].get('total', 0)
-                    aggregated_combined_stats[key]['correct'] += by_combined[key].get('correct', 0)
-        
-        # 计算汇总准确率
-        for key in aggregated_type_stats:
-            total_count = aggregated_type_stats[key]['total']
-            correct = aggregated_type_stats[key]['correct']
-            aggregated_type_stats[key]['accuracy'] = correct / total_count if total_count > 0 else 0
-            # 计算分数准确率
-            score_total = aggregated_type_stats[key]['score_total']
-            score_accurate = aggregated_type_stats[key]['score_accurate']
-            aggregated_type_stats[key]['score_accuracy'] = score_accurate / score_total if score_total > 0 else 0
-        
-        for key in aggregated_bvalue_stats:
-            total_count = aggregated_bvalue_stats[key]['total']
-            correct = aggregated_bvalue_stats[key]['correct']
-            aggregated_bvalue_stats[key]['accuracy'] = correct / total_count if total_count > 0 else 0
-        
-        for key in aggregated_combined_stats:
-            total_count = aggregated_combined_stats[key]['total']
-            correct = aggregated_combined_stats[key]['correct']
-            aggregated_combined_stats[key]['accuracy'] = correct / total_count if total_count > 0 else 0
+        overall_report = build_overall_report(homework_items, total_correct, total_questions)
+        overall_report['ai_evaluated'] = True
+        overall_accuracy = overall_report['overall_accuracy']
+        aggregated_type_stats = overall_report['by_question_type']
+        aggregated_combined_stats = overall_report['by_combined']
         
         task_data['status'] = 'completed'
-        
-        # 计算 has_score：检查任何一个作业的评估结果是否包含分数数据
-        has_score = False
-        for item in homework_items:
-            evaluation = item.get('evaluation') or {}
-            if evaluation.get('has_score'):
-                has_score = True
-                break
-        task_data['has_score'] = has_score
-        
-        task_data['overall_report'] = {
-            'overall_accuracy': overall_accuracy,
-            'total_homework': len(homework_items),
-            'total_questions': total_questions,
-            'correct_questions': total_correct,
-            'ai_evaluated': True,
-            'by_question_type': aggregated_type_stats,
-            'by_bvalue': aggregated_bvalue_stats,
-            'by_combined': aggregated_combined_stats,
-            'has_score': has_score
-        }
+        task_data['has_score'] = overall_report['has_score']
+        task_data['overall_report'] = overall_report
         
         StorageService.save_batch_task(task_id, task_data)
         
+        # 后台预计算作业详情，查看详情时直接读取
+        threading.Thread(target=precompute_homework_details, args=(task_id, task_data), daemon=True).start()
+        
         # 自动触发 AI 分析
         try:
             analysis_service = get_analysis_service()
@@ -4687,6 +4757,7 @@ def semantic_evaluate_task(task_id):
 
 
 @batch_evaluation_bp.route('/tasks/<task_id>/semantic-report', methods=['GET'])
+@conditional_get(StorageService.get_batch_task_version, artifact_tag=lambda task_id: f'task-{task_id}')
 def get_semantic_report(task_id):
     """获取语义评估报告"""
     task_data = StorageService.load_batch_task(task_id)
@@ -4759,6 +4830,7 @@ def evaluate_single_semantic():
 # ========== 题目类型详情 API ==========
 
 @batch_evaluation_bp.route('/tasks/<task_id>/type-details', methods=['GET'])
+@conditional_get(StorageService.get_batch_task_version, artifact_tag=lambda task_id: f'task-{task_id}')
 def get_type_details(task_id):
     """
     获取指定题目类型的详细题目列表
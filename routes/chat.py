@@ -187,7 +187,7 @@ def analyze():
         return jsonify({'error': '请输入消息或上传图片'}), 400
     
     config = ConfigService.load_config(user_id=user_id)
-    api_url = config.get('api_url', 'https://ark.cn-beijing.volces.com/api/v3/chat/completions')
+    api_url = ConfigService.get_llm_api_url('doubao', config)
     api_key = config.get('api_key', '')
     
     if not api_key:
@@ -296,7 +296,7 @@ def chat():
     is_deepseek = 'deepseek' in model.lower()
     
     if is_deepseek:
-        api_url = 'https://api.deepseek.com/chat/completions'
+        api_url = ConfigService.get_llm_api_url('deepseek', config)
         api_key = config.get('deepseek_api_key', '')
         print(f"[Chat] DeepSeek API Key: {'已配置' if api_key else '未配置'}")
         if not api_key:
@@ -304,7 +304,7 @@ def chat():
         if model == 'deepseek-v3.2':
             model = 'deepseek-chat'
     else:
-        api_url = config.get('gpt_api_url', 'https://api.gpt.ge/v1/chat/completions')
+        api_url = ConfigService.get_llm_api_url('gpt', config)
         api_key = config.get('gpt_api_key', '')
         print(f"[Chat] GPT API URL: {api_url}")
         print(f"[Chat] GPT API Key: {'已配置' if api_key else '未配置'}")
@@ -644,7 +644,7 @@ def first_principles_analysis():
     if not api_key:
         return jsonify({'error': '请先配置 DeepSeek API Key'}), 400
     
-    api_url = 'https://api.deepseek.com/chat/completions'
+    api_url = ConfigService.get_llm_api_url('deepseek', config)
     
     # 构建消息列表 - deepseek-reasoner不支持system角色
     messages = []
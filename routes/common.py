@@ -69,6 +69,31 @@ def prototype_demo():
     return render_template('prototype-demo.html')
 
 
+# ========== 健康检查 API ==========
+
+@common_bp.route('/api/health', methods=['GET'])
+def health():
+    """
+    健康检查
+
+    始终返回 200（进程存活）；data.ready 表示缓存预热是否结束。
+    ?ready=1 时预热未结束返回 503，可用作负载均衡的就绪探针。
+    """
+    from services.cache_warmup_service import CacheWarmupService
+    warmup = CacheWarmupService.get_status()
+    body = {
+        'success': True,
+        'data': {
+            'status': 'ok',
+            'ready': warmup['ready'],
+            'warmup': warmup
+        }
+    }
+    if request.args.get('ready') in ('1', 'true') and not warmup['ready']:
+        return jsonify(body), 503
+    return jsonify(body)
+
+
 # ========== 配置 API ==========
 
 @common_bp.route('/api/config', methods=['GET', 'POST'])
@@ -81,7 +106,7 @@ def config():
         # 移除敏感信息（不返回完整密钥，只返回是否已配置）
         safe_config = {
             'api_url': config_data.get('api_url', ''),
-            'gpt_api_url': config_data.get('gpt_api_url', 'https://api.gpt.ge/v1/chat/completions'),
+            'gpt_api_url': ConfigService.get_llm_api_url('gpt', config_data),
             'mysql': config_data.get('mysql', {}),
             'app_mysql': config_data.get('app_mysql', {}),
             'prompts': config_data.get('prompts', {}),
@@ -147,9 +172,11 @@ def validate_api_key():
         return jsonify({'valid': False, 'error': '缺少参数'})
     
     try:
+        if key_type in ConfigService.LLM_PROVIDER_URLS:
+            url = ConfigService.get_llm_api_url(key_type, ConfigService.load_config(apply_headers=False))
+        
         if key_type == 'doubao':
             # 验证豆包API
-            url = 'https://ark.cn-beijing.volces.com/api/v3/chat/completions'
             headers = {
                 'Content-Type': 'application/json',
                 'Authorization': f'Bearer {api_key}'
@@ -168,7 +195,6 @@ def validate_api_key():
                 
         elif key_type == 'deepseek':
             # 验证DeepSeek API
-            url = 'https://api.deepseek.com/chat/completions'
             headers = {
                 'Content-Type': 'application/json',
                 'Authorization': f'Bearer {api_key}'
@@ -187,7 +213,6 @@ def validate_api_key():
                 
         elif key_type == 'qwen':
             # 验证通义千问API
-            url = 'https://dashscope.aliyuncs.com/compatible-mode/v1/chat/completions'
             headers = {
                 'Content-Type': 'application/json',
                 'Authorization': f'Bearer {api_key}'
@@ -20,6 +20,8 @@ from datetime import datetime, timedelta
 from flask import Blueprint, request, jsonify
 from services.dashboard_service import DashboardService
 from services.database_service import AppDatabaseService
+from services.config_service import ConfigService
+from utils.http_cache import conditional_get
 
 # 创建蓝图
 dashboard_bp = Blueprint('dashboard', __name__)
@@ -28,6 +30,8 @@ dashboard_bp = Blueprint('dashboard', __name__)
 # ========== 基础功能 API (US-1~9) ==========
 
 @dashboard_bp.route('/api/dashboard/overview', methods=['GET'])
+@conditional_get(lambda: DashboardService.get_cache_version(f"overview_{request.args.get('range', 'today')}"),
+                 artifact_tag='dashboard')
 def get_overview():
     """
     获取看板概览统计数据 (US-2)
@@ -906,7 +910,8 @@ def get_cache_status():
             success: bool,
             data: {
                 total_keys: int,
-                keys: [{key, cached_at, expires_at, is_expired}]
+                keys: [{key, cached_at, expires_at, is_expired}],
+                config: {config_hits, config_misses, user_keys_hits, user_keys_misses, cached_users}
             }
         }
         
@@ -915,6 +920,7 @@ def get_cache_status():
     """
     try:
         data = DashboardService.get_cache_status()
+        data['config'] = ConfigService.get_cache_stats()
         
         return jsonify({
             'success': True,
@@ -975,6 +981,45 @@ def clear_cache():
         }), 500
 
 
+@dashboard_bp.route('/api/dashboard/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """
+    获取缓存命中统计 (US-29.6)
+    
+    返回每个缓存键的命中、未命中、宽限期内返回旧值、等待他人计算的次数和计算耗时。
+    
+    Returns:
+        JSON: {
+            success: bool,
+            data: {
+                keys: {key: {hits, misses, stale_served, waits, errors, computes,
+                       compute_ms_avg, compute_ms_max, compute_ms_last, hit_rate}},
+                inflight: [key],
+                responses: {memory_hits, disk_hits, misses, stores, spills, evictions,
+                            bytes_saved, entries, memory_bytes, disk_bytes, ...}
+            }
+        }
+        
+    Example:
+        GET /api/dashboard/cache/stats
+    """
+    try:
+        from services.response_cache_service import ResponseCacheService
+        data = DashboardService.get_cache_stats()
+        data['responses'] = ResponseCacheService.get_stats()
+        return jsonify({
+            'success': True,
+            'data': data
+        })
+        
+    except Exception as e:
+        print(f"[Dashboard] 获取缓存统计失败: {e}")
+        return jsonify({
+            'success': False,
+            'error': '获取缓存统计失败'
+        }), 500
+
+
 # ========== AI生成测试计划 API (US-7) ==========
 
 @dashboard_bp.route('/api/dashboard/ai-plan', methods=['POST'])
@@ -1474,7 +1519,21 @@ def execute_plan_manually(plan_id):
 
 # ========== 问题热点图 API (US-11) ==========
 
+def _heatmap_version():
+    """热点图的版本：与路由参数校验一致地拼出缓存键，取 DashboardService 缓存写入时间"""
+    subject_id = request.args.get('subject_id')
+    subject_id = int(subject_id) if subject_id else None
+    try:
+        days = int(request.args.get('days', '7'))
+        if days < 0:
+            days = 7
+    except (ValueError, TypeError):
+        days = 7
+    return DashboardService.get_cache_version(f'heatmap_{subject_id}_{days}')
+
+
 @dashboard_bp.route('/api/dashboard/heatmap', methods=['GET'])
+@conditional_get(_heatmap_version, artifact_tag='dashboard')
 def get_heatmap():
     """
     获取问题热点图数据 (US-11)
@@ -1904,7 +1963,9 @@ def export_daily_report(report_id):
     """
     导出日报 (US-14, 9.2.3)
     
-    将日报导出为 Word 文档。
+    将日报导出为 Word 文档。文档在后台渲染并按日报内容版本缓存：
+    当前版本已渲染时直接下载，否则启动后台渲染并返回 202 和导出状态，
+    客户端轮询 /export/status 至 ready 后再次请求下载。
     
     Path Parameters:
         report_id: 日报ID
@@ -1913,7 +1974,7 @@ def export_daily_report(report_id):
         format: 导出格式，目前仅支持 docx，默认 docx
         
     Returns:
-        文件下载响应
+        文件下载响应，或 202 JSON: {success: true, data: {导出状态}}
         
     Example:
         GET /api/dashboard/daily-report/abc12345/export?format=docx
@@ -1944,14 +2005,16 @@ def export_daily_report(report_id):
                 'error': f'不支持的导出格式: {export_format}，目前仅支持 docx'
             }), 400
         
-        # 调用服务层导出
-        filepath = ReportService.export_report(report_id, export_format)
+        filepath = ReportService.get_export_artifact(report_id, export_format)
+        if filepath is None:
+            status = ReportService.request_export(report_id, export_format)
+            return jsonify({'success': True, 'data': status}), 202
         
-        # 返回文件下载
+        # 返回文件下载（去掉文件名中的内容版本）
         return send_file(
-            filepath,
+            os.path.abspath(filepath),
             as_attachment=True,
-            download_name=os.path.basename(filepath)
+            download_name=os.path.basename(filepath).rsplit('_', 1)[0] + f'.{export_format}'
         )
         
     except ValueError as e:
@@ -1967,9 +2030,66 @@ def export_daily_report(report_id):
         }), 500
 
 
+@dashboard_bp.route('/api/dashboard/daily-report/<report_id>/export', methods=['POST'])
+def request_daily_report_export(report_id):
+    """
+    请求后台导出日报
+    
+    Query Parameters:
+        format: 导出格式，默认 docx
+        
+    Returns:
+        JSON: {success: bool, data: {report_id, version, format, status, filename, error}}
+            已缓存时返回 200（status=ready），否则返回 202
+    """
+    from services.report_service import ReportService
+    
+    try:
+        status = ReportService.request_export(report_id, request.args.get('format', 'docx'))
+        return jsonify({'success': True, 'data': status}), 200 if status['status'] == 'ready' else 202
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        print(f"[Dashboard] 请求导出日报失败: {e}")
+        return jsonify({'success': False, 'error': '导出日报失败，请稍后重试'}), 500
+
+
+@dashboard_bp.route('/api/dashboard/daily-report/<report_id>/export/status', methods=['GET'])
+def get_daily_report_export_status(report_id):
+    """
+    查询日报导出状态
+    
+    Returns:
+        JSON: {success: bool, data: {status: ready|pending|running|failed|none, ...}}
+    """
+    from services.report_service import ReportService
+    
+    try:
+        status = ReportService.get_export_status(report_id, request.args.get('format', 'docx'))
+        return jsonify({'success': True, 'data': status})
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        print(f"[Dashboard] 查询日报导出状态失败: {e}")
+        return jsonify({'success': False, 'error': '查询导出状态失败，请稍后重试'}), 500
+
+
 # ========== 趋势分析 API (US-15) ==========
 
+def _trends_version():
+    """趋势数据的版本：与路由参数校验一致地拼出缓存键，取 DashboardService 缓存写入时间"""
+    try:
+        days = int(request.args.get('days', '7'))
+        days = 7 if days < 1 else min(days, 365)
+    except (ValueError, TypeError):
+        days = 7
+    subject_id = request.args.get('subject_id')
+    subject_id = int(subject_id) if subject_id else None
+    return DashboardService.get_cache_version(f'trends_{days}_{subject_id}')
+
+
 @dashboard_bp.route('/api/dashboard/trends', methods=['GET'])
+@conditional_get(_trends_version, artifact_tag='dashboard')
 def get_trends():
     """
     获取趋势分析数据 (US-15, 10.2.1)
@@ -2198,12 +2318,14 @@ def search():
     """
     智能搜索 (US-32)
     
-    全局搜索框支持搜索任务名、数据集名、书本名、题号等内容。
-    返回匹配结果并高亮关键词。
+    全局搜索框支持搜索任务名、数据集名、书本名、题号和答案内容。
+    返回按匹配程度排序的分页结果并高亮关键词。
     
     Query Parameters:
-        q: 搜索关键词（必填，至少1个字符）
+        q: 搜索关键词（必填，至少1个字符），支持类型前缀如 task:物理、书本:八上
         type: 搜索类型，可选值 all|task|dataset|book|question，默认 all
+        page: 页码，默认 1
+        page_size: 每页条数，默认 20，最大 100
         
     Returns:
         JSON: {
@@ -2216,7 +2338,10 @@ def search():
                         name: string,      # 结果名称
                         highlight: string  # 高亮后的名称（使用<mark>标签）
                     }
-                ]
+                ],
+                total: int,        # 匹配总数
+                page: int,
+                page_size: int
             }
         }
         
@@ -2268,8 +2393,11 @@ def search():
                 'error': f'无效的搜索类型，可选值: {", ".join(valid_types)}'
             }), 400
         
+        page = request.args.get('page', 1, type=int) or 1
+        page_size = min(max(request.args.get('page_size', 20, type=int) or 20, 1), 100)
+        
         # 调用服务层执行搜索
-        data = DashboardService.search(query, search_type)
+        data = DashboardService.search(query, search_type, page=max(page, 1), page_size=page_size)
         
         return jsonify({
             'success': True,
@@ -2285,6 +2413,28 @@ def search():
         }), 500
 
 
+@dashboard_bp.route('/api/dashboard/search/reindex', methods=['POST'])
+def rebuild_search_index():
+    """
+    全量重建搜索索引
+    
+    任务/数据集的保存和删除会增量更新索引，绕过 StorageService 直接修改数据文件后调用此接口。
+    """
+    try:
+        from services.search_index_service import SearchIndexService
+        count = SearchIndexService.rebuild()
+        return jsonify({
+            'success': True,
+            'data': {'documents': count, 'status': SearchIndexService.get_status()}
+        })
+    except Exception as e:
+        print(f"[Dashboard] 重建搜索索引失败: {e}")
+        return jsonify({
+            'success': False,
+            'error': '重建搜索索引失败'
+        }), 500
+
+
 # ========== 高级分析工具 API ==========
 
 @dashboard_bp.route('/api/dashboard/advanced-tools/stats', methods=['GET'])
@@ -2339,7 +2489,18 @@ def get_advanced_tools_stats():
         }), 500
 
 
+def _batch_compare_version():
+    """批次对比的版本：两个任务文件的版本，任一任务不存在时返回 None"""
+    from services.storage_service import StorageService
+    versions = [StorageService.get_batch_task_version(request.args.get(name, '').strip())
+                for name in ('task_id_1', 'task_id_2')]
+    if None in versions:
+        return None
+    return '|'.join(v[0] for v in versions), max(v[1] for v in versions)
+
+
 @dashboard_bp.route('/api/dashboard/batch-compare', methods=['GET'])
+@conditional_get(_batch_compare_version, artifact_tag='dashboard')
 def get_batch_compare():
     """
     获取批次对比数据
@@ -2420,6 +2581,7 @@ def get_batch_compare():
 
 
 @dashboard_bp.route('/api/dashboard/batch-tasks', methods=['GET'])
+@conditional_get(lambda: DashboardService.get_cache_version('all_batch_tasks'), artifact_tag='dashboard')
 def get_batch_tasks_for_compare():
     """
     获取可用于对比的批量评估任务列表
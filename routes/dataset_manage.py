@@ -7,7 +7,9 @@ import json
 from flask import Blueprint, request, jsonify, render_template
 
 from services.config_service import ConfigService
+from services.prompt_registry import PromptRegistry
 from services.database_service import DatabaseService
+from services.homework_query_service import HomeworkQueryService
 from services.llm_service import LLMService
 
 dataset_manage_bp = Blueprint('dataset_manage', __name__)
@@ -23,12 +25,8 @@ def dataset_manage_page():
 def get_homework_result(homework_id):
     """获取指定作业的AI批改结果（homework_result），用于效果矫正对比"""
     try:
-        sql = """
-            SELECT h.id, h.homework_result, h.data_value, h.pic_path
-            FROM zp_homework h
-            WHERE h.id = %s
-        """
-        row = DatabaseService.execute_one(sql, (homework_id,))
+        # 列表接口不返回大字段，查看时按需加载（只取 homework_result）
+        row = HomeworkQueryService.load_blobs([homework_id], ('homework_result',)).get(str(homework_id))
         
         if not row:
             return jsonify({'success': False, 'error': '未找到作业记录'})
@@ -80,10 +78,16 @@ def get_homework_result(homework_id):
 
 @dataset_manage_bp.route('/api/dataset/available-homework', methods=['GET'])
 def get_dataset_available_homework():
-    """获取指定页码的可用作业图片列表"""
+    """
+    获取指定页码的可用作业图片列表
+
+    题目数量由数据库计算，不传输 homework_result；支持 limit / cursor 键集分页。
+    """
     book_id = request.args.get('book_id')
     page_num = request.args.get('page_num', type=int)
     hours = request.args.get('hours', 12, type=int)  # 默认12小时，减少查询范围
+    limit = request.args.get('limit', 20, type=int)
+    cursor = request.args.get('cursor')
     
     if not book_id or page_num is None:
         return jsonify({'success': False, 'error': '缺少必要参数'})
@@ -95,23 +99,18 @@ def get_dataset_available_homework():
     try:
         print(f"[AvailableHomework] Querying book_id={book_id}, page_num={page_num}, hours={hours}")
         
-        sql = """
-            SELECT h.id, h.student_id, h.pic_path, h.homework_result, h.create_time,
-                   s.name AS student_name
-            FROM zp_homework h
-            LEFT JOIN zp_student s ON h.student_id = s.id
-            LEFT JOIN zp_homework_publish p ON h.hw_publish_id = p.id
-            WHERE h.status = 3 
-              AND p.book_id = %s
-              AND h.page_num = %s
-              AND h.pic_path IS NOT NULL
-              AND h.pic_path != ''
-              AND h.create_time >= DATE_SUB(NOW(), INTERVAL %s HOUR)
-            ORDER BY h.create_time DESC
-            LIMIT 20
-        """
-        
-        rows = DatabaseService.execute_query(sql, (book_id, page_num, hours))
+        try:
+            rows, next_cursor = HomeworkQueryService.list_homework(
+                hours=hours,
+                book_id=book_id,
+                page_num=page_num,
+                require_pic=True,
+                with_names=False,
+                limit=min(limit, 100),
+                cursor=cursor
+            )
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
         print(f"[AvailableHomework] Found {len(rows)} records")
         
         config = ConfigService.load_config()
@@ -125,24 +124,17 @@ def get_dataset_available_homework():
             else:
                 pic_url = f"{pic_base_url}{pic_path}" if pic_path and pic_base_url else ''
             
-            question_count = 0
-            try:
-                homework_result = json.loads(row.get('homework_result', '[]') or '[]')
-                question_count = len(homework_result) if isinstance(homework_result, list) else 0
-            except:
-                pass
-            
             homework_list.append({
                 'id': str(row['id']),
                 'student_id': row.get('student_id', ''),
                 'student_name': row.get('student_name', ''),
                 'pic_path': pic_path,
                 'pic_url': pic_url,
-                'question_count': question_count,
+                'question_count': row['question_count'],
                 'create_time': row['create_time'].isoformat() if row.get('create_time') else None
             })
         
-        return jsonify({'success': True, 'data': homework_list})
+        return jsonify({'success': True, 'data': homework_list, 'next_cursor': next_cursor})
     
     except Exception as e:
         print(f"[AvailableHomework] Error: {str(e)}")
@@ -433,7 +425,6 @@ def dataset_recognize():
             prompt, has_score = build_dynamic_prompt(data_value_items, subject_id)
         else:
             # 回退到静态提示词
-            prompts_config = config.get('prompts', {})
             subject_prompt_map = {
                 0: 'recognize_english',
                 1: 'recognize_chinese',
@@ -441,7 +432,7 @@ def dataset_recognize():
                 3: 'recognize_physics',
             }
             prompt_key = subject_prompt_map.get(subject_id, 'recognize')
-            prompt = prompts_config.get(prompt_key, prompts_config.get('recognize', '请识别图片中作业的每道题答案。'))
+            prompt = PromptRegistry.get(prompt_key, PromptRegistry.get('recognize', '请识别图片中作业的每道题答案。'))
         
         # 调用视觉模型，设置较长的超时时间以支持多题目识别
         result = LLMService.call_vision_model(pic_url, prompt, 'doubao-seed-1-8-251228', timeout=240, user_id=user_id)
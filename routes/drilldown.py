@@ -4,6 +4,7 @@
 from flask import Blueprint, request, jsonify
 
 from services.drilldown_service import DrilldownService
+from services.aggregate_cube_service import AggregateCubeService
 
 drilldown_bp = Blueprint('drilldown', __name__)
 
@@ -29,3 +30,12 @@ def get_drilldown_data():
         return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@drilldown_bp.route('/api/drilldown/rebuild', methods=['POST'])
+def rebuild_drilldown_cube():
+    """从任务文件重建聚合立方体"""
+    try:
+        return jsonify({'success': True, 'data': AggregateCubeService.rebuild()})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
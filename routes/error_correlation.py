@@ -14,9 +14,12 @@ def analyze_correlations():
     subject_id = request.args.get('subject_id', type=int)
     book_name = request.args.get('book_name')
     min_occurrence = request.args.get('min_occurrence', 2, type=int)
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    limit = request.args.get('limit', 20, type=int)
     
     result = ErrorCorrelationService.analyze_correlations(
-        subject_id, book_name, min_occurrence
+        subject_id, book_name, min_occurrence, start_date, end_date, limit
     )
     return jsonify({'success': True, **result})
 
@@ -23,6 +23,7 @@ def get_samples():
         cluster_id: 聚类筛选
         task_id: 任务筛选
         keyword: 关键词搜索
+        cursor: 上一页返回的 next_cursor（keyset 分页，传入时按游标取下一页）
     """
     try:
         page = request.args.get('page', 1, type=int)
@@ -33,12 +34,15 @@ def get_samples():
         cluster_id = request.args.get('cluster_id')
         task_id = request.args.get('task_id')
         keyword = request.args.get('keyword')
+        cursor = request.args.get('cursor')
         
         # 参数校验
         if page < 1:
             page = 1
         if page_size < 1 or page_size > 100:
             page_size = 20
+        if cursor and not cursor.isdigit():
+            return jsonify({'success': False, 'error': '无效的分页游标'}), 400
         
         result = ErrorSampleService.get_samples(
             page=page,
@@ -48,7 +52,8 @@ def get_samples():
             subject_id=subject_id,
             cluster_id=cluster_id,
             task_id=task_id,
-            keyword=keyword
+            keyword=keyword,
+            cursor=cursor
         )
         
         return jsonify({'success': True, 'data': result})
@@ -248,12 +248,12 @@ def multi_model_compare_api():
             if is_qwen:
                 if not config.get('qwen_api_key'):
                     return {'model': model_id, 'idx': idx, 'error': '未配置Qwen API Key'}
-                api_url = 'https://dashscope.aliyuncs.com/compatible-mode/v1/chat/completions'
+                api_url = ConfigService.get_llm_api_url('qwen', config)
                 api_key = config['qwen_api_key']
             else:
                 if not config.get('api_key'):
                     return {'model': model_id, 'idx': idx, 'error': '未配置API Key'}
-                api_url = config['api_url']
+                api_url = ConfigService.get_llm_api_url('doubao', config)
                 api_key = config['api_key']
             
             content = [
@@ -84,7 +84,7 @@ def optimize_prompt():
 
     try:
         response = requests.post(
-            'https://dashscope.aliyuncs.com/compatible-mode/v1/chat/completions',
+            ConfigService.get_llm_api_url('qwen', config),
             json={
                 'model': 'qwen3-max',
                 'messages': [
@@ -201,7 +201,7 @@ def generate_prompt_response():
     
     try:
         response = requests.post(
-            config.get('api_url', 'https://ark.cn-beijing.volces.com/api/v3/chat/completions'),
+            ConfigService.get_llm_api_url('doubao', config),
             json={'model': model, 'messages': messages},
             headers={'Content-Type': 'application/json', 'Authorization': f"Bearer {config.get('api_key', '')}"},
             timeout=120
@@ -9,6 +9,7 @@ from datetime import datetime
 from flask import Blueprint, request, jsonify
 
 from services.config_service import ConfigService
+from services.prompt_registry import PromptRegistry
 from services.database_service import DatabaseService
 from services.llm_service import LLMService
 from services.storage_service import StorageService
@@ -245,11 +246,8 @@ def recognize_base_effect():
     if not image:
         return jsonify({'success': False, 'error': '缺少图片数据'})
     
-    config = ConfigService.load_config(user_id=user_id)
-    
     # 使用通用识别提示词
-    prompts_config = config.get('prompts', {})
-    prompt = prompts_config.get('recognize', '请识别图片中作业的每道题答案。')
+    prompt = PromptRegistry.get('recognize', '请识别图片中作业的每道题答案。')
     
     result = LLMService.call_vision_model(image, prompt, 'doubao-1-5-vision-pro-32k-250115', user_id=user_id)
     
@@ -279,11 +277,8 @@ def auto_recognize_from_db():
     if not pic_path:
         return jsonify({'success': False, 'error': '图片路径为空'})
     
-    config = ConfigService.load_config(user_id=user_id)
-    
     # 使用通用识别提示词
-    prompts_config = config.get('prompts', {})
-    prompt = prompts_config.get('recognize', '请识别图片中作业的每道题答案。')
+    prompt = PromptRegistry.get('recognize', '请识别图片中作业的每道题答案。')
     
     result = LLMService.call_vision_model(pic_path, prompt, 'doubao-seed-1-8-251228', user_id=user_id)
     
@@ -349,11 +344,8 @@ def do_ai_compare(base_effect, homework_result):
     from routes.auth import get_current_user_id
     user_id = get_current_user_id()
     
-    config = ConfigService.load_config(user_id=user_id)
-    
     # 获取比对提示词
-    prompts_config = config.get('prompts', {})
-    compare_prompt = prompts_config.get('compare_answer', '')
+    compare_prompt = PromptRegistry.get('compare_answer', '')
     
     if not compare_prompt:
         return {'success': False, 'error': '未配置比对提示词'}
@@ -0,0 +1,590 @@
+"""
+评估结果聚合立方体模块
+
+把批量任务的评估结果物化为各分析使用的存储（见 services/cube），
+下钻、关联分析、热点图、异常检测、批次对比直接查询存储，不再逐个解析任务文件：
+- CellStore: (日期, 学科, 书本, 页码, 题号) 维度的聚合单元
+- PairStore: 错误类型 / 错题共现计数
+- HeatStore: 热点计数和错误记录引用（详情查询时从任务文件读取）
+- MomentStore: 任务准确率矩
+- FingerprintStore: 任务指纹
+
+这里负责任务贡献（任务元信息 + 各存储的部分）的计算、落盘和同步，
+载入 / 替换 / 删除贡献时依次调用各存储的 apply 钩子：
+- 每个任务的贡献单独落盘（analytics_cube/tasks/<task_id>.json，记录对应任务文件的 mtime 和大小
+  以及各存储部分的版本，存储版本变化时只重新计算该部分）
+- 保存 / 删除任务时增量更新（StorageService 钩子），并把任务ID追加到变更日志 analytics_cube/changes.log
+- 查询前按 CHECK_INTERVAL 检查变更信号：任务目录 mtime 变化时对比文件名找出新增 / 删除的任务，
+  变更日志有新记录时只同步其中的任务；日志被轮转时才扫描全部任务文件的属性
+- 离线重建: python -m services.aggregate_cube_service --rebuild
+"""
+import os
+import json
+import time
+import shutil
+import threading
+from typing import Dict, Any, List, Optional, Iterable
+
+from .storage_service import StorageService
+from .cube import CellStore, PairStore, HeatStore, MomentStore, FingerprintStore, DateBuckets
+from utils.file_utils import safe_filename
+from utils.running_stats import RunningStats
+
+
+# 订阅任务贡献的存储（顺序即 apply 调用顺序）
+STORES = (CellStore, PairStore, HeatStore, MomentStore, FingerprintStore)
+
+
+def infer_subject(task: Dict[str, Any]) -> int:
+    """从任务的书本名称推断学科（任务没有 subject_id 时）"""
+    name = (task.get('book_name') or task.get('dataset_name') or '').lower()
+    if not name:
+        for item in task.get('homework_items') or []:
+            if item.get('book_name'):
+                name = item['book_name'].lower()
+                break
+    for subject_id, keywords in ((0, ('英语', 'english')), (1, ('语文', 'chinese')), (2, ('数学', 'math')),
+                                 (3, ('物理', 'physics')), (4, ('化学', 'chemistry')), (5, ('生物', 'biology')),
+                                 (6, ('地理', 'geography'))):
+        if any(k in name for k in keywords):
+            return subject_id
+    return 0
+
+
+def build_meta(task: Dict[str, Any], fallback_date: str = '') -> Dict[str, Any]:
+    """
+    任务元信息（各存储共用）
+
+    Returns:
+        dict: {date, subject_id, book, name, created_at,
+               accuracy / total_questions / correct_count: overall_report 中的汇总（正确数为 correct_questions）,
+               model / prompts: 模型和 [[提示词, 版本]]}
+    """
+    subject_id = task.get('subject_id')
+    if subject_id is None:
+        subject_id = infer_subject(task)
+    report = task.get('overall_report') or {}
+    return {
+        'date': (task.get('created_at') or '')[:10] or fallback_date,
+        'subject_id': subject_id,
+        'book': task.get('book_name') or task.get('dataset_name') or '未知书本',
+        'name': task.get('name', ''),
+        'created_at': task.get('created_at') or task.get('start_time', ''),
+        'accuracy': report.get('overall_accuracy'),
+        'total_questions': report.get('total_questions', 0) or 0,
+        'correct_count': report.get('correct_questions', report.get('correct_count', 0)) or 0,
+        'model': task.get('model') or task.get('vision_model') or 'unknown',
+        'prompts': sorted([key, (info or {}).get('version') if isinstance(info, dict) else info]
+                          for key, info in (task.get('prompt_versions') or {}).items())
+    }
+
+
+def build_parts(task: Dict[str, Any], meta: Dict[str, Any], stores: Iterable = STORES) -> Dict[str, Any]:
+    """计算指定存储的部分 {存储名称: {version, data}}"""
+    return {store.NAME: {'version': store.VERSION, 'data': store.build(task, meta)} for store in stores}
+
+
+def build_contribution(task: Dict[str, Any], task_id: str, signature: str = None,
+                       fallback_date: str = '') -> Dict[str, Any]:
+    """
+    计算单个任务对立方体的贡献
+
+    Returns:
+        dict: {version, task_id, signature, meta: 任务元信息（见 build_meta）, parts: {存储名称: {version, data}}}
+    """
+    meta = build_meta(task, fallback_date)
+    return {
+        'version': AggregateCubeService.CUBE_VERSION,
+        'task_id': task_id,
+        'signature': signature,
+        'meta': meta,
+        'parts': build_parts(task, meta)
+    }
+
+
+class AggregateCubeService:
+    """
+    评估结果聚合立方体（进程内单例，类方法访问）
+
+    Attributes:
+        CUBE_DIR: 贡献文件目录
+        CUBE_VERSION: 贡献文件和任务元信息的格式版本，变化后全部重新计算（各存储部分另有版本）
+        CHECK_INTERVAL: 查询前检查变更信号的最小间隔（秒）
+        CHANGE_LOG_MAX_BYTES: 变更日志超过该大小时轮转，其他 worker 随后全量扫描一次
+    """
+
+    CUBE_DIR = 'analytics_cube'
+    CUBE_VERSION = 6
+    CHECK_INTERVAL = 2.0
+    CHANGE_LOG_MAX_BYTES = 1024 * 1024
+
+    _lock = threading.RLock()
+    # task_id -> 任务元信息（见 build_meta，附带 signature）
+    _meta: Dict[str, Dict[str, Any]] = {}
+    # date -> {task_id: True}
+    _task_days = DateBuckets()
+    _checked_at = 0.0
+    # 任务目录 mtime（None 表示尚未全量同步）
+    _dir_mtime: Optional[int] = None
+    # 变更日志的 inode 和已读取的偏移
+    _log_inode: Optional[int] = None
+    _log_offset = 0
+
+    # ========== 查询 ==========
+
+    @classmethod
+    def rollup(cls, group_by: Iterable[str], where: Dict[str, Any] = None, start_date: str = None,
+               end_date: str = None, questions: bool = False) -> Dict[tuple, Dict[str, Any]]:
+        """
+        按维度汇总
+
+        Args:
+            group_by: 分组维度（CUBE_DIMS 中的名称）
+            where: 维度等值筛选，如 {'subject': 2, 'book': '数学七上'}
+            start_date / end_date: 日期范围（YYYY-MM-DD，含两端）
+            questions: True 汇总题级单元，False 汇总页级单元
+
+        Returns:
+            dict: {分组键: {items, total, correct, error_count, errors}}
+        """
+        cls.ensure_fresh()
+        return CellStore.rollup(group_by, where, start_date, end_date, questions)
+
+    @classmethod
+    def pair_counts(cls, kind: str, subject=None, book: str = None, book_contains: str = None,
+                    start_date: str = None, end_date: str = None):
+        """
+        汇总日期范围内的共现次数
+
+        Args:
+            kind: 'type' 错误类型对，'question' 错题对
+            subject / book: 学科、书本等值筛选
+            book_contains: 书本名称包含该字符串
+
+        Returns:
+            Counter: type 为 {(错误类型1, 错误类型2): 次数}，question 为 {(book, page, 题号1, 题号2): 次数}
+        """
+        cls.ensure_fresh()
+        return PairStore.pair_counts(kind, subject, book, book_contains, start_date, end_date)
+
+    @classmethod
+    def heat_counts(cls, start_date: str = None):
+        """
+        合并 start_date（含）以来各日桶的热点计数
+
+        Returns:
+            dict: {(数据集, 书本ID, 书本名称, 页码, 题号): Counter(错误类型)}
+        """
+        cls.ensure_fresh()
+        return HeatStore.heat_counts(start_date)
+
+    @classmethod
+    def heat_records(cls, book_id, page_num, question_index, start_date: str = None) -> List[Dict[str, Any]]:
+        """
+        某题 start_date（含）以来的错误记录，附带 task_id、task_name、created_at
+
+        热点存储只保留错误引用，详情按引用从各任务文件读取（每个任务读取一次）
+        """
+        cls.ensure_fresh()
+        refs: Dict[str, List[tuple]] = {}
+        for task_id, homework_id, position in HeatStore.heat_refs(book_id, page_num, question_index, start_date):
+            refs.setdefault(task_id, []).append((homework_id, position))
+
+        records = []
+        for task_id, task_refs in refs.items():
+            try:
+                task = StorageService.load_batch_task(task_id) or {}
+            except (OSError, ValueError):
+                continue
+            items = {item.get('homework_id', ''): item for item in task.get('homework_items') or []}
+            with cls._lock:
+                meta = cls._meta.get(task_id)
+            if meta is None:
+                continue
+            for homework_id, position in task_refs:
+                errors = ((items.get(homework_id) or {}).get('evaluation') or {}).get('errors') or []
+                if position < len(errors):
+                    records.append({'task_id': task_id, 'task_name': meta['name'],
+                                    **HeatStore.describe(items[homework_id], errors[position]),
+                                    'created_at': meta['created_at']})
+        return records
+
+    @classmethod
+    def accuracy_moments(cls, start_date: str = None, subject=None, book: str = None,
+                         exclude_task_id: str = None) -> RunningStats:
+        """
+        合并 start_date（含）以来的任务准确率统计量
+
+        Args:
+            start_date: 窗口起始日期，早于保留期的部分已过期
+            subject / book: 学科、书本筛选
+            exclude_task_id: 排除的任务（如正在检测的任务本身）
+        """
+        cls.ensure_fresh()
+        return MomentStore.accuracy_moments(start_date, subject, book, exclude_task_id)
+
+    @classmethod
+    def fingerprints(cls, task_ids: Iterable[str] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        任务指纹 {task_id: 指纹}（只读，不要修改返回的指纹）
+
+        Args:
+            task_ids: 指定任务，为空时返回全部；不存在的任务不返回
+        """
+        cls.ensure_fresh()
+        return FingerprintStore.fingerprints(task_ids)
+
+    @classmethod
+    def task_ids(cls, date: str = None) -> List[str]:
+        """全部任务ID（按任务日期从新到旧），指定 date 时只返回该日期的任务"""
+        cls.ensure_fresh()
+        with cls._lock:
+            ids = []
+            for _, tasks in reversed(cls._task_days.window(date, date)):
+                ids.extend(sorted(tasks, reverse=True))
+            return ids
+
+    @classmethod
+    def task_cells(cls, task_id: str) -> Optional[Dict[tuple, tuple]]:
+        """单个任务的单元 {(book, page, question): (items, total, correct, errors, sample)}，任务不存在时返回 None"""
+        cls.ensure_fresh()
+        return CellStore.task_cells(task_id)
+
+    @classmethod
+    def task_groups(cls, group_by: str, where: Dict[str, Any] = None, start_date: str = None,
+                    end_date: str = None) -> Dict[Any, List[str]]:
+        """按学科或书本分组的任务ID列表（只统计日期范围内的任务）"""
+        cls.ensure_fresh()
+        return CellStore.task_groups(group_by, where, start_date, end_date)
+
+    @classmethod
+    def latest_samples(cls, book: str, page: str, start_date: str = None,
+                       end_date: str = None) -> Dict[str, Dict[str, Any]]:
+        """某页各题最近一次错误的样例 {题号: {ai_answer, expected_answer, error_type}}"""
+        cls.ensure_fresh()
+        return CellStore.latest_samples(book, page, start_date, end_date)
+
+    @classmethod
+    def error_examples(cls, error_type: str, limit: int) -> List[Dict[str, Any]]:
+        """某错误类型的示例 [{book, page, question, ai_answer, expected_answer, task_id}]（任务从新到旧）"""
+        cls.ensure_fresh()
+        return CellStore.error_examples(error_type, limit)
+
+    @classmethod
+    def subject_of_book(cls, book: str) -> Optional[int]:
+        """书本所属学科（取出现次数最多的学科）"""
+        cls.ensure_fresh()
+        return CellStore.subject_of_book(book)
+
+    # ========== 增量维护 ==========
+
+    @classmethod
+    def index_task(cls, task_id: str, task_data: Dict[str, Any]):
+        """任务保存后更新贡献（StorageService 钩子）"""
+        signature = cls._task_signature(task_id)
+        contrib = build_contribution(task_data, task_id, signature, cls._mtime_date(task_id))
+        with cls._lock:
+            cls._apply(task_id, contrib)
+        cls._write_contribution(task_id, contrib)
+        cls._record_change(task_id)
+
+    @classmethod
+    def remove_task(cls, task_id: str):
+        """任务删除后移除贡献（StorageService 钩子）"""
+        with cls._lock:
+            cls._apply(task_id, None)
+        try:
+            os.remove(cls._contribution_path(task_id))
+        except OSError:
+            pass
+        cls._record_change(task_id)
+
+    @classmethod
+    def ensure_fresh(cls, force: bool = False):
+        """按变更信号同步立方体（间隔 CHECK_INTERVAL 秒），force 时全量扫描任务目录"""
+        now = time.time()
+        if not force and now - cls._checked_at < cls.CHECK_INTERVAL:
+            return
+        with cls._lock:
+            if not force and now - cls._checked_at < cls.CHECK_INTERVAL:
+                return
+            if force or cls._dir_mtime is None:
+                cls._sync()
+            else:
+                cls._sync_changes()
+            for store in STORES:
+                store.expire()
+            cls._checked_at = time.time()
+
+    @classmethod
+    def rebuild(cls) -> Dict[str, Any]:
+        """删除全部贡献文件并从任务文件重新计算"""
+        start = time.time()
+        with cls._lock:
+            shutil.rmtree(cls._tasks_dir(), ignore_errors=True)
+            cls.reset()
+            cls._sync()
+            cls._checked_at = time.time()
+            status = cls.get_status()
+        status['elapsed'] = round(time.time() - start, 3)
+        print(f"[AggregateCube] 重建完成: {status}")
+        return status
+
+    @classmethod
+    def get_status(cls) -> Dict[str, Any]:
+        with cls._lock:
+            status = {'tasks': len(cls._meta)}
+            for store in STORES:
+                status.update(store.status())
+            status['checked_at'] = cls._checked_at
+            return status
+
+    @classmethod
+    def reset(cls):
+        """清空内存状态（测试和基准测试使用）"""
+        with cls._lock:
+            cls._meta = {}
+            cls._task_days = DateBuckets()
+            cls._checked_at = 0.0
+            cls._dir_mtime = None
+            cls._log_inode = None
+            cls._log_offset = 0
+            for store in STORES:
+                store.reset()
+
+    @classmethod
+    def _sync(cls):
+        """全量扫描任务目录的文件属性，只重新计算变化的任务（调用方持有锁）"""
+        batch_dir = StorageService.BATCH_TASKS_DIR
+        # 先记录变更信号，扫描期间发生的变化留到下次检查
+        cls._dir_mtime = cls._dir_signature()
+        cls._log_inode, cls._log_offset = cls._log_position()
+        seen = set()
+        loaded, computed = 0, 0
+        try:
+            entries = list(os.scandir(batch_dir))
+        except OSError:
+            entries = []
+        for entry in entries:
+            if not entry.name.endswith('.json'):
+                continue
+            task_id = entry.name[:-5]
+            seen.add(task_id)
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            result = cls._load(task_id, entry.path, st)
+            loaded += result == 'loaded'
+            computed += result == 'computed'
+
+        for task_id in [t for t in cls._meta if t not in seen]:
+            cls._apply(task_id, None)
+        if computed:
+            print(f"[AggregateCube] 同步完成: 加载 {loaded} 个，重新计算 {computed} 个任务")
+
+    @classmethod
+    def _sync_changes(cls):
+        """按变更信号同步（调用方持有锁）：任务目录 mtime 和变更日志"""
+        changed = cls._read_changes()
+        if changed is None:
+            cls._sync()
+            return
+
+        dir_mtime = cls._dir_signature()
+        if dir_mtime != cls._dir_mtime:
+            cls._dir_mtime = dir_mtime
+            try:
+                names = {entry.name[:-5] for entry in os.scandir(StorageService.BATCH_TASKS_DIR)
+                         if entry.name.endswith('.json')}
+            except OSError:
+                names = set()
+            changed.update(t for t in names if t not in cls._meta)
+            changed.update(t for t in cls._meta if t not in names)
+
+        for task_id in sorted(changed):
+            path = os.path.join(StorageService.BATCH_TASKS_DIR, f'{task_id}.json')
+            try:
+                st = os.stat(path)
+            except OSError:
+                if task_id in cls._meta:
+                    cls._apply(task_id, None)
+                continue
+            cls._load(task_id, path, st)
+
+    @classmethod
+    def _load(cls, task_id: str, path: str, st: os.stat_result) -> Optional[str]:
+        """
+        按任务文件属性载入贡献（调用方持有锁）
+
+        Returns:
+            str: 'unchanged' 已是最新，'loaded' 直接加载贡献文件，'computed' 重新计算了部分或全部存储；
+                 任务文件无法读取时返回 None
+        """
+        signature = f'{st.st_mtime_ns}-{st.st_size}'
+        current = cls._meta.get(task_id)
+        if current is not None and current['signature'] == signature:
+            return 'unchanged'
+
+        contrib = cls._read_contribution(task_id)
+        if contrib is not None and contrib.get('signature') != signature:
+            contrib = None
+        stale = [store for store in STORES
+                 if contrib is None or (contrib['parts'].get(store.NAME) or {}).get('version') != store.VERSION]
+        if stale:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    task = json.load(f)
+            except (OSError, ValueError):
+                return None
+            if contrib is None:
+                contrib = build_contribution(task, task_id, signature,
+                                             time.strftime('%Y-%m-%d', time.localtime(st.st_mtime)))
+            else:
+                contrib['parts'].update(build_parts(task, contrib['meta'], stale))
+            cls._write_contribution(task_id, contrib)
+        cls._apply(task_id, contrib)
+        return 'computed' if stale else 'loaded'
+
+    @classmethod
+    def _apply(cls, task_id: str, contrib: Optional[Dict[str, Any]]):
+        """用新贡献替换任务的旧贡献并通知各存储（调用方持有锁）"""
+        old = cls._meta.pop(task_id, None)
+        if old is not None:
+            tasks = cls._task_days.get(old['date'])
+            if tasks is not None:
+                tasks.pop(task_id, None)
+                cls._task_days.discard_if_empty(old['date'])
+        meta = None
+        if contrib is not None:
+            meta = cls._meta[task_id] = {**contrib['meta'], 'signature': contrib.get('signature')}
+            cls._task_days.setdefault(meta['date'])[task_id] = True
+        for store in STORES:
+            store.apply(task_id, meta, contrib['parts'][store.NAME]['data'] if meta is not None else None)
+
+    # ========== 变更信号 ==========
+
+    @classmethod
+    def _change_log_path(cls) -> str:
+        return os.path.join(cls.CUBE_DIR, 'changes.log')
+
+    @classmethod
+    def _record_change(cls, task_id: str):
+        """把变化的任务ID追加到变更日志，超过 CHANGE_LOG_MAX_BYTES 时先轮转"""
+        path = cls._change_log_path()
+        try:
+            os.makedirs(cls.CUBE_DIR, exist_ok=True)
+            try:
+                if os.path.getsize(path) > cls.CHANGE_LOG_MAX_BYTES:
+                    os.replace(path, f'{path}.1')
+            except OSError:
+                pass
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(f'{task_id}\n')
+        except OSError as e:
+            print(f"[AggregateCube] 写入变更日志失败 {task_id}: {e}")
+
+    @classmethod
+    def _log_position(cls):
+        try:
+            st = os.stat(cls._change_log_path())
+        except OSError:
+            return None, 0
+        return st.st_ino, st.st_size
+
+    @classmethod
+    def _read_changes(cls) -> Optional[set]:
+        """
+        读取变更日志中的新记录（调用方持有锁）
+
+        Returns:
+            set: 变化的任务ID；日志被轮转或截断时返回 None（需要全量扫描）
+        """
+        inode, size = cls._log_position()
+        if inode is None:
+            return set()
+        if cls._log_inode is None:
+            # 日志在上次检查后才创建，全部记录都是新的
+            cls._log_inode, cls._log_offset = inode, 0
+        elif inode != cls._log_inode or size < cls._log_offset:
+            return None
+        if size == cls._log_offset:
+            return set()
+        try:
+            with open(cls._change_log_path(), 'rb') as f:
+                f.seek(cls._log_offset)
+                chunk = f.read(size - cls._log_offset)
+        except OSError:
+            return None
+        # 只消费完整的行，写到一半的记录留到下次
+        complete = chunk[:chunk.rfind(b'\n') + 1]
+        cls._log_offset += len(complete)
+        return {line for line in complete.decode('utf-8', errors='replace').splitlines() if line}
+
+    @staticmethod
+    def _dir_signature() -> int:
+        try:
+            return os.stat(StorageService.BATCH_TASKS_DIR).st_mtime_ns
+        except OSError:
+            return 0
+
+    # ========== 文件 ==========
+
+    @classmethod
+    def _tasks_dir(cls) -> str:
+        return os.path.join(cls.CUBE_DIR, 'tasks')
+
+    @classmethod
+    def _contribution_path(cls, task_id: str) -> str:
+        return os.path.join(cls._tasks_dir(), f'{safe_filename(str(task_id))}.json')
+
+    @classmethod
+    def _read_contribution(cls, task_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(cls._contribution_path(task_id), 'r', encoding='utf-8') as f:
+                contrib = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return contrib if contrib.get('version') == cls.CUBE_VERSION else None
+
+    @classmethod
+    def _write_contribution(cls, task_id: str, contrib: Dict[str, Any]):
+        path = cls._contribution_path(task_id)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(cls._tasks_dir(), exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(contrib, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"[AggregateCube] 写入贡献失败 {task_id}: {e}")
+
+    @staticmethod
+    def _task_signature(task_id: str) -> Optional[str]:
+        try:
+            st = os.stat(StorageService.get_file_path(StorageService.BATCH_TASKS_DIR, task_id))
+        except OSError:
+            return None
+        return f'{st.st_mtime_ns}-{st.st_size}'
+
+    @staticmethod
+    def _mtime_date(task_id: str) -> str:
+        try:
+            st = os.stat(StorageService.get_file_path(StorageService.BATCH_TASKS_DIR, task_id))
+        except OSError:
+            return time.strftime('%Y-%m-%d')
+        return time.strftime('%Y-%m-%d', time.localtime(st.st_mtime))
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='评估结果聚合立方体维护')
+    parser.add_argument('--rebuild', action='store_true', help='删除全部贡献文件并从任务文件重新计算')
+    args = parser.parse_args()
+
+    if args.rebuild:
+        AggregateCubeService.rebuild()
+    else:
+        AggregateCubeService.ensure_fresh(force=True)
+        print(f"[AggregateCube] {AggregateCubeService.get_status()}")
@@ -26,6 +26,7 @@ from collections import defaultdict
 from .storage_service import StorageService
 from .llm_service import LLMService
 from .database_service import AppDatabaseService
+from .telemetry_writer import TelemetryWriter
 
 
 # 学科ID映射
@@ -877,17 +878,17 @@ class AIAnalysisService:
     @classmethod
     def _log_automation(cls, task_type: str, related_id: str, 
                        status: str, message: str, duration: int = None):
-        """记录自动化日志"""
+        """记录自动化日志（异步批量写入）"""
         try:
-            log_id = str(uuid.uuid4())[:8]
-            sql = """
-                INSERT INTO automation_logs 
-                (log_id, task_type, related_id, status, message, duration_seconds, created_at)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """
-            AppDatabaseService.execute_insert(sql, (
-                log_id, task_type, related_id, status, message, duration, datetime.now()
-            ))
+            TelemetryWriter.submit('automation_logs', {
+                'log_id': str(uuid.uuid4())[:8],
+                'task_type': task_type,
+                'related_id': related_id,
+                'status': status,
+                'message': message,
+                'duration_seconds': duration,
+                'created_at': datetime.now()
+            })
         except Exception as e:
             print(f"[AIAnalysis] 记录日志失败: {e}")
     
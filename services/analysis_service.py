@@ -14,11 +14,15 @@
 """
 import os
 import json
+from collections import Counter
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional, List, Dict, Any
 
 from .storage_service import StorageService
 from .dashboard_service import DashboardService, SUBJECT_MAP
+from .aggregate_cube_service import AggregateCubeService
+from .cube import HeatStore
 
 
 class AnalysisService:
@@ -47,7 +51,7 @@ class AnalysisService:
         
         Args:
             subject_id: 学科ID筛选，None 表示全部学科
-            days: 时间范围，7|30|0(全部)
+            days: 时间范围，7|30|0(全部，即热点日桶保留期 HeatStore.RETENTION_DAYS 天内)
             
         Returns:
             dict: 热点图数据，结构如下：
@@ -77,12 +81,19 @@ class AnalysisService:
                     "time_range": "7天"
                 }
         """
-        # 缓存键
-        cache_key = f'heatmap_{subject_id}_{days}'
-        cached = DashboardService.get_cached(cache_key)
-        if cached is not None:
-            return cached
-        
+        return DashboardService.get_or_compute(
+            f'heatmap_{subject_id}_{days}',
+            lambda: AnalysisService._compute_heatmap(subject_id, days),
+            ttl=3600
+        )
+    
+    @staticmethod
+    def _compute_heatmap(subject_id: Optional[int], days: int) -> Dict[str, Any]:
+        """
+        计算热点图数据（见 get_heatmap）
+
+        热点计数由 AggregateCubeService 在任务保存时按日分桶维护，这里只合并时间窗口内的日桶
+        """
         result = {
             'heatmap': [],
             'total_errors': 0,
@@ -90,76 +101,37 @@ class AnalysisService:
         }
         
         try:
-            # 加载所有批量任务
-            all_tasks = DashboardService._load_all_batch_tasks()
-            
-            # 按时间范围筛选任务
-            if days > 0:
-                filtered_tasks = AnalysisService._filter_tasks_by_days(all_tasks, days)
-            else:
-                filtered_tasks = all_tasks
+            counts = AggregateCubeService.heat_counts(AnalysisService._window_start(days))
             
             # 获取数据集信息用于确定学科
-            datasets = StorageService.get_all_datasets_summary()
-            dataset_subject_map = {ds['dataset_id']: ds.get('subject_id') for ds in datasets}
+            dataset_subject_map = {}
+            if any(key[0] for key in counts):
+                datasets = StorageService.get_all_datasets_summary()
+                dataset_subject_map = {ds['dataset_id']: ds.get('subject_id') for ds in datasets}
             
             # 聚合错误数据: book_id -> page_num -> question_index -> errors
             error_aggregation = {}
             
-            for task in filtered_tasks:
-                for hw_item in task.get('homework_items', []):
-                    # 确定学科ID
-                    item_subject_id = None
-                    matched_dataset = hw_item.get('matched_dataset')
-                    if matched_dataset and matched_dataset in dataset_subject_map:
-                        item_subject_id = dataset_subject_map[matched_dataset]
-                    
-                    # 如果没有匹配数据集，尝试从书名推断
-                    if item_subject_id is None:
-                        book_name = hw_item.get('book_name', '')
-                        item_subject_id = DashboardService._infer_subject_from_book_name(book_name)
-                    
-                    # 学科筛选
-                    if subject_id is not None and item_subject_id != subject_id:
-                        continue
-                    
-                    # 获取书本和页码信息
-                    book_id = hw_item.get('book_id', 'unknown')
-                    book_name = hw_item.get('book_name', '未知书本')
-                    page_num = hw_item.get('page_num', 0)
-                    
-                    # 获取错误列表
-                    evaluation = hw_item.get('evaluation') or {}
-                    errors = evaluation.get('errors') or []
-                    
-                    # 聚合错误
-                    for error in errors:
-                        question_index = error.get('index', 'unknown')
-                        error_type = error.get('error_type', '其他')
-                        
-                        # 初始化聚合结构
-                        if book_id not in error_aggregation:
-                            error_aggregation[book_id] = {
-                                'book_name': book_name,
-                                'subject_id': item_subject_id,
-                                'pages': {}
-                            }
-                        
-                        if page_num not in error_aggregation[book_id]['pages']:
-                            error_aggregation[book_id]['pages'][page_num] = {}
-                        
-                        if question_index not in error_aggregation[book_id]['pages'][page_num]:
-                            error_aggregation[book_id]['pages'][page_num][question_index] = {
-                                'error_count': 0,
-                                'error_types': {}
-                            }
-                        
-                        # 累加错误计数
-                        error_aggregation[book_id]['pages'][page_num][question_index]['error_count'] += 1
-                        
-                        # 累加错误类型计数
-                        error_types = error_aggregation[book_id]['pages'][page_num][question_index]['error_types']
-                        error_types[error_type] = error_types.get(error_type, 0) + 1
+            for (dataset, book_id, book_name, page_num, question_index), errors in counts.items():
+                # 确定学科ID：优先匹配数据集，否则从书名推断
+                item_subject_id = dataset_subject_map.get(dataset) if dataset else None
+                if item_subject_id is None:
+                    item_subject_id = DashboardService._infer_subject_from_book_name(book_name)
+                
+                # 学科筛选
+                if subject_id is not None and item_subject_id != subject_id:
+                    continue
+                
+                if book_id not in error_aggregation:
+                    error_aggregation[book_id] = {
+                        'book_name': book_name or '未知书本',
+                        'subject_id': item_subject_id,
+                        'pages': {}
+                    }
+                questions = error_aggregation[book_id]['pages'].setdefault(page_num, {})
+                if question_index not in questions:
+                    questions[question_index] = Counter()
+                questions[question_index].update(errors)
             
             # 转换为输出格式
             total_errors = 0
@@ -179,15 +151,15 @@ class AnalysisService:
                     # 按题号排序
                     sorted_questions = sorted(questions.items(), key=lambda x: AnalysisService._sort_question_index(x[0]))
                     
-                    for question_index, error_data in sorted_questions:
-                        error_count = error_data['error_count']
+                    for question_index, error_types in sorted_questions:
+                        error_count = sum(error_types.values())
                         heat_level = AnalysisService._calculate_heat_level(error_count)
                         
                         questions_list.append({
                             'index': question_index,
                             'error_count': error_count,
                             'heat_level': heat_level,
-                            'error_types': error_data['error_types']
+                            'error_types': dict(error_types)
                         })
                         
                         page_error_count += error_count
@@ -217,45 +189,26 @@ class AnalysisService:
             result['heatmap'] = heatmap_data
             result['total_errors'] = total_errors
             
-            # 缓存结果 (1小时)
-            DashboardService.set_cached(cache_key, result, ttl=3600)
-            
         except Exception as e:
             print(f"[AnalysisService] 获取热点图数据失败: {e}")
+            return DashboardService.uncacheable(result)
         
         return result
     
     @staticmethod
-    def _filter_tasks_by_days(tasks: List[Dict], days: int) -> List[Dict]:
+    def _window_start(days: int) -> Optional[str]:
         """
-        按天数筛选任务
+        时间窗口起始日期
         
         Args:
-            tasks: 任务列表
             days: 天数，0 表示全部
             
         Returns:
-            list: 筛选后的任务列表
+            str: 起始日期 YYYY-MM-DD（含当天的日桶），全部时返回 None
         """
         if days <= 0:
-            return tasks
-        
-        cutoff_date = datetime.now() - timedelta(days=days)
-        filtered = []
-        
-        for task in tasks:
-            created_at = task.get('created_at', '')
-            if created_at:
-                try:
-                    task_time = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-                    if task_time.tzinfo:
-                        task_time = task_time.replace(tzinfo=None)
-                    if task_time >= cutoff_date:
-                        filtered.append(task)
-                except:
-                    continue
-        
-        return filtered
+            return None
+        return (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
     
     @staticmethod
     def _calculate_heat_level(error_count: int) -> str:
@@ -284,6 +237,7 @@ class AnalysisService:
             return 'low'
     
     @staticmethod
+    @lru_cache(maxsize=4096)
     def _sort_question_index(index: str) -> tuple:
         """
         题号排序辅助函数
@@ -324,7 +278,7 @@ class AnalysisService:
         elif days == 30:
             return '最近30天'
         elif days <= 0:
-            return '全部'
+            return f'全部（最近{HeatStore.RETENTION_DAYS}天）'
         else:
             return f'最近{days}天'
     
@@ -355,48 +309,9 @@ class AnalysisService:
         }
         
         try:
-            # 加载所有批量任务
-            all_tasks = DashboardService._load_all_batch_tasks()
-            
-            # 按时间范围筛选
-            if days > 0:
-                filtered_tasks = AnalysisService._filter_tasks_by_days(all_tasks, days)
-            else:
-                filtered_tasks = all_tasks
-            
-            errors_list = []
-            
-            for task in filtered_tasks:
-                task_id = task.get('task_id', '')
-                task_name = task.get('name', '')
-                
-                for hw_item in task.get('homework_items', []):
-                    # 匹配书本和页码
-                    if hw_item.get('book_id') != book_id:
-                        continue
-                    if hw_item.get('page_num') != page_num:
-                        continue
-                    
-                    # 获取错误列表
-                    evaluation = hw_item.get('evaluation') or {}
-                    errors = evaluation.get('errors') or []
-                    
-                    for error in errors:
-                        # 匹配题号
-                        if error.get('index') != question_index:
-                            continue
-                        
-                        errors_list.append({
-                            'task_id': task_id,
-                            'task_name': task_name,
-                            'homework_id': hw_item.get('homework_id', ''),
-                            'student_name': hw_item.get('student_name', ''),
-                            'error_type': error.get('error_type', ''),
-                            'base_answer': error.get('base_answer', ''),
-                            'base_user': error.get('base_user', ''),
-                            'hw_user': error.get('hw_user', ''),
-                            'created_at': task.get('created_at', '')
-                        })
+            errors_list = AggregateCubeService.heat_records(
+                book_id, page_num, question_index, AnalysisService._window_start(days)
+            )
             
             # 按时间倒序排列
             errors_list.sort(key=lambda x: x.get('created_at', ''), reverse=True)
@@ -12,18 +12,67 @@
 一致性计算：
 - 一致性 = 正常题数 / (总题数 - 全员错误题数) × 100%
 - 排除全员错误的影响，因为可能是数据集标注问题
+
+任务准确率异常的历史基线来自 AggregateCubeService 按日分桶的准确率统计量（Welford），
+异常统计来自 anomaly_log_summary 汇总表（写入 / 确认异常时增量维护）
 """
 import uuid
 import json
 import os
 import re
-import statistics
 from datetime import datetime, timedelta
 from typing import Optional, List, Dict, Any
 from collections import defaultdict
 
 from .database_service import AppDatabaseService
 from .storage_service import StorageService
+from .aggregate_cube_service import AggregateCubeService
+from utils.running_stats import RunningStats
+
+
+_INDEX_DIGITS = re.compile(r'\d+')
+
+
+def _index_homework_result(homework_result) -> Dict[str, Dict]:
+    """
+    homework_result 题号映射（含子题）
+
+    键为原始题号、题号中的第一个数字和 temp_<tempIndex>，先序遍历，后出现的覆盖先出现的
+    """
+    if isinstance(homework_result, str):
+        try:
+            homework_result = json.loads(homework_result)
+        except ValueError:
+            return {}
+    result = {}
+    stack = list(reversed(homework_result)) if isinstance(homework_result, list) else []
+    while stack:
+        hw_item = stack.pop()
+        if not isinstance(hw_item, dict):
+            continue
+        idx = hw_item.get('index')
+        temp_idx = hw_item.get('tempIndex')
+        if idx:
+            result[str(idx)] = hw_item
+            nums = _INDEX_DIGITS.search(str(idx))
+            if nums:
+                result[nums.group()] = hw_item
+        if temp_idx is not None:
+            result[f'temp_{temp_idx}'] = hw_item
+        children = hw_item.get('children')
+        if children:
+            stack.extend(reversed(children))
+    return result
+
+
+def _base_effect_questions(base_effects: List[Dict]) -> List[tuple]:
+    """一页基准效果的 [(题号, 基准题)]，同题号取最后一个，保留首次出现的顺序"""
+    questions = {}
+    for be in base_effects:
+        idx = be.get('index')
+        if idx:
+            questions[str(idx)] = be
+    return [(idx, be) for idx, be in questions.items() if not idx.startswith('temp_')]
 
 
 class AnomalyService:
@@ -43,23 +92,6 @@ class AnomalyService:
     
     # ========== 任务级题目异常检测 ==========
     
-    @staticmethod
-    def _collect_question_indices(data_value: list, result: set = None) -> set:
-        """从 data_value 递归收集所有子题的题号（只收集叶子节点）"""
-        if result is None:
-            result = set()
-        for item in data_value:
-            children = item.get('children', [])
-            if children:
-                # 有子题，递归处理子题
-                AnomalyService._collect_question_indices(children, result)
-            else:
-                # 叶子节点，收集题号
-                idx = item.get('index')
-                if idx:
-                    result.add(str(idx))
-        return result
-    
     @staticmethod
     def detect_question_anomalies(task_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -71,6 +103,9 @@ class AnomalyService:
         3. 低异常：有人批改对的情况下，其他错误类型
         4. 正常：所有人都做对的题目
         
+        单遍统计：每个数据集只加载一次，每个 (数据集, 页码) 的基准题目表只构建一次；
+        homework_result 只在需要补充正确样例时才解析
+        
         Args:
             task_data: 完整的任务数据
             
@@ -96,254 +131,143 @@ class AnomalyService:
                 'anomalies': []
             }
         
-        # 按页码统计作业数
-        page_homework_count = defaultdict(int)
-        for item in completed_items:
-            page_num = item.get('page_num', '?')
-            page_homework_count[page_num] += 1
+        datasets = {}
+        page_questions = {}
+        
+        def questions_of(dataset_id, page_num):
+            key = (dataset_id, str(page_num))
+            if key not in page_questions:
+                if dataset_id not in datasets:
+                    datasets[dataset_id] = StorageService.load_dataset(dataset_id) or {}
+                base_effects = (datasets[dataset_id].get('base_effects') or {}).get(key[1], [])
+                page_questions[key] = _base_effect_questions(base_effects)
+            return page_questions[key]
         
         # 按题目聚合统计 (page_num + question_index)
-        # 使用 evaluation 中的题目信息作为统计依据
-        question_stats = defaultdict(lambda: {
-            'total': 0,
-            'correct': 0,
-            'error': 0,
-            'samples': [],
-            'error_types': defaultdict(int),
-            'error_samples': [],
-            'page_num': '?',
-            'question_index': '?'
-        })
-        
-        # 遍历每个作业，统计正确和错误
+        question_stats = {}
+        
+        def stats_of(page_num, q_index):
+            q_key = f"{page_num}_{q_index}"
+            stats = question_stats.get(q_key)
+            if stats is None:
+                stats = question_stats[q_key] = {
+                    'total': 0, 'correct': 0, 'error': 0, 'samples': [], 'error_types': {}
+                }
+            stats['page_num'] = page_num
+            stats['question_index'] = q_index
+            return stats
+        
         for item in completed_items:
             page_num = item.get('page_num', '?')
             evaluation = item.get('evaluation', {})
             student_id = item.get('student_id', item.get('homework_id', ''))
             student_name = item.get('student_name', '')
             
-            total_questions = evaluation.get('total_questions', 0)
-            correct_count = evaluation.get('correct_count', 0)
-            errors = evaluation.get('errors', [])
-            
-            # 解析 homework_result 获取 AI 识别的答案（用于正确题目）
-            homework_result_str = item.get('homework_result', '[]')
-            try:
-                homework_result = json.loads(homework_result_str) if isinstance(homework_result_str, str) else homework_result_str
-            except:
-                homework_result = []
-            
-            # 构建 homework_result 的索引映射 (index -> item)，支持多种格式
-            hw_result_map = {}
-            def build_hw_map(items):
-                for hw_item in items:
-                    idx = hw_item.get('index')
-                    temp_idx = hw_item.get('tempIndex')
-                    if idx:
-                        hw_result_map[str(idx)] = hw_item
-                        # 也用纯数字索引
-                        import re
-                        nums = re.findall(r'\d+', str(idx))
-                        if nums:
-                            hw_result_map[nums[0]] = hw_item
-                    if temp_idx is not None:
-                        hw_result_map[f'temp_{temp_idx}'] = hw_item
-                    children = hw_item.get('children', [])
-                    if children:
-                        build_hw_map(children)
-            build_hw_map(homework_result)
-            
-            # 获取基准效果（从匹配的数据集中加载）
-            base_effect_map = {}
-            matched_dataset_id = item.get('matched_dataset')
-            if matched_dataset_id:
-                ds_data = StorageService.load_dataset(matched_dataset_id)
-                if ds_data:
-                    page_key = str(page_num)
-                    base_effects = ds_data.get('base_effects', {}).get(page_key, [])
-                    for be in base_effects:
-                        be_idx = be.get('index')
-                        be_temp_idx = be.get('tempIndex')
-                        if be_idx:
-                            base_effect_map[str(be_idx)] = be
-                        if be_temp_idx is not None:
-                            base_effect_map[f'temp_{be_temp_idx}'] = be
-            
-            # 收集错误题目的索引
+            # 错误题目
             error_indices = set()
-            for err in errors:
+            for err in evaluation.get('errors', []):
                 q_index = str(err.get('index', '?'))
                 error_indices.add(q_index)
                 
-                q_key = f"{page_num}_{q_index}"
-                stats = question_stats[q_key]
-                stats['page_num'] = page_num
-                stats['question_index'] = q_index
+                stats = stats_of(page_num, q_index)
                 stats['total'] += 1
                 stats['error'] += 1
                 
                 error_type = err.get('error_type', '未知错误')
-                stats['error_types'][error_type] += 1
+                stats['error_types'][error_type] = stats['error_types'].get(error_type, 0) + 1
                 
-                base_effect = err.get('base_effect', {})
-                ai_result = err.get('ai_result', {})
-                
-                error_sample = {
-                    'student_id': student_id,
-                    'student_name': student_name,
-                    'result': 'error',
-                    'hw_answer': ai_result.get('userAnswer', ''),
-                    'base_answer': base_effect.get('answer', ''),
-                    'base_user': base_effect.get('userAnswer', ''),
-                    'error_type': error_type
-                }
-                stats['error_samples'].append(error_sample)
                 if len(stats['samples']) < 10:
-                    stats['samples'].append(error_sample)
+                    base_effect = err.get('base_effect', {})
+                    stats['samples'].append({
+                        'student_id': student_id,
+                        'student_name': student_name,
+                        'result': 'error',
+                        'hw_answer': err.get('ai_result', {}).get('userAnswer', ''),
+                        'base_answer': base_effect.get('answer', ''),
+                        'base_user': base_effect.get('userAnswer', ''),
+                        'error_type': error_type
+                    })
             
-            # 处理正确的题目：从基准效果中获取所有题目，排除错误的
-            for be_idx, be in base_effect_map.items():
-                if be_idx.startswith('temp_'):
-                    continue  # 跳过 tempIndex 索引，避免重复
-                
+            # 正确题目：基准效果中的题目排除错误的
+            matched_dataset_id = item.get('matched_dataset')
+            if not matched_dataset_id:
+                continue
+            hw_result_map = None
+            for be_idx, be in questions_of(matched_dataset_id, page_num):
                 if be_idx in error_indices:
-                    continue  # 已经在错误中处理过了
+                    continue
                 
-                q_key = f"{page_num}_{be_idx}"
-                stats = question_stats[q_key]
-                stats['page_num'] = page_num
-                stats['question_index'] = be_idx
+                stats = stats_of(page_num, be_idx)
                 stats['total'] += 1
                 stats['correct'] += 1
+                if len(stats['samples']) >= 10:
+                    continue
                 
-                # 获取 AI 识别的答案
-                hw_item = hw_result_map.get(be_idx, {})
-                if not hw_item:
-                    # 尝试用 tempIndex 查找
-                    temp_idx = be.get('tempIndex')
-                    if temp_idx is not None:
-                        hw_item = hw_result_map.get(f'temp_{temp_idx}', {})
-                
-                hw_answer = hw_item.get('userAnswer', '')
-                base_answer = be.get('answer', '')
-                base_user = be.get('userAnswer', '')
+                # 获取 AI 识别的答案，优先按题号，其次按 tempIndex
+                if hw_result_map is None:
+                    hw_result_map = _index_homework_result(item.get('homework_result', '[]'))
+                hw_item = hw_result_map.get(be_idx)
+                if not hw_item and be.get('tempIndex') is not None:
+                    hw_item = hw_result_map.get(f"temp_{be.get('tempIndex')}")
                 
-                correct_sample = {
+                stats['samples'].append({
                     'student_id': student_id,
                     'student_name': student_name,
                     'result': 'correct',
-                    'hw_answer': hw_answer,
-                    'base_answer': base_answer,
-                    'base_user': base_user
-                }
-                if len(stats['samples']) < 10:
-                    stats['samples'].append(correct_sample)
+                    'hw_answer': (hw_item or {}).get('userAnswer', ''),
+                    'base_answer': be.get('answer', ''),
+                    'base_user': be.get('userAnswer', '')
+                })
         
         # 分析异常
         anomalies = []
-        universal_errors = 0
-        high_anomaly = 0
-        low_anomaly = 0
+        counts = {'universal_error': 0, 'high_anomaly': 0, 'low_anomaly': 0}
         normal = 0
         
-        for q_key, stats in question_stats.items():
-            if stats['total'] == 0:
+        for stats in question_stats.values():
+            total, correct, error = stats['total'], stats['correct'], stats['error']
+            if total == 0:
                 continue
             
-            error_rate = stats['error'] / stats['total']
-            page_num = stats.get('page_num', '?')
-            q_index = stats.get('question_index', '?')
-            
-            # 获取该页码的作业总数
-            page_total = page_homework_count.get(page_num, 0)
-            
-            anomaly = None
-            
-            # 1. 全员错误检测（新定义）
-            # 条件：该题目所有学生的AI批改结果都与基准不一致（全部异常）
-            # 即：没有任何一个学生该题是正常的
-            is_universal_error = (
-                error_rate == 1.0 and 
-                stats['total'] >= 2 and 
-                stats['correct'] == 0  # 没有任何正确的
-            )
-            
-            if is_universal_error:
-                # 统计错误类型分布
-                error_type_summary = AnomalyService._format_error_types(stats['error_types'])
-                anomaly = {
-                    'type': 'universal_error',
-                    'severity': 'critical',
-                    'page_num': page_num,
-                    'question_index': q_index,
-                    'error_rate': error_rate,
-                    'sample_count': stats['total'],
-                    'correct_count': stats['correct'],
-                    'error_count': stats['error'],
-                    'error_types': dict(stats['error_types']),
-                    'description': f'全部{stats["total"]}人判错',
-                    'error_type_summary': error_type_summary,
-                    'samples': stats['samples'][:5]
-                }
-                universal_errors += 1
-            
-            # 2. 有人对有人错的情况（不稳定）
-            elif stats['correct'] > 0 and stats['error'] > 0 and stats['total'] >= 2:
-                # 分析错误类型
-                error_types = stats['error_types']
-                high_anomaly_count = sum(error_types.get(t, 0) for t in AnomalyService.HIGH_ANOMALY_ERROR_TYPES)
-                low_anomaly_count = stats['error'] - high_anomaly_count
-                
-                # 判断主要异常类型
-                if high_anomaly_count > 0:
-                    # 高异常：存在"识别正确-判断错误"
-                    error_type_summary = AnomalyService._format_error_types(stats['error_types'])
-                    anomaly = {
-                        'type': 'high_anomaly',
-                        'severity': 'high',
-                        'page_num': page_num,
-                        'question_index': q_index,
-                        'error_rate': error_rate,
-                        'sample_count': stats['total'],
-                        'correct_count': stats['correct'],
-                        'error_count': stats['error'],
-                        'error_types': dict(stats['error_types']),
-                        'description': f'{stats["correct"]}对/{stats["error"]}错，含识别正确-判断错误',
-                        'error_type_summary': error_type_summary,
-                        'samples': stats['samples'][:5]
-                    }
-                    high_anomaly += 1
+            if correct == 0 and error == total and total >= 2:
+                # 全员错误：没有任何一个学生该题是正常的
+                anomaly_type, severity = 'universal_error', 'critical'
+                description = f'全部{total}人判错'
+            elif correct > 0 and error > 0 and total >= 2:
+                # 有人对有人错：存在"识别正确-判断错误"为高异常，其他为低异常
+                if any(stats['error_types'].get(t) for t in AnomalyService.HIGH_ANOMALY_ERROR_TYPES):
+                    anomaly_type, severity = 'high_anomaly', 'high'
+                    description = f'{correct}对/{error}错，含识别正确-判断错误'
                 else:
-                    # 低异常：其他错误类型
-                    error_type_summary = AnomalyService._format_error_types(stats['error_types'])
-                    anomaly = {
-                        'type': 'low_anomaly',
-                        'severity': 'medium',
-                        'page_num': page_num,
-                        'question_index': q_index,
-                        'error_rate': error_rate,
-                        'sample_count': stats['total'],
-                        'correct_count': stats['correct'],
-                        'error_count': stats['error'],
-                        'error_types': dict(stats['error_types']),
-                        'description': f'{stats["correct"]}对/{stats["error"]}错',
-                        'error_type_summary': error_type_summary,
-                        'samples': stats['samples'][:5]
-                    }
-                    low_anomaly += 1
-            
+                    anomaly_type, severity = 'low_anomaly', 'medium'
+                    description = f'{correct}对/{error}错'
             else:
                 normal += 1
+                continue
             
-            if anomaly:
-                anomalies.append(anomaly)
+            counts[anomaly_type] += 1
+            anomalies.append({
+                'type': anomaly_type,
+                'severity': severity,
+                'page_num': stats['page_num'],
+                'question_index': stats['question_index'],
+                'error_rate': error / total,
+                'sample_count': total,
+                'correct_count': correct,
+                'error_count': error,
+                'error_types': dict(stats['error_types']),
+                'description': description,
+                'error_type_summary': AnomalyService._format_error_types(stats['error_types']),
+                'samples': stats['samples'][:5]
+            })
         
         # 按严重程度和错误率排序
         severity_order = {'critical': 0, 'high': 1, 'medium': 2, 'low': 3}
         anomalies.sort(key=lambda x: (severity_order.get(x['severity'], 99), -x['error_rate']))
         
+        universal_errors = counts['universal_error']
         total_questions = len(question_stats)
-        anomaly_count = universal_errors + high_anomaly + low_anomaly
+        anomaly_count = sum(counts.values())
         
         # 计算一致性（排除全员错误）
         effective_questions = total_questions - universal_errors  # 有效题数
@@ -352,8 +276,8 @@ class AnomalyService:
         return {
             'summary': {
                 'universal_errors': universal_errors,
-                'high_anomaly': high_anomaly,
-                'low_anomaly': low_anomaly,
+                'high_anomaly': counts['high_anomaly'],
+                'low_anomaly': counts['low_anomaly'],
                 'normal': normal,
                 'total_questions': total_questions,
                 'anomaly_count': anomaly_count,
@@ -406,15 +330,15 @@ class AnomalyService:
         overall_report = task_data.get('overall_report') or {}
         current_accuracy = overall_report.get('overall_accuracy', 0)
         
-        # 获取历史准确率
-        history_accuracies = AnomalyService._get_history_accuracies(task_id)
+        # 获取历史准确率统计量
+        history = AnomalyService._get_history_stats(task_id)
         
-        if len(history_accuracies) < AnomalyService._config['min_samples']:
+        if history.n < AnomalyService._config['min_samples']:
             return None  # 样本不足，无法检测
         
         # 计算统计值
-        mean_acc = statistics.mean(history_accuracies)
-        std_acc = statistics.stdev(history_accuracies)
+        mean_acc = history.mean
+        std_acc = history.stdev
         
         if std_acc == 0:
             return None  # 标准差为0，无法检测
@@ -449,50 +373,10 @@ class AnomalyService:
         return anomaly
     
     @staticmethod
-    def _get_history_accuracies(exclude_task_id: str = None, days: int = 30) -> List[float]:
-        """获取历史准确率列表"""
-        accuracies = []
-        batch_tasks_dir = StorageService.BATCH_TASKS_DIR
-        
-        if not os.path.exists(batch_tasks_dir):
-            return accuracies
-        
-        cutoff_date = datetime.now() - timedelta(days=days)
-        
-        for filename in os.listdir(batch_tasks_dir):
-            if not filename.endswith('.json'):
-                continue
-            
-            task_id = filename.replace('.json', '')
-            if task_id == exclude_task_id:
-                continue
-            
-            filepath = os.path.join(batch_tasks_dir, filename)
-            try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    task_data = json.load(f)
-                
-                # 检查时间
-                created_at = task_data.get('created_at', '')
-                if created_at:
-                    try:
-                        task_time = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-                        if task_time.tzinfo:
-                            task_time = task_time.replace(tzinfo=None)
-                        if task_time < cutoff_date:
-                            continue
-                    except:
-                        pass
-                
-                # 获取准确率
-                overall_report = task_data.get('overall_report') or {}
-                accuracy = overall_report.get('overall_accuracy')
-                if accuracy is not None:
-                    accuracies.append(accuracy)
-            except:
-                continue
-        
-        return accuracies
+    def _get_history_stats(exclude_task_id: str = None, days: int = 30) -> RunningStats:
+        """获取最近 N 天（按日分桶）历史任务准确率的样本数、均值和方差"""
+        start_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+        return AggregateCubeService.accuracy_moments(start_date, exclude_task_id=exclude_task_id)
     
     @staticmethod
     def _save_anomaly(anomaly: Dict[str, Any]) -> None:
@@ -510,6 +394,21 @@ class AnomalyService:
             anomaly.get('deviation'), anomaly.get('threshold'),
             anomaly.get('message')
         ))
+        AnomalyService._update_summary(anomaly['anomaly_type'], anomaly['severity'], datetime.now().date(), 1, 1)
+    
+    @staticmethod
+    def _update_summary(anomaly_type: str, severity: str, log_date, total: int, unacknowledged: int) -> None:
+        """累加异常统计汇总"""
+        try:
+            AppDatabaseService.execute_update("""
+                INSERT INTO anomaly_log_summary (log_date, anomaly_type, severity, total, unacknowledged)
+                VALUES (%s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE
+                    total = total + VALUES(total),
+                    unacknowledged = unacknowledged + VALUES(unacknowledged)
+            """, (log_date, anomaly_type, severity or '', total, unacknowledged))
+        except Exception as e:
+            print(f"[Anomaly] 更新异常统计汇总失败: {e}")
 
     
     @staticmethod
@@ -598,56 +497,63 @@ class AnomalyService:
     
     @staticmethod
     def acknowledge_anomaly(anomaly_id: str, user_id: int = None) -> bool:
-        """确认异常"""
+        """确认异常（只有本次确实把未确认改为已确认时才扣减汇总的未确认数）"""
         sql = """
             UPDATE anomaly_logs 
             SET is_acknowledged = 1, acknowledged_by = %s, acknowledged_at = NOW()
-            WHERE anomaly_id = %s
+            WHERE anomaly_id = %s AND is_acknowledged = 0
         """
         result = AppDatabaseService.execute_update(sql, (user_id, anomaly_id))
+        if result > 0:
+            row = AppDatabaseService.execute_one("""
+                SELECT anomaly_type, severity, DATE(created_at) AS log_date
+                FROM anomaly_logs WHERE anomaly_id = %s
+            """, (anomaly_id,))
+            if row:
+                AnomalyService._update_summary(row['anomaly_type'], row['severity'], row['log_date'], 0, -1)
         return result > 0
     
     @staticmethod
     def get_statistics() -> Dict[str, Any]:
-        """获取异常统计"""
-        # 未确认数量
-        unack_sql = "SELECT COUNT(*) as count FROM anomaly_logs WHERE is_acknowledged = 0"
-        unack_result = AppDatabaseService.execute_one(unack_sql)
-        unacknowledged = unack_result['count'] if unack_result else 0
-        
-        # 今日异常数
-        today_sql = """
-            SELECT COUNT(*) as count FROM anomaly_logs 
-            WHERE DATE(created_at) = CURDATE()
-        """
-        today_result = AppDatabaseService.execute_one(today_sql)
-        today_count = today_result['count'] if today_result else 0
-        
-        # 按类型统计
-        type_sql = """
-            SELECT anomaly_type, COUNT(*) as count 
-            FROM anomaly_logs 
-            GROUP BY anomaly_type
-        """
-        type_rows = AppDatabaseService.execute_query(type_sql)
-        by_type = {row['anomaly_type']: row['count'] for row in type_rows}
-        
-        # 按严重程度统计
-        severity_sql = """
-            SELECT severity, COUNT(*) as count 
-            FROM anomaly_logs 
-            GROUP BY severity
-        """
-        severity_rows = AppDatabaseService.execute_query(severity_sql)
-        by_severity = {row['severity']: row['count'] for row in severity_rows}
+        """获取异常统计（读 anomaly_log_summary 汇总表，一次查询）"""
+        rows = AppDatabaseService.execute_query("""
+            SELECT log_date, anomaly_type, severity, total, unacknowledged
+            FROM anomaly_log_summary
+        """) or []
+        
+        today = datetime.now().date()
+        unacknowledged = 0
+        today_count = 0
+        by_type = defaultdict(int)
+        by_severity = defaultdict(int)
+        for row in rows:
+            total = int(row['total'] or 0)
+            unacknowledged += int(row['unacknowledged'] or 0)
+            if row['log_date'] == today:
+                today_count += total
+            if total:
+                by_type[row['anomaly_type']] += total
+                by_severity[row['severity']] += total
         
         return {
             'unacknowledged': unacknowledged,
             'today_count': today_count,
-            'by_type': by_type,
-            'by_severity': by_severity
+            'by_type': dict(by_type),
+            'by_severity': dict(by_severity)
         }
     
+    @staticmethod
+    def rebuild_summary() -> int:
+        """从 anomaly_logs 重建异常统计汇总（可重复执行），返回汇总行数"""
+        AppDatabaseService.execute_update("DELETE FROM anomaly_log_summary")
+        return AppDatabaseService.execute_update("""
+            INSERT INTO anomaly_log_summary (log_date, anomaly_type, severity, total, unacknowledged)
+            SELECT DATE(created_at), anomaly_type, COALESCE(severity, ''), COUNT(*),
+                   SUM(CASE WHEN is_acknowledged = 0 THEN 1 ELSE 0 END)
+            FROM anomaly_logs
+            GROUP BY 1, 2, 3
+        """) or 0
+    
     @staticmethod
     def set_threshold(threshold_sigma: float) -> None:
         """设置异常阈值 (US-26.3)"""
@@ -5,18 +5,28 @@
 - 批次间准确率变化曲线
 - 环比/同比对比
 - 基线对比
+- 多任务对比（逐题差异位图）
+
+所有对比都在 AggregateCubeService 维护的任务指纹上计算（任务保存时生成一次），
+不再逐个读取任务文件
 """
-import json
-import os
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
+from typing import List, Dict, Any
+
+from .aggregate_cube_service import AggregateCubeService
+from .cube import question_sort_key
+
 
-from .storage_service import StorageService
+def _accuracy(correct: int, total: int) -> float:
+    return correct / total if total > 0 else 0
 
 
 class BatchCompareService:
     """批次对比分析服务"""
-    
+
+    # 多任务对比的最大任务数（位图按整数返回，保证前端 Number 精确）
+    MAX_COMPARE_TASKS = 50
+
     @staticmethod
     def get_batch_trend(
         subject_id: int = None,
@@ -25,84 +35,44 @@ class BatchCompareService:
     ) -> Dict[str, Any]:
         """
         获取批次准确率趋势 (US-18.1)
-        
+
         Returns:
             dict: {dates, accuracy_data, task_counts}
         """
-        batch_dir = StorageService.BATCH_TASKS_DIR
         daily_stats = {}
-        
         cutoff = datetime.now() - timedelta(days=days)
-        
-        if os.path.exists(batch_dir):
-            for filename in os.listdir(batch_dir):
-                if not filename.endswith('.json'):
-                    continue
-                filepath = os.path.join(batch_dir, filename)
-                try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        task = json.load(f)
-                    
-                    # 筛选条件
-                    if subject_id is not None:
-                        task_subject = task.get('subject_id')
-                        if task_subject != subject_id:
-                            continue
-                    if book_name:
-                        task_book = task.get('book_name') or task.get('dataset_name', '')
-                        if book_name not in task_book:
-                            continue
-                    
-                    # 获取日期
-                    created = task.get('created_at') or task.get('start_time', '')
-                    if not created:
-                        continue
-                    
-                    try:
-                        dt = datetime.fromisoformat(created.replace('Z', '+00:00'))
-                    except:
-                        continue
-                    
-                    if dt < cutoff:
-                        continue
-                    
-                    date_key = dt.strftime('%Y-%m-%d')
-                    
-                    if date_key not in daily_stats:
-                        daily_stats[date_key] = {
-                            'total_questions': 0,
-                            'correct_count': 0,
-                            'task_count': 0
-                        }
-                    
-                    report = task.get('overall_report') or {}
-                    daily_stats[date_key]['total_questions'] += report.get('total_questions', 0)
-                    daily_stats[date_key]['correct_count'] += report.get('correct_count', 0)
-                    daily_stats[date_key]['task_count'] += 1
-                    
-                except Exception:
-                    continue
-        
+
+        for fp in AggregateCubeService.fingerprints().values():
+            # 筛选条件
+            if subject_id is not None and fp['subject_id'] != subject_id:
+                continue
+            if book_name and book_name not in fp['book']:
+                continue
+            if fp['created'] is None or fp['created'] < cutoff:
+                continue
+
+            date_key = fp['created'].strftime('%Y-%m-%d')
+            stats = daily_stats.setdefault(date_key, {'total_questions': 0, 'correct_count': 0, 'task_count': 0})
+            stats['total_questions'] += fp['total_questions']
+            stats['correct_count'] += fp['correct_count']
+            stats['task_count'] += 1
+
         # 排序并计算准确率
         dates = sorted(daily_stats.keys())
         accuracy_data = []
         task_counts = []
-        
+
         for date in dates:
             stats = daily_stats[date]
-            if stats['total_questions'] > 0:
-                acc = stats['correct_count'] / stats['total_questions']
-            else:
-                acc = 0
-            accuracy_data.append(round(acc * 100, 2))
+            accuracy_data.append(round(_accuracy(stats['correct_count'], stats['total_questions']) * 100, 2))
             task_counts.append(stats['task_count'])
-        
+
         return {
             'dates': dates,
             'accuracy_data': accuracy_data,
             'task_counts': task_counts
         }
-    
+
     @staticmethod
     def compare_periods(
         period1_start: str,
@@ -113,67 +83,44 @@ class BatchCompareService:
     ) -> Dict[str, Any]:
         """
         对比两个时间段 (US-33.1 环比/同比)
-        
+
         Returns:
             dict: {period1, period2, change, change_percent}
         """
+        fingerprints = [
+            fp for fp in AggregateCubeService.fingerprints().values()
+            if fp['created'] is not None and (subject_id is None or fp['subject_id'] == subject_id)
+        ]
+
         def get_period_stats(start: str, end: str) -> Dict:
-            batch_dir = StorageService.BATCH_TASKS_DIR
-            total_q = 0
-            correct = 0
-            task_count = 0
-            
             try:
                 start_dt = datetime.fromisoformat(start)
                 end_dt = datetime.fromisoformat(end)
-            except:
+            except (TypeError, ValueError):
                 return {'accuracy': 0, 'total_questions': 0, 'task_count': 0}
-            
-            if os.path.exists(batch_dir):
-                for filename in os.listdir(batch_dir):
-                    if not filename.endswith('.json'):
-                        continue
-                    filepath = os.path.join(batch_dir, filename)
-                    try:
-                        with open(filepath, 'r', encoding='utf-8') as f:
-                            task = json.load(f)
-                        
-                        if subject_id is not None:
-                            if task.get('subject_id') != subject_id:
-                                continue
-                        
-                        created = task.get('created_at') or task.get('start_time', '')
-                        if not created:
-                            continue
-                        
-                        try:
-                            dt = datetime.fromisoformat(created.replace('Z', '+00:00'))
-                        except:
-                            continue
-                        
-                        if not (start_dt <= dt <= end_dt):
-                            continue
-                        
-                        report = task.get('overall_report') or {}
-                        total_q += report.get('total_questions', 0)
-                        correct += report.get('correct_count', 0)
-                        task_count += 1
-                    except:
-                        continue
-            
+
+            total_q = 0
+            correct = 0
+            task_count = 0
+            for fp in fingerprints:
+                if start_dt <= fp['created'] <= end_dt:
+                    total_q += fp['total_questions']
+                    correct += fp['correct_count']
+                    task_count += 1
+
             return {
-                'accuracy': correct / total_q if total_q > 0 else 0,
+                'accuracy': _accuracy(correct, total_q),
                 'total_questions': total_q,
                 'correct_count': correct,
                 'task_count': task_count
             }
-        
+
         p1 = get_period_stats(period1_start, period1_end)
         p2 = get_period_stats(period2_start, period2_end)
-        
+
         change = p2['accuracy'] - p1['accuracy']
         change_percent = (change / p1['accuracy'] * 100) if p1['accuracy'] > 0 else 0
-        
+
         return {
             'period1': {
                 'start': period1_start,
@@ -189,7 +136,7 @@ class BatchCompareService:
             'change_percent': round(change_percent, 2)
         }
 
-    
+
     @staticmethod
     def compare_with_baseline(
         task_id: str,
@@ -197,124 +144,73 @@ class BatchCompareService:
     ) -> Dict[str, Any]:
         """
         与基线对比 (US-33.2)
-        
+
+        逐题对比只覆盖两个任务都评估过的页；做对一方的答案取另一方错误样例中的标准答案
+
         Args:
             task_id: 当前任务ID
             baseline_task_id: 基线任务ID，为空则使用最早的同类任务
-            
+
         Returns:
             dict: {current, baseline, improvements, regressions}
         """
-        batch_dir = StorageService.BATCH_TASKS_DIR
-        
-        # 加载当前任务
-        current_path = os.path.join(batch_dir, f'{task_id}.json')
-        if not os.path.exists(current_path):
+        fingerprints = AggregateCubeService.fingerprints()
+        current = fingerprints.get(task_id)
+        if current is None:
             return {'error': '任务不存在'}
-        
-        with open(current_path, 'r', encoding='utf-8') as f:
-            current_task = json.load(f)
-        
+
         # 查找基线任务
-        baseline_task = None
         if baseline_task_id:
-            baseline_path = os.path.join(batch_dir, f'{baseline_task_id}.json')
-            if os.path.exists(baseline_path):
-                with open(baseline_path, 'r', encoding='utf-8') as f:
-                    baseline_task = json.load(f)
+            baseline = fingerprints.get(baseline_task_id)
         else:
-            # 查找最早的同类任务作为基线
-            book_name = current_task.get('book_name') or current_task.get('dataset_name', '')
-            earliest_time = None
-            
-            for filename in os.listdir(batch_dir):
-                if not filename.endswith('.json') or filename == f'{task_id}.json':
-                    continue
-                filepath = os.path.join(batch_dir, filename)
-                try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        task = json.load(f)
-                    
-                    task_book = task.get('book_name') or task.get('dataset_name', '')
-                    if task_book != book_name:
-                        continue
-                    
-                    created = task.get('created_at') or task.get('start_time', '')
-                    if not created:
-                        continue
-                    
-                    try:
-                        dt = datetime.fromisoformat(created.replace('Z', '+00:00'))
-                    except:
-                        continue
-                    
-                    if earliest_time is None or dt < earliest_time:
-                        earliest_time = dt
-                        baseline_task = task
-                except:
-                    continue
-        
-        if not baseline_task:
+            # 最早的同书本任务作为基线
+            candidates = [fp for t, fp in fingerprints.items()
+                          if t != task_id and fp['book'] == current['book'] and fp['created'] is not None]
+            baseline = min(candidates, key=lambda fp: fp['created']) if candidates else None
+
+        if not baseline:
             return {'error': '未找到基线任务'}
-        
-        # 对比分析
-        current_report = current_task.get('overall_report') or {}
-        baseline_report = baseline_task.get('overall_report') or {}
-        
-        current_acc = current_report.get('correct_count', 0) / current_report.get('total_questions', 1)
-        baseline_acc = baseline_report.get('correct_count', 0) / baseline_report.get('total_questions', 1)
-        
+
+        current_acc = current['correct_count'] / (current['total_questions'] or 1)
+        baseline_acc = baseline['correct_count'] / (baseline['total_questions'] or 1)
+
         # 逐题对比
+        current_cells = AggregateCubeService.task_cells(task_id) or {}
+        baseline_cells = AggregateCubeService.task_cells(baseline['task_id']) or {}
         improvements = []
         regressions = []
-        
-        current_results = {
-            (r.get('page_number', i), q.get('question_number', j)): q
-            for i, r in enumerate(current_task.get('results') or [])
-            for j, q in enumerate(r.get('questions') or [])
-        }
-        
-        baseline_results = {
-            (r.get('page_number', i), q.get('question_number', j)): q
-            for i, r in enumerate(baseline_task.get('results') or [])
-            for j, q in enumerate(r.get('questions') or [])
-        }
-        
-        for key, curr_q in current_results.items():
-            base_q = baseline_results.get(key)
-            if not base_q:
+        for key in _question_keys([current, baseline]):
+            book, page, _ = key
+            if (book, page) not in current['pages'] or (book, page) not in baseline['pages']:
                 continue
-            
-            curr_correct = curr_q.get('is_correct') or curr_q.get('match', False)
-            base_correct = base_q.get('is_correct') or base_q.get('match', False)
-            
-            if curr_correct and not base_correct:
-                improvements.append({
-                    'page': key[0],
-                    'question': key[1],
-                    'baseline_answer': base_q.get('ai_answer', ''),
-                    'current_answer': curr_q.get('ai_answer', '')
-                })
-            elif not curr_correct and base_correct:
-                regressions.append({
-                    'page': key[0],
-                    'question': key[1],
-                    'baseline_answer': base_q.get('ai_answer', ''),
-                    'current_answer': curr_q.get('ai_answer', '')
-                })
-        
+            current_wrong = key in current['questions']
+            baseline_wrong = key in baseline['questions']
+            if current_wrong == baseline_wrong:
+                continue
+            sample = ((baseline_cells if baseline_wrong else current_cells).get(key) or [None] * 5)[4] or {}
+            wrong_answer = sample.get('ai_answer', '')
+            right_answer = sample.get('expected_answer', '')
+            entry = {
+                'book': book,
+                'page': page,
+                'question': key[2],
+                'baseline_answer': wrong_answer if baseline_wrong else right_answer,
+                'current_answer': right_answer if baseline_wrong else wrong_answer
+            }
+            (improvements if baseline_wrong else regressions).append(entry)
+
         return {
             'current': {
                 'task_id': task_id,
                 'accuracy': round(current_acc * 100, 2),
-                'total_questions': current_report.get('total_questions', 0),
-                'created_at': current_task.get('created_at', '')
+                'total_questions': current['total_questions'],
+                'created_at': current['created_at']
             },
             'baseline': {
-                'task_id': baseline_task.get('task_id', ''),
+                'task_id': baseline['task_id'],
                 'accuracy': round(baseline_acc * 100, 2),
-                'total_questions': baseline_report.get('total_questions', 0),
-                'created_at': baseline_task.get('created_at', '')
+                'total_questions': baseline['total_questions'],
+                'created_at': baseline['created_at']
             },
             'change': round((current_acc - baseline_acc) * 100, 2),
             'improvements': improvements[:20],
@@ -322,92 +218,57 @@ class BatchCompareService:
             'improvement_count': len(improvements),
             'regression_count': len(regressions)
         }
-    
+
     @staticmethod
     def get_model_comparison(days: int = 30) -> Dict[str, Any]:
         """
         模型间对比 (US-18.2)
-        
+
         Returns:
             dict: {models: [{name, accuracy, task_count, trend}]}
         """
-        batch_dir = StorageService.BATCH_TASKS_DIR
         model_stats = {}
         cutoff = datetime.now() - timedelta(days=days)
-        
-        if os.path.exists(batch_dir):
-            for filename in os.listdir(batch_dir):
-                if not filename.endswith('.json'):
-                    continue
-                filepath = os.path.join(batch_dir, filename)
-                try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        task = json.load(f)
-                    
-                    model = task.get('model') or task.get('vision_model', 'unknown')
-                    
-                    created = task.get('created_at') or task.get('start_time', '')
-                    if created:
-                        try:
-                            dt = datetime.fromisoformat(created.replace('Z', '+00:00'))
-                            if dt < cutoff:
-                                continue
-                        except:
-                            pass
-                    
-                    if model not in model_stats:
-                        model_stats[model] = {
-                            'name': model,
-                            'total_questions': 0,
-                            'correct_count': 0,
-                            'task_count': 0,
-                            'daily': {}
-                        }
-                    
-                    stats = model_stats[model]
-                    report = task.get('overall_report') or {}
-                    stats['total_questions'] += report.get('total_questions', 0)
-                    stats['correct_count'] += report.get('correct_count', 0)
-                    stats['task_count'] += 1
-                    
-                    # 记录每日数据用于趋势
-                    if created:
-                        try:
-                            date_key = datetime.fromisoformat(created.replace('Z', '+00:00')).strftime('%Y-%m-%d')
-                            if date_key not in stats['daily']:
-                                stats['daily'][date_key] = {'q': 0, 'c': 0}
-                            stats['daily'][date_key]['q'] += report.get('total_questions', 0)
-                            stats['daily'][date_key]['c'] += report.get('correct_count', 0)
-                        except:
-                            pass
-                except:
-                    continue
-        
+
+        for fp in AggregateCubeService.fingerprints().values():
+            created = fp['created']
+            if created is not None and created < cutoff:
+                continue
+
+            model = fp['model']
+            stats = model_stats.setdefault(model, {
+                'name': model,
+                'total_questions': 0,
+                'correct_count': 0,
+                'task_count': 0,
+                'daily': {}
+            })
+            stats['total_questions'] += fp['total_questions']
+            stats['correct_count'] += fp['correct_count']
+            stats['task_count'] += 1
+
+            # 记录每日数据用于趋势
+            if created is not None:
+                daily = stats['daily'].setdefault(created.strftime('%Y-%m-%d'), {'q': 0, 'c': 0})
+                daily['q'] += fp['total_questions']
+                daily['c'] += fp['correct_count']
+
         # 计算准确率和趋势
         models = []
         for model, stats in model_stats.items():
-            accuracy = stats['correct_count'] / stats['total_questions'] if stats['total_questions'] > 0 else 0
-            
+            accuracy = _accuracy(stats['correct_count'], stats['total_questions'])
+
             # 计算趋势（最近7天 vs 之前）
             dates = sorted(stats['daily'].keys())
-            if len(dates) >= 7:
-                recent = dates[-7:]
-                earlier = dates[:-7] if len(dates) > 7 else []
-                
-                recent_q = sum(stats['daily'][d]['q'] for d in recent)
-                recent_c = sum(stats['daily'][d]['c'] for d in recent)
-                recent_acc = recent_c / recent_q if recent_q > 0 else 0
-                
-                if earlier:
-                    earlier_q = sum(stats['daily'][d]['q'] for d in earlier)
-                    earlier_c = sum(stats['daily'][d]['c'] for d in earlier)
-                    earlier_acc = earlier_c / earlier_q if earlier_q > 0 else 0
-                    trend = recent_acc - earlier_acc
-                else:
-                    trend = 0
-            else:
-                trend = 0
-            
+            trend = 0
+            if len(dates) > 7:
+                recent, earlier = dates[-7:], dates[:-7]
+                recent_acc = _accuracy(sum(stats['daily'][d]['c'] for d in recent),
+                                       sum(stats['daily'][d]['q'] for d in recent))
+                earlier_acc = _accuracy(sum(stats['daily'][d]['c'] for d in earlier),
+                                        sum(stats['daily'][d]['q'] for d in earlier))
+                trend = recent_acc - earlier_acc
+
             models.append({
                 'name': model,
                 'accuracy': round(accuracy * 100, 2),
@@ -415,7 +276,118 @@ class BatchCompareService:
                 'total_questions': stats['total_questions'],
                 'trend': round(trend * 100, 2)
             })
-        
+
         models.sort(key=lambda x: x['accuracy'], reverse=True)
-        
+
         return {'models': models}
+
+    @staticmethod
+    def compare_tasks(task_ids: List[str], reference_task_id: str = None) -> Dict[str, Any]:
+        """
+        多任务对比
+
+        位图的第 i 位对应 tasks[i]：
+        - covered_bitmap: 评估过该题所在页的任务
+        - wrong_bitmap: 该题出错的任务
+        - diff_bitmap: 结果与参照任务不同的任务（参照任务未评估该页时为 0）
+        questions 只列出各任务结果不一致的题目，question_count 为至少一个任务出错的题目数
+
+        Args:
+            task_ids: 任务ID列表（2 ~ MAX_COMPARE_TASKS 个）
+            reference_task_id: 参照任务，为空时取第一个
+
+        Returns:
+            dict: {reference_task_id, tasks, error_types, questions, question_count, diff_count}
+        """
+        task_ids = list(dict.fromkeys(task_ids or []))
+        if len(task_ids) < 2:
+            return {'error': '至少需要 2 个任务'}
+        if len(task_ids) > BatchCompareService.MAX_COMPARE_TASKS:
+            return {'error': f'最多对比 {BatchCompareService.MAX_COMPARE_TASKS} 个任务'}
+        reference_task_id = reference_task_id or task_ids[0]
+        if reference_task_id not in task_ids:
+            return {'error': '参照任务不在对比列表中'}
+
+        fingerprints = AggregateCubeService.fingerprints(task_ids)
+        missing = [t for t in task_ids if t not in fingerprints]
+        if missing:
+            return {'error': f"任务不存在: {', '.join(missing)}"}
+        fps = [fingerprints[t] for t in task_ids]
+        ref = task_ids.index(reference_task_id)
+        ref_bit = 1 << ref
+
+        improvements = [0] * len(fps)
+        regressions = [0] * len(fps)
+        questions = []
+        keys = _question_keys(fps)
+        for key in keys:
+            book, page, question = key
+            covered = wrong = 0
+            for i, fp in enumerate(fps):
+                if (book, page) in fp['pages']:
+                    covered |= 1 << i
+                if key in fp['questions']:
+                    wrong |= 1 << i
+            if wrong == 0 or wrong == covered:
+                continue
+
+            diff = 0
+            if covered & ref_bit:
+                diff = (wrong ^ (covered if wrong & ref_bit else 0)) & covered
+                for i in range(len(fps)):
+                    if diff >> i & 1:
+                        if wrong & ref_bit:
+                            improvements[i] += 1
+                        else:
+                            regressions[i] += 1
+            questions.append({
+                'book': book,
+                'page': page,
+                'question': question,
+                'covered_bitmap': covered,
+                'wrong_bitmap': wrong,
+                'diff_bitmap': diff,
+                'error_counts': [fp['questions'].get(key, 0) for fp in fps]
+            })
+
+        error_types = {}
+        for i, fp in enumerate(fps):
+            for error_type, count in fp['errors'].items():
+                error_types.setdefault(error_type, [0] * len(fps))[i] = count
+
+        ref_acc = _accuracy(fps[ref]['correct_count'], fps[ref]['total_questions'])
+        tasks = []
+        for i, fp in enumerate(fps):
+            acc = _accuracy(fp['correct_count'], fp['total_questions'])
+            tasks.append({
+                'task_id': fp['task_id'],
+                'name': fp['name'],
+                'created_at': fp['created_at'],
+                'subject_id': fp['subject_id'],
+                'book': fp['book'],
+                'model': fp['model'],
+                'prompts': {key: version for key, version in fp['prompts']},
+                'accuracy': round(acc * 100, 2),
+                'total_questions': fp['total_questions'],
+                'correct_count': fp['correct_count'],
+                'change': round((acc - ref_acc) * 100, 2),
+                'improvement_count': improvements[i],
+                'regression_count': regressions[i]
+            })
+
+        return {
+            'reference_task_id': reference_task_id,
+            'tasks': tasks,
+            'error_types': error_types,
+            'questions': questions,
+            'question_count': len(keys),
+            'diff_count': len(questions)
+        }
+
+
+def _question_keys(fingerprints: List[Dict[str, Any]]) -> List[tuple]:
+    """指纹中出过错的题目 (book, page, question)，按书本、页码、题号自然排序"""
+    keys = set()
+    for fp in fingerprints:
+        keys.update(fp['questions'])
+    return sorted(keys, key=lambda k: (k[0], question_sort_key(k[1]), question_sort_key(k[2])))
@@ -5,20 +5,101 @@
 - Prompt版本管理
 - 最佳实践标记和收藏
 - 效果对比
+
+实践数据常驻内存并维护分类 / 标签 / 星标索引，practices.json 按文件签名（mtime/inode/size）
+检测外部变化后重新加载；使用次数追加写入 usage.jsonl，累积到阈值后由后台线程合并进
+practices.json，记录使用不再重写整个文件
 """
 import json
 import os
+import threading
+from collections import defaultdict
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Set
 
 from .storage_service import StorageService
 
 
+class _PracticeIndex:
+    """内存中的实践集合，及分类 / 标签 / 星标索引"""
+
+    def __init__(self, practices: List[Dict] = ()):
+        self.practices: Dict[str, Dict] = {}
+        # 实践在文件中的顺序，排序时同分保持文件顺序
+        self.position: Dict[str, int] = {}
+        self.by_category: Dict[str, Set[str]] = defaultdict(set)
+        self.by_tag: Dict[str, Set[str]] = defaultdict(set)
+        self.starred: Set[str] = set()
+        self._next_position = 0
+        for practice in practices:
+            self.add(practice)
+
+    def add(self, practice: Dict, position: int = None) -> None:
+        practice_id = practice.get('id')
+        if position is None:
+            position = self._next_position
+            self._next_position += 1
+        self.practices[practice_id] = practice
+        self.position[practice_id] = position
+        self.by_category[practice.get('category', '未分类')].add(practice_id)
+        for tag in practice.get('tags') or []:
+            self.by_tag[tag].add(practice_id)
+        if practice.get('is_starred'):
+            self.starred.add(practice_id)
+
+    def remove(self, practice_id: str) -> Optional[Dict]:
+        practice = self.practices.pop(practice_id, None)
+        if practice is None:
+            return None
+        self.position.pop(practice_id, None)
+        self._discard(self.by_category, practice.get('category', '未分类'), practice_id)
+        for tag in practice.get('tags') or []:
+            self._discard(self.by_tag, tag, practice_id)
+        self.starred.discard(practice_id)
+        return practice
+
+    def update(self, practice_id: str, changes: Dict) -> Dict:
+        """修改单个实践并重建其索引（保持原顺序）"""
+        practice = self.practices[practice_id]
+        position = self.position[practice_id]
+        self.remove(practice_id)
+        practice.update(changes)
+        self.add(practice, position)
+        return practice
+
+    def ordered(self) -> List[Dict]:
+        """按文件顺序返回全部实践"""
+        return sorted(self.practices.values(), key=lambda p: self.position[p.get('id')])
+
+    @staticmethod
+    def _discard(index: Dict[str, Set[str]], key: str, practice_id: str) -> None:
+        ids = index.get(key)
+        if ids is None:
+            return
+        ids.discard(practice_id)
+        if not ids:
+            del index[key]
+
+
 class BestPracticeService:
     """最佳实践库服务"""
     
     PRACTICES_DIR = 'best_practices'
     PRACTICES_FILE = 'practices.json'
+    USAGE_LOG_FILE = 'usage.jsonl'
+    # 未合并的使用记录达到该条数时后台合并进 practices.json
+    USAGE_COMPACT_THRESHOLD = 200
+    
+    _lock = threading.RLock()
+    _index: Optional[_PracticeIndex] = None
+    # practices.json 的 (路径, mtime_ns, inode, size)，文件不存在时为 (路径,)
+    _signature = None
+    # 已应用到内存的使用日志 inode 和字节偏移
+    _usage_inode = None
+    _usage_offset = 0
+    # 尚未合并进 practices.json 的使用记录数
+    _usage_pending = 0
+    _compact_thread = None
     
     @staticmethod
     def _get_filepath() -> str:
@@ -27,23 +108,141 @@ class BestPracticeService:
         return os.path.join(BestPracticeService.PRACTICES_DIR, BestPracticeService.PRACTICES_FILE)
     
     @staticmethod
-    def _load_practices() -> List[Dict]:
-        """加载最佳实践数据"""
-        filepath = BestPracticeService._get_filepath()
-        if os.path.exists(filepath):
+    def _get_usage_log_path() -> str:
+        return os.path.join(BestPracticeService.PRACTICES_DIR, BestPracticeService.USAGE_LOG_FILE)
+    
+    @staticmethod
+    def _file_signature(filepath: str) -> tuple:
+        try:
+            st = os.stat(filepath)
+        except OSError:
+            return (filepath,)
+        return (filepath, st.st_mtime_ns, st.st_ino, st.st_size)
+    
+    @staticmethod
+    def _ensure_loaded() -> _PracticeIndex:
+        """返回内存索引，practices.json 变化时重新加载，并应用新追加的使用记录"""
+        cls = BestPracticeService
+        with cls._lock:
+            filepath = cls._get_filepath()
+            signature = cls._file_signature(filepath)
+            if cls._index is None or signature != cls._signature:
+                practices = []
+                if os.path.exists(filepath):
+                    try:
+                        with open(filepath, 'r', encoding='utf-8') as f:
+                            practices = json.load(f)
+                    except:
+                        pass
+                cls._index = _PracticeIndex(practices)
+                cls._signature = signature
+                cls._usage_inode = None
+                cls._usage_offset = 0
+                cls._usage_pending = 0
+            cls._apply_usage_log(cls._get_usage_log_path())
+            return cls._index
+    
+    @staticmethod
+    def _apply_usage_log(log_path: str) -> None:
+        """把使用日志中尚未读取的记录累加到内存（只读取上次偏移之后的完整行）"""
+        cls = BestPracticeService
+        try:
+            st = os.stat(log_path)
+        except OSError:
+            return
+        if st.st_ino != cls._usage_inode or st.st_size < cls._usage_offset:
+            # 新日志文件（首次读取或已被合并轮换）
+            cls._usage_inode = st.st_ino
+            cls._usage_offset = 0
+        if st.st_size == cls._usage_offset:
+            return
+        
+        with open(log_path, 'rb') as f:
+            f.seek(cls._usage_offset)
+            data = f.read()
+        consumed = data.rfind(b'\n') + 1
+        if not consumed:
+            return
+        cls._usage_offset += consumed
+        
+        practices = cls._index.practices
+        for line in data[:consumed].splitlines():
             try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            cls._usage_pending += 1
+            practice = practices.get(entry.get('id'))
+            if practice is None:
+                continue
+            practice['usage_count'] = practice.get('usage_count', 0) + 1
+            if entry.get('at', '') > practice.get('last_used_at', ''):
+                practice['last_used_at'] = entry['at']
+    
+    @staticmethod
+    def _save_practices() -> None:
+        """
+        把内存中的实践（含已累加的使用次数）写回 practices.json
+        
+        先轮换使用日志再写文件：轮换前追加的记录在写入前读入内存，轮换后的记录进入新日志
+        """
+        cls = BestPracticeService
+        with cls._lock:
+            log_path = cls._get_usage_log_path()
+            compacting = f'{log_path}.{os.getpid()}.compact'
+            rotated = False
+            try:
+                # 其他 worker 可能刚把日志轮换走
+                os.replace(log_path, compacting)
+                rotated = True
+            except FileNotFoundError:
                 pass
-        return []
+            if rotated:
+                cls._apply_usage_log(compacting)
+            
+            filepath = cls._get_filepath()
+            tmp_path = f'{filepath}.{os.getpid()}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(cls._index.ordered(), f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, filepath)
+            
+            if rotated:
+                os.remove(compacting)
+            cls._signature = cls._file_signature(filepath)
+            cls._usage_inode = None
+            cls._usage_offset = 0
+            cls._usage_pending = 0
+    
+    @staticmethod
+    def compact_usage() -> int:
+        """把使用日志合并进 practices.json，返回合并的记录数"""
+        cls = BestPracticeService
+        with cls._lock:
+            cls._ensure_loaded()
+            pending = cls._usage_pending
+            if pending:
+                cls._save_practices()
+            return pending
     
     @staticmethod
-    def _save_practices(practices: List[Dict]):
-        """保存最佳实践数据"""
-        filepath = BestPracticeService._get_filepath()
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(practices, f, ensure_ascii=False, indent=2)
+    def _schedule_compaction() -> None:
+        """后台合并使用日志（同一时间只有一个合并线程）"""
+        cls = BestPracticeService
+        with cls._lock:
+            if cls._compact_thread is not None and cls._compact_thread.is_alive():
+                return
+            cls._compact_thread = threading.Thread(
+                target=cls._compact_worker, name='best-practice-compact', daemon=True
+            )
+            cls._compact_thread.start()
+    
+    @staticmethod
+    def _compact_worker() -> None:
+        try:
+            merged = BestPracticeService.compact_usage()
+            print(f"[BestPractice] 已合并 {merged} 条使用记录")
+        except Exception as e:
+            print(f"[BestPractice] 合并使用记录失败: {e}")
     
     @staticmethod
     def add_practice(
@@ -57,8 +256,6 @@ class BestPracticeService:
         """
         添加最佳实践 (US-16.1)
         """
-        practices = BestPracticeService._load_practices()
-        
         practice_id = f"bp_{datetime.now().strftime('%Y%m%d%H%M%S')}"
         
         practice = {
@@ -76,10 +273,11 @@ class BestPracticeService:
             'usage_count': 0
         }
         
-        practices.append(practice)
-        BestPracticeService._save_practices(practices)
+        with BestPracticeService._lock:
+            BestPracticeService._ensure_loaded().add(practice)
+            BestPracticeService._save_practices()
         
-        return {'success': True, 'practice': practice}
+        return {'success': True, 'practice': dict(practice)}
     
     @staticmethod
     def get_practices(
@@ -89,15 +287,25 @@ class BestPracticeService:
     ) -> List[Dict]:
         """
         获取最佳实践列表 (US-16.2)
-        """
-        practices = BestPracticeService._load_practices()
         
-        if category:
-            practices = [p for p in practices if p.get('category') == category]
-        if tag:
-            practices = [p for p in practices if tag in p.get('tags', [])]
-        if starred_only:
-            practices = [p for p in practices if p.get('is_starred')]
+        通过分类 / 标签 / 星标索引取候选集，只对结果排序
+        """
+        with BestPracticeService._lock:
+            index = BestPracticeService._ensure_loaded()
+            
+            candidates = None
+            for ids in (index.by_category.get(category, set()) if category else None,
+                        index.by_tag.get(tag, set()) if tag else None,
+                        index.starred if starred_only else None):
+                if ids is not None:
+                    candidates = set(ids) if candidates is None else candidates & ids
+            
+            if candidates is None:
+                practices = index.ordered()
+            else:
+                practices = sorted((index.practices[pid] for pid in candidates),
+                                   key=lambda p: index.position[p.get('id')])
+            practices = [dict(p) for p in practices]
         
         # 按使用次数和星标排序
         practices.sort(key=lambda x: (x.get('is_starred', False), x.get('usage_count', 0)), reverse=True)
@@ -107,11 +315,9 @@ class BestPracticeService:
     @staticmethod
     def get_practice(practice_id: str) -> Optional[Dict]:
         """获取单个最佳实践"""
-        practices = BestPracticeService._load_practices()
-        for p in practices:
-            if p.get('id') == practice_id:
-                return p
-        return None
+        with BestPracticeService._lock:
+            practice = BestPracticeService._ensure_loaded().practices.get(practice_id)
+            return dict(practice) if practice is not None else None
     
     @staticmethod
     def update_practice(
@@ -121,63 +327,70 @@ class BestPracticeService:
         """
         更新最佳实践 (US-16.3)
         """
-        practices = BestPracticeService._load_practices()
-        
-        for i, p in enumerate(practices):
-            if p.get('id') == practice_id:
-                # 如果prompt内容变化，增加版本号
-                if 'prompt_content' in updates and updates['prompt_content'] != p.get('prompt_content'):
-                    p['version'] = p.get('version', 1) + 1
-                
-                p.update(updates)
-                p['updated_at'] = datetime.now().isoformat()
-                practices[i] = p
-                BestPracticeService._save_practices(practices)
-                return {'success': True, 'practice': p}
-        
-        return {'success': False, 'error': '实践不存在'}
+        with BestPracticeService._lock:
+            index = BestPracticeService._ensure_loaded()
+            p = index.practices.get(practice_id)
+            if p is None:
+                return {'success': False, 'error': '实践不存在'}
+            
+            changes = {}
+            # 如果prompt内容变化，增加版本号
+            if 'prompt_content' in updates and updates['prompt_content'] != p.get('prompt_content'):
+                changes['version'] = p.get('version', 1) + 1
+            
+            changes.update(updates)
+            changes['updated_at'] = datetime.now().isoformat()
+            index.update(practice_id, changes)
+            BestPracticeService._save_practices()
+            return {'success': True, 'practice': dict(p)}
     
     @staticmethod
     def toggle_star(practice_id: str) -> Dict[str, Any]:
         """切换星标状态"""
-        practices = BestPracticeService._load_practices()
-        
-        for i, p in enumerate(practices):
-            if p.get('id') == practice_id:
-                p['is_starred'] = not p.get('is_starred', False)
-                practices[i] = p
-                BestPracticeService._save_practices(practices)
-                return {'success': True, 'is_starred': p['is_starred']}
-        
-        return {'success': False, 'error': '实践不存在'}
+        with BestPracticeService._lock:
+            index = BestPracticeService._ensure_loaded()
+            p = index.practices.get(practice_id)
+            if p is None:
+                return {'success': False, 'error': '实践不存在'}
+            
+            index.update(practice_id, {'is_starred': not p.get('is_starred', False)})
+            BestPracticeService._save_practices()
+            return {'success': True, 'is_starred': p['is_starred']}
     
     @staticmethod
     def delete_practice(practice_id: str) -> Dict[str, Any]:
         """删除最佳实践"""
-        practices = BestPracticeService._load_practices()
-        
-        for i, p in enumerate(practices):
-            if p.get('id') == practice_id:
-                practices.pop(i)
-                BestPracticeService._save_practices(practices)
-                return {'success': True}
-        
-        return {'success': False, 'error': '实践不存在'}
+        with BestPracticeService._lock:
+            index = BestPracticeService._ensure_loaded()
+            if index.remove(practice_id) is None:
+                return {'success': False, 'error': '实践不存在'}
+            BestPracticeService._save_practices()
+            return {'success': True}
     
     @staticmethod
     def record_usage(practice_id: str) -> Dict[str, Any]:
-        """记录使用次数"""
-        practices = BestPracticeService._load_practices()
+        """
+        记录使用次数
         
-        for i, p in enumerate(practices):
-            if p.get('id') == practice_id:
-                p['usage_count'] = p.get('usage_count', 0) + 1
-                p['last_used_at'] = datetime.now().isoformat()
-                practices[i] = p
-                BestPracticeService._save_practices(practices)
-                return {'success': True, 'usage_count': p['usage_count']}
+        只向使用日志追加一行，累积到 USAGE_COMPACT_THRESHOLD 条后在后台合并进 practices.json
+        """
+        cls = BestPracticeService
+        with cls._lock:
+            index = cls._ensure_loaded()
+            if practice_id not in index.practices:
+                return {'success': False, 'error': '实践不存在'}
+            
+            entry = json.dumps({'id': practice_id, 'at': datetime.now().isoformat()}, ensure_ascii=False)
+            with open(cls._get_usage_log_path(), 'a', encoding='utf-8') as f:
+                f.write(entry + '\n')
+            # 读回日志尾部（含其他进程追加的记录）
+            cls._apply_usage_log(cls._get_usage_log_path())
+            
+            usage_count = index.practices[practice_id].get('usage_count', 0)
+            if cls._usage_pending >= cls.USAGE_COMPACT_THRESHOLD:
+                cls._schedule_compaction()
         
-        return {'success': False, 'error': '实践不存在'}
+        return {'success': True, 'usage_count': usage_count}
 
     
     @staticmethod
@@ -260,18 +473,14 @@ class BestPracticeService:
     @staticmethod
     def get_categories() -> List[str]:
         """获取所有分类"""
-        practices = BestPracticeService._load_practices()
-        categories = set(p.get('category', '未分类') for p in practices)
-        return sorted(list(categories))
+        with BestPracticeService._lock:
+            return sorted(BestPracticeService._ensure_loaded().by_category)
     
     @staticmethod
     def get_tags() -> List[str]:
         """获取所有标签"""
-        practices = BestPracticeService._load_practices()
-        tags = set()
-        for p in practices:
-            tags.update(p.get('tags', []))
-        return sorted(list(tags))
+        with BestPracticeService._lock:
+            return sorted(BestPracticeService._ensure_loaded().by_tag)
     
     @staticmethod
     def import_from_task(task_id: str, name: str = None) -> Dict[str, Any]:
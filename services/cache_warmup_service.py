@@ -0,0 +1,246 @@
+"""
+缓存预热模块
+
+worker 启动后在低优先级后台线程中依次加载冷启动代价高的缓存，
+避免部署或 worker 回收（如 gunicorn max_requests）后首批访问者承担全部加载耗时：
+- 预热项以声明式列表维护，包含优先级和单项时间预算
+- 按优先级顺序执行，单项超出预算后不再等待，继续下一项
+- 预热状态通过 /api/health 报告，全部完成（或跳过）后 ready 为 True
+"""
+import os
+import time
+import threading
+import importlib
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+
+# 预热项：priority 越小越先执行，budget 为单项最长等待时间（秒）
+# target 为 "模块路径:可调用对象"，执行时才导入，避免服务层依赖路由模块
+WARMABLES: List[Dict[str, Any]] = [
+    {
+        'name': 'all_batch_tasks',
+        'target': 'services.dashboard_service:DashboardService._load_all_batch_tasks',
+        'priority': 10,
+        'budget': 60,
+    },
+    {
+        'name': 'task_summaries',
+        'target': 'routes.batch_evaluation:get_cached_task_summaries',
+        'priority': 20,
+        'budget': 60,
+    },
+    {
+        'name': 'datasets_summary',
+        'target': 'services.storage_service:StorageService.get_all_datasets_summary',
+        'priority': 30,
+        'budget': 30,
+    },
+    {
+        'name': 'search_index',
+        'target': 'services.search_index_service:SearchIndexService.ensure_loaded',
+        'priority': 35,
+        'budget': 30,
+    },
+    {
+        'name': 'zpsmart_books',
+        'target': 'routes.batch_evaluation:get_book_list',
+        'priority': 40,
+        'budget': 20,
+    },
+    {
+        'name': 'dashboard_overview',
+        'target': 'services.dashboard_service:DashboardService.get_overview',
+        'priority': 50,
+        'budget': 30,
+    },
+]
+
+
+class CacheWarmupService:
+    """
+    缓存预热服务
+
+    所有方法均为类方法，每个进程（gunicorn worker）各自预热一次。
+
+    Attributes:
+        ENABLED: 是否启用预热（环境变量 CACHE_WARMUP=false 关闭）
+        START_DELAY: 启动后延迟开始的秒数，让 worker 先完成启动并接收请求
+        TOTAL_BUDGET: 整体预热最长时间（秒），超出后剩余项标记为 skipped
+        NICE_INCREMENT: 预热线程的调度优先级降低值（仅 Linux 生效）
+    """
+
+    ENABLED = os.environ.get('CACHE_WARMUP', 'true').lower() == 'true'
+    START_DELAY = float(os.environ.get('CACHE_WARMUP_DELAY', 1.0))
+    TOTAL_BUDGET = float(os.environ.get('CACHE_WARMUP_BUDGET', 180))
+    NICE_INCREMENT = 10
+
+    _lock = threading.Lock()
+    _thread: Optional[threading.Thread] = None
+    _state: Dict[str, Any] = {
+        'status': 'pending',
+        'started_at': None,
+        'finished_at': None,
+        'duration_ms': None,
+        'items': {}
+    }
+
+    # ========== 公共接口 ==========
+
+    @classmethod
+    def start(cls, warmables: List[Dict[str, Any]] = None, delay: float = None) -> bool:
+        """
+        启动后台预热线程（重复调用只启动一次）
+
+        Args:
+            warmables: 预热项列表，默认为 WARMABLES
+            delay: 延迟开始的秒数，默认为 START_DELAY
+
+        Returns:
+            bool: 本次是否启动了线程
+        """
+        if not cls.ENABLED:
+            cls._state['status'] = 'disabled'
+            return False
+
+        with cls._lock:
+            if cls._thread is not None:
+                return False
+            items = sorted(warmables if warmables is not None else WARMABLES, key=lambda w: w.get('priority', 100))
+            cls._state = {
+                'status': 'pending',
+                'started_at': None,
+                'finished_at': None,
+                'duration_ms': None,
+                'items': {w['name']: {'status': 'pending', 'priority': w.get('priority', 100),
+                                      'budget': w.get('budget'), 'duration_ms': None, 'error': None}
+                          for w in items}
+            }
+            cls._thread = threading.Thread(
+                target=cls._run,
+                args=(items, cls.START_DELAY if delay is None else delay),
+                name='cache-warmup',
+                daemon=True
+            )
+            cls._thread.start()
+        print(f"[Warmup] 缓存预热已启动，共 {len(items)} 项")
+        return True
+
+    @classmethod
+    def is_ready(cls) -> bool:
+        """预热是否已结束（完成或关闭）"""
+        return cls._state['status'] in ('ready', 'disabled')
+
+    @classmethod
+    def get_status(cls) -> Dict[str, Any]:
+        """获取预热状态"""
+        state = cls._state
+        return {
+            'ready': cls.is_ready(),
+            'status': state['status'],
+            'started_at': state['started_at'],
+            'finished_at': state['finished_at'],
+            'duration_ms': state['duration_ms'],
+            'items': {name: dict(item) for name, item in state['items'].items()}
+        }
+
+    @classmethod
+    def wait(cls, timeout: float = None) -> bool:
+        """等待预热线程结束，返回是否已就绪"""
+        thread = cls._thread
+        if thread is not None:
+            thread.join(timeout)
+        return cls.is_ready()
+
+    @classmethod
+    def reset(cls):
+        """重置状态（测试用，不会中断正在运行的线程）"""
+        with cls._lock:
+            cls._thread = None
+            cls._state = {'status': 'pending', 'started_at': None, 'finished_at': None,
+                          'duration_ms': None, 'items': {}}
+
+    # ========== 内部实现 ==========
+
+    @staticmethod
+    def _resolve(target):
+        """解析 "模块路径:属性路径" 为可调用对象"""
+        if callable(target):
+            return target
+        module_path, _, attr_path = target.partition(':')
+        obj = importlib.import_module(module_path)
+        for attr in attr_path.split('.'):
+            obj = getattr(obj, attr)
+        return obj
+
+    @classmethod
+    def _lower_priority(cls):
+        """
+        把当前线程的 nice 值设为主线程 + NICE_INCREMENT，避免与请求线程争抢 CPU
+
+        设置的是绝对值（以主线程为基准），子线程继承已降低的 nice 值后再次调用也不会叠加
+        """
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(),
+                           os.getpriority(os.PRIO_PROCESS, os.getpid()) + cls.NICE_INCREMENT)
+        except (AttributeError, OSError):
+            pass
+
+    @classmethod
+    def _run(cls, items: List[Dict[str, Any]], delay: float):
+        cls._lower_priority()
+        if delay:
+            time.sleep(delay)
+
+        state = cls._state
+        state['status'] = 'running'
+        state['started_at'] = datetime.now().isoformat()
+        started = time.perf_counter()
+        deadline = time.monotonic() + cls.TOTAL_BUDGET
+
+        for warmable in items:
+            item = state['items'][warmable['name']]
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                item['status'] = 'skipped'
+                item['error'] = '超出整体预热时间'
+                continue
+            budget = min(warmable.get('budget') or remaining, remaining)
+            cls._run_item(warmable, item, budget)
+
+        state['duration_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        state['finished_at'] = datetime.now().isoformat()
+        state['status'] = 'ready'
+        failed = [name for name, item in state['items'].items() if item['status'] != 'ok']
+        print(f"[Warmup] 缓存预热完成，耗时 {state['duration_ms']}ms" +
+              (f"，未完成: {', '.join(failed)}" if failed else ''))
+
+    @classmethod
+    def _run_item(cls, warmable: Dict[str, Any], item: Dict[str, Any], budget: float):
+        """
+        执行单个预热项
+
+        在独立线程中执行，超出预算后不再等待（线程继续在后台完成并写入缓存）。
+        """
+        done = threading.Event()
+        started = time.perf_counter()
+        item['status'] = 'running'
+
+        def target():
+            try:
+                cls._lower_priority()
+                cls._resolve(warmable['target'])(*warmable.get('args', ()))
+                item['status'] = 'ok'
+            except Exception as e:
+                item['status'] = 'error'
+                item['error'] = str(e)
+                print(f"[Warmup] 预热 {warmable['name']} 失败: {e}")
+            finally:
+                item['duration_ms'] = round((time.perf_counter() - started) * 1000, 1)
+                done.set()
+
+        threading.Thread(target=target, name=f"cache-warmup-{warmable['name']}", daemon=True).start()
+        if not done.wait(budget):
+            item['status'] = 'timeout'
+            item['error'] = f'超出预算 {budget:.0f}s'
+            print(f"[Warmup] 预热 {warmable['name']} 超出预算 {budget:.0f}s，继续下一项")
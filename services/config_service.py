@@ -3,9 +3,15 @@
 提供配置文件和提示词文件的读写操作
 支持环境变量覆盖敏感配置
 支持从请求头获取API密钥（浏览器localStorage存储）
+config.json 按 mtime/inode 缓存，用户API密钥按 TTL 缓存，
+并用共享的戳文件让其他 worker 中的缓存在密钥保存后立即失效
 """
 import os
+import copy
 import json
+import time
+import threading
+from collections import OrderedDict
 from flask import request
 
 
@@ -26,6 +32,11 @@ class ConfigService:
         'DOUBAO_API_URL': 'api_url',
         'DEEPSEEK_API_KEY': 'deepseek_api_key',
         'QWEN_API_KEY': 'qwen_api_key',
+        # 模型接口地址（可指向本地替身服务器做压测）
+        'GPT_API_URL': 'gpt_api_url',
+        'DEEPSEEK_API_URL': 'deepseek_api_url',
+        'QWEN_API_URL': 'qwen_api_url',
+        'ZHIPU_API_URL': 'zhipu_api_url',
         # 主数据库
         'MYSQL_HOST': 'mysql.host',
         'MYSQL_PORT': 'mysql.port',
@@ -40,6 +51,15 @@ class ConfigService:
         'APP_MYSQL_DATABASE': 'app_mysql.database',
     }
     
+    # 模型服务商接口地址（服务商 -> (配置键, 默认地址)）
+    LLM_PROVIDER_URLS = {
+        'doubao': ('api_url', 'https://ark.cn-beijing.volces.com/api/v3/chat/completions'),
+        'gpt': ('gpt_api_url', 'https://api.gpt.ge/v1/chat/completions'),
+        'deepseek': ('deepseek_api_url', 'https://api.deepseek.com/chat/completions'),
+        'qwen': ('qwen_api_url', 'https://dashscope.aliyuncs.com/compatible-mode/v1/chat/completions'),
+        'zhipu': ('zhipu_api_url', 'https://open.bigmodel.cn/api/paas/v4/chat/completions'),
+    }
+    
     # 请求头映射（请求头名 -> 配置路径）
     HEADER_MAPPINGS = {
         'X-Doubao-Api-Key': 'api_key',
@@ -48,6 +68,25 @@ class ConfigService:
         'X-Qwen-Api-Key': 'qwen_api_key',
     }
     
+    # 用户API密钥缓存：TTL（秒）和最大用户数
+    USER_KEYS_CACHE_TTL = 300
+    USER_KEYS_CACHE_MAX = 256
+    # 用户API密钥戳文件：任一 worker 保存密钥时追加写入，各 worker 比对其签名判断缓存是否过期
+    USER_KEYS_STAMP_FILE = 'user_keys.stamp'
+    USER_KEYS_STAMP_MAX_BYTES = 64 * 1024
+    
+    # config.json 缓存：文件签名 (mtime_ns, inode, size) 不变时复用解析结果
+    _config_cache = {'signature': None, 'config': None}
+    # 用户API密钥缓存：user_id -> (过期时间, 戳文件签名, api_keys)，按最近使用排序
+    _user_keys_cache = OrderedDict()
+    _cache_lock = threading.Lock()
+    _cache_stats = {
+        'config_hits': 0,
+        'config_misses': 0,
+        'user_keys_hits': 0,
+        'user_keys_misses': 0,
+    }
+    
     @staticmethod
     def _set_nested_value(config, path, value):
         """设置嵌套配置值"""
@@ -85,15 +124,22 @@ class ConfigService:
         return config
     
     @staticmethod
-    def load_config(apply_headers=True, user_id=None):
-        """加载配置（优先级：用户数据库配置 > 环境变量 > 文件配置）
+    def _load_config_file():
+        """读取 config.json，文件签名未变化时返回缓存副本"""
+        try:
+            st = os.stat(ConfigService.CONFIG_FILE)
+            signature = (ConfigService.CONFIG_FILE, st.st_mtime_ns, st.st_ino, st.st_size)
+        except OSError:
+            signature = None
         
-        Args:
-            apply_headers: 是否应用请求头中的API密钥覆盖
-            user_id: 用户ID，如果提供则从数据库加载用户配置
-        """
-        # 先从文件加载基础配置
-        if os.path.exists(ConfigService.CONFIG_FILE):
+        with ConfigService._cache_lock:
+            cache = ConfigService._config_cache
+            if cache['config'] is not None and cache['signature'] == signature:
+                ConfigService._cache_stats['config_hits'] += 1
+                return copy.deepcopy(cache['config'])
+            ConfigService._cache_stats['config_misses'] += 1
+        
+        if signature is not None:
             with open(ConfigService.CONFIG_FILE, 'r', encoding='utf-8') as f:
                 config = json.load(f)
         else:
@@ -107,16 +153,100 @@ class ConfigService:
                 'qwen_api_key': ''
             }
         
+        with ConfigService._cache_lock:
+            ConfigService._config_cache = {'signature': signature, 'config': config}
+        return copy.deepcopy(config)
+    
+    @staticmethod
+    def _user_keys_stamp():
+        """获取用户API密钥戳文件签名 (mtime_ns, inode, size)，文件不存在时返回 None"""
+        try:
+            st = os.stat(ConfigService.USER_KEYS_STAMP_FILE)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_ino, st.st_size)
+    
+    @staticmethod
+    def _get_user_api_keys(user_id):
+        """获取用户API密钥，带 TTL 缓存（保存用户设置时调用 invalidate_user_keys 失效，
+        戳文件签名变化说明其他 worker 保存过密钥，缓存同样视为过期）"""
+        now = time.time()
+        stamp = ConfigService._user_keys_stamp()
+        with ConfigService._cache_lock:
+            entry = ConfigService._user_keys_cache.get(user_id)
+            if entry and entry[0] > now and entry[1] == stamp:
+                ConfigService._user_keys_cache.move_to_end(user_id)
+                ConfigService._cache_stats['user_keys_hits'] += 1
+                return dict(entry[2])
+            ConfigService._cache_stats['user_keys_misses'] += 1
+        
+        from services.database_service import AppDatabaseService
+        user_api_keys = AppDatabaseService.get_user_api_keys(user_id) or {}
+        print(f"[Config] 加载用户 {user_id} 的配置: {list(user_api_keys.keys()) if user_api_keys else '无'}")
+        
+        with ConfigService._cache_lock:
+            cache = ConfigService._user_keys_cache
+            cache[user_id] = (now + ConfigService.USER_KEYS_CACHE_TTL, stamp, dict(user_api_keys))
+            cache.move_to_end(user_id)
+            while len(cache) > ConfigService.USER_KEYS_CACHE_MAX:
+                cache.popitem(last=False)
+        return user_api_keys
+    
+    @staticmethod
+    def invalidate_user_keys(user_id=None):
+        """使用户API密钥缓存失效，user_id 为 None 时清空全部
+        
+        同时追加写入戳文件，其他 worker 下次读取时发现签名变化会重新查询数据库。
+        戳文件超过上限时截断重写（inode 不变但 mtime/size 仍会变化）。
+        """
+        with ConfigService._cache_lock:
+            if user_id is None:
+                ConfigService._user_keys_cache.clear()
+            else:
+                ConfigService._user_keys_cache.pop(user_id, None)
+        
+        path = ConfigService.USER_KEYS_STAMP_FILE
+        try:
+            mode = 'a'
+            if os.path.exists(path) and os.path.getsize(path) > ConfigService.USER_KEYS_STAMP_MAX_BYTES:
+                mode = 'w'
+            with open(path, mode, encoding='utf-8') as f:
+                f.write(f'{user_id if user_id is not None else "*"} {time.time():.6f}\n')
+        except OSError as e:
+            print(f"[Config] 写入用户密钥戳文件失败: {e}")
+    
+    @staticmethod
+    def invalidate_config_cache():
+        """使 config.json 缓存失效"""
+        with ConfigService._cache_lock:
+            ConfigService._config_cache = {'signature': None, 'config': None}
+    
+    @staticmethod
+    def get_cache_stats():
+        """获取配置缓存命中统计"""
+        with ConfigService._cache_lock:
+            stats = dict(ConfigService._cache_stats)
+            stats['cached_users'] = len(ConfigService._user_keys_cache)
+        return stats
+    
+    @staticmethod
+    def load_config(apply_headers=True, user_id=None):
+        """加载配置（优先级：用户数据库配置 > 环境变量 > 文件配置）
+        
+        Args:
+            apply_headers: 是否应用请求头中的API密钥覆盖
+            user_id: 用户ID，如果提供则从数据库加载用户配置
+        """
+        # 先从文件加载基础配置
+        config = ConfigService._load_config_file()
+        
         # 应用环境变量覆盖
         config = ConfigService._apply_env_overrides(config)
         
         # 从数据库加载用户配置（优先级最高）
         if user_id:
             try:
-                from services.database_service import AppDatabaseService
-                user_api_keys = AppDatabaseService.get_user_api_keys(user_id)
-                print(f"[Config] 加载用户 {user_id} 的配置: {list(user_api_keys.keys()) if user_api_keys else '无'}")
-                print(f"[Config] deepseek_api_key 是否存在: {bool(user_api_keys.get('deepseek_api_key'))}")
+                user_api_keys = ConfigService._get_user_api_keys(user_id)
                 if user_api_keys:
                     # 用户配置覆盖默认配置
                     for key, value in user_api_keys.items():
@@ -133,6 +263,26 @@ class ConfigService:
         
         return config
     
+    @staticmethod
+    def get_llm_api_url(provider, config=None):
+        """获取模型服务商的 chat/completions 接口地址
+        
+        优先级：环境变量 LLM_BASE_URL（所有服务商统一指向替身服务器，
+        地址为 {LLM_BASE_URL}/{provider}/chat/completions）> 配置项 > 默认地址
+        
+        Args:
+            provider: 服务商 doubao|gpt|deepseek|qwen|zhipu
+            config: 已加载的配置，为 None 时只应用环境变量
+        """
+        base_url = os.environ.get('LLM_BASE_URL')
+        if base_url:
+            return f"{base_url.rstrip('/')}/{provider}/chat/completions"
+        
+        config_key, default_url = ConfigService.LLM_PROVIDER_URLS[provider]
+        if config is None:
+            config = ConfigService._apply_env_overrides({})
+        return config.get(config_key) or default_url
+    
     @staticmethod
     def get_api_keys_status():
         """获取API密钥配置状态（不返回实际密钥值）"""
@@ -148,6 +298,9 @@ class ConfigService:
         """保存配置"""
         with open(ConfigService.CONFIG_FILE, 'w', encoding='utf-8') as f:
             json.dump(config, f, ensure_ascii=False, indent=2)
+        ConfigService.invalidate_config_cache()
+        from .prompt_registry import PromptRegistry
+        PromptRegistry.invalidate()
     
     @staticmethod
     def load_prompts():
@@ -162,6 +315,8 @@ class ConfigService:
         """保存提示词列表"""
         with open(ConfigService.PROMPTS_FILE, 'w', encoding='utf-8') as f:
             json.dump(prompts, f, ensure_ascii=False, indent=2)
+        from .prompt_registry import PromptRegistry
+        PromptRegistry.invalidate()
     
     @staticmethod
     def load_subjects():
@@ -0,0 +1,36 @@
+"""
+聚合立方体存储
+
+AggregateCubeService 负责任务贡献的计算、落盘和同步，这里的各存储订阅同一个任务贡献钩子，
+各自维护索引并带独立的格式版本（只有版本变化的存储会重新计算）：
+- CellStore: (日期, 学科, 书本, 页码, 题号) 聚合单元、逐任务单元、按书本的样例和学科索引
+- PairStore: 错误类型 / 错题共现计数
+- HeatStore: 热点计数和错误记录引用
+- MomentStore: 任务准确率矩
+- FingerprintStore: 任务指纹
+
+题号排序、错误类型归一等公共函数和常量也从这里导出，供各分析服务直接使用。
+"""
+from .base import CubeStore, DateBuckets, PAGE_TOTAL, UNKNOWN_ERROR_TYPE, counted_errors, error_type_of, question_sort_key
+from .cells import CellStore, CUBE_DIMS
+from .pairs import PairStore, PAIR_KINDS
+from .heat import HeatStore
+from .moments import MomentStore
+from .fingerprints import FingerprintStore
+
+__all__ = [
+    'CubeStore',
+    'DateBuckets',
+    'CellStore',
+    'PairStore',
+    'HeatStore',
+    'MomentStore',
+    'FingerprintStore',
+    'CUBE_DIMS',
+    'PAIR_KINDS',
+    'PAGE_TOTAL',
+    'UNKNOWN_ERROR_TYPE',
+    'counted_errors',
+    'error_type_of',
+    'question_sort_key'
+]
@@ -0,0 +1,139 @@
+"""
+聚合立方体存储基类和公共工具
+"""
+import re
+import bisect
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+
+# 页级单元的题号
+PAGE_TOTAL = ''
+
+# 缺失错误类型时的取值
+UNKNOWN_ERROR_TYPE = '未知错误'
+
+
+def counted_errors(item: Dict[str, Any]) -> list:
+    """立方体计入的作业项错误：只统计已完成且有评估结果的作业项"""
+    evaluation = item.get('evaluation')
+    if item.get('status') != 'completed' or not evaluation:
+        return []
+    return evaluation.get('errors') or []
+
+
+def error_type_of(error: Dict[str, Any]) -> str:
+    """立方体中的错误类型，缺失时记为 UNKNOWN_ERROR_TYPE"""
+    return error.get('error_type') or UNKNOWN_ERROR_TYPE
+
+
+def item_book_page(item: Dict[str, Any], task_book: str) -> Tuple[str, str]:
+    """作业项所在的 (书本, 页码)，书本缺失时取任务书本"""
+    page = str(item.get('page_num') if item.get('page_num') is not None else '')
+    return item.get('book_name') or task_book, page
+
+
+def question_sort_key(question: str):
+    """题号自然排序（1, 2, 10, 10(1) ...）"""
+    return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', question)]
+
+
+def norm_dim(dim: str, value):
+    """把查询参数转换为立方体中的维度取值（学科为整数，页码和题号为字符串）"""
+    if dim == 'subject':
+        return int(value) if value is not None and str(value).lstrip('-').isdigit() else value
+    return str(value) if dim in ('page', 'question') else value
+
+
+class DateBuckets:
+    """按日期分桶的字典，日期有序保存，按日期范围二分查找"""
+
+    __slots__ = ('buckets', 'dates')
+
+    def __init__(self):
+        self.buckets: Dict[str, dict] = {}
+        self.dates: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def get(self, date: str) -> Optional[dict]:
+        return self.buckets.get(date)
+
+    def setdefault(self, date: str) -> dict:
+        bucket = self.buckets.get(date)
+        if bucket is None:
+            bucket = self.buckets[date] = {}
+            bisect.insort(self.dates, date)
+        return bucket
+
+    def discard_if_empty(self, date: str):
+        if date in self.buckets and not self.buckets[date]:
+            del self.buckets[date]
+            del self.dates[bisect.bisect_left(self.dates, date)]
+
+    def window(self, start_date: str = None, end_date: str = None) -> List[Tuple[str, dict]]:
+        """日期范围（含两端）内的 [(日期, 分桶)]，按日期从早到晚"""
+        start = bisect.bisect_left(self.dates, start_date) if start_date else 0
+        end = bisect.bisect_right(self.dates, end_date) if end_date else len(self.dates)
+        return [(date, self.buckets[date]) for date in self.dates[start:end]]
+
+    def expire_before(self, cutoff: str) -> List[str]:
+        """删除早于 cutoff 的分桶，返回删除的日期"""
+        expired = self.dates[:bisect.bisect_left(self.dates, cutoff)]
+        for date in expired:
+            del self.buckets[date]
+        del self.dates[:len(expired)]
+        return expired
+
+
+class CubeStore:
+    """
+    聚合立方体存储基类（进程内单例，类方法访问，子类各自持有状态和锁）
+
+    AggregateCubeService 计算任务贡献时调用 build 生成本存储的部分（可 JSON 序列化），
+    载入 / 替换 / 删除贡献时调用 apply；贡献文件按存储记录 VERSION，版本变化时只重新计算该存储的部分
+
+    Attributes:
+        NAME: 贡献文件中的部分名称
+        VERSION: 本存储部分的格式版本
+    """
+
+    NAME = ''
+    VERSION = 1
+
+    _lock = threading.RLock()
+
+    @classmethod
+    def build(cls, task: Dict[str, Any], meta: Dict[str, Any]) -> Any:
+        """由任务数据和任务元信息（见 build_meta）计算本存储的部分"""
+        raise NotImplementedError
+
+    @classmethod
+    def apply(cls, task_id: str, meta: Optional[Dict[str, Any]], data: Any):
+        """用新贡献替换任务的旧贡献，meta 为 None 时只移除"""
+        with cls._lock:
+            cls._remove(task_id)
+            if meta is not None:
+                cls._add(task_id, meta, data)
+
+    @classmethod
+    def expire(cls):
+        """删除超过保留期的分桶（查询前由 ensure_fresh 调用）"""
+
+    @classmethod
+    def reset(cls):
+        """清空内存状态"""
+        raise NotImplementedError
+
+    @classmethod
+    def status(cls) -> Dict[str, Any]:
+        return {}
+
+    @classmethod
+    def _add(cls, task_id: str, meta: Dict[str, Any], data: Any):
+        raise NotImplementedError
+
+    @classmethod
+    def _remove(cls, task_id: str):
+        raise NotImplementedError
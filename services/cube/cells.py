@@ -0,0 +1,278 @@
+"""
+聚合单元存储
+
+(日期, 学科, 书本, 页码, 题号) 维度的聚合单元：
+- 页级单元（题号为空）：作业数、题目数、正确数、各错误类型数量
+- 题级单元：该题的各错误类型数量（题目数取同一页的作业数，每份作业都包含该页全部题目）
+
+单元按 日期 -> (学科, 书本) -> (页码, 题号) 分层保存，日期有序，汇总时二分定位日期范围；
+另外维护按书本的学科计数、按 (书本, 页码) 的各题样例和按错误类型的样例，供下钻和错误模式直接查询
+"""
+import bisect
+import threading
+from collections import Counter
+from typing import Dict, Any, List, Optional, Tuple, Iterable
+
+from .base import (CubeStore, DateBuckets, PAGE_TOTAL, error_type_of, item_book_page, norm_dim)
+
+
+# 立方体维度
+CUBE_DIMS = ('date', 'subject', 'book', 'page', 'question')
+
+
+def _sample_order(entry: tuple) -> tuple:
+    return entry[:2]
+
+
+class CellStore(CubeStore):
+    """
+    聚合单元存储
+
+    部分格式: [[book, page, question, items, total, correct, {错误类型: 数量}, 样例, {错误类型: 样例}]]，
+    样例为该题最后一个错误的 {ai_answer, expected_answer, error_type}，另按错误类型各保留最后一个错误的样例
+    """
+
+    NAME = 'cells'
+    VERSION = 2
+
+    _lock = threading.RLock()
+    # date -> {(subject, book): ({(page, ''): 页级单元}, {(page, question): 题级单元})}，单元为 [items, total, correct, Counter]
+    _days = DateBuckets()
+    # task_id -> (date, subject, {(book, page, question): (items, total, correct, errors, sample)})
+    _tasks: Dict[str, Tuple[str, Any, Dict[tuple, tuple]]] = {}
+    # date -> {task_id: (subject, 书本集合)}，按日期范围分组任务
+    _task_days = DateBuckets()
+    # book -> Counter(subject -> 任务数)
+    _book_subjects: Dict[str, Counter] = {}
+    # (book, page) -> {question: [(date, task_id, sample)]}，按 (date, task_id) 有序
+    _samples: Dict[tuple, Dict[str, list]] = {}
+    # 错误类型 -> {task_id: [(book, page, question, sample)]}
+    _type_samples: Dict[str, Dict[str, list]] = {}
+
+    @classmethod
+    def build(cls, task: Dict[str, Any], meta: Dict[str, Any]) -> List[list]:
+        cells: Dict[Tuple[str, str, str], list] = {}
+        for item in task.get('homework_items') or []:
+            evaluation = item.get('evaluation')
+            if item.get('status') != 'completed' or not evaluation:
+                continue
+            book, page = item_book_page(item, meta['book'])
+            page_cell = cells.setdefault((book, page, PAGE_TOTAL), [0, 0, 0, {}, None, {}])
+            page_cell[0] += 1
+            page_cell[1] += evaluation.get('total_questions', 0) or 0
+            page_cell[2] += evaluation.get('correct_count', 0) or 0
+
+            for error in evaluation.get('errors') or []:
+                error_type = error_type_of(error)
+                page_cell[3][error_type] = page_cell[3].get(error_type, 0) + 1
+                cell = cells.setdefault((book, page, str(error.get('index', ''))), [0, 0, 0, {}, None, {}])
+                cell[3][error_type] = cell[3].get(error_type, 0) + 1
+                cell[4] = cell[5][error_type] = {
+                    'ai_answer': (error.get('ai_result') or {}).get('userAnswer', ''),
+                    'expected_answer': (error.get('base_effect') or {}).get('userAnswer', ''),
+                    'error_type': error_type
+                }
+        return [[book, page, question] + value for (book, page, question), value in cells.items()]
+
+    # ========== 查询 ==========
+
+    @classmethod
+    def rollup(cls, group_by: Iterable[str], where: Dict[str, Any] = None, start_date: str = None,
+               end_date: str = None, questions: bool = False) -> Dict[tuple, Dict[str, Any]]:
+        """按维度汇总（见 AggregateCubeService.rollup）"""
+        positions = [CUBE_DIMS.index(d) for d in group_by]
+        where = {d: norm_dim(d, v) for d, v in (where or {}).items()}
+        conditions = [(CUBE_DIMS.index(d), v) for d, v in where.items() if d in ('page', 'question')]
+        result: Dict[tuple, Dict[str, Any]] = {}
+        with cls._lock:
+            for date, bucket in cls._days.window(start_date, end_date):
+                if 'date' in where and date != where['date']:
+                    continue
+                for (subject, book), levels in bucket.items():
+                    if 'subject' in where and subject != where['subject'] or 'book' in where and book != where['book']:
+                        continue
+                    for (page, question), (items, total, correct, errors) in levels[int(questions)].items():
+                        key = (date, subject, book, page, question)
+                        if any(key[pos] != value for pos, value in conditions):
+                            continue
+                        group = tuple(key[pos] for pos in positions)
+                        agg = result.get(group)
+                        if agg is None:
+                            agg = result[group] = {'items': 0, 'total': 0, 'correct': 0, 'errors': Counter()}
+                        agg['items'] += items
+                        agg['total'] += total
+                        agg['correct'] += correct
+                        agg['errors'].update(errors)
+        for agg in result.values():
+            agg['error_count'] = sum(agg['errors'].values())
+        return result
+
+    @classmethod
+    def task_cells(cls, task_id: str) -> Optional[Dict[tuple, tuple]]:
+        with cls._lock:
+            entry = cls._tasks.get(task_id)
+            return dict(entry[2]) if entry is not None else None
+
+    @classmethod
+    def task_groups(cls, group_by: str, where: Dict[str, Any] = None, start_date: str = None,
+                    end_date: str = None) -> Dict[Any, List[str]]:
+        """按学科或书本分组的任务ID列表（只统计日期范围内的任务）"""
+        where = {d: norm_dim(d, v) for d, v in (where or {}).items()}
+        groups: Dict[Any, List[str]] = {}
+        with cls._lock:
+            for _, tasks in cls._task_days.window(start_date, end_date):
+                for task_id, (subject, books) in tasks.items():
+                    if 'subject' in where and subject != where['subject']:
+                        continue
+                    if 'book' in where and where['book'] not in books:
+                        continue
+                    if group_by == 'subject':
+                        groups.setdefault(subject, []).append(task_id)
+                    else:
+                        for book in books if 'book' not in where else (where['book'],):
+                            groups.setdefault(book, []).append(task_id)
+        return {key: sorted(task_ids) for key, task_ids in groups.items()}
+
+    @classmethod
+    def latest_samples(cls, book: str, page: str, start_date: str = None,
+                       end_date: str = None) -> Dict[str, Dict[str, Any]]:
+        """某页各题日期范围内最近一次错误的样例"""
+        samples = {}
+        with cls._lock:
+            for question, entries in (cls._samples.get((book, str(page))) or {}).items():
+                for date, _, sample in reversed(entries):
+                    if end_date and date > end_date:
+                        continue
+                    if not start_date or date >= start_date:
+                        samples[question] = sample
+                    break
+        return samples
+
+    @classmethod
+    def error_examples(cls, error_type: str, limit: int) -> List[Dict[str, Any]]:
+        """
+        某错误类型的示例（任务按日期从新到旧，每个任务每题取该类型最后一个错误）
+
+        Returns:
+            list: [{book, page, question, ai_answer, expected_answer, task_id}]
+        """
+        examples = []
+        with cls._lock:
+            tasks = cls._type_samples.get(error_type) or {}
+            for task_id in sorted(tasks, key=lambda t: (cls._tasks[t][0], t), reverse=True):
+                for book, page, question, sample in tasks[task_id]:
+                    if len(examples) >= limit:
+                        return examples
+                    examples.append({'book': book, 'page': page, 'question': question,
+                                     'ai_answer': sample.get('ai_answer', ''),
+                                     'expected_answer': sample.get('expected_answer', ''), 'task_id': task_id})
+        return examples
+
+    @classmethod
+    def subject_of_book(cls, book: str) -> Optional[int]:
+        """书本所属学科（取出现次数最多的学科）"""
+        with cls._lock:
+            counter = cls._book_subjects.get(book)
+            return counter.most_common(1)[0][0] if counter else None
+
+    # ========== 维护 ==========
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._days = DateBuckets()
+            cls._tasks = {}
+            cls._task_days = DateBuckets()
+            cls._book_subjects = {}
+            cls._samples = {}
+            cls._type_samples = {}
+
+    @classmethod
+    def status(cls) -> Dict[str, Any]:
+        with cls._lock:
+            return {'cells': sum(len(levels[0]) + len(levels[1]) for _, bucket in cls._days.window()
+                                 for levels in bucket.values())}
+
+    @classmethod
+    def _add(cls, task_id: str, meta: Dict[str, Any], data: List[list]):
+        date, subject = meta['date'], meta['subject_id']
+        bucket = cls._days.setdefault(date)
+        cells = {}
+        for book, page, question, items, total, correct, errors, sample, type_samples in data:
+            cells[(book, page, question)] = (items, total, correct, errors, sample)
+            for error_type, type_sample in type_samples.items():
+                cls._type_samples.setdefault(error_type, {}).setdefault(task_id, []).append(
+                    (book, page, question, type_sample))
+            levels = bucket.get((subject, book))
+            if levels is None:
+                levels = bucket[(subject, book)] = ({}, {})
+            cell = levels[question != PAGE_TOTAL].get((page, question))
+            if cell is None:
+                cell = levels[question != PAGE_TOTAL][(page, question)] = [0, 0, 0, Counter()]
+            cell[0] += items
+            cell[1] += total
+            cell[2] += correct
+            cell[3].update(errors)
+            if sample and question != PAGE_TOTAL:
+                entries = cls._samples.setdefault((book, page), {}).setdefault(question, [])
+                bisect.insort(entries, (date, task_id, sample), key=_sample_order)
+        cls._days.discard_if_empty(date)
+        cls._tasks[task_id] = (date, subject, cells)
+
+        books = {book for book, _, _ in cells}
+        if books:
+            cls._task_days.setdefault(date)[task_id] = (subject, books)
+        for book in books:
+            cls._book_subjects.setdefault(book, Counter())[subject] += 1
+
+    @classmethod
+    def _remove(cls, task_id: str):
+        entry = cls._tasks.pop(task_id, None)
+        if entry is None:
+            return
+        date, subject, cells = entry
+        bucket = cls._days.get(date) or {}
+        books = set()
+        for (book, page, question), (items, total, correct, errors, sample) in cells.items():
+            books.add(book)
+            if question == PAGE_TOTAL:
+                for error_type in errors:
+                    tasks = cls._type_samples.get(error_type)
+                    if tasks is not None and tasks.pop(task_id, None) is not None and not tasks:
+                        del cls._type_samples[error_type]
+            levels = bucket.get((subject, book))
+            cell = levels[question != PAGE_TOTAL].get((page, question)) if levels else None
+            if cell is not None:
+                cell[0] -= items
+                cell[1] -= total
+                cell[2] -= correct
+                cell[3].subtract(errors)
+                cell[3] += Counter()  # 去掉计数为 0 的类型
+                if cell[0] <= 0 and not cell[3]:
+                    del levels[question != PAGE_TOTAL][(page, question)]
+                    if not levels[0] and not levels[1]:
+                        del bucket[(subject, book)]
+            if sample and question != PAGE_TOTAL:
+                questions = cls._samples.get((book, page)) or {}
+                entries = questions.get(question) or []
+                position = bisect.bisect_left(entries, (date, task_id), key=_sample_order)
+                if position < len(entries) and entries[position][1] == task_id:
+                    del entries[position]
+                if not entries:
+                    questions.pop(question, None)
+                if not questions:
+                    cls._samples.pop((book, page), None)
+        cls._days.discard_if_empty(date)
+
+        tasks = cls._task_days.get(date)
+        if tasks is not None:
+            tasks.pop(task_id, None)
+            cls._task_days.discard_if_empty(date)
+        for book in books:
+            counter = cls._book_subjects.get(book)
+            if counter is not None:
+                counter[subject] -= 1
+                if counter[subject] <= 0:
+                    del counter[subject]
+                if not counter:
+                    del cls._book_subjects[book]
@@ -0,0 +1,106 @@
+"""
+任务指纹存储
+
+每个任务的题目数、正确数、错误类型直方图、逐题结果、模型和提示词版本，
+批次对比（BatchCompareService）只在指纹上计算
+"""
+import threading
+from datetime import datetime
+from collections import Counter
+from typing import Dict, Any, List, Iterable
+
+from .base import CubeStore, error_type_of, item_book_page
+
+
+def build_fingerprint(task_id: str, meta: Dict[str, Any], data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    由任务元信息和指纹部分生成任务指纹
+
+    Returns:
+        dict: {task_id, name, date, created（datetime 或 None）, created_at, subject_id, book, model,
+               prompts（((提示词, 版本), ...)）, total_questions, correct_count, accuracy,
+               errors: Counter{错误类型: 数量}, pages: {(book, page): 作业数},
+               questions: {(book, page, question): 错误次数}}
+    """
+    created = None
+    try:
+        created = datetime.fromisoformat(meta['created_at'].replace('Z', '+00:00')).replace(tzinfo=None)
+    except (AttributeError, ValueError):
+        pass
+    return {
+        'task_id': task_id,
+        'name': meta['name'],
+        'date': meta['date'],
+        'created': created,
+        'created_at': meta['created_at'],
+        'subject_id': meta['subject_id'],
+        'book': meta['book'],
+        'model': meta['model'],
+        'prompts': tuple(tuple(p) for p in meta.get('prompts') or []),
+        'total_questions': meta['total_questions'],
+        'correct_count': meta['correct_count'],
+        'accuracy': meta['accuracy'],
+        'errors': Counter(data['errors']),
+        'pages': {(book, page): items for book, page, items in data['pages']},
+        'questions': {(book, page, question): n for book, page, question, n in data['questions']}
+    }
+
+
+class FingerprintStore(CubeStore):
+    """
+    任务指纹存储
+
+    部分格式: {'errors': {错误类型: 数量}, 'pages': [[book, page, 作业数]], 'questions': [[book, page, 题号, 错误次数]]}
+    """
+
+    NAME = 'fingerprints'
+    VERSION = 1
+
+    _lock = threading.RLock()
+    # task_id -> 任务指纹（见 build_fingerprint）
+    _fingerprints: Dict[str, Dict[str, Any]] = {}
+
+    @classmethod
+    def build(cls, task: Dict[str, Any], meta: Dict[str, Any]) -> Dict[str, Any]:
+        errors: Counter = Counter()
+        pages: Counter = Counter()
+        questions: Counter = Counter()
+        for item in task.get('homework_items') or []:
+            evaluation = item.get('evaluation')
+            if item.get('status') != 'completed' or not evaluation:
+                continue
+            book, page = item_book_page(item, meta['book'])
+            pages[(book, page)] += 1
+            for error in evaluation.get('errors') or []:
+                errors[error_type_of(error)] += 1
+                questions[(book, page, str(error.get('index', '')))] += 1
+        return {
+            'errors': dict(errors),
+            'pages': [list(key) + [n] for key, n in pages.items()],
+            'questions': [list(key) + [n] for key, n in questions.items()]
+        }
+
+    @classmethod
+    def fingerprints(cls, task_ids: Iterable[str] = None) -> Dict[str, Dict[str, Any]]:
+        with cls._lock:
+            if task_ids is None:
+                return dict(cls._fingerprints)
+            return {t: cls._fingerprints[t] for t in task_ids if t in cls._fingerprints}
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._fingerprints = {}
+
+    @classmethod
+    def status(cls) -> Dict[str, Any]:
+        with cls._lock:
+            return {'fingerprints': len(cls._fingerprints)}
+
+    @classmethod
+    def _add(cls, task_id: str, meta: Dict[str, Any], data: Dict[str, Any]):
+        cls._fingerprints[task_id] = build_fingerprint(task_id, meta, data)
+
+    @classmethod
+    def _remove(cls, task_id: str):
+        cls._fingerprints.pop(task_id, None)
@@ -0,0 +1,155 @@
+"""
+热点计数存储
+
+按日期分桶的 (数据集, 书本ID, 书本名称, 页码, 题号) 错误类型次数（热点图按最近 N 天合并日桶），
+并保留指向各份作业错误记录的引用 (task_id, homework_id, 错误序号)，错误详情查询时再从任务文件读取；
+只保留最近 RETENTION_DAYS 天
+"""
+import time
+import threading
+from collections import Counter
+from typing import Dict, Any, List, Tuple
+
+from .base import CubeStore, DateBuckets
+
+
+class HeatStore(CubeStore):
+    """
+    热点计数存储（统计所有带评估错误的作业，页码和题号保留原始值）
+
+    部分格式: [[数据集, 书本ID, 书本名称, 页码, 题号, {错误类型: 数量}, [[homework_id, 错误序号]]]]，
+    错误序号为该错误在作业项 evaluation.errors 中的位置
+
+    Attributes:
+        RETENTION_DAYS: 热点日桶的保留天数（热点图“全部”即保留期内）
+    """
+
+    NAME = 'heat'
+    VERSION = 2
+    RETENTION_DAYS = 90
+
+    _lock = threading.RLock()
+    # date -> {(数据集, 书本ID, 书本名称, 页码, 题号): Counter}
+    _days = DateBuckets()
+    # (书本ID, 页码, 题号) -> {task_id: date}，用于查找错误详情
+    _questions: Dict[tuple, Dict[str, str]] = {}
+    # task_id -> (date, {热点键: (errors, [[homework_id, 错误序号]])})，只记录计入日桶的任务
+    _tasks: Dict[str, Tuple[str, Dict[tuple, tuple]]] = {}
+
+    @classmethod
+    def build(cls, task: Dict[str, Any], meta: Dict[str, Any]) -> List[list]:
+        heat: Dict[tuple, list] = {}
+        for item in task.get('homework_items') or []:
+            evaluation = item.get('evaluation') or {}
+            for position, error in enumerate(evaluation.get('errors') or []):
+                key = (item.get('matched_dataset') or '', item.get('book_id', 'unknown'), item.get('book_name', ''),
+                       item.get('page_num', 0), error.get('index', 'unknown'))
+                entry = heat.setdefault(key, [{}, []])
+                error_type = error.get('error_type', '其他')
+                entry[0][error_type] = entry[0].get(error_type, 0) + 1
+                entry[1].append([item.get('homework_id', ''), position])
+        return [list(key) + value for key, value in heat.items()]
+
+    @staticmethod
+    def describe(item: Dict[str, Any], error: Dict[str, Any]) -> Dict[str, Any]:
+        """错误引用指向的错误记录详情"""
+        return {
+            'homework_id': item.get('homework_id', ''),
+            'student_name': item.get('student_name', ''),
+            'error_type': error.get('error_type', ''),
+            'base_answer': error.get('base_answer', ''),
+            'base_user': error.get('base_user', ''),
+            'hw_user': error.get('hw_user', '')
+        }
+
+    @classmethod
+    def heat_counts(cls, start_date: str = None) -> Dict[tuple, Counter]:
+        """合并 start_date（含）以来各日桶的热点计数"""
+        result: Dict[tuple, Counter] = {}
+        with cls._lock:
+            for _, bucket in cls._days.window(start_date):
+                for key, errors in bucket.items():
+                    merged = result.get(key)
+                    if merged is None:
+                        result[key] = Counter(errors)
+                    else:
+                        merged.update(errors)
+        return result
+
+    @classmethod
+    def heat_refs(cls, book_id, page_num, question_index, start_date: str = None) -> List[Tuple[str, str, int]]:
+        """某题 start_date（含）以来的错误引用 [(task_id, homework_id, 错误序号)]"""
+        refs = []
+        with cls._lock:
+            for task_id, date in (cls._questions.get((book_id, page_num, question_index)) or {}).items():
+                if start_date and date < start_date:
+                    continue
+                for key, (_, task_refs) in cls._tasks[task_id][1].items():
+                    if key[1] == book_id and key[3] == page_num and key[4] == question_index:
+                        refs.extend((task_id, homework_id, position) for homework_id, position in task_refs)
+        return refs
+
+    @classmethod
+    def expire(cls):
+        with cls._lock:
+            cutoff = cls._cutoff()
+            if not cls._days.expire_before(cutoff):
+                return
+            for task_id in [t for t, (date, _) in cls._tasks.items() if date < cutoff]:
+                for key in cls._tasks.pop(task_id)[1]:
+                    cls._forget_question(task_id, key)
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._days = DateBuckets()
+            cls._questions = {}
+            cls._tasks = {}
+
+    @classmethod
+    def status(cls) -> Dict[str, Any]:
+        with cls._lock:
+            return {'heat_days': len(cls._days)}
+
+    @classmethod
+    def _cutoff(cls) -> str:
+        return time.strftime('%Y-%m-%d', time.localtime(time.time() - cls.RETENTION_DAYS * 86400))
+
+    @classmethod
+    def _add(cls, task_id: str, meta: Dict[str, Any], data: List[list]):
+        date = meta['date']
+        if date < cls._cutoff():
+            return
+        heat = {}
+        for dataset, book_id, book_name, page_num, question_index, errors, refs in data:
+            key = (dataset, book_id, book_name, page_num, question_index)
+            heat[key] = (errors, refs)
+            cls._days.setdefault(date).setdefault(key, Counter()).update(errors)
+            cls._questions.setdefault((book_id, page_num, question_index), {})[task_id] = date
+        if heat:
+            cls._tasks[task_id] = (date, heat)
+
+    @classmethod
+    def _remove(cls, task_id: str):
+        entry = cls._tasks.pop(task_id, None)
+        if entry is None:
+            return
+        date, heat = entry
+        bucket = cls._days.get(date) or {}
+        for key, (errors, _) in heat.items():
+            counter = bucket.get(key)
+            if counter is not None:
+                counter.subtract(errors)
+                counter += Counter()
+                if not counter:
+                    del bucket[key]
+            cls._forget_question(task_id, key)
+        cls._days.discard_if_empty(date)
+
+    @classmethod
+    def _forget_question(cls, task_id: str, key: tuple):
+        tasks = cls._questions.get((key[1], key[3], key[4]))
+        if tasks is not None:
+            tasks.pop(task_id, None)
+            if not tasks:
+                del cls._questions[(key[1], key[3], key[4])]
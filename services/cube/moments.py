@@ -0,0 +1,99 @@
+"""
+准确率矩存储
+
+按 (日期, 学科, 书本) 分桶的任务准确率 Welford 统计量，异常检测按时间窗口合并，
+只保留最近 RETENTION_DAYS 天
+"""
+import time
+import threading
+from typing import Dict, Any, Optional, Tuple
+
+from utils.running_stats import RunningStats
+from .base import CubeStore, DateBuckets, norm_dim
+
+
+class MomentStore(CubeStore):
+    """
+    准确率矩存储（只使用任务元信息中的 accuracy，部分为空）
+
+    Attributes:
+        RETENTION_DAYS: 准确率矩分桶的保留天数
+    """
+
+    NAME = 'moments'
+    VERSION = 1
+    RETENTION_DAYS = 90
+
+    _lock = threading.RLock()
+    # date -> {(subject, book): RunningStats}
+    _days = DateBuckets()
+    # task_id -> (date, subject, book, accuracy)，只记录计入分桶的任务
+    _tasks: Dict[str, Tuple[str, Any, Optional[str], float]] = {}
+
+    @classmethod
+    def build(cls, task: Dict[str, Any], meta: Dict[str, Any]) -> None:
+        return None
+
+    @classmethod
+    def accuracy_moments(cls, start_date: str = None, subject=None, book: str = None,
+                         exclude_task_id: str = None) -> RunningStats:
+        """合并 start_date（含）以来的任务准确率统计量（见 AggregateCubeService.accuracy_moments）"""
+        subject = norm_dim('subject', subject)
+        result = RunningStats()
+        with cls._lock:
+            for _, bucket in cls._days.window(start_date):
+                for (s, b), stats in bucket.items():
+                    if (subject is None or s == subject) and (book is None or b == book):
+                        result.merge(stats)
+            entry = cls._tasks.get(exclude_task_id) if exclude_task_id else None
+            if entry is not None:
+                date, s, b, accuracy = entry
+                if ((not start_date or date >= start_date) and (subject is None or s == subject)
+                        and (book is None or b == book)):
+                    result.remove(accuracy)
+        return result
+
+    @classmethod
+    def expire(cls):
+        with cls._lock:
+            cutoff = cls._cutoff()
+            if cls._days.expire_before(cutoff):
+                cls._tasks = {t: entry for t, entry in cls._tasks.items() if entry[0] >= cutoff}
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._days = DateBuckets()
+            cls._tasks = {}
+
+    @classmethod
+    def status(cls) -> Dict[str, Any]:
+        with cls._lock:
+            return {'moment_days': len(cls._days)}
+
+    @classmethod
+    def _cutoff(cls) -> str:
+        return time.strftime('%Y-%m-%d', time.localtime(time.time() - cls.RETENTION_DAYS * 86400))
+
+    @classmethod
+    def _add(cls, task_id: str, meta: Dict[str, Any], data: None):
+        accuracy = meta.get('accuracy')
+        if accuracy is None or meta['date'] < cls._cutoff():
+            return
+        cls._days.setdefault(meta['date']).setdefault((meta['subject_id'], meta.get('book')),
+                                                      RunningStats()).add(accuracy)
+        cls._tasks[task_id] = (meta['date'], meta['subject_id'], meta.get('book'), accuracy)
+
+    @classmethod
+    def _remove(cls, task_id: str):
+        entry = cls._tasks.pop(task_id, None)
+        if entry is None:
+            return
+        date, subject, book, accuracy = entry
+        bucket = cls._days.get(date)
+        stats = bucket.get((subject, book)) if bucket else None
+        if stats is not None:
+            stats.remove(accuracy)
+            if stats.n == 0:
+                del bucket[(subject, book)]
+            cls._days.discard_if_empty(date)
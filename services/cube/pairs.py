@@ -0,0 +1,121 @@
+"""
+共现计数存储
+
+同一份作业中错误类型两两共现次数（按书本）、错题两两共现次数（按书本和页码），均按日期分桶
+"""
+import threading
+from itertools import combinations
+from collections import Counter
+from typing import Dict, Any, List, Tuple
+
+from .base import CubeStore, DateBuckets, error_type_of, item_book_page, norm_dim, question_sort_key
+
+
+# 共现计数类型
+PAIR_KINDS = ('type', 'question')
+
+
+class PairStore(CubeStore):
+    """
+    共现计数存储
+
+    部分格式: {'type': [[book, 错误类型1, 错误类型2, 次数]], 'question': [[book, page, 题号1, 题号2, 次数]]}
+    """
+
+    NAME = 'pairs'
+    VERSION = 1
+
+    _lock = threading.RLock()
+    # date -> {'type': Counter((subject, book, 错误类型1, 错误类型2)), 'question': Counter((subject, book, page, 题号1, 题号2))}
+    _days = DateBuckets()
+    # task_id -> (date, subject, {kind: {pair: 次数}})
+    _tasks: Dict[str, Tuple[str, Any, Dict[str, Dict[tuple, int]]]] = {}
+
+    @classmethod
+    def build(cls, task: Dict[str, Any], meta: Dict[str, Any]) -> Dict[str, List[list]]:
+        type_pairs: Counter = Counter()
+        question_pairs: Counter = Counter()
+        for item in task.get('homework_items') or []:
+            evaluation = item.get('evaluation')
+            if item.get('status') != 'completed' or not evaluation:
+                continue
+            book, page = item_book_page(item, meta['book'])
+            item_types: Counter = Counter()
+            item_questions = set()
+            for error in evaluation.get('errors') or []:
+                item_types[error_type_of(error)] += 1
+                item_questions.add(str(error.get('index', '')))
+
+            # 错误类型两两共现：按类型计数相乘，不逐对遍历错误
+            types = sorted(item_types.items())
+            for i, (type1, count1) in enumerate(types):
+                if count1 > 1:
+                    type_pairs[(book, type1, type1)] += count1 * (count1 - 1) // 2
+                for type2, count2 in types[i + 1:]:
+                    type_pairs[(book, type1, type2)] += count1 * count2
+            for question1, question2 in combinations(sorted(item_questions, key=question_sort_key), 2):
+                question_pairs[(book, page, question1, question2)] += 1
+        return {
+            'type': [list(key) + [n] for key, n in type_pairs.items()],
+            'question': [list(key) + [n] for key, n in question_pairs.items()]
+        }
+
+    @classmethod
+    def pair_counts(cls, kind: str, subject=None, book: str = None, book_contains: str = None,
+                    start_date: str = None, end_date: str = None) -> Counter:
+        """汇总日期范围内的共现次数（见 AggregateCubeService.pair_counts）"""
+        subject = norm_dim('subject', subject)
+        result = Counter()
+        with cls._lock:
+            for _, bucket in cls._days.window(start_date, end_date):
+                for key, count in bucket[kind].items():
+                    if subject is not None and key[0] != subject:
+                        continue
+                    if book is not None and key[1] != book or book_contains and book_contains not in key[1]:
+                        continue
+                    result[key[2:] if kind == 'type' else key[1:]] += count
+        return result
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._days = DateBuckets()
+            cls._tasks = {}
+
+    @classmethod
+    def status(cls) -> Dict[str, Any]:
+        with cls._lock:
+            return {'pairs': sum(len(bucket[kind]) for _, bucket in cls._days.window() for kind in PAIR_KINDS)}
+
+    @classmethod
+    def _add(cls, task_id: str, meta: Dict[str, Any], data: Dict[str, List[list]]):
+        date, subject = meta['date'], meta['subject_id']
+        pairs = {kind: {tuple(row[:-1]): row[-1] for row in data.get(kind) or []} for kind in PAIR_KINDS}
+        if not any(pairs.values()):
+            return
+        bucket = cls._days.setdefault(date)
+        for kind in PAIR_KINDS:
+            counter = bucket.setdefault(kind, Counter())
+            for pair, count in pairs[kind].items():
+                counter[(subject,) + pair] += count
+        cls._tasks[task_id] = (date, subject, pairs)
+
+    @classmethod
+    def _remove(cls, task_id: str):
+        entry = cls._tasks.pop(task_id, None)
+        if entry is None:
+            return
+        date, subject, pairs = entry
+        bucket = cls._days.get(date)
+        if bucket is None:
+            return
+        for kind in PAIR_KINDS:
+            counter = bucket[kind]
+            for pair, count in pairs[kind].items():
+                key = (subject,) + pair
+                counter[key] -= count
+                if counter[key] <= 0:
+                    del counter[key]
+        if not any(bucket.values()):
+            bucket.clear()
+            cls._days.discard_if_empty(date)
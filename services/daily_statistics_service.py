@@ -0,0 +1,484 @@
+"""
+每日统计汇总服务模块
+
+增量维护 daily_statistics 表（趋势图数据源），不再依赖每天从全部任务文件重算的快照任务：
+- 每个任务对各 (日期, 学科) 的贡献记录在 daily_statistics_tasks 表中
+- 任务保存 / 重新评估 / 删除时，与上次贡献做差得到增量，累加写入 daily_statistics（后台线程执行，不阻塞保存）
+- 对账：按日期用贡献表汇总结果校正 daily_statistics，可重复执行（快照任务改为调用对账）
+- 回填：一次扫描任务文件，按日期区间重建贡献表和 daily_statistics
+
+回填用法:
+    python -m services.daily_statistics_service --days 90
+    python -m services.daily_statistics_service --start 2026-01-01 --end 2026-02-01
+    python -m services.daily_statistics_service --reconcile --days 7
+"""
+import os
+import json
+import queue
+import threading
+from datetime import datetime, date, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+
+from .database_service import AppDatabaseService
+from .storage_service import StorageService
+
+
+# 整体统计在贡献表中的学科键（daily_statistics 中为 subject_id IS NULL）
+SUBJECT_OVERALL = -1
+
+METRIC_FIELDS = ('task_count', 'homework_count', 'question_count', 'correct_count')
+
+# (stat_date 'YYYY-MM-DD', 学科键) -> {task_count, homework_count, question_count, correct_count, error_distribution}
+Rows = Dict[Tuple[str, int], Dict[str, Any]]
+
+
+def _empty_stats(task_count: int = 0) -> Dict[str, Any]:
+    return {'task_count': task_count, 'homework_count': 0, 'question_count': 0,
+            'correct_count': 0, 'error_distribution': {}}
+
+
+def _accuracy(stats: Dict[str, Any]) -> float:
+    if stats['question_count'] > 0:
+        return round(stats['correct_count'] / stats['question_count'], 4)
+    return 0
+
+
+def task_stat_date(task: Dict[str, Any]) -> Optional[str]:
+    """任务的统计日期（created_at 所在日期），无法解析时返回 None"""
+    created_at = task.get('created_at', '')
+    if not created_at:
+        return None
+    try:
+        task_time = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
+    except (ValueError, AttributeError):
+        return None
+    return task_time.date().isoformat()
+
+
+def build_task_rows(task: Dict[str, Any], dataset_subject_map: Dict[str, Any]) -> Rows:
+    """
+    计算单个任务对每日统计的贡献（口径与原快照一致）
+
+    整体行统计全部作业；学科行只统计能确定学科（匹配数据集或书名推断）的作业，
+    任务在涉及的每个学科各计 1 个任务
+    """
+    from .dashboard_service import DashboardService, SUBJECT_MAP
+
+    stat_date = task_stat_date(task)
+    if stat_date is None:
+        return {}
+    rows: Rows = {(stat_date, SUBJECT_OVERALL): _empty_stats(task_count=1)}
+
+    for hw_item in task.get('homework_items', []):
+        subject_id = None
+        matched_dataset = hw_item.get('matched_dataset')
+        if matched_dataset and matched_dataset in dataset_subject_map:
+            subject_id = dataset_subject_map[matched_dataset]
+        if subject_id is None:
+            subject_id = DashboardService._infer_subject_from_book_name(hw_item.get('book_name', ''))
+
+        targets = [rows[(stat_date, SUBJECT_OVERALL)]]
+        if subject_id is not None and subject_id in SUBJECT_MAP:
+            targets.append(rows.setdefault((stat_date, subject_id), _empty_stats(task_count=1)))
+
+        evaluation = hw_item.get('evaluation') or {}
+        errors = evaluation.get('errors') or []
+        for stats in targets:
+            stats['homework_count'] += 1
+            stats['question_count'] += evaluation.get('total_questions', 0)
+            stats['correct_count'] += evaluation.get('correct_count', 0)
+            for error in errors:
+                error_type = error.get('error_type', '其他')
+                stats['error_distribution'][error_type] = stats['error_distribution'].get(error_type, 0) + 1
+    return rows
+
+
+def diff_rows(new: Rows, old: Rows) -> Rows:
+    """new - old，只保留有变化的键和错误类型"""
+    delta: Rows = {}
+    for key in set(new) | set(old):
+        a = new.get(key) or _empty_stats()
+        b = old.get(key) or _empty_stats()
+        change = {f: a[f] - b[f] for f in METRIC_FIELDS}
+        distribution = {}
+        for error_type in set(a['error_distribution']) | set(b['error_distribution']):
+            n = a['error_distribution'].get(error_type, 0) - b['error_distribution'].get(error_type, 0)
+            if n:
+                distribution[error_type] = n
+        change['error_distribution'] = distribution
+        if distribution or any(change[f] for f in METRIC_FIELDS):
+            delta[key] = change
+    return delta
+
+
+def merge_rows(rows_list: List[Rows]) -> Rows:
+    """合并多个任务的贡献"""
+    merged: Rows = {}
+    for rows in rows_list:
+        for key, stats in rows.items():
+            target = merged.setdefault(key, _empty_stats())
+            for f in METRIC_FIELDS:
+                target[f] += stats[f]
+            for error_type, n in stats['error_distribution'].items():
+                target['error_distribution'][error_type] = target['error_distribution'].get(error_type, 0) + n
+    return merged
+
+
+def _json_path(key: str) -> str:
+    return '$."' + key.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def _is_deadlock(error: Exception) -> bool:
+    """MySQL 死锁（1213）或锁等待超时（1205），事务已回滚，可以重试"""
+    return type(error).__name__ == 'OperationalError' and bool(error.args) and error.args[0] in (1205, 1213)
+
+
+class DailyStatisticsService:
+    """
+    每日统计汇总服务
+
+    Attributes:
+        ENABLED: 是否在任务保存时增量更新（环境变量 DAILY_STATS_INCREMENTAL=false 关闭）
+        DEADLOCK_RETRIES: 增量事务死锁 / 锁等待超时后的重试次数
+    """
+
+    ENABLED = os.environ.get('DAILY_STATS_INCREMENTAL', 'true').lower() == 'true'
+    DEADLOCK_RETRIES = 2
+
+    _lock = threading.Lock()
+    _thread: Optional[threading.Thread] = None
+    # 待处理任务（同一任务多次保存只处理最新一次）：task_id -> 任务数据，None 表示已删除
+    _pending: Dict[str, Optional[Dict[str, Any]]] = {}
+    _signal: 'queue.Queue[None]' = queue.Queue()
+
+    # ========== 增量维护 ==========
+
+    @classmethod
+    def start(cls) -> bool:
+        """启动后台更新线程（应用启动时调用；未启动时 submit 不做任何事，由对账 / 回填补齐）"""
+        if not cls.ENABLED:
+            return False
+        with cls._lock:
+            if cls._thread is not None:
+                return False
+            cls._thread = threading.Thread(target=cls._run, name='daily-statistics', daemon=True)
+            cls._thread.start()
+        print("[DailyStatistics] 增量更新线程已启动")
+        return True
+
+    @classmethod
+    def submit(cls, task_id: str, task_data: Optional[Dict[str, Any]]) -> None:
+        """任务保存（task_data）或删除（None）后提交增量更新（StorageService 钩子）"""
+        if cls._thread is None:
+            return
+        with cls._lock:
+            cls._pending[task_id] = task_data
+        cls._signal.put(None)
+
+    @classmethod
+    def _run(cls) -> None:
+        while True:
+            cls._signal.get()
+            with cls._lock:
+                pending, cls._pending = cls._pending, {}
+            for task_id, task_data in pending.items():
+                try:
+                    cls.apply_task(task_id, task_data)
+                except Exception as e:
+                    print(f"[DailyStatistics] 增量更新失败 {task_id}: {e}")
+
+    @staticmethod
+    def apply_task(task_id: str, task_data: Optional[Dict[str, Any]],
+                   dataset_subject_map: Dict[str, Any] = None) -> Rows:
+        """
+        用任务的新贡献替换旧贡献，并把差值累加到 daily_statistics
+
+        读旧贡献、写贡献表和累加增量在同一个事务中完成，旧贡献用 SELECT ... FOR UPDATE 锁定，
+        多个 worker 同时处理同一任务时依次执行，不会基于同一份旧贡献重复累加；死锁时重试
+
+        Args:
+            task_id: 任务ID
+            task_data: 任务数据，None 表示任务已删除
+            dataset_subject_map: 数据集ID -> 学科ID，默认按需加载
+
+        Returns:
+            dict: 写入的增量
+        """
+        new: Rows = {}
+        if task_data is not None:
+            if dataset_subject_map is None:
+                dataset_subject_map = DailyStatisticsService._dataset_subject_map(task_data)
+            new = build_task_rows(task_data, dataset_subject_map)
+        for attempt in range(DailyStatisticsService.DEADLOCK_RETRIES + 1):
+            try:
+                delta = DailyStatisticsService._apply_rows(task_id, new)
+                break
+            except Exception as e:
+                if attempt == DailyStatisticsService.DEADLOCK_RETRIES or not _is_deadlock(e):
+                    raise
+                print(f"[DailyStatistics] 增量更新死锁，重试 {task_id}")
+        if not delta:
+            return delta
+
+        try:
+            from .dashboard_service import DashboardService
+            DashboardService.invalidate_trends_cache()
+        except Exception as e:
+            print(f"[DailyStatistics] 清除趋势缓存失败: {e}")
+        return delta
+
+    @staticmethod
+    def _apply_rows(task_id: str, new: Rows) -> Rows:
+        """在一个事务中锁定任务的旧贡献，写入新贡献并累加差值，返回差值"""
+        with AppDatabaseService.transaction() as cursor:
+            old = DailyStatisticsService._load_task_rows(cursor, task_id)
+            delta = diff_rows(new, old)
+            if not delta:
+                return delta
+
+            DailyStatisticsService._replace_task_rows(cursor, task_id, new)
+            # 按固定顺序累加，减少并发事务之间的死锁
+            for (stat_date, subject_key), change in sorted(delta.items()):
+                DailyStatisticsService._upsert_delta(cursor, stat_date, subject_key, change)
+            dates = sorted({k[0] for k in delta})
+            cursor.execute(f"""
+                DELETE FROM daily_statistics
+                WHERE stat_date IN ({','.join(['%s'] * len(dates))})
+                  AND task_count <= 0 AND homework_count <= 0
+            """, tuple(dates))
+        return delta
+
+    @staticmethod
+    def _dataset_subject_map(task_data: Dict[str, Any] = None) -> Dict[str, Any]:
+        """数据集ID -> 学科ID（任务没有匹配数据集时不加载）"""
+        if task_data is not None and not any(item.get('matched_dataset')
+                                             for item in task_data.get('homework_items', [])):
+            return {}
+        datasets = StorageService.get_all_datasets_summary()
+        return {ds['dataset_id']: ds.get('subject_id') for ds in datasets}
+
+    @staticmethod
+    def _load_task_rows(cursor, task_id: str) -> Rows:
+        """读取并锁定任务的贡献行（任务还没有贡献时锁定该任务ID的间隙，阻止并发插入）"""
+        cursor.execute(f"""
+            SELECT stat_date, subject_key, {', '.join(METRIC_FIELDS)}, error_distribution
+            FROM daily_statistics_tasks WHERE task_id = %s
+            FOR UPDATE
+        """, (task_id,))
+        rows = cursor.fetchall() or []
+        return {(str(row['stat_date']), int(row['subject_key'])): DailyStatisticsService._row_stats(row)
+                for row in rows}
+
+    @staticmethod
+    def _row_stats(row: Dict[str, Any]) -> Dict[str, Any]:
+        distribution = row.get('error_distribution') or {}
+        if isinstance(distribution, (str, bytes)):
+            distribution = json.loads(distribution)
+        stats = {f: int(row.get(f) or 0) for f in METRIC_FIELDS}
+        stats['error_distribution'] = {k: int(v) for k, v in distribution.items() if v}
+        return stats
+
+    @staticmethod
+    def _replace_task_rows(cursor, task_id: str, rows: Rows) -> None:
+        cursor.execute("DELETE FROM daily_statistics_tasks WHERE task_id = %s", (task_id,))
+        DailyStatisticsService._insert_task_rows([(task_id, key, stats) for key, stats in rows.items()], cursor)
+
+    @staticmethod
+    def _insert_task_rows(items: List[Tuple[str, Tuple[str, int], Dict[str, Any]]], cursor=None) -> None:
+        """批量插入贡献行（传入 cursor 时在其所属事务中执行）"""
+        if not items:
+            return
+        sql = f"""
+            INSERT INTO daily_statistics_tasks
+            (task_id, stat_date, subject_key, {', '.join(METRIC_FIELDS)}, error_distribution)
+            VALUES (%s, %s, %s, {', '.join(['%s'] * len(METRIC_FIELDS))}, %s)
+        """
+        params = [
+            (task_id, stat_date, subject_key) + tuple(stats[f] for f in METRIC_FIELDS)
+            + (json.dumps(stats['error_distribution'], ensure_ascii=False),)
+            for task_id, (stat_date, subject_key), stats in items
+        ]
+        if cursor is not None:
+            cursor.executemany(sql, params)
+        else:
+            AppDatabaseService.execute_many(sql, params)
+
+    @staticmethod
+    def _upsert_delta(cursor, stat_date: str, subject_key: int, change: Dict[str, Any]) -> None:
+        """累加一行增量；accuracy 按累加后的题目数和正确数重新计算，错误类型逐项用 JSON_SET 累加"""
+        distribution = change['error_distribution']
+        json_args = ''
+        json_params: List[Any] = []
+        for error_type, n in distribution.items():
+            json_args += ", %s, COALESCE(JSON_EXTRACT(error_distribution, %s), 0) + %s"
+            json_params += [_json_path(error_type), _json_path(error_type), n]
+        json_update = (f"error_distribution = JSON_SET(COALESCE(error_distribution, JSON_OBJECT()){json_args}),"
+                       if distribution else '')
+
+        insert_values = {f: max(change[f], 0) for f in METRIC_FIELDS}
+        insert_values['error_distribution'] = {k: n for k, n in distribution.items() if n > 0}
+        now = datetime.now()
+        sql = f"""
+            INSERT INTO daily_statistics
+            (stat_date, subject_id, {', '.join(METRIC_FIELDS)}, accuracy, error_distribution, created_at, updated_at)
+            VALUES (%s, %s, {', '.join(['%s'] * len(METRIC_FIELDS))}, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                {', '.join(f'{f} = {f} + %s' for f in METRIC_FIELDS)},
+                accuracy = IF(question_count > 0, ROUND(correct_count / question_count, 4), 0),
+                {json_update}
+                updated_at = VALUES(updated_at)
+        """
+        params = (
+            (stat_date, None if subject_key == SUBJECT_OVERALL else subject_key)
+            + tuple(insert_values[f] for f in METRIC_FIELDS)
+            + (_accuracy(insert_values), json.dumps(insert_values['error_distribution'], ensure_ascii=False),
+               now, now)
+            + tuple(change[f] for f in METRIC_FIELDS)
+            + tuple(json_params)
+        )
+        cursor.execute(sql, params)
+
+    # ========== 对账 ==========
+
+    @staticmethod
+    def reconcile(stat_date: str) -> Dict[str, Any]:
+        """
+        用贡献表汇总结果校正某天的 daily_statistics（幂等）
+
+        Returns:
+            dict: {date, overall, by_subject, repaired}，repaired 为校正的行数
+        """
+        expected = merge_rows([
+            {(stat_date, int(row['subject_key'])): DailyStatisticsService._row_stats(row)}
+            for row in AppDatabaseService.execute_query(f"""
+                SELECT subject_key, {', '.join(METRIC_FIELDS)}, error_distribution
+                FROM daily_statistics_tasks WHERE stat_date = %s
+            """, (stat_date,)) or []
+        ])
+        actual = {
+            (stat_date, SUBJECT_OVERALL if row['subject_id'] is None else int(row['subject_id'])):
+                DailyStatisticsService._row_stats(row)
+            for row in AppDatabaseService.execute_query(f"""
+                SELECT subject_id, {', '.join(METRIC_FIELDS)}, error_distribution
+                FROM daily_statistics WHERE stat_date = %s
+            """, (stat_date,)) or []
+        }
+
+        repaired = 0
+        for key, stats in expected.items():
+            if actual.get(key) != stats:
+                DailyStatisticsService._write_row(key, stats)
+                repaired += 1
+        for key in actual:
+            if key not in expected:
+                subject_key = key[1]
+                if subject_key == SUBJECT_OVERALL:
+                    AppDatabaseService.execute_update(
+                        "DELETE FROM daily_statistics WHERE stat_date = %s AND subject_id IS NULL", (stat_date,))
+                else:
+                    AppDatabaseService.execute_update(
+                        "DELETE FROM daily_statistics WHERE stat_date = %s AND subject_id = %s",
+                        (stat_date, subject_key))
+                repaired += 1
+        if repaired:
+            print(f"[DailyStatistics] 对账校正 {stat_date}: {repaired} 行")
+            try:
+                from .dashboard_service import DashboardService
+                DashboardService.invalidate_trends_cache()
+            except Exception as e:
+                print(f"[DailyStatistics] 清除趋势缓存失败: {e}")
+
+        overall = expected.get((stat_date, SUBJECT_OVERALL)) or _empty_stats()
+        return {
+            'date': stat_date,
+            'overall': {**overall, 'accuracy': _accuracy(overall)},
+            'by_subject': {subject_key: {**stats, 'accuracy': _accuracy(stats)}
+                           for (_, subject_key), stats in sorted(expected.items())
+                           if subject_key != SUBJECT_OVERALL},
+            'repaired': repaired
+        }
+
+    @staticmethod
+    def _write_row(key: Tuple[str, int], stats: Dict[str, Any]) -> None:
+        """按绝对值写入一行 daily_statistics"""
+        stat_date, subject_key = key
+        now = datetime.now()
+        AppDatabaseService.execute_update(f"""
+            INSERT INTO daily_statistics
+            (stat_date, subject_id, {', '.join(METRIC_FIELDS)}, accuracy, error_distribution, created_at, updated_at)
+            VALUES (%s, %s, {', '.join(['%s'] * len(METRIC_FIELDS))}, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                {', '.join(f'{f} = VALUES({f})' for f in METRIC_FIELDS)},
+                accuracy = VALUES(accuracy),
+                error_distribution = VALUES(error_distribution),
+                updated_at = VALUES(updated_at)
+        """, (stat_date, None if subject_key == SUBJECT_OVERALL else subject_key)
+            + tuple(stats[f] for f in METRIC_FIELDS)
+            + (_accuracy(stats), json.dumps(stats['error_distribution'], ensure_ascii=False), now, now))
+
+    # ========== 回填 ==========
+
+    @staticmethod
+    def backfill(start_date: date, end_date: date) -> Dict[str, int]:
+        """
+        从任务文件重建 [start_date, end_date) 区间的贡献表和 daily_statistics
+
+        一次扫描全部任务文件，先删除区间内的行再整体写入，可重复执行。
+
+        Returns:
+            dict: {tasks, task_rows, daily_rows}
+        """
+        start, end = start_date.isoformat(), end_date.isoformat()
+        dataset_subject_map = DailyStatisticsService._dataset_subject_map()
+
+        items = []
+        task_count = 0
+        batch_dir = StorageService.BATCH_TASKS_DIR
+        for entry in os.scandir(batch_dir) if os.path.isdir(batch_dir) else []:
+            if not entry.name.endswith('.json'):
+                continue
+            try:
+                with open(entry.path, 'r', encoding='utf-8') as f:
+                    task = json.load(f)
+            except (OSError, ValueError):
+                continue
+            stat_date = task_stat_date(task)
+            if stat_date is None or not start <= stat_date < end:
+                continue
+            task_count += 1
+            task_id = task.get('task_id') or entry.name[:-5]
+            items += [(task_id, key, stats) for key, stats in build_task_rows(task, dataset_subject_map).items()]
+
+        AppDatabaseService.execute_update(
+            "DELETE FROM daily_statistics_tasks WHERE stat_date >= %s AND stat_date < %s", (start, end))
+        DailyStatisticsService._insert_task_rows(items)
+        AppDatabaseService.execute_update(
+            "DELETE FROM daily_statistics WHERE stat_date >= %s AND stat_date < %s", (start, end))
+        daily = merge_rows([{key: stats} for _, key, stats in items])
+        for key, stats in daily.items():
+            DailyStatisticsService._write_row(key, stats)
+
+        return {'tasks': task_count, 'task_rows': len(items), 'daily_rows': len(daily)}
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='回填 / 对账每日统计汇总表')
+    parser.add_argument('--days', type=int, default=30, help='最近 N 天（含今天）')
+    parser.add_argument('--start', help='开始日期 YYYY-MM-DD（含）')
+    parser.add_argument('--end', help='结束日期 YYYY-MM-DD（不含），默认明天')
+    parser.add_argument('--reconcile', action='store_true', help='只按贡献表逐日对账，不扫描任务文件')
+    args = parser.parse_args()
+
+    end = date.fromisoformat(args.end) if args.end else date.today() + timedelta(days=1)
+    start = date.fromisoformat(args.start) if args.start else end - timedelta(days=args.days)
+    if args.reconcile:
+        day = start
+        while day < end:
+            DailyStatisticsService.reconcile(day.isoformat())
+            day += timedelta(days=1)
+        print(f"[DailyStatistics] 对账完成 {start} ~ {end}")
+    else:
+        result = DailyStatisticsService.backfill(start, end)
+        print(f"[DailyStatistics] 回填完成 {start} ~ {end}: {result}")
@@ -6,7 +6,7 @@
 - 数据集概览统计
 - 学科评估概览
 - 测试计划 CRUD 操作
-- 内存缓存管理
+- 内存缓存管理（单飞计算 + 过期后宽限期内返回旧值并后台刷新）
 
 遵循 NFR-34 代码质量标准
 """
@@ -14,11 +14,25 @@ import os
 import json
 import uuid
 import time
+import random
+import threading
 from datetime import datetime, timedelta
 from typing import Optional, List, Dict, Any, Tuple
 
 from .database_service import AppDatabaseService
 from .storage_service import StorageService
+from .response_cache_service import ResponseCacheService
+
+
+class _Uncacheable:
+    """计算失败时的返回值包装：结果照常返回给调用方，但不写入缓存"""
+    __slots__ = ('value',)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+
+_MISSING = object()
 
 
 # 学科ID映射
@@ -43,11 +57,25 @@ class DashboardService:
     Attributes:
         _cache: 内存缓存字典，存储缓存数据和过期时间
         _cache_ttl: 默认缓存过期时间（秒），默认5分钟
+        _inflight: 正在计算的缓存键，同一键同时只有一个计算
+        _cache_stats: 每个缓存键的命中/未命中/旧值返回/计算耗时统计
     """
     
     # 内存缓存
     _cache: Dict[str, Dict[str, Any]] = {}
     _cache_ttl: int = 300  # 默认5分钟
+    _cache_lock = threading.RLock()
+    _inflight: Dict[str, Dict[str, Any]] = {}
+    _cache_stats: Dict[str, Dict[str, Any]] = {}
+    # 缓存失效代数：计算开始后发生失效，则计算结果不再写入缓存
+    _cache_generation: int = 0
+    
+    # 过期后的宽限期占 TTL 的比例：宽限期内返回旧值并在后台刷新
+    CACHE_STALE_GRACE_RATIO = 0.5
+    # 过期时间随机提前的最大比例，避免同一批键同时过期
+    CACHE_JITTER_RATIO = 0.1
+    # 等待其他线程计算的最长时间（秒），超时后自行计算
+    CACHE_WAIT_TIMEOUT = 60
     
     # 分级缓存TTL配置（秒）
     CACHE_TTL_CONFIG = {
@@ -58,6 +86,7 @@ class DashboardService:
         'overview': 300,               # 概览统计：5分钟（需要较新数据）
         'heatmap': 600,                # 热点图：10分钟
         'trends': 600,                 # 趋势数据：10分钟
+        'zpsmart_books': 1800,         # zpsmart 图书列表：30分钟
         'default': 300                 # 默认：5分钟
     }
     
@@ -77,14 +106,15 @@ class DashboardService:
         Returns:
             缓存的数据，如果不存在或已过期则返回 None
         """
-        if key in DashboardService._cache:
-            cache_entry = DashboardService._cache[key]
+        cache_entry = DashboardService._cache.get(key)
+        if cache_entry is not None:
+            now = time.time()
             # 检查是否过期
-            if time.time() < cache_entry.get('expires_at', 0):
+            if now < cache_entry.get('expires_at', 0):
                 return cache_entry.get('data')
-            else:
-                # 缓存已过期，删除
-                del DashboardService._cache[key]
+            elif now >= cache_entry.get('stale_until', 0):
+                # 超过宽限期，删除（宽限期内保留给 get_or_compute 返回旧值）
+                DashboardService._cache.pop(key, None)
         return None
     
     @staticmethod
@@ -125,13 +155,178 @@ class DashboardService:
         if ttl is None:
             ttl = DashboardService._get_cache_ttl(key)
         
+        now = time.time()
+        # 过期时间随机提前，分散同时写入的键的过期时刻
+        expires_at = now + ttl * (1 - random.uniform(0, DashboardService.CACHE_JITTER_RATIO))
         DashboardService._cache[key] = {
             'data': value,
-            'expires_at': time.time() + ttl,
+            'expires_at': expires_at,
+            'stale_until': expires_at + ttl * DashboardService.CACHE_STALE_GRACE_RATIO,
             'cached_at': datetime.now().isoformat(),
             'ttl': ttl
         }
     
+    @staticmethod
+    def get_cache_version(key: str) -> Optional[tuple]:
+        """
+        获取未过期缓存项的版本
+        
+        用于条件 GET：版本为写入时间，缓存重新计算或失效后随之变化。
+        
+        Returns:
+            tuple: (版本戳, 写入时间)；缓存不存在或已过期时返回 None
+        """
+        entry = DashboardService._cache.get(key)
+        if entry is None or time.time() >= entry.get('expires_at', 0):
+            return None
+        cached_at = entry.get('cached_at')
+        return cached_at, datetime.fromisoformat(cached_at)
+    
+    @staticmethod
+    def uncacheable(value: Any) -> _Uncacheable:
+        """包装计算结果，使 get_or_compute 返回该值但不写入缓存（用于计算失败时的兜底结果）"""
+        return _Uncacheable(value)
+    
+    @staticmethod
+    def get_or_compute(key: str, compute, ttl: int = None) -> Any:
+        """
+        读取缓存，未命中时计算并写入 (US-29.6)
+        
+        - 未过期：直接返回
+        - 已过期但在宽限期内：返回旧值，并在后台线程刷新（同一键只刷新一次）
+        - 不存在或超过宽限期：同一键只有一个线程计算，其余线程等待其结果
+        
+        Args:
+            key: 缓存键名
+            compute: 无参计算函数；返回 uncacheable(value) 时不写入缓存
+            ttl: 缓存过期时间（秒），如果为None则根据key自动选择
+            
+        Returns:
+            缓存或计算得到的数据
+        """
+        now = time.time()
+        entry = DashboardService._cache.get(key)
+        if entry is not None:
+            if now < entry.get('expires_at', 0):
+                DashboardService._record_stat(key, 'hits')
+                return entry.get('data')
+            if now < entry.get('stale_until', 0):
+                DashboardService._record_stat(key, 'stale_served')
+                DashboardService._refresh_in_background(key, compute, ttl)
+                return entry.get('data')
+        
+        DashboardService._record_stat(key, 'misses')
+        with DashboardService._cache_lock:
+            flight = DashboardService._inflight.get(key)
+            is_leader = flight is None
+            if is_leader:
+                flight = {'event': threading.Event(), 'value': _MISSING, 'error': None}
+                DashboardService._inflight[key] = flight
+        
+        if is_leader:
+            return DashboardService._run_compute(key, compute, ttl, flight)
+        
+        # 其他线程正在计算，等待结果
+        DashboardService._record_stat(key, 'waits')
+        flight['event'].wait(DashboardService.CACHE_WAIT_TIMEOUT)
+        if flight['error'] is not None:
+            raise flight['error']
+        if flight['value'] is not _MISSING:
+            return flight['value']
+        return DashboardService._run_compute(key, compute, ttl, None)
+    
+    @staticmethod
+    def _run_compute(key: str, compute, ttl: Optional[int], flight: Optional[Dict[str, Any]]) -> Any:
+        """执行计算并写入缓存，结束后唤醒等待者"""
+        generation = DashboardService._cache_generation
+        start = time.perf_counter()
+        try:
+            value = compute()
+            cacheable = not isinstance(value, _Uncacheable)
+            if not cacheable:
+                value = value.value
+            DashboardService._record_compute(key, time.perf_counter() - start)
+            # 计算期间发生失效（数据已变更），结果不写入缓存
+            if cacheable and generation == DashboardService._cache_generation:
+                DashboardService.set_cached(key, value, ttl)
+            if flight is not None:
+                flight['value'] = value
+            return value
+        except Exception as e:
+            DashboardService._record_stat(key, 'errors')
+            if flight is not None:
+                flight['error'] = e
+            raise
+        finally:
+            if flight is not None:
+                with DashboardService._cache_lock:
+                    if DashboardService._inflight.get(key) is flight:
+                        del DashboardService._inflight[key]
+                flight['event'].set()
+    
+    @staticmethod
+    def _refresh_in_background(key: str, compute, ttl: Optional[int]) -> None:
+        """后台刷新过期键，已有计算进行中时跳过"""
+        with DashboardService._cache_lock:
+            if key in DashboardService._inflight:
+                return
+            flight = {'event': threading.Event(), 'value': _MISSING, 'error': None}
+            DashboardService._inflight[key] = flight
+        
+        def refresh():
+            try:
+                DashboardService._run_compute(key, compute, ttl, flight)
+            except Exception as e:
+                print(f"[Dashboard] 后台刷新缓存失败 {key}: {e}")
+        
+        threading.Thread(target=refresh, name=f'cache-refresh-{key}', daemon=True).start()
+    
+    @staticmethod
+    def _key_stats(key: str) -> Dict[str, Any]:
+        stats = DashboardService._cache_stats.get(key)
+        if stats is None:
+            stats = DashboardService._cache_stats.setdefault(key, {
+                'hits': 0, 'misses': 0, 'stale_served': 0, 'waits': 0, 'errors': 0,
+                'computes': 0, 'compute_ms_total': 0.0, 'compute_ms_max': 0.0, 'compute_ms_last': 0.0
+            })
+        return stats
+    
+    @staticmethod
+    def _record_stat(key: str, field: str) -> None:
+        with DashboardService._cache_lock:
+            DashboardService._key_stats(key)[field] += 1
+    
+    @staticmethod
+    def _record_compute(key: str, elapsed: float) -> None:
+        ms = elapsed * 1000
+        with DashboardService._cache_lock:
+            stats = DashboardService._key_stats(key)
+            stats['computes'] += 1
+            stats['compute_ms_total'] += ms
+            stats['compute_ms_last'] = ms
+            stats['compute_ms_max'] = max(stats['compute_ms_max'], ms)
+    
+    @staticmethod
+    def get_cache_stats() -> Dict[str, Any]:
+        """
+        获取每个缓存键的统计 (US-29.6)
+        
+        Returns:
+            dict: {keys: {key: {hits, misses, stale_served, waits, errors, computes,
+                   compute_ms_avg, compute_ms_max, compute_ms_last, hit_rate}}, inflight: [key]}
+        """
+        with DashboardService._cache_lock:
+            keys = {}
+            for key, stats in DashboardService._cache_stats.items():
+                item = dict(stats)
+                served = item['hits'] + item['stale_served'] + item['misses']
+                item['hit_rate'] = round((item['hits'] + item['stale_served']) / served, 4) if served else 0
+                item['compute_ms_avg'] = round(item['compute_ms_total'] / item['computes'], 2) if item['computes'] else 0
+                for field in ('compute_ms_total', 'compute_ms_max', 'compute_ms_last'):
+                    item[field] = round(item[field], 2)
+                keys[key] = item
+            return {'keys': keys, 'inflight': list(DashboardService._inflight.keys())}
+    
     @staticmethod
     def clear_cache(key: str = None) -> None:
         """
@@ -142,10 +337,12 @@ class DashboardService:
         Args:
             key: 要清除的缓存键名，如果为 None 则清除所有缓存
         """
+        DashboardService._cache_generation += 1
         if key is None:
             DashboardService._cache.clear()
-        elif key in DashboardService._cache:
-            del DashboardService._cache[key]
+            ResponseCacheService.invalidate()
+        else:
+            DashboardService._cache.pop(key, None)
     
     @staticmethod
     def invalidate_task_related_cache() -> None:
@@ -155,6 +352,8 @@ class DashboardService:
         当批量任务创建、更新或删除时调用此方法，
         清除所有依赖任务数据的缓存。
         """
+        # 即使当前没有缓存，也要让进行中的计算结果作废
+        DashboardService._cache_generation += 1
         keys_to_clear = []
         for key in list(DashboardService._cache.keys()):
             # 清除任务相关的缓存
@@ -172,9 +371,19 @@ class DashboardService:
         for key in keys_to_clear:
             DashboardService.clear_cache(key)
         
+        ResponseCacheService.invalidate('dashboard')
+        
         if keys_to_clear:
             print(f"[Dashboard] 已清除 {len(keys_to_clear)} 个任务相关缓存")
     
+    @staticmethod
+    def invalidate_trends_cache() -> None:
+        """使趋势缓存失效（daily_statistics 增量更新后调用）"""
+        for key in list(DashboardService._cache.keys()):
+            if key.startswith('trends_'):
+                DashboardService.clear_cache(key)
+        ResponseCacheService.invalidate('dashboard')
+    
     @staticmethod
     def invalidate_dataset_related_cache() -> None:
         """
@@ -182,6 +391,8 @@ class DashboardService:
         
         当数据集创建、更新或删除时调用此方法。
         """
+        # 即使当前没有缓存，也要让进行中的计算结果作废
+        DashboardService._cache_generation += 1
         keys_to_clear = []
         for key in list(DashboardService._cache.keys()):
             if any(prefix in key for prefix in [
@@ -195,6 +406,9 @@ class DashboardService:
         for key in keys_to_clear:
             DashboardService.clear_cache(key)
         
+        ResponseCacheService.invalidate('datasets')
+        ResponseCacheService.invalidate('dashboard')
+        
         if keys_to_clear:
             print(f"[Dashboard] 已清除 {len(keys_to_clear)} 个数据集相关缓存")
     
@@ -213,12 +427,13 @@ class DashboardService:
             'keys': []
         }
         current_time = time.time()
-        for key, entry in DashboardService._cache.items():
+        for key, entry in list(DashboardService._cache.items()):
             status['keys'].append({
                 'key': key,
                 'cached_at': entry.get('cached_at'),
                 'expires_at': datetime.fromtimestamp(entry.get('expires_at', 0)).isoformat(),
-                'is_expired': current_time >= entry.get('expires_at', 0)
+                'is_expired': current_time >= entry.get('expires_at', 0),
+                'is_stale': entry.get('expires_at', 0) <= current_time < entry.get('stale_until', 0)
             })
         return status
     
@@ -235,11 +450,11 @@ class DashboardService:
         Returns:
             list: 所有批量任务数据列表，按创建时间倒序排列
         """
-        cache_key = 'all_batch_tasks'
-        cached = DashboardService.get_cached(cache_key)
-        if cached is not None:
-            return cached
-        
+        return DashboardService.get_or_compute('all_batch_tasks', DashboardService._scan_batch_tasks)
+    
+    @staticmethod
+    def _scan_batch_tasks() -> List[Dict[str, Any]]:
+        """扫描 batch_tasks/ 目录读取所有任务文件"""
         tasks = []
         batch_tasks_dir = StorageService.BATCH_TASKS_DIR
         
@@ -262,11 +477,9 @@ class DashboardService:
             # 按创建时间倒序排列
             tasks.sort(key=lambda x: x.get('created_at', ''), reverse=True)
             
-            # 缓存结果
-            DashboardService.set_cached(cache_key, tasks)
-            
         except Exception as e:
             print(f"[Dashboard] 扫描批量任务目录失败: {e}")
+            return DashboardService.uncacheable(tasks)
         
         return tasks
     
@@ -332,11 +545,13 @@ class DashboardService:
                 - accuracy: 准确率统计 {current, previous, trend}
                 - last_sync: 最后同步时间
         """
-        cache_key = f'overview_{time_range}'
-        cached = DashboardService.get_cached(cache_key)
-        if cached is not None:
-            return cached
-        
+        return DashboardService.get_or_compute(
+            f'overview_{time_range}', lambda: DashboardService._compute_overview(time_range)
+        )
+    
+    @staticmethod
+    def _compute_overview(time_range: str) -> Dict[str, Any]:
+        """计算概览统计（见 get_overview）"""
         result = {
             'datasets': {'total': 0, 'by_subject': {}},
             'tasks': {'today': 0, 'week': 0, 'month': 0},
@@ -475,11 +690,9 @@ class DashboardService:
                         pass
             result['datasets']['week_new'] = week_new_count
             
-            # 缓存结果
-            DashboardService.set_cached(cache_key, result)
-            
         except Exception as e:
             print(f"[Dashboard] 获取概览统计失败: {e}")
+            return DashboardService.uncacheable(result)
         
         return result
     
@@ -2150,203 +2363,29 @@ class DashboardService:
         """
         生成每日统计快照 (US-15, 10.1)
         
-        将指定日期的统计数据保存到 daily_statistics 表。
-        包含整体统计和按学科分组的统计。
+        daily_statistics 表由 DailyStatisticsService 在任务保存时增量维护，
+        这里只用任务贡献表对账校正指定日期（幂等，不再扫描任务文件）。
         
         Args:
             date: 统计日期，格式 YYYY-MM-DD，默认为昨天
             
         Returns:
-            dict: 生成的统计数据
+            dict: 对账后的统计数据 {date, overall, by_subject, repaired}
         """
+        from .daily_statistics_service import DailyStatisticsService
+        
         if not date:
             date = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
         
         try:
-            # 解析日期
-            stat_date = datetime.strptime(date, '%Y-%m-%d').date()
-            start_datetime = datetime.combine(stat_date, datetime.min.time())
-            end_datetime = datetime.combine(stat_date, datetime.max.time())
-            
-            # 加载所有批量任务
-            all_tasks = DashboardService._load_all_batch_tasks()
-            
-            # 筛选指定日期的任务
-            day_tasks = []
-            for task in all_tasks:
-                created_at = task.get('created_at', '')
-                if created_at:
-                    try:
-                        task_time = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-                        if task_time.tzinfo:
-                            task_time = task_time.replace(tzinfo=None)
-                        if start_datetime <= task_time <= end_datetime:
-                            day_tasks.append(task)
-                    except:
-                        continue
-            
-            # 获取数据集信息用于确定学科
-            datasets = StorageService.get_all_datasets_summary()
-            dataset_subject_map = {ds['dataset_id']: ds.get('subject_id') for ds in datasets}
-            
-            # 统计整体数据
-            overall_stats = {
-                'task_count': len(day_tasks),
-                'homework_count': 0,
-                'question_count': 0,
-                'correct_count': 0,
-                'error_distribution': {}
-            }
-            
-            # 按学科统计
-            subject_stats = {}
-            for subject_id in SUBJECT_MAP.keys():
-                subject_stats[subject_id] = {
-                    'task_count': 0,
-                    'homework_count': 0,
-                    'question_count': 0,
-                    'correct_count': 0,
-                    'error_distribution': {}
-                }
-            
-            # 遍历任务统计
-            task_subjects = {}  # task_id -> set of subject_ids
-            
-            for task in day_tasks:
-                task_id = task.get('task_id', '')
-                task_subjects[task_id] = set()
-                
-                for hw_item in task.get('homework_items', []):
-                    # 确定学科ID
-                    subject_id = None
-                    matched_dataset = hw_item.get('matched_dataset')
-                    if matched_dataset and matched_dataset in dataset_subject_map:
-                        subject_id = dataset_subject_map[matched_dataset]
-                    
-                    if subject_id is None:
-                        book_name = hw_item.get('book_name', '')
-                        subject_id = DashboardService._infer_subject_from_book_name(book_name)
-                    
-                    # 统计整体数据
-                    overall_stats['homework_count'] += 1
-                    evaluation = hw_item.get('evaluation') or {}
-                    overall_stats['question_count'] += evaluation.get('total_questions', 0)
-                    overall_stats['correct_count'] += evaluation.get('correct_count', 0)
-                    
-                    # 统计错误类型
-                    errors = evaluation.get('errors') or []
-                    for error in errors:
-                        error_type = error.get('error_type', '其他')
-                        overall_stats['error_distribution'][error_type] = \
-                            overall_stats['error_distribution'].get(error_type, 0) + 1
-                    
-                    # 按学科统计
-                    if subject_id is not None and subject_id in subject_stats:
-                        task_subjects[task_id].add(subject_id)
-                        subject_stats[subject_id]['homework_count'] += 1
-                        subject_stats[subject_id]['question_count'] += evaluation.get('total_questions', 0)
-                        subject_stats[subject_id]['correct_count'] += evaluation.get('correct_count', 0)
-                        
-                        for error in errors:
-                            error_type = error.get('error_type', '其他')
-                            subject_stats[subject_id]['error_distribution'][error_type] = \
-                                subject_stats[subject_id]['error_distribution'].get(error_type, 0) + 1
-            
-            # 统计任务数
-            for task_id, subjects in task_subjects.items():
-                for subject_id in subjects:
-                    if subject_id in subject_stats:
-                        subject_stats[subject_id]['task_count'] += 1
-            
-            # 计算准确率
-            overall_accuracy = 0
-            if overall_stats['question_count'] > 0:
-                overall_accuracy = round(overall_stats['correct_count'] / overall_stats['question_count'], 4)
-            
-            # 保存整体统计到数据库
-            DashboardService._save_daily_statistics(
-                stat_date=date,
-                subject_id=None,  # NULL 表示整体
-                stats=overall_stats,
-                accuracy=overall_accuracy
-            )
-            
-            # 保存各学科统计
-            for subject_id, stats in subject_stats.items():
-                if stats['homework_count'] > 0:
-                    accuracy = 0
-                    if stats['question_count'] > 0:
-                        accuracy = round(stats['correct_count'] / stats['question_count'], 4)
-                    
-                    DashboardService._save_daily_statistics(
-                        stat_date=date,
-                        subject_id=subject_id,
-                        stats=stats,
-                        accuracy=accuracy
-                    )
-            
-            print(f"[Dashboard] 统计快照生成成功: date={date}, tasks={overall_stats['task_count']}")
-            
-            return {
-                'date': date,
-                'overall': {
-                    **overall_stats,
-                    'accuracy': overall_accuracy
-                },
-                'by_subject': subject_stats
-            }
-            
+            result = DailyStatisticsService.reconcile(date)
+            print(f"[Dashboard] 统计快照对账完成: date={date}, tasks={result['overall']['task_count']}, "
+                  f"repaired={result['repaired']}")
+            return result
         except Exception as e:
             print(f"[Dashboard] 生成统计快照失败: {e}")
             raise
     
-    @staticmethod
-    def _save_daily_statistics(
-        stat_date: str,
-        subject_id: int,
-        stats: Dict[str, Any],
-        accuracy: float
-    ) -> None:
-        """
-        保存每日统计数据到数据库
-        
-        Args:
-            stat_date: 统计日期
-            subject_id: 学科ID，None 表示整体
-            stats: 统计数据
-            accuracy: 准确率
-        """
-        try:
-            sql = """
-                INSERT INTO daily_statistics 
-                (stat_date, subject_id, task_count, homework_count, question_count, 
-                 correct_count, accuracy, error_distribution, created_at, updated_at)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ON DUPLICATE KEY UPDATE
-                    task_count = VALUES(task_count),
-                    homework_count = VALUES(homework_count),
-                    question_count = VALUES(question_count),
-                    correct_count = VALUES(correct_count),
-                    accuracy = VALUES(accuracy),
-                    error_distribution = VALUES(error_distribution),
-                    updated_at = VALUES(updated_at)
-            """
-            now = datetime.now()
-            AppDatabaseService.execute_insert(sql, (
-                stat_date,
-                subject_id,
-                stats.get('task_count', 0),
-                stats.get('homework_count', 0),
-                stats.get('question_count', 0),
-                stats.get('correct_count', 0),
-                accuracy,
-                json.dumps(stats.get('error_distribution', {}), ensure_ascii=False),
-                now,
-                now
-            ))
-        except Exception as e:
-            print(f"[Dashboard] 保存统计数据失败: {e}")
-    
     @staticmethod
     def get_trends(days: int = 7, subject_id: int = None) -> Dict[str, Any]:
         """
@@ -2364,6 +2403,13 @@ class DashboardService:
                 - trends: 整体趋势数据列表
                 - by_subject: 按学科分组的趋势数据
         """
+        return DashboardService.get_or_compute(
+            f'trends_{days}_{subject_id}', lambda: DashboardService._compute_trends(days, subject_id)
+        )
+    
+    @staticmethod
+    def _compute_trends(days: int, subject_id: int = None) -> Dict[str, Any]:
+        """计算趋势数据（见 get_trends）"""
         try:
             # 计算日期范围
             end_date = datetime.now().date()
@@ -2437,10 +2483,10 @@ class DashboardService:
             
         except Exception as e:
             print(f"[Dashboard] 获取趋势数据失败: {e}")
-            return {
+            return DashboardService.uncacheable({
                 'trends': [],
                 'by_subject': {}
-            }
+            })
     
     @staticmethod
     def _calculate_trends_from_tasks(days: int, subject_id: int = None) -> Dict[str, Any]:
@@ -2616,289 +2662,34 @@ class DashboardService:
     # ========== 智能搜索 (US-32) ==========
     
     @staticmethod
-    def search(query: str, search_type: str = 'all') -> Dict[str, Any]:
+    def search(query: str, search_type: str = 'all', page: int = 1, page_size: int = 20) -> Dict[str, Any]:
         """
         智能搜索 (US-32)
         
-        搜索任务名、数据集名、书本名、题号等内容，返回匹配结果并高亮关键词。
+        搜索任务名、数据集名、书本名、题号和答案内容，返回匹配结果并高亮关键词。
+        基于 SearchIndexService 的 n-gram 倒排索引，结果按匹配程度排序并分页。
         
         Args:
-            query: 搜索关键词
+            query: 搜索关键词，支持 "task:"、"书本:" 等类型前缀
             search_type: 搜索类型 all|task|dataset|book|question
+            page: 页码（从 1 开始）
+            page_size: 每页条数
             
         Returns:
             dict: 包含搜索结果列表
                 - results: [{type, id, name, highlight}]
+                - total: 匹配总数
+                - page, page_size: 分页参数
         """
-        results = []
-        
         if not query or len(query.strip()) < 1:
-            return {'results': results}
-        
-        query = query.strip()
-        query_lower = query.lower()
+            return {'results': [], 'total': 0, 'page': page, 'page_size': page_size}
         
         try:
-            # 搜索批量任务 (task)
-            if search_type in ['all', 'task']:
-                task_results = DashboardService._search_tasks(query, query_lower)
-                results.extend(task_results)
-            
-            # 搜索数据集 (dataset)
-            if search_type in ['all', 'dataset']:
-                dataset_results = DashboardService._search_datasets(query, query_lower)
-                results.extend(dataset_results)
-            
-            # 搜索书本 (book) - 从数据集和任务中提取
-            if search_type in ['all', 'book']:
-                book_results = DashboardService._search_books(query, query_lower)
-                results.extend(book_results)
-            
-            # 搜索题号 (question) - 从错误样本中搜索
-            if search_type in ['all', 'question']:
-                question_results = DashboardService._search_questions(query, query_lower)
-                results.extend(question_results)
-            
-            # 去重并限制结果数量
-            seen = set()
-            unique_results = []
-            for r in results:
-                key = f"{r['type']}_{r['id']}"
-                if key not in seen:
-                    seen.add(key)
-                    unique_results.append(r)
-                    if len(unique_results) >= 20:  # 最多返回20条结果
-                        break
-            
-            return {'results': unique_results}
-            
+            from .search_index_service import SearchIndexService
+            return SearchIndexService.search(query.strip(), search_type, page=page, page_size=page_size)
         except Exception as e:
             print(f"[Dashboard] 搜索失败: {e}")
-            return {'results': []}
-    
-    @staticmethod
-    def _search_tasks(query: str, query_lower: str) -> List[Dict[str, Any]]:
-        """
-        搜索批量任务
-        
-        Args:
-            query: 原始搜索关键词
-            query_lower: 小写搜索关键词
-            
-        Returns:
-            list: 匹配的任务列表
-        """
-        results = []
-        
-        try:
-            # 加载所有批量任务
-            all_tasks = DashboardService._load_all_batch_tasks()
-            
-            for task in all_tasks:
-                task_name = task.get('name', '')
-                task_id = task.get('task_id', '')
-                
-                # 检查任务名是否匹配
-                if query_lower in task_name.lower():
-                    results.append({
-                        'type': 'task',
-                        'id': task_id,
-                        'name': task_name,
-                        'highlight': DashboardService._highlight_text(task_name, query)
-                    })
-                    
-                    if len(results) >= 10:  # 每种类型最多10条
-                        break
-                        
-        except Exception as e:
-            print(f"[Dashboard] 搜索任务失败: {e}")
-        
-        return results
-    
-    @staticmethod
-    def _search_datasets(query: str, query_lower: str) -> List[Dict[str, Any]]:
-        """
-        搜索数据集
-        
-        Args:
-            query: 原始搜索关键词
-            query_lower: 小写搜索关键词
-            
-        Returns:
-            list: 匹配的数据集列表
-        """
-        results = []
-        
-        try:
-            # 获取所有数据集
-            all_datasets = StorageService.get_all_datasets_summary()
-            
-            for ds in all_datasets:
-                ds_name = ds.get('name', '')
-                ds_id = ds.get('dataset_id', '')
-                book_name = ds.get('book_name', '')
-                
-                # 检查数据集名或书本名是否匹配
-                if query_lower in ds_name.lower() or query_lower in book_name.lower():
-                    # 优先高亮数据集名，如果数据集名不匹配则高亮书本名
-                    if query_lower in ds_name.lower():
-                        highlight = DashboardService._highlight_text(ds_name, query)
-                    else:
-                        highlight = DashboardService._highlight_text(book_name, query)
-                    
-                    results.append({
-                        'type': 'dataset',
-                        'id': ds_id,
-                        'name': ds_name,
-                        'highlight': highlight
-                    })
-                    
-                    if len(results) >= 10:
-                        break
-                        
-        except Exception as e:
-            print(f"[Dashboard] 搜索数据集失败: {e}")
-        
-        return results
-    
-    @staticmethod
-    def _search_books(query: str, query_lower: str) -> List[Dict[str, Any]]:
-        """
-        搜索书本
-        
-        从数据集和批量任务中提取书本信息进行搜索。
-        
-        Args:
-            query: 原始搜索关键词
-            query_lower: 小写搜索关键词
-            
-        Returns:
-            list: 匹配的书本列表
-        """
-        results = []
-        seen_books = set()
-        
-        try:
-            # 从数据集中提取书本
-            all_datasets = StorageService.get_all_datasets_summary()
-            
-            for ds in all_datasets:
-                book_name = ds.get('book_name', '')
-                book_id = ds.get('book_id', '')
-                
-                if not book_name or book_id in seen_books:
-                    continue
-                
-                if query_lower in book_name.lower():
-                    seen_books.add(book_id)
-                    results.append({
-                        'type': 'book',
-                        'id': book_id,
-                        'name': book_name,
-                        'highlight': DashboardService._highlight_text(book_name, query)
-                    })
-                    
-                    if len(results) >= 10:
-                        break
-            
-            # 如果结果不足，从批量任务中补充
-            if len(results) < 10:
-                all_tasks = DashboardService._load_all_batch_tasks()
-                
-                for task in all_tasks:
-                    for hw_item in task.get('homework_items', []):
-                        book_name = hw_item.get('book_name', '')
-                        book_id = hw_item.get('book_id', '')
-                        
-                        if not book_name or book_id in seen_books:
-                            continue
-                        
-                        if query_lower in book_name.lower():
-                            seen_books.add(book_id)
-                            results.append({
-                                'type': 'book',
-                                'id': book_id,
-                                'name': book_name,
-                                'highlight': DashboardService._highlight_text(book_name, query)
-                            })
-                            
-                            if len(results) >= 10:
-                                break
-                    
-                    if len(results) >= 10:
-                        break
-                        
-        except Exception as e:
-            print(f"[Dashboard] 搜索书本失败: {e}")
-        
-        return results
-    
-    @staticmethod
-    def _search_questions(query: str, query_lower: str) -> List[Dict[str, Any]]:
-        """
-        搜索题号
-        
-        从批量任务的评估错误中搜索题号。
-        
-        Args:
-            query: 原始搜索关键词
-            query_lower: 小写搜索关键词
-            
-        Returns:
-            list: 匹配的题目列表
-        """
-        results = []
-        seen_questions = set()
-        
-        try:
-            # 从批量任务中搜索题号
-            all_tasks = DashboardService._load_all_batch_tasks()
-            
-            for task in all_tasks:
-                task_id = task.get('task_id', '')
-                
-                for hw_item in task.get('homework_items', []):
-                    evaluation = hw_item.get('evaluation') or {}
-                    errors = evaluation.get('errors') or []
-                    book_name = hw_item.get('book_name', '')
-                    page_num = hw_item.get('page_num', '')
-                    
-                    for error in errors:
-                        index = str(error.get('index', ''))
-                        
-                        if not index:
-                            continue
-                        
-                        # 检查题号是否匹配
-                        if query_lower in index.lower():
-                            # 生成唯一键避免重复
-                            unique_key = f"{book_name}_{page_num}_{index}"
-                            if unique_key in seen_questions:
-                                continue
-                            
-                            seen_questions.add(unique_key)
-                            display_name = f"第{index}题 - {book_name} P{page_num}"
-                            
-                            results.append({
-                                'type': 'question',
-                                'id': task_id,  # 关联到任务
-                                'name': display_name,
-                                'highlight': DashboardService._highlight_text(display_name, query)
-                            })
-                            
-                            if len(results) >= 10:
-                                break
-                    
-                    if len(results) >= 10:
-                        break
-                
-                if len(results) >= 10:
-                    break
-                    
-        except Exception as e:
-            print(f"[Dashboard] 搜索题号失败: {e}")
-        
-        return results
+            return {'results': [], 'total': 0, 'page': page, 'page_size': page_size}
     
     @staticmethod
     def _highlight_text(text: str, query: str) -> str:
@@ -2941,11 +2732,13 @@ class DashboardService:
         Returns:
             dict: 包含各工具统计数据
         """
-        cache_key = 'advanced_tools_stats'
-        cached = DashboardService.get_cached(cache_key)
-        if cached is not None:
-            return cached
-        
+        return DashboardService.get_or_compute(
+            'advanced_tools_stats', DashboardService._compute_advanced_tools_stats, ttl=60
+        )
+    
+    @staticmethod
+    def _compute_advanced_tools_stats() -> Dict[str, Any]:
+        """计算高级分析工具统计（见 get_advanced_tools_stats）"""
         result = {
             'error_samples': {
                 'total': 0,
@@ -3017,10 +2810,9 @@ class DashboardService:
             result['suggestions']['total'] = min(len(error_types_count), 10)
             result['suggestions']['pending'] = result['suggestions']['total']
             
-            DashboardService.set_cached(cache_key, result, ttl=60)
-            
         except Exception as e:
             print(f"[Dashboard] 获取高级工具统计失败: {e}")
+            return DashboardService.uncacheable(result)
         
         return result
     
@@ -6,6 +6,7 @@
 - app_mysql: 应用数据库(aiuser)，用于存储平台数据
 """
 import json
+from contextlib import contextmanager
 from datetime import datetime
 from .config_service import ConfigService
 
@@ -212,6 +213,75 @@ class AppDatabaseService:
             if conn:
                 conn.close()
     
+    @staticmethod
+    def execute_many(sql, params_list):
+        """批量执行写入操作（INSERT ... VALUES 会被合并为多行插入），返回影响行数"""
+        if not params_list:
+            return 0
+        conn = None
+        cursor = None
+        try:
+            conn = AppDatabaseService.get_connection()
+            cursor = conn.cursor()
+            affected = cursor.executemany(sql, params_list)
+            conn.commit()
+            return affected
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+    
+    @staticmethod
+    @contextmanager
+    def transaction():
+        """
+        在同一个事务中执行多条语句：产出游标，正常退出时提交，抛出异常时回滚
+        （配合 SELECT ... FOR UPDATE 做读-改-写）
+        """
+        conn = None
+        cursor = None
+        try:
+            conn = AppDatabaseService.get_connection()
+            conn.begin()
+            cursor = conn.cursor()
+            yield cursor
+            conn.commit()
+        except Exception:
+            if conn:
+                conn.rollback()
+            raise
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+    
+    @staticmethod
+    def iter_query(sql, params=None, chunk_size=1000):
+        """
+        流式执行查询：使用服务端游标（SSDictCursor），按 chunk_size 分批产出结果行列表，
+        结果集不会一次性读入内存，适合导出等大结果集场景
+        """
+        import pymysql
+        
+        conn = None
+        cursor = None
+        try:
+            conn = AppDatabaseService.get_connection()
+            cursor = conn.cursor(pymysql.cursors.SSDictCursor)
+            cursor.execute(sql, params or ())
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+    
     # ========== 数据集相关操作 ==========
     
     @staticmethod
@@ -642,7 +712,9 @@ class AppDatabaseService:
         """更新用户的API密钥配置"""
         api_keys_json = json.dumps(api_keys, ensure_ascii=False) if api_keys else None
         sql = "UPDATE users SET api_keys = %s, updated_at = %s WHERE id = %s"
-        return AppDatabaseService.execute_update(sql, (api_keys_json, datetime.now(), user_id))
+        result = AppDatabaseService.execute_update(sql, (api_keys_json, datetime.now(), user_id))
+        ConfigService.invalidate_user_keys(user_id)
+        return result
     
     @staticmethod
     def get_user_api_keys(user_id):
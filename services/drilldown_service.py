@@ -2,13 +2,12 @@
 多维度数据下钻服务 (US-21)
 
 支持下钻路径：总体 → 学科 → 书本 → 页码 → 题目
+各层级由 AggregateCubeService 的聚合单元汇总得到，筛选条件（start_date / end_date）作用在日期维度上
 """
-import json
-import os
-from typing import Optional, List, Dict, Any
+from typing import List, Dict, Any
 
-from .database_service import AppDatabaseService
-from .storage_service import StorageService
+from .aggregate_cube_service import AggregateCubeService, infer_subject
+from .cube import question_sort_key
 
 
 # 下钻层级定义
@@ -21,6 +20,25 @@ SUBJECT_MAP = {
 }
 
 
+def _with_accuracy(stats: Dict[str, Any]) -> Dict[str, Any]:
+    stats['accuracy'] = stats['correct_count'] / stats['question_count'] if stats['question_count'] > 0 else 0
+    return stats
+
+
+def _summary(data: List[Dict[str, Any]]) -> Dict[str, Any]:
+    total_questions = sum(d['question_count'] for d in data)
+    total_correct = sum(d['correct_count'] for d in data)
+    return {
+        'total_accuracy': total_correct / total_questions if total_questions > 0 else 0,
+        'total_questions': total_questions,
+        'total_items': len(data)
+    }
+
+
+def _subject_name(subject_id) -> str:
+    return SUBJECT_MAP.get(subject_id, f'学科{subject_id}')
+
+
 class DrilldownService:
     """数据下钻服务类"""
     
@@ -56,61 +74,27 @@ class DrilldownService:
         else:
             raise ValueError(f'无效的层级: {level}')
     
+    @staticmethod
+    def _date_range(filters: Dict) -> Dict[str, Any]:
+        return {'start_date': filters.get('start_date'), 'end_date': filters.get('end_date')}
+    
     @staticmethod
     def _get_overall_data(filters: Dict) -> Dict[str, Any]:
         """获取总体数据 - 按学科分组"""
-        # 从批量任务文件聚合数据
-        batch_dir = StorageService.BATCH_TASKS_DIR
-        subject_stats = {}
-        
-        if os.path.exists(batch_dir):
-            for filename in os.listdir(batch_dir):
-                if not filename.endswith('.json'):
-                    continue
-                
-                filepath = os.path.join(batch_dir, filename)
-                try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        task = json.load(f)
-                    
-                    subject_id = task.get('subject_id')
-                    if subject_id is None:
-                        subject_id = DrilldownService._infer_subject(task)
-                    
-                    if subject_id not in subject_stats:
-                        subject_stats[subject_id] = {
-                            'id': str(subject_id),
-                            'name': SUBJECT_MAP.get(subject_id, f'学科{subject_id}'),
-                            'task_count': 0,
-                            'question_count': 0,
-                            'correct_count': 0,
-                            'error_count': 0
-                        }
-                    
-                    stats = subject_stats[subject_id]
-                    stats['task_count'] += 1
-                    
-                    report = task.get('overall_report') or {}
-                    stats['question_count'] += report.get('total_questions', 0)
-                    stats['correct_count'] += report.get('correct_count', 0)
-                    stats['error_count'] += report.get('error_count', 0)
-                    
-                except Exception:
-                    continue
+        dates = DrilldownService._date_range(filters)
+        cells = AggregateCubeService.rollup(('subject',), **dates)
+        tasks = AggregateCubeService.task_groups('subject', **dates)
         
-        # 计算准确率
         data = []
-        total_questions = 0
-        total_correct = 0
-        
-        for subject_id, stats in subject_stats.items():
-            if stats['question_count'] > 0:
-                stats['accuracy'] = stats['correct_count'] / stats['question_count']
-            else:
-                stats['accuracy'] = 0
-            data.append(stats)
-            total_questions += stats['question_count']
-            total_correct += stats['correct_count']
+        for (subject_id,), agg in cells.items():
+            data.append(_with_accuracy({
+                'id': str(subject_id),
+                'name': _subject_name(subject_id),
+                'task_count': len(tasks.get(subject_id, [])),
+                'question_count': agg['total'],
+                'correct_count': agg['correct'],
+                'error_count': agg['total'] - agg['correct']
+            }))
         
         # 按题目数排序
         data.sort(key=lambda x: x['question_count'], reverse=True)
@@ -120,73 +104,30 @@ class DrilldownService:
             'parent_id': None,
             'breadcrumb': [{'level': 'overall', 'id': None, 'name': '总览'}],
             'data': data,
-            'summary': {
-                'total_accuracy': total_correct / total_questions if total_questions > 0 else 0,
-                'total_questions': total_questions,
-                'total_items': len(data)
-            }
+            'summary': _summary(data)
         }
     
     @staticmethod
     def _get_subject_data(subject_id: str, filters: Dict) -> Dict[str, Any]:
         """获取学科数据 - 按书本分组"""
-        batch_dir = StorageService.BATCH_TASKS_DIR
-        book_stats = {}
         subject_id_int = int(subject_id) if subject_id else 0
-        subject_name = SUBJECT_MAP.get(subject_id_int, f'学科{subject_id}')
-        
-        if os.path.exists(batch_dir):
-            for filename in os.listdir(batch_dir):
-                if not filename.endswith('.json'):
-                    continue
-                filepath = os.path.join(batch_dir, filename)
-                try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        task = json.load(f)
-                    
-                    task_subject = task.get('subject_id')
-                    if task_subject is None:
-                        task_subject = DrilldownService._infer_subject(task)
-                    if str(task_subject) != str(subject_id):
-                        continue
-                    
-                    book_name = task.get('book_name') or task.get('dataset_name', '未知书本')
-                    book_id = book_name
-                    
-                    if book_id not in book_stats:
-                        book_stats[book_id] = {
-                            'id': book_id,
-                            'name': book_name,
-                            'task_count': 0,
-                            'question_count': 0,
-                            'correct_count': 0,
-                            'error_count': 0,
-                            'task_ids': []
-                        }
-                    
-                    stats = book_stats[book_id]
-                    stats['task_count'] += 1
-                    stats['task_ids'].append(filename.replace('.json', ''))
-                    
-                    report = task.get('overall_report') or {}
-                    stats['question_count'] += report.get('total_questions', 0)
-                    stats['correct_count'] += report.get('correct_count', 0)
-                    stats['error_count'] += report.get('error_count', 0)
-                except Exception:
-                    continue
+        dates = DrilldownService._date_range(filters)
+        where = {'subject': subject_id_int}
+        cells = AggregateCubeService.rollup(('book',), where, **dates)
+        tasks = AggregateCubeService.task_groups('book', where, **dates)
         
         data = []
-        total_questions = 0
-        total_correct = 0
-        
-        for book_id, stats in book_stats.items():
-            if stats['question_count'] > 0:
-                stats['accuracy'] = stats['correct_count'] / stats['question_count']
-            else:
-                stats['accuracy'] = 0
-            data.append(stats)
-            total_questions += stats['question_count']
-            total_correct += stats['correct_count']
+        for (book,), agg in cells.items():
+            task_ids = tasks.get(book, [])
+            data.append(_with_accuracy({
+                'id': book,
+                'name': book,
+                'task_count': len(task_ids),
+                'question_count': agg['total'],
+                'correct_count': agg['correct'],
+                'error_count': agg['total'] - agg['correct'],
+                'task_ids': task_ids
+            }))
         
         data.sort(key=lambda x: x['question_count'], reverse=True)
         
@@ -195,265 +136,137 @@ class DrilldownService:
             'parent_id': subject_id,
             'breadcrumb': [
                 {'level': 'overall', 'id': None, 'name': '总览'},
-                {'level': 'subject', 'id': subject_id, 'name': subject_name}
+                {'level': 'subject', 'id': subject_id, 'name': _subject_name(subject_id_int)}
             ],
             'data': data,
-            'summary': {
-                'total_accuracy': total_correct / total_questions if total_questions > 0 else 0,
-                'total_questions': total_questions,
-                'total_items': len(data)
-            }
+            'summary': _summary(data)
         }
     
     @staticmethod
     def _get_book_data(book_id: str, filters: Dict) -> Dict[str, Any]:
         """获取书本数据 - 按页码分组"""
-        batch_dir = StorageService.BATCH_TASKS_DIR
-        page_stats = {}
-        book_name = book_id
-        subject_id = None
-        subject_name = ''
-        
-        if os.path.exists(batch_dir):
-            for filename in os.listdir(batch_dir):
-                if not filename.endswith('.json'):
-                    continue
-                filepath = os.path.join(batch_dir, filename)
-                try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        task = json.load(f)
-                    
-                    task_book = task.get('book_name') or task.get('dataset_name', '')
-                    if task_book != book_id:
-                        continue
-                    
-                    if subject_id is None:
-                        subject_id = task.get('subject_id')
-                        if subject_id is None:
-                            subject_id = DrilldownService._infer_subject(task)
-                        subject_name = SUBJECT_MAP.get(subject_id, f'学科{subject_id}')
-                    
-                    results = task.get('results') or []
-                    for result in results:
-                        page_num = result.get('page_number') or result.get('image_index', 0)
-                        page_id = f"{book_id}_{page_num}"
-                        
-                        if page_id not in page_stats:
-                            page_stats[page_id] = {
-                                'id': page_id,
-                                'name': f'第{page_num}页',
-                                'page_number': page_num,
-                                'question_count': 0,
-                                'correct_count': 0,
-                                'error_count': 0
-                            }
-                        
-                        stats = page_stats[page_id]
-                        questions = result.get('questions') or []
-                        for q in questions:
-                            stats['question_count'] += 1
-                            is_correct = q.get('is_correct') or q.get('match', False)
-                            if is_correct:
-                                stats['correct_count'] += 1
-                            else:
-                                stats['error_count'] += 1
-                except Exception:
-                    continue
+        cells = AggregateCubeService.rollup(('page',), {'book': book_id}, **DrilldownService._date_range(filters))
+        subject_id = AggregateCubeService.subject_of_book(book_id)
         
         data = []
-        total_questions = 0
-        total_correct = 0
+        for (page,), agg in cells.items():
+            data.append(_with_accuracy({
+                'id': f"{book_id}_{page}",
+                'name': f'第{page}页',
+                'page_number': int(page) if page.isdigit() else page,
+                'homework_count': agg['items'],
+                'question_count': agg['total'],
+                'correct_count': agg['correct'],
+                'error_count': agg['total'] - agg['correct']
+            }))
         
-        for page_id, stats in page_stats.items():
-            if stats['question_count'] > 0:
-                stats['accuracy'] = stats['correct_count'] / stats['question_count']
-            else:
-                stats['accuracy'] = 0
-            data.append(stats)
-            total_questions += stats['question_count']
-            total_correct += stats['correct_count']
-        
-        data.sort(key=lambda x: x['page_number'])
+        data.sort(key=lambda x: question_sort_key(str(x['page_number'])))
         
         return {
             'level': 'book',
             'parent_id': book_id,
             'breadcrumb': [
                 {'level': 'overall', 'id': None, 'name': '总览'},
-                {'level': 'subject', 'id': str(subject_id), 'name': subject_name},
-                {'level': 'book', 'id': book_id, 'name': book_name}
+                {'level': 'subject', 'id': str(subject_id), 'name': _subject_name(subject_id)},
+                {'level': 'book', 'id': book_id, 'name': book_id}
             ],
             'data': data,
-            'summary': {
-                'total_accuracy': total_correct / total_questions if total_questions > 0 else 0,
-                'total_questions': total_questions,
-                'total_items': len(data)
-            }
+            'summary': _summary(data)
         }
     
     @staticmethod
-    def _get_page_data(page_id: str, filters: Dict) -> Dict[str, Any]:
-        """获取页码数据 - 显示题目列表"""
-        parts = page_id.rsplit('_', 1)
-        book_id = parts[0] if len(parts) > 1 else page_id
-        page_num = int(parts[1]) if len(parts) > 1 else 0
-        
-        batch_dir = StorageService.BATCH_TASKS_DIR
-        questions = []
-        subject_id = None
-        subject_name = ''
+    def _question_stats(book_id: str, page: str, filters: Dict) -> tuple:
+        """某页各题的统计，返回 ({题号: 题目数据}, 页级汇总)；每份作业都包含该页全部题目，题目数取该页的作业数"""
+        dates = DrilldownService._date_range(filters)
+        page_id = f"{book_id}_{page}"
+        where = {'book': book_id, 'page': page}
+        page_cells = AggregateCubeService.rollup(('page',), where, **dates)
+        homework_count = sum(agg['items'] for agg in page_cells.values())
+        question_cells = AggregateCubeService.rollup(('question',), where, questions=True, **dates)
+        samples = AggregateCubeService.latest_samples(book_id, page, **dates)
         
-        if os.path.exists(batch_dir):
-            for filename in os.listdir(batch_dir):
-                if not filename.endswith('.json'):
-                    continue
-                filepath = os.path.join(batch_dir, filename)
-                try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        task = json.load(f)
-                    
-                    task_book = task.get('book_name') or task.get('dataset_name', '')
-                    if task_book != book_id:
-                        continue
-                    
-                    if subject_id is None:
-                        subject_id = task.get('subject_id')
-                        if subject_id is None:
-                            subject_id = DrilldownService._infer_subject(task)
-                        subject_name = SUBJECT_MAP.get(subject_id, f'学科{subject_id}')
-                    
-                    results = task.get('results') or []
-                    for result in results:
-                        result_page = result.get('page_number') or result.get('image_index', 0)
-                        if result_page != page_num:
-                            continue
-                        
-                        qs = result.get('questions') or []
-                        for idx, q in enumerate(qs):
-                            is_correct = q.get('is_correct') or q.get('match', False)
-                            questions.append({
-                                'id': f"{page_id}_{idx}",
-                                'name': q.get('question_number') or f'题目{idx+1}',
-                                'question_number': q.get('question_number', str(idx+1)),
-                                'ai_answer': q.get('ai_answer', ''),
-                                'expected_answer': q.get('expected_answer') or q.get('baseline_answer', ''),
-                                'is_correct': is_correct,
-                                'error_type': q.get('error_type', '') if not is_correct else ''
-                            })
-                except Exception:
-                    continue
+        questions = {}
+        for (question,), agg in question_cells.items():
+            error_count = min(agg['error_count'], homework_count)
+            sample = samples.get(question) or {}
+            questions[question] = _with_accuracy({
+                'id': f"{page_id}#{question}",
+                'name': question,
+                'question_number': question,
+                'question_count': homework_count,
+                'correct_count': homework_count - error_count,
+                'error_count': error_count,
+                'is_correct': error_count == 0,
+                'error_type': agg['errors'].most_common(1)[0][0] if agg['errors'] else '',
+                'error_types': dict(agg['errors']),
+                'ai_answer': sample.get('ai_answer', ''),
+                'expected_answer': sample.get('expected_answer', '')
+            })
+        return questions, page_cells
+    
+    @staticmethod
+    def _get_page_data(page_id: str, filters: Dict) -> Dict[str, Any]:
+        """获取页码数据 - 显示出现过错误的题目列表"""
+        book_id, _, page = page_id.rpartition('_')
+        if not book_id:
+            book_id, page = page_id, ''
+        questions, page_cells = DrilldownService._question_stats(book_id, page, filters)
+        subject_id = AggregateCubeService.subject_of_book(book_id)
         
-        correct_count = sum(1 for q in questions if q['is_correct'])
+        data = [questions[q] for q in sorted(questions, key=question_sort_key)]
+        total_questions = sum(agg['total'] for agg in page_cells.values())
+        correct_count = sum(agg['correct'] for agg in page_cells.values())
         
         return {
             'level': 'page',
             'parent_id': page_id,
             'breadcrumb': [
                 {'level': 'overall', 'id': None, 'name': '总览'},
-                {'level': 'subject', 'id': str(subject_id), 'name': subject_name},
+                {'level': 'subject', 'id': str(subject_id), 'name': _subject_name(subject_id)},
                 {'level': 'book', 'id': book_id, 'name': book_id},
-                {'level': 'page', 'id': page_id, 'name': f'第{page_num}页'}
+                {'level': 'page', 'id': page_id, 'name': f'第{page}页'}
             ],
-            'data': questions,
+            'data': data,
             'summary': {
-                'total_accuracy': correct_count / len(questions) if questions else 0,
-                'total_questions': len(questions),
+                'total_accuracy': correct_count / total_questions if total_questions > 0 else 0,
+                'total_questions': total_questions,
                 'correct_count': correct_count,
-                'error_count': len(questions) - correct_count
+                'error_count': total_questions - correct_count
             }
         }
     
     @staticmethod
     def _get_question_data(question_id: str, filters: Dict) -> Dict[str, Any]:
         """获取题目详情"""
-        parts = question_id.rsplit('_', 2)
-        if len(parts) < 3:
+        page_id, sep, question = question_id.rpartition('#')
+        book_id, _, page = page_id.rpartition('_')
+        if not sep or not book_id:
             return {'level': 'question', 'parent_id': question_id, 'data': None}
         
-        book_id = parts[0]
-        page_num = int(parts[1])
-        q_idx = int(parts[2])
-        
-        batch_dir = StorageService.BATCH_TASKS_DIR
-        question_detail = None
-        subject_id = None
-        subject_name = ''
-        
-        if os.path.exists(batch_dir):
-            for filename in os.listdir(batch_dir):
-                if not filename.endswith('.json'):
-                    continue
-                filepath = os.path.join(batch_dir, filename)
-                try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        task = json.load(f)
-                    
-                    task_book = task.get('book_name') or task.get('dataset_name', '')
-                    if task_book != book_id:
-                        continue
-                    
-                    if subject_id is None:
-                        subject_id = task.get('subject_id')
-                        if subject_id is None:
-                            subject_id = DrilldownService._infer_subject(task)
-                        subject_name = SUBJECT_MAP.get(subject_id, f'学科{subject_id}')
-                    
-                    results = task.get('results') or []
-                    for result in results:
-                        result_page = result.get('page_number') or result.get('image_index', 0)
-                        if result_page != page_num:
-                            continue
-                        
-                        qs = result.get('questions') or []
-                        if q_idx < len(qs):
-                            q = qs[q_idx]
-                            is_correct = q.get('is_correct') or q.get('match', False)
-                            question_detail = {
-                                'id': question_id,
-                                'question_number': q.get('question_number', str(q_idx+1)),
-                                'ai_answer': q.get('ai_answer', ''),
-                                'expected_answer': q.get('expected_answer') or q.get('baseline_answer', ''),
-                                'is_correct': is_correct,
-                                'error_type': q.get('error_type', ''),
-                                'image_url': result.get('image_url', ''),
-                                'raw_response': q.get('raw_response', '')
-                            }
-                            break
-                    if question_detail:
-                        break
-                except Exception:
-                    continue
+        questions, _ = DrilldownService._question_stats(book_id, page, filters)
+        detail = questions.get(question)
+        if detail is not None:
+            detail['image_url'] = ''
+        subject_id = AggregateCubeService.subject_of_book(book_id)
         
         return {
             'level': 'question',
             'parent_id': question_id,
             'breadcrumb': [
                 {'level': 'overall', 'id': None, 'name': '总览'},
-                {'level': 'subject', 'id': str(subject_id), 'name': subject_name},
+                {'level': 'subject', 'id': str(subject_id), 'name': _subject_name(subject_id)},
                 {'level': 'book', 'id': book_id, 'name': book_id},
-                {'level': 'page', 'id': f'{book_id}_{page_num}', 'name': f'第{page_num}页'},
-                {'level': 'question', 'id': question_id, 'name': f'题目{q_idx+1}'}
+                {'level': 'page', 'id': page_id, 'name': f'第{page}页'},
+                {'level': 'question', 'id': question_id, 'name': f'题目{question}'}
             ],
-            'data': question_detail,
-            'summary': {}
+            'data': detail,
+            'summary': {
+                'total_accuracy': detail['accuracy'],
+                'total_questions': detail['question_count']
+            } if detail else {}
         }
     
     @staticmethod
     def _infer_subject(task: Dict) -> int:
         """从任务数据推断学科"""
-        name = (task.get('book_name') or task.get('dataset_name') or '').lower()
-        if '英语' in name or 'english' in name:
-            return 0
-        elif '语文' in name or 'chinese' in name:
-            return 1
-        elif '数学' in name or 'math' in name:
-            return 2
-        elif '物理' in name or 'physics' in name:
-            return 3
-        elif '化学' in name or 'chemistry' in name:
-            return 4
-        elif '生物' in name or 'biology' in name:
-            return 5
-        elif '地理' in name or 'geography' in name:
-            return 6
-        return 0
\ No newline at end of file
+        return infer_subject(task)
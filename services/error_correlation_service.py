@@ -1,113 +1,120 @@
 """
 错误关联分析服务 (US-20)
 
-分析错误之间的关联关系，找出共同模式
+分析错误之间的关联关系，找出共同模式。
+共现次数和支持度（各错误类型、各题的错误次数）由 AggregateCubeService 在任务保存时增量维护，
+按日期分桶，查询时只汇总时间窗口内的计数，再用堆取出关联强度最高的 top-k
 """
-import json
-import os
-from collections import defaultdict
-from typing import Optional, List, Dict, Any
+import heapq
+from collections import Counter
+from typing import Callable, List, Dict, Any
 
-from .storage_service import StorageService
 from .llm_service import LLMService
+from .aggregate_cube_service import AggregateCubeService
+from .cube import PAGE_TOTAL, question_sort_key
+
+
+def _top_correlations(pairs: Counter, supports: Callable[[tuple], tuple], min_occurrence: int,
+                      limit: int) -> List[tuple]:
+    """
+    按关联强度（共现次数 / 较小一方的支持度）取 top-k
+
+    Args:
+        pairs: {对: 共现次数}
+        supports: 对 -> (一方的支持度, 另一方的支持度)
+
+    Returns:
+        list: [(强度, 共现次数, 对, 支持度1, 支持度2)]，按强度、共现次数倒序
+    """
+    candidates = []
+    for pair, count in pairs.items():
+        if count < min_occurrence:
+            continue
+        total1, total2 = supports(pair)
+        candidates.append((count / max(1, min(total1, total2)), count, pair, total1, total2))
+    return heapq.nlargest(limit, candidates, key=lambda x: (x[0], x[1]))
 
 
 class ErrorCorrelationService:
     """错误关联分析服务"""
-    
+
     @staticmethod
     def analyze_correlations(
         subject_id: int = None,
         book_name: str = None,
-        min_occurrence: int = 2
+        min_occurrence: int = 2,
+        start_date: str = None,
+        end_date: str = None,
+        limit: int = 20
     ) -> Dict[str, Any]:
         """
         分析错误关联 (US-20.1)
-        
-        找出经常一起出现的错误模式
+
+        找出经常一起出现的错误模式：
+        - correlations: 同一份作业中一起出现的错误类型
+        - question_correlations: 同一页中经常一起出错的题目
+
+        Args:
+            subject_id: 学科ID
+            book_name: 书本名称（包含匹配）
+            min_occurrence: 最少共现次数
+            start_date / end_date: 时间窗口（YYYY-MM-DD，含两端）
+            limit: 返回的关联数量
         """
-        batch_dir = StorageService.BATCH_TASKS_DIR
-        
-        # 收集错误数据
-        error_pairs = defaultdict(int)  # (error1, error2) -> count
-        error_by_page = defaultdict(list)  # page_key -> [errors]
-        error_types = defaultdict(int)
-        
-        if not os.path.exists(batch_dir):
-            return {'correlations': [], 'error_types': {}}
-        
-        for filename in os.listdir(batch_dir):
-            if not filename.endswith('.json'):
-                continue
-            
-            filepath = os.path.join(batch_dir, filename)
-            try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    task = json.load(f)
-                
-                # 筛选
-                if subject_id is not None and task.get('subject_id') != subject_id:
-                    continue
-                if book_name:
-                    task_book = task.get('book_name') or task.get('dataset_name', '')
-                    if book_name not in task_book:
-                        continue
-                
-                task_book = task.get('book_name') or task.get('dataset_name', 'unknown')
-                
-                results = task.get('results') or []
-                for result in results:
-                    page_num = result.get('page_number') or result.get('image_index', 0)
-                    page_key = f"{task_book}_{page_num}"
-                    
-                    page_errors = []
-                    questions = result.get('questions') or []
-                    for q in questions:
-                        is_correct = q.get('is_correct') or q.get('match', False)
-                        if not is_correct:
-                            error_type = q.get('error_type') or 'unknown'
-                            page_errors.append(error_type)
-                            error_types[error_type] += 1
-                    
-                    if len(page_errors) >= 2:
-                        # 记录同页错误对
-                        for i in range(len(page_errors)):
-                            for j in range(i + 1, len(page_errors)):
-                                pair = tuple(sorted([page_errors[i], page_errors[j]]))
-                                error_pairs[pair] += 1
-                    
-                    error_by_page[page_key] = page_errors
-                    
-            except Exception:
-                continue
-        
-        # 筛选高频关联
-        correlations = []
-        for (e1, e2), count in error_pairs.items():
-            if count >= min_occurrence:
-                # 计算关联强度
-                total_e1 = error_types.get(e1, 1)
-                total_e2 = error_types.get(e2, 1)
-                strength = count / min(total_e1, total_e2)
-                
-                correlations.append({
-                    'error1': e1,
-                    'error2': e2,
-                    'co_occurrence': count,
-                    'strength': round(strength, 3),
-                    'error1_total': total_e1,
-                    'error2_total': total_e2
-                })
-        
-        # 按关联强度排序
-        correlations.sort(key=lambda x: x['strength'], reverse=True)
-        
+        where = {'subject': subject_id} if subject_id is not None else None
+        pages = AggregateCubeService.rollup(['book', 'page'], where=where,
+                                            start_date=start_date, end_date=end_date)
+        if book_name:
+            pages = {key: agg for key, agg in pages.items() if book_name in key[0]}
+
+        error_types = Counter()
+        for agg in pages.values():
+            error_types.update(agg['errors'])
+
+        type_pairs = AggregateCubeService.pair_counts('type', subject=subject_id, book_contains=book_name,
+                                                      start_date=start_date, end_date=end_date)
+        top = _top_correlations(type_pairs, lambda p: (error_types.get(p[0], 1), error_types.get(p[1], 1)),
+                                min_occurrence, limit)
+        correlations = [{
+            'error1': e1,
+            'error2': e2,
+            'co_occurrence': count,
+            'strength': round(strength, 3),
+            'error1_total': total1,
+            'error2_total': total2
+        } for strength, count, (e1, e2), total1, total2 in top]
+
+        question_pairs = AggregateCubeService.pair_counts('question', subject=subject_id, book_contains=book_name,
+                                                          start_date=start_date, end_date=end_date)
+        question_correlations = []
+        if question_pairs:
+            questions = AggregateCubeService.rollup(['book', 'page', 'question'], where=where, start_date=start_date,
+                                                    end_date=end_date, questions=True)
+
+            def question_supports(pair):
+                book, page, q1, q2 = pair
+                return (questions.get((book, page, q1), {}).get('error_count', 1),
+                        questions.get((book, page, q2), {}).get('error_count', 1))
+
+            question_correlations = [{
+                'book': book,
+                'page': page,
+                'question1': q1,
+                'question2': q2,
+                'co_occurrence': count,
+                'strength': round(strength, 3),
+                'question1_total': total1,
+                'question2_total': total2
+            } for strength, count, (book, page, q1, q2), total1, total2 in _top_correlations(
+                question_pairs, question_supports, min_occurrence, limit)]
+
         return {
-            'correlations': correlations[:20],
+            'correlations': correlations,
+            'question_correlations': question_correlations,
             'error_types': dict(error_types),
-            'total_pages_analyzed': len(error_by_page)
+            'total_pages_analyzed': len(pages)
         }
-    
+
     @staticmethod
     def find_error_patterns(
         error_type: str,
@@ -115,96 +122,62 @@ class ErrorCorrelationService:
     ) -> Dict[str, Any]:
         """
         查找特定错误类型的模式 (US-20.2)
+
+        示例取各任务各题该错误类型最后一个错误的样例，contexts 为各书本中该错误类型的次数
         """
-        batch_dir = StorageService.BATCH_TASKS_DIR
-        
-        examples = []
-        contexts = defaultdict(int)  # 上下文统计
-        
-        if not os.path.exists(batch_dir):
-            return {'examples': [], 'contexts': {}}
-        
-        for filename in os.listdir(batch_dir):
-            if not filename.endswith('.json'):
-                continue
-            
-            filepath = os.path.join(batch_dir, filename)
-            try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    task = json.load(f)
-                
-                book_name = task.get('book_name') or task.get('dataset_name', '')
-                
-                results = task.get('results') or []
-                for result in results:
-                    page_num = result.get('page_number', 0)
-                    questions = result.get('questions') or []
-                    
-                    for q in questions:
-                        q_error_type = q.get('error_type', '')
-                        if q_error_type == error_type:
-                            examples.append({
-                                'book': book_name,
-                                'page': page_num,
-                                'question': q.get('question_number', ''),
-                                'ai_answer': q.get('ai_answer', ''),
-                                'expected': q.get('expected_answer') or q.get('baseline_answer', ''),
-                                'task_id': task.get('task_id', filename.replace('.json', ''))
-                            })
-                            
-                            # 统计上下文
-                            contexts[book_name] += 1
-                            
-                            if len(examples) >= limit * 2:
-                                break
-                    
-                    if len(examples) >= limit * 2:
-                        break
-                        
-            except Exception:
-                continue
-        
+        books = AggregateCubeService.rollup(['book'])
+        contexts = {book: agg['errors'][error_type] for (book,), agg in books.items() if agg['errors'][error_type]}
+
+        examples = [{
+            'book': example['book'],
+            'page': example['page'],
+            'question': example['question'],
+            'ai_answer': example['ai_answer'],
+            'expected': example['expected_answer'],
+            'task_id': example['task_id']
+        } for example in AggregateCubeService.error_examples(error_type, limit)]
+
         return {
             'error_type': error_type,
-            'examples': examples[:limit],
-            'total_count': len(examples),
-            'contexts': dict(contexts)
+            'examples': examples,
+            'total_count': sum(contexts.values()),
+            'contexts': contexts
         }
 
-    
     @staticmethod
     def generate_correlation_report(
         subject_id: int = None
     ) -> Dict[str, Any]:
         """
         生成错误关联分析报告 (US-20.3)
-        
+
         使用AI分析错误关联并给出建议
         """
         # 获取关联数据
         correlations = ErrorCorrelationService.analyze_correlations(
             subject_id=subject_id,
-            min_occurrence=2
+            min_occurrence=2,
+            limit=10
         )
-        
+
         if not correlations.get('correlations'):
             return {
                 'success': True,
                 'report': '暂无足够的错误数据进行关联分析',
                 'correlations': []
             }
-        
+
         # 构建分析提示
         correlation_text = '\n'.join([
             f"- {c['error1']} 和 {c['error2']}: 共现{c['co_occurrence']}次, 关联强度{c['strength']}"
             for c in correlations['correlations'][:10]
         ])
-        
+
         error_dist = '\n'.join([
             f"- {k}: {v}次"
-            for k, v in sorted(correlations['error_types'].items(), key=lambda x: -x[1])[:10]
+            for k, v in heapq.nlargest(10, correlations['error_types'].items(), key=lambda x: x[1])
         ])
-        
+
         prompt = f"""分析以下AI批改系统的错误关联数据，给出改进建议：
 
 ## 错误类型分布
@@ -226,9 +199,9 @@ class ErrorCorrelationService:
                 messages=[{'role': 'user', 'content': prompt}],
                 model='deepseek-v3.2'
             )
-            
+
             report = response.get('content', '分析生成失败')
-            
+
             return {
                 'success': True,
                 'report': report,
@@ -241,66 +214,57 @@ class ErrorCorrelationService:
                 'error': str(e),
                 'correlations': correlations['correlations'][:10]
             }
-    
+
     @staticmethod
     def get_error_chain(
         task_id: str,
         page_num: int = None
     ) -> Dict[str, Any]:
         """
-        获取错误链（同一任务/页面的连续错误）
+        获取错误链（同一任务同一页中题号连续的错题）
+
+        题级单元只记录出错的题目，题号为相邻整数的错题视为连续
         """
-        batch_dir = StorageService.BATCH_TASKS_DIR
-        filepath = os.path.join(batch_dir, f'{task_id}.json')
-        
-        if not os.path.exists(filepath):
+        cells = AggregateCubeService.task_cells(task_id)
+        if cells is None:
             return {'chains': [], 'error': '任务不存在'}
-        
-        try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                task = json.load(f)
-            
-            chains = []
-            results = task.get('results') or []
-            
-            for result in results:
-                result_page = result.get('page_number') or result.get('image_index', 0)
-                if page_num is not None and result_page != page_num:
-                    continue
-                
-                questions = result.get('questions') or []
-                current_chain = []
-                
-                for q in questions:
-                    is_correct = q.get('is_correct') or q.get('match', False)
-                    if not is_correct:
-                        current_chain.append({
-                            'question': q.get('question_number', ''),
-                            'error_type': q.get('error_type', 'unknown'),
-                            'ai_answer': q.get('ai_answer', ''),
-                            'expected': q.get('expected_answer') or q.get('baseline_answer', '')
-                        })
-                    else:
-                        if len(current_chain) >= 2:
-                            chains.append({
-                                'page': result_page,
-                                'length': len(current_chain),
-                                'errors': current_chain
-                            })
-                        current_chain = []
-                
-                # 处理末尾的链
-                if len(current_chain) >= 2:
-                    chains.append({
-                        'page': result_page,
-                        'length': len(current_chain),
-                        'errors': current_chain
-                    })
-            
-            return {
-                'task_id': task_id,
-                'chains': chains,
-                'total_chains': len(chains)
-            }
-        except Exception as e:
-            return {'chains': [], 'error': str(e)}
+
+        pages: Dict[tuple, List[tuple]] = {}
+        for (book, page, question), (_, _, _, errors, sample) in cells.items():
+            if question == PAGE_TOTAL:
+                continue
+            if page_num is not None and page != str(page_num):
+                continue
+            pages.setdefault((book, page), []).append((question, errors, sample or {}))
+
+        chains = []
+        for (book, page), questions in sorted(pages.items()):
+            questions.sort(key=lambda x: question_sort_key(x[0]))
+            current_chain = []
+            previous = None
+            for question, errors, sample in questions:
+                if previous is None or not (question.isdigit() and previous.isdigit()
+                                            and int(question) == int(previous) + 1):
+                    if len(current_chain) >= 2:
+                        chains.append({'book': book, 'page': page, 'length': len(current_chain),
+                                       'errors': current_chain})
+                    current_chain = []
+                current_chain.append({
+                    'question': question,
+                    'error_type': Counter(errors).most_common(1)[0][0] if errors else 'unknown',
+                    'error_count': sum(errors.values()),
+                    'ai_answer': sample.get('ai_answer', ''),
+                    'expected': sample.get('expected_answer', '')
+                })
+                previous = question
+
+            # 处理末尾的链
+            if len(current_chain) >= 2:
+                chains.append({'book': book, 'page': page, 'length': len(current_chain),
+                               'errors': current_chain})
+
+        return {
+            'task_id': task_id,
+            'chains': chains,
+            'total_chains': len(chains)
+        }
@@ -7,8 +7,10 @@
 import uuid
 import json
 import os
+from collections import Counter
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from functools import lru_cache
+from typing import Optional, List, Dict, Any, Iterable
 
 from .database_service import AppDatabaseService
 from .storage_service import StorageService
@@ -26,6 +28,106 @@ ERROR_SEVERITY = {
     '答案不匹配': 'medium'
 }
 
+# 书名关键词 -> 学科ID
+SUBJECT_KEYWORDS = {
+    0: ['英语', 'english'],
+    1: ['语文', 'chinese'],
+    2: ['数学', 'math'],
+    3: ['物理', 'physics'],
+    4: ['化学', 'chemistry'],
+    5: ['生物', 'biology'],
+    6: ['地理', 'geography']
+}
+
+# error_sample_counts 中未识别学科的占位值（主键列不能为 NULL）
+NO_SUBJECT = -1
+
+# 只含这些筛选条件时，列表总数直接从 error_sample_counts 汇总
+COUNTED_FILTERS = ('status', 'subject_id', 'error_type')
+
+SAMPLE_COLUMNS = """id, sample_id, task_id, homework_id, dataset_id, book_id, book_name,
+                   page_num, question_index, subject_id, error_type, base_answer,
+                   base_user, hw_user, pic_path, status, notes, cluster_id,
+                   created_at, updated_at"""
+
+EXPORT_HEADERS = [
+    '样本ID', '任务ID', '作业ID', '书本名称', '页码', '题号',
+    '错误类型', '严重程度', '基准答案', '基准用户答案', 'AI答案',
+    '状态', '备注', '创建时间'
+]
+
+# 导出时服务端游标每批读取的行数
+EXPORT_CHUNK_SIZE = 1000
+
+
+@lru_cache(maxsize=4096)
+def _subject_of_book(book_name: str) -> Optional[int]:
+    """从书名推断学科ID（按书名缓存）"""
+    if not book_name:
+        return None
+    book_name_lower = book_name.lower()
+    for subject_id, keywords in SUBJECT_KEYWORDS.items():
+        for keyword in keywords:
+            if keyword in book_name_lower:
+                return subject_id
+    return None
+
+
+def _format_sample(row: Dict[str, Any]) -> Dict[str, Any]:
+    """数据库行 -> 样本字典"""
+    return {
+        'sample_id': row['sample_id'],
+        'task_id': row['task_id'],
+        'homework_id': row['homework_id'],
+        'dataset_id': row.get('dataset_id'),
+        'book_id': row.get('book_id'),
+        'book_name': row.get('book_name', ''),
+        'page_num': row.get('page_num'),
+        'question_index': row['question_index'],
+        'subject_id': row.get('subject_id'),
+        'error_type': row['error_type'],
+        'severity': ERROR_SEVERITY.get(row['error_type'], 'medium'),
+        'base_answer': row.get('base_answer', ''),
+        'base_user': row.get('base_user', ''),
+        'hw_user': row.get('hw_user', ''),
+        'pic_path': row.get('pic_path', ''),
+        'status': row['status'],
+        'notes': row.get('notes', ''),
+        'cluster_id': row.get('cluster_id'),
+        'created_at': row['created_at'].isoformat() if row.get('created_at') else '',
+        'updated_at': row['updated_at'].isoformat() if row.get('updated_at') else ''
+    }
+
+
+def _export_row(sample: Dict[str, Any]) -> list:
+    return [
+        sample['sample_id'], sample['task_id'], sample['homework_id'],
+        sample['book_name'], sample['page_num'], sample['question_index'],
+        sample['error_type'], sample['severity'],
+        sample['base_answer'], sample['base_user'], sample['hw_user'],
+        sample['status'], sample['notes'], sample['created_at']
+    ]
+
+
+def _build_where(filters: Dict[str, Any]) -> tuple:
+    """筛选条件 -> (WHERE 子句, 参数列表)"""
+    where_clauses = ['1=1']
+    params = []
+    for column in ('error_type', 'status', 'cluster_id', 'task_id'):
+        if filters.get(column):
+            where_clauses.append(f'{column} = %s')
+            params.append(filters[column])
+    if filters.get('subject_id') is not None:
+        where_clauses.append('subject_id = %s')
+        params.append(filters['subject_id'])
+    if filters.get('keyword'):
+        where_clauses.append(
+            '(book_name LIKE %s OR question_index LIKE %s OR base_answer LIKE %s)'
+        )
+        kw = f'%{filters["keyword"]}%'
+        params.extend([kw, kw, kw])
+    return ' AND '.join(where_clauses), params
+
 
 class ErrorSampleService:
     """错误样本服务类"""
@@ -61,7 +163,15 @@ class ErrorSampleService:
         except Exception as e:
             raise ValueError(f'读取任务文件失败: {e}')
         
-        # 遍历作业项
+        # 任务内已收集的 (作业ID, 题号)，一次查询代替逐条检查
+        existing_rows = AppDatabaseService.execute_query(
+            "SELECT homework_id, question_index FROM error_samples WHERE task_id = %s",
+            (task_id,)
+        ) or []
+        seen = {(row['homework_id'], row['question_index']) for row in existing_rows}
+        
+        rows = []
+        counts = Counter()
         for hw_item in task_data.get('homework_items', []):
             evaluation = hw_item.get('evaluation') or {}
             errors = evaluation.get('errors') or []
@@ -80,40 +190,39 @@ class ErrorSampleService:
             subject_id = ErrorSampleService._infer_subject_id(book_name)
             
             for error in errors:
-                sample_id = str(uuid.uuid4())[:8]
                 question_index = error.get('index', '')
                 error_type = error.get('error_type', '其他')
                 
-                # 检查是否已存在相同样本
-                existing = AppDatabaseService.execute_one(
-                    """SELECT id FROM error_samples 
-                       WHERE task_id = %s AND homework_id = %s AND question_index = %s""",
-                    (task_id, homework_id, question_index)
-                )
-                
-                if existing:
+                # 跳过已存在的相同样本
+                if (homework_id, question_index) in seen:
                     result['skipped'] += 1
                     continue
+                seen.add((homework_id, question_index))
                 
-                # 插入样本
-                try:
-                    sql = """
-                        INSERT INTO error_samples 
-                        (sample_id, task_id, homework_id, dataset_id, book_id, book_name,
-                         page_num, question_index, subject_id, error_type, base_answer,
-                         base_user, hw_user, pic_path, status)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    """
-                    AppDatabaseService.execute_insert(sql, (
-                        sample_id, task_id, homework_id, matched_dataset,
-                        book_id, book_name, page_num, question_index, subject_id,
-                        error_type, error.get('base_answer', ''),
-                        error.get('base_user', ''), error.get('hw_user', ''),
-                        pic_path, 'pending'
-                    ))
-                    result['collected'] += 1
-                except Exception as e:
-                    result['errors'].append(f'插入样本失败: {e}')
+                rows.append((
+                    str(uuid.uuid4())[:8], task_id, homework_id, matched_dataset,
+                    book_id, book_name, page_num, question_index, subject_id,
+                    error_type, error.get('base_answer', ''),
+                    error.get('base_user', ''), error.get('hw_user', ''),
+                    pic_path, 'pending'
+                ))
+                counts[('pending', subject_id, error_type)] += 1
+        
+        # 批量插入样本
+        if rows:
+            try:
+                sql = """
+                    INSERT INTO error_samples 
+                    (sample_id, task_id, homework_id, dataset_id, book_id, book_name,
+                     page_num, question_index, subject_id, error_type, base_answer,
+                     base_user, hw_user, pic_path, status)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """
+                AppDatabaseService.execute_many(sql, rows)
+                result['collected'] = len(rows)
+                ErrorSampleService._update_counts(counts)
+            except Exception as e:
+                result['errors'].append(f'插入样本失败: {e}')
         
         # 清除缓存
         ErrorSampleService._cache.clear()
@@ -130,12 +239,15 @@ class ErrorSampleService:
         subject_id: int = None,
         cluster_id: str = None,
         task_id: str = None,
-        keyword: str = None
+        keyword: str = None,
+        cursor: str = None
     ) -> Dict[str, Any]:
         """
         获取错误样本列表 (US-19.2)
         
-        支持多条件筛选和分页。
+        支持多条件筛选和分页。按 id 倒序（即收集顺序，最新在前），
+        传入上一页返回的 next_cursor 时走 keyset 分页（id < cursor），
+        翻页代价与页码无关；不传时按 page 做偏移分页（用于跳页）。
         
         Args:
             page: 页码
@@ -146,96 +258,81 @@ class ErrorSampleService:
             cluster_id: 聚类筛选
             task_id: 任务筛选
             keyword: 关键词搜索
+            cursor: 上一页返回的 next_cursor
             
         Returns:
-            dict: {items: list, total: int, page: int, page_size: int}
+            dict: {items: list, total: int, page: int, page_size: int, total_pages: int,
+                   next_cursor: str|None}
         """
-        # 构建查询条件
-        where_clauses = ['1=1']
-        params = []
-        
-        if error_type:
-            where_clauses.append('error_type = %s')
-            params.append(error_type)
-        
-        if status:
-            where_clauses.append('status = %s')
-            params.append(status)
-        
-        if subject_id is not None:
-            where_clauses.append('subject_id = %s')
-            params.append(subject_id)
-        
-        if cluster_id:
-            where_clauses.append('cluster_id = %s')
-            params.append(cluster_id)
-        
-        if task_id:
-            where_clauses.append('task_id = %s')
-            params.append(task_id)
-        
-        if keyword:
-            where_clauses.append(
-                '(book_name LIKE %s OR question_index LIKE %s OR base_answer LIKE %s)'
-            )
-            kw = f'%{keyword}%'
-            params.extend([kw, kw, kw])
-        
-        where_sql = ' AND '.join(where_clauses)
-        
-        # 查询总数
-        count_sql = f'SELECT COUNT(*) as total FROM error_samples WHERE {where_sql}'
-        count_result = AppDatabaseService.execute_one(count_sql, tuple(params) if params else None)
-        total = count_result['total'] if count_result else 0
-        
-        # 查询列表
-        offset = (page - 1) * page_size
-        list_sql = f"""
-            SELECT sample_id, task_id, homework_id, dataset_id, book_id, book_name,
-                   page_num, question_index, subject_id, error_type, base_answer,
-                   base_user, hw_user, pic_path, status, notes, cluster_id,
-                   created_at, updated_at
-            FROM error_samples 
-            WHERE {where_sql}
-            ORDER BY created_at DESC
-            LIMIT %s OFFSET %s
-        """
-        params.extend([page_size, offset])
-        rows = AppDatabaseService.execute_query(list_sql, tuple(params))
+        filters = {
+            'error_type': error_type, 'status': status, 'subject_id': subject_id,
+            'cluster_id': cluster_id, 'task_id': task_id, 'keyword': keyword
+        }
+        where_sql, params = _build_where(filters)
+        total = ErrorSampleService._count(filters, where_sql, params)
+        
+        # 多取一条判断是否还有下一页
+        if cursor:
+            list_sql = f"""
+                SELECT {SAMPLE_COLUMNS}
+                FROM error_samples 
+                WHERE {where_sql} AND id < %s
+                ORDER BY id DESC
+                LIMIT %s
+            """
+            params = params + [int(cursor), page_size + 1]
+        else:
+            list_sql = f"""
+                SELECT {SAMPLE_COLUMNS}
+                FROM error_samples 
+                WHERE {where_sql}
+                ORDER BY id DESC
+                LIMIT %s OFFSET %s
+            """
+            params = params + [page_size + 1, (page - 1) * page_size]
+        rows = AppDatabaseService.execute_query(list_sql, tuple(params)) or []
         
-        # 格式化结果
-        items = []
-        for row in rows:
-            items.append({
-                'sample_id': row['sample_id'],
-                'task_id': row['task_id'],
-                'homework_id': row['homework_id'],
-                'dataset_id': row.get('dataset_id'),
-                'book_id': row.get('book_id'),
-                'book_name': row.get('book_name', ''),
-                'page_num': row.get('page_num'),
-                'question_index': row['question_index'],
-                'subject_id': row.get('subject_id'),
-                'error_type': row['error_type'],
-                'severity': ERROR_SEVERITY.get(row['error_type'], 'medium'),
-                'base_answer': row.get('base_answer', ''),
-                'base_user': row.get('base_user', ''),
-                'hw_user': row.get('hw_user', ''),
-                'pic_path': row.get('pic_path', ''),
-                'status': row['status'],
-                'notes': row.get('notes', ''),
-                'cluster_id': row.get('cluster_id'),
-                'created_at': row['created_at'].isoformat() if row.get('created_at') else '',
-                'updated_at': row['updated_at'].isoformat() if row.get('updated_at') else ''
-            })
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
         
         return {
-            'items': items,
+            'items': [_format_sample(row) for row in rows],
             'total': total,
             'page': page,
             'page_size': page_size,
-            'total_pages': (total + page_size - 1) // page_size
+            'total_pages': (total + page_size - 1) // page_size,
+            'next_cursor': str(rows[-1]['id']) if has_more else None
         }
+    
+    @staticmethod
+    def _count(filters: Dict[str, Any], where_sql: str, params: list) -> int:
+        """
+        列表总数：只按 状态/学科/错误类型 筛选时汇总 error_sample_counts，
+        其余组合（任务、聚类、关键词）走索引 COUNT(*)
+        """
+        active = [key for key, value in filters.items()
+                  if value is not None and (value or key == 'subject_id')]
+        if all(key in COUNTED_FILTERS for key in active):
+            clauses = ['1=1']
+            count_params = []
+            for key in active:
+                clauses.append(f'{key} = %s')
+                count_params.append(filters[key])
+            try:
+                row = AppDatabaseService.execute_one(
+                    f"SELECT COALESCE(SUM(sample_count), 0) AS total FROM error_sample_counts "
+                    f"WHERE {' AND '.join(clauses)}",
+                    tuple(count_params) if count_params else None
+                )
+                return int(row['total']) if row else 0
+            except Exception as e:
+                print(f'[ErrorSamples] 读取样本计数失败，回退到 COUNT: {e}')
+        
+        row = AppDatabaseService.execute_one(
+            f'SELECT COUNT(*) as total FROM error_samples WHERE {where_sql}',
+            tuple(params) if params else None
+        )
+        return row['total'] if row else 0
 
     
     @staticmethod
@@ -249,11 +346,8 @@ class ErrorSampleService:
         Returns:
             dict: 样本详细信息
         """
-        sql = """
-            SELECT sample_id, task_id, homework_id, dataset_id, book_id, book_name,
-                   page_num, question_index, subject_id, error_type, base_answer,
-                   base_user, hw_user, pic_path, status, notes, cluster_id,
-                   created_at, updated_at
+        sql = f"""
+            SELECT {SAMPLE_COLUMNS}
             FROM error_samples 
             WHERE sample_id = %s
         """
@@ -262,28 +356,7 @@ class ErrorSampleService:
         if not row:
             return None
         
-        return {
-            'sample_id': row['sample_id'],
-            'task_id': row['task_id'],
-            'homework_id': row['homework_id'],
-            'dataset_id': row.get('dataset_id'),
-            'book_id': row.get('book_id'),
-            'book_name': row.get('book_name', ''),
-            'page_num': row.get('page_num'),
-            'question_index': row['question_index'],
-            'subject_id': row.get('subject_id'),
-            'error_type': row['error_type'],
-            'severity': ERROR_SEVERITY.get(row['error_type'], 'medium'),
-            'base_answer': row.get('base_answer', ''),
-            'base_user': row.get('base_user', ''),
-            'hw_user': row.get('hw_user', ''),
-            'pic_path': row.get('pic_path', ''),
-            'status': row['status'],
-            'notes': row.get('notes', ''),
-            'cluster_id': row.get('cluster_id'),
-            'created_at': row['created_at'].isoformat() if row.get('created_at') else '',
-            'updated_at': row['updated_at'].isoformat() if row.get('updated_at') else ''
-        }
+        return _format_sample(row)
     
     @staticmethod
     def update_status(
@@ -311,6 +384,14 @@ class ErrorSampleService:
         
         placeholders = ','.join(['%s'] * len(sample_ids))
         
+        # 状态实际变化的样本，用于调整计数
+        moved = AppDatabaseService.execute_query(f"""
+            SELECT status, subject_id, error_type, COUNT(*) as count
+            FROM error_samples
+            WHERE sample_id IN ({placeholders}) AND status <> %s
+            GROUP BY status, subject_id, error_type
+        """, tuple(sample_ids) + (status,)) or []
+        
         if notes:
             sql = f"""
                 UPDATE error_samples 
@@ -328,55 +409,90 @@ class ErrorSampleService:
         
         result = AppDatabaseService.execute_update(sql, tuple(params))
         
+        counts = Counter()
+        for row in moved:
+            counts[(row['status'], row['subject_id'], row['error_type'])] -= row['count']
+            counts[(status, row['subject_id'], row['error_type'])] += row['count']
+        ErrorSampleService._update_counts(counts)
+        
         # 清除缓存
         ErrorSampleService._cache.clear()
         
         return result
     
+    @staticmethod
+    def _update_counts(counts: Counter) -> None:
+        """累加样本计数 {(状态, 学科ID, 错误类型): 增量}"""
+        rows = [(status, NO_SUBJECT if subject_id is None else subject_id, error_type, delta)
+                for (status, subject_id, error_type), delta in counts.items() if delta]
+        if not rows:
+            return
+        try:
+            AppDatabaseService.execute_many("""
+                INSERT INTO error_sample_counts (status, subject_id, error_type, sample_count)
+                VALUES (%s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE sample_count = sample_count + VALUES(sample_count)
+            """, rows)
+        except Exception as e:
+            print(f'[ErrorSamples] 更新样本计数失败: {e}')
+    
+    @staticmethod
+    def rebuild_counts() -> int:
+        """从 error_samples 重建样本计数（可重复执行），返回计数行数"""
+        AppDatabaseService.execute_update("DELETE FROM error_sample_counts")
+        return AppDatabaseService.execute_update(f"""
+            INSERT INTO error_sample_counts (status, subject_id, error_type, sample_count)
+            SELECT COALESCE(status, 'pending'), COALESCE(subject_id, {NO_SUBJECT}), error_type, COUNT(*)
+            FROM error_samples
+            GROUP BY 1, 2, 3
+        """) or 0
+    
     @staticmethod
     def get_statistics() -> Dict[str, Any]:
         """
-        获取错误样本统计
+        获取错误样本统计（读 error_sample_counts 计数表，一次查询）
         
         Returns:
             dict: {total, by_status, by_error_type, by_subject}
         """
-        # 总数和状态分布
-        status_sql = """
-            SELECT status, COUNT(*) as count 
-            FROM error_samples 
-            GROUP BY status
-        """
-        status_rows = AppDatabaseService.execute_query(status_sql)
-        by_status = {row['status']: row['count'] for row in status_rows}
-        total = sum(by_status.values())
-        
-        # 错误类型分布
-        type_sql = """
-            SELECT error_type, COUNT(*) as count 
-            FROM error_samples 
-            GROUP BY error_type
-            ORDER BY count DESC
-        """
-        type_rows = AppDatabaseService.execute_query(type_sql)
-        by_error_type = {row['error_type']: row['count'] for row in type_rows}
-        
-        # 学科分布
-        subject_sql = """
-            SELECT subject_id, COUNT(*) as count 
-            FROM error_samples 
-            WHERE subject_id IS NOT NULL
-            GROUP BY subject_id
-        """
-        subject_rows = AppDatabaseService.execute_query(subject_sql)
-        by_subject = {row['subject_id']: row['count'] for row in subject_rows}
+        rows = AppDatabaseService.execute_query("""
+            SELECT status, subject_id, error_type, sample_count
+            FROM error_sample_counts
+            WHERE sample_count > 0
+        """) or []
+        
+        by_status = Counter()
+        by_error_type = Counter()
+        by_subject = Counter()
+        for row in rows:
+            count = int(row['sample_count'])
+            by_status[row['status']] += count
+            by_error_type[row['error_type']] += count
+            if row['subject_id'] != NO_SUBJECT:
+                by_subject[row['subject_id']] += count
         
         return {
-            'total': total,
-            'by_status': by_status,
-            'by_error_type': by_error_type,
-            'by_subject': by_subject
+            'total': sum(by_status.values()),
+            'by_status': dict(by_status),
+            'by_error_type': dict(by_error_type.most_common()),
+            'by_subject': dict(by_subject)
         }
+    
+    @staticmethod
+    def iter_samples(filters: Dict[str, Any] = None,
+                     chunk_size: int = None) -> Iterable[Dict[str, Any]]:
+        """按筛选条件逐条产出样本（服务端游标分批读取，内存占用与总数无关）"""
+        where_sql, params = _build_where(filters or {})
+        sql = f"""
+            SELECT {SAMPLE_COLUMNS}
+            FROM error_samples 
+            WHERE {where_sql}
+            ORDER BY id DESC
+        """
+        for rows in AppDatabaseService.iter_query(sql, tuple(params) if params else None,
+                                                  chunk_size or EXPORT_CHUNK_SIZE):
+            for row in rows:
+                yield _format_sample(row)
 
     
     @staticmethod
@@ -387,6 +503,8 @@ class ErrorSampleService:
         """
         导出错误样本 (US-22.5)
         
+        样本通过服务端游标分批读取并逐行写入文件（xlsx 使用 write_only 模式）
+        
         Args:
             filters: 筛选条件
             format: 导出格式 xlsx/csv
@@ -398,23 +516,12 @@ class ErrorSampleService:
         import csv
         
         filters = filters or {}
-        
-        # 获取所有符合条件的样本
-        all_samples = []
-        page = 1
-        while True:
-            result = ErrorSampleService.get_samples(
-                page=page,
-                page_size=1000,
-                error_type=filters.get('error_type'),
-                status=filters.get('status'),
-                subject_id=filters.get('subject_id'),
-                task_id=filters.get('task_id')
-            )
-            all_samples.extend(result['items'])
-            if page >= result['total_pages']:
-                break
-            page += 1
+        samples = ErrorSampleService.iter_samples({
+            'error_type': filters.get('error_type'),
+            'status': filters.get('status'),
+            'subject_id': filters.get('subject_id'),
+            'task_id': filters.get('task_id')
+        })
         
         # 确保导出目录存在
         export_dir = StorageService.EXPORTS_DIR
@@ -428,46 +535,18 @@ class ErrorSampleService:
             
             with open(filepath, 'w', newline='', encoding='utf-8-sig') as f:
                 writer = csv.writer(f)
-                # 写入表头
-                writer.writerow([
-                    '样本ID', '任务ID', '作业ID', '书本名称', '页码', '题号',
-                    '错误类型', '严重程度', '基准答案', '基准用户答案', 'AI答案',
-                    '状态', '备注', '创建时间'
-                ])
-                # 写入数据
-                for sample in all_samples:
-                    writer.writerow([
-                        sample['sample_id'], sample['task_id'], sample['homework_id'],
-                        sample['book_name'], sample['page_num'], sample['question_index'],
-                        sample['error_type'], sample['severity'],
-                        sample['base_answer'], sample['base_user'], sample['hw_user'],
-                        sample['status'], sample['notes'], sample['created_at']
-                    ])
+                writer.writerow(EXPORT_HEADERS)
+                for sample in samples:
+                    writer.writerow(_export_row(sample))
         else:
             filename = f'error_samples_{timestamp}.xlsx'
             filepath = os.path.join(export_dir, filename)
             
-            wb = Workbook()
-            ws = wb.active
-            ws.title = '错误样本'
-            
-            # 写入表头
-            headers = [
-                '样本ID', '任务ID', '作业ID', '书本名称', '页码', '题号',
-                '错误类型', '严重程度', '基准答案', '基准用户答案', 'AI答案',
-                '状态', '备注', '创建时间'
-            ]
-            ws.append(headers)
-            
-            # 写入数据
-            for sample in all_samples:
-                ws.append([
-                    sample['sample_id'], sample['task_id'], sample['homework_id'],
-                    sample['book_name'], sample['page_num'], sample['question_index'],
-                    sample['error_type'], sample['severity'],
-                    sample['base_answer'], sample['base_user'], sample['hw_user'],
-                    sample['status'], sample['notes'], sample['created_at']
-                ])
+            wb = Workbook(write_only=True)
+            ws = wb.create_sheet('错误样本')
+            ws.append(EXPORT_HEADERS)
+            for sample in samples:
+                ws.append(_export_row(sample))
             
             wb.save(filepath)
         
@@ -476,23 +555,4 @@ class ErrorSampleService:
     @staticmethod
     def _infer_subject_id(book_name: str) -> Optional[int]:
         """从书名推断学科ID"""
-        if not book_name:
-            return None
-        
-        book_name_lower = book_name.lower()
-        subject_keywords = {
-            0: ['英语', 'english'],
-            1: ['语文', 'chinese'],
-            2: ['数学', 'math'],
-            3: ['物理', 'physics'],
-            4: ['化学', 'chemistry'],
-            5: ['生物', 'biology'],
-            6: ['地理', 'geography']
-        }
-        
-        for subject_id, keywords in subject_keywords.items():
-            for keyword in keywords:
-                if keyword in book_name_lower:
-                    return subject_id
-        
-        return None
+        return _subject_of_book(book_name)
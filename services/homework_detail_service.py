@@ -0,0 +1,171 @@
+"""
+作业评估详情缓存模块
+
+get_homework_detail 每次打开作业都要查找基准效果并重新评估，匹配不到数据集时还会遍历所有数据集。
+本模块把计算好的详情按作业存放在任务旁边（homework_details/<task_id>/<homework_id>.json），
+查看详情时只需一次文件读取和一次版本校验：
+- 作业指纹：评估器版本、学科、评估设置、匹配的数据集、页码以及识别结果，作业重新评估或更换数据集后自然失效
+- 基准来源版本：指定数据集 / 全部数据集 / 基准效果文件的版本戳，基准数据修改后失效
+- 批量评估结束后整体预计算，删除任务时一并删除
+"""
+import os
+import json
+import shutil
+import hashlib
+from typing import Dict, Any, Optional
+
+from .storage_service import StorageService
+from utils.file_utils import safe_filename
+
+
+class HomeworkDetailService:
+    """
+    作业评估详情缓存
+
+    Attributes:
+        DETAIL_DIR: 详情缓存目录
+        EVALUATOR_VERSION: 评估器版本，do_evaluation 逻辑或详情结构变化时递增，使旧缓存失效
+    """
+
+    DETAIL_DIR = 'homework_details'
+    EVALUATOR_VERSION = 1
+
+    # ========== 键 ==========
+
+    @classmethod
+    def fingerprint(cls, task_data: Dict[str, Any], homework_item: Dict[str, Any], subject_id=None) -> str:
+        """计算作业指纹（评估输入的摘要）"""
+        parts = [
+            cls.EVALUATOR_VERSION,
+            subject_id,
+            task_data.get('fuzzy_threshold', 0.85),
+            task_data.get('ignore_index_prefix', True),
+            homework_item.get('matched_dataset'),
+            homework_item.get('book_id'),
+            homework_item.get('book_name'),
+            homework_item.get('homework_name'),
+            homework_item.get('page_num'),
+            homework_item.get('homework_result'),
+            homework_item.get('data_value')
+        ]
+        raw = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def source_version(source: Optional[Dict[str, Any]]) -> Optional[str]:
+        """
+        获取基准来源的版本戳
+
+        Args:
+            source: {'type': 'dataset', 'id': ...} 指定数据集；
+                    {'type': 'datasets'} 遍历数据集得到或未找到基准（任何数据集变化都可能影响结果）；
+                    {'type': 'baseline', 'file': ...} 基准效果文件
+
+        Returns:
+            版本戳；无法获取时返回 None（不缓存）
+        """
+        if not source:
+            return None
+        source_type = source.get('type')
+        if source_type == 'dataset':
+            version = StorageService.get_dataset_version(source.get('id'))
+        elif source_type == 'datasets':
+            version = StorageService.get_all_datasets_version()
+        elif source_type == 'baseline':
+            try:
+                st = os.stat(os.path.join(StorageService.BASELINE_EFFECTS_DIR, source.get('file', '')))
+            except OSError:
+                return None
+            version = (f'{st.st_mtime_ns}-{st.st_size}', None)
+        else:
+            return None
+        return None if version is None else str(version[0])
+
+    @classmethod
+    def snapshot_versions(cls, homework_item: Dict[str, Any], versions: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        在计算详情之前获取作业可能用到的基准来源版本（匹配的数据集、全部数据集）
+
+        Args:
+            versions: 已获取的版本（批量预计算时跨作业复用）
+        """
+        versions = versions if versions is not None else {}
+        sources = [{'type': 'datasets'}]
+        if homework_item.get('matched_dataset'):
+            sources.append({'type': 'dataset', 'id': homework_item['matched_dataset']})
+        for source in sources:
+            key = cls._source_key(source)
+            if key not in versions:
+                versions[key] = cls.source_version(source)
+        return versions
+
+    @classmethod
+    def version_for(cls, versions: Dict[str, Any], source: Optional[Dict[str, Any]]) -> Optional[str]:
+        """从快照中取基准来源的版本，基准效果文件直接读取"""
+        if not source:
+            return None
+        if source.get('type') == 'baseline':
+            return cls.source_version(source)
+        return versions.get(cls._source_key(source))
+
+    @staticmethod
+    def _source_key(source: Dict[str, Any]) -> str:
+        return json.dumps(source, sort_keys=True)
+
+    # ========== 读写 ==========
+
+    @classmethod
+    def _detail_path(cls, task_id: str, homework_id) -> str:
+        return os.path.join(cls.DETAIL_DIR, safe_filename(str(task_id)), f'{safe_filename(str(homework_id))}.json')
+
+    @classmethod
+    def get(cls, task_id: str, homework_id, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """获取缓存的详情，指纹或基准来源版本不一致时返回 None"""
+        try:
+            entry = StorageService.load_json(cls._detail_path(task_id, homework_id))
+        except (OSError, ValueError):
+            return None
+        if not entry or entry.get('fingerprint') != fingerprint:
+            return None
+        try:
+            current = cls.source_version(entry.get('source'))
+        except Exception as e:
+            print(f"[HomeworkDetail] 获取基准版本失败: {e}")
+            return None
+        if current is None or current != entry.get('source_version'):
+            return None
+        return entry.get('detail')
+
+    @classmethod
+    def put(cls, task_id: str, homework_id, fingerprint: str, source: Optional[Dict[str, Any]],
+            detail: Dict[str, Any], source_version: Optional[str]) -> bool:
+        """
+        保存详情
+
+        source_version 应在计算详情之前获取（snapshot_versions / version_for），
+        避免计算期间基准数据变化导致以新版本缓存旧结果。
+
+        Returns:
+            bool: 是否已保存（基准来源版本未知时不保存）
+        """
+        if source_version is None:
+            return False
+        path = cls._detail_path(task_id, homework_id)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        try:
+            StorageService.save_json(tmp_path, {
+                'fingerprint': fingerprint,
+                'source': source,
+                'source_version': source_version,
+                'detail': detail
+            })
+            os.replace(tmp_path, path)
+            return True
+        except OSError as e:
+            print(f"[HomeworkDetail] 保存详情失败 {task_id}/{homework_id}: {e}")
+            return False
+
+    @classmethod
+    def delete_task(cls, task_id: str):
+        """删除任务的全部详情缓存"""
+        shutil.rmtree(os.path.join(cls.DETAIL_DIR, safe_filename(str(task_id))), ignore_errors=True)
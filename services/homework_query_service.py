@@ -0,0 +1,142 @@
+"""
+作业列表查询模块
+
+面向原业务数据库(zpsmart)的作业列表查询层：
+- 列表只查询轻量列，题目数量在数据库端用 JSON_LENGTH 计算，不再传输 homework_result 再在 Python 中解析
+- 按 (create_time, id) 倒序做键集分页，翻页时不扫描前面的行
+- homework_result / data_value 等大字段按作业 ID 按需加载（load_blobs）
+"""
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple, Iterable
+
+from .database_service import DatabaseService
+from utils.projection import encode_keyset_cursor, decode_keyset_cursor
+
+
+# homework_result 是 JSON 数组时取元素个数，否则为 0（与原先 len(json.loads(...)) 的结果一致）
+QUESTION_COUNT_SQL = (
+    "CASE WHEN JSON_VALID(h.homework_result) AND JSON_TYPE(h.homework_result) = 'ARRAY' "
+    "THEN JSON_LENGTH(h.homework_result) ELSE 0 END"
+)
+
+# 允许按需加载的大字段
+BLOB_COLUMNS = ('homework_result', 'data_value')
+
+
+class HomeworkQueryService:
+    """作业列表查询服务"""
+
+    MAX_LIMIT = 500
+
+    @staticmethod
+    def list_homework(hours: int = None, subject_id: int = None, publish_ids: List[str] = None,
+                      book_id: str = None, page_num: int = None, require_pic: bool = False,
+                      with_names: bool = True, limit: int = 500,
+                      cursor: str = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        查询已批改（status=3）的作业列表
+
+        Args:
+            hours: 只查询最近 N 小时内创建的作业
+            subject_id: 学科ID
+            publish_ids: 作业任务ID列表（字符串形式，避免大整数精度问题）
+            book_id: 书本ID（作业任务关联的书本）
+            page_num: 页码
+            require_pic: 只返回有图片的作业
+            with_names: 是否关联查询作业名称、书本名称
+            limit: 每页条数（最多 MAX_LIMIT）
+            cursor: 上一页返回的游标
+
+        Returns:
+            tuple: (作业列表, 下一页游标)；没有下一页时游标为 None。
+                   每行包含 id, student_id, student_name, hw_publish_id, subject_id, page_num,
+                   pic_path, create_time, question_count，with_names 时另有 homework_name, book_id, book_name
+
+        Raises:
+            ValueError: 游标格式错误
+        """
+        limit = max(1, min(limit or HomeworkQueryService.MAX_LIMIT, HomeworkQueryService.MAX_LIMIT))
+        after = decode_keyset_cursor(cursor, 2)
+
+        columns = [
+            'h.id', 'h.student_id', 'h.hw_publish_id', 'h.subject_id', 'h.page_num',
+            'h.pic_path', 'h.create_time', f'{QUESTION_COUNT_SQL} AS question_count',
+            's.name AS student_name'
+        ]
+        joins = ['LEFT JOIN zp_student s ON h.student_id = s.id']
+        if with_names or book_id is not None:
+            joins.append('LEFT JOIN zp_homework_publish p ON h.hw_publish_id = p.id')
+        if with_names:
+            columns += ['p.content AS homework_name', 'b.id AS book_id', 'b.book_name AS book_name']
+            joins.append('LEFT JOIN zp_make_book b ON p.book_id = b.id')
+
+        conditions = ['h.status = 3']
+        params = []
+        if hours is not None:
+            conditions.append('h.create_time >= DATE_SUB(NOW(), INTERVAL %s HOUR)')
+            params.append(hours)
+        if publish_ids:
+            conditions.append(f"h.hw_publish_id IN ({','.join(['%s'] * len(publish_ids))})")
+            params.extend(publish_ids)
+        if subject_id is not None:
+            conditions.append('h.subject_id = %s')
+            params.append(subject_id)
+        if book_id is not None:
+            conditions.append('p.book_id = %s')
+            params.append(book_id)
+        if page_num is not None:
+            conditions.append('h.page_num = %s')
+            params.append(page_num)
+        if require_pic:
+            conditions.append("h.pic_path IS NOT NULL AND h.pic_path != ''")
+        if after is not None:
+            conditions.append('(h.create_time < %s OR (h.create_time = %s AND h.id < %s))')
+            params.extend([after[0], after[0], int(after[1])])
+
+        sql = f"""
+            SELECT {', '.join(columns)}
+            FROM zp_homework h
+            {' '.join(joins)}
+            WHERE {' AND '.join(conditions)}
+            ORDER BY h.create_time DESC, h.id DESC
+            LIMIT %s
+        """
+        params.append(limit + 1)
+        rows = DatabaseService.execute_query(sql, tuple(params))
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            create_time = last.get('create_time')
+            if isinstance(create_time, datetime):
+                create_time = create_time.strftime('%Y-%m-%d %H:%M:%S.%f')
+            next_cursor = encode_keyset_cursor([create_time, str(last['id'])])
+
+        for row in rows:
+            row['question_count'] = int(row.get('question_count') or 0)
+        return rows, next_cursor
+
+    @staticmethod
+    def load_blobs(homework_ids: Iterable, columns: Iterable[str] = BLOB_COLUMNS) -> Dict[str, Dict[str, Any]]:
+        """
+        按需加载作业大字段
+
+        Args:
+            homework_ids: 作业ID列表
+            columns: 要加载的字段（homework_result / data_value）
+
+        Returns:
+            dict: {作业ID(字符串): {字段: 值}}
+        """
+        ids = [str(i) for i in homework_ids if str(i).strip()]
+        columns = [c for c in columns if c in BLOB_COLUMNS]
+        if not ids or not columns:
+            return {}
+        sql = f"""
+            SELECT h.id, {', '.join('h.' + c for c in columns)}
+            FROM zp_homework h
+            WHERE h.id IN ({','.join(['%s'] * len(ids))})
+        """
+        rows = DatabaseService.execute_query(sql, tuple(ids))
+        return {str(row['id']): {c: row.get(c) for c in columns} for row in rows}
@@ -13,15 +13,12 @@ import requests
 from datetime import datetime
 from typing import List, Dict, Optional, Any
 from .config_service import ConfigService
+from .llm_usage_service import LLMUsageService
 
 
 class LLMService:
     """LLM 服务类"""
     
-    QWEN_API_URL = 'https://dashscope.aliyuncs.com/compatible-mode/v1/chat/completions'
-    DEEPSEEK_API_URL = 'https://api.deepseek.com/chat/completions'
-    ZHIPU_API_URL = 'https://open.bigmodel.cn/api/paas/v4/chat/completions'
-    
     @staticmethod
     def call_qwen(prompt, system_prompt='你是一个专业的AI助手。', model='qwen3-max', timeout=60, user_id=None):
         """调用 Qwen 模型"""
@@ -46,7 +43,7 @@ class LLMService:
         
         try:
             response = requests.post(
-                LLMService.QWEN_API_URL,
+                ConfigService.get_llm_api_url('qwen', config),
                 json=payload,
                 headers=headers,
                 timeout=timeout
@@ -90,7 +87,7 @@ class LLMService:
         
         try:
             response = requests.post(
-                LLMService.DEEPSEEK_API_URL,
+                ConfigService.get_llm_api_url('deepseek', config),
                 json=payload,
                 headers=headers,
                 timeout=timeout
@@ -132,7 +129,7 @@ class LLMService:
         
         try:
             response = requests.post(
-                LLMService.ZHIPU_API_URL,
+                ConfigService.get_llm_api_url('zhipu', config),
                 json=payload,
                 headers=headers,
                 timeout=timeout
@@ -154,7 +151,7 @@ class LLMService:
     def call_vision_model(image, prompt, model=None, timeout=120, user_id=None):
         """调用视觉模型"""
         config = ConfigService.load_config(user_id=user_id)
-        api_url = config.get('api_url', 'https://ark.cn-beijing.volces.com/api/v3/chat/completions')
+        api_url = ConfigService.get_llm_api_url('doubao', config)
         api_key = config.get('api_key')
         
         print(f"[Vision] user_id={user_id}, model={model}, api_key={'已配置' if api_key else '未配置'}")
@@ -371,7 +368,7 @@ class LLMService:
         try:
             async with aiohttp.ClientSession() as session:
                 async with session.post(
-                    LLMService.DEEPSEEK_API_URL,
+                    ConfigService.get_llm_api_url('deepseek', config),
                     json=payload,
                     headers=headers,
                     timeout=aiohttp.ClientTimeout(total=timeout)
@@ -572,24 +569,27 @@ class LLMService:
         error_message: str = None
     ):
         """
-        记录 LLM 调用日志到数据库
+        记录 LLM 调用日志（异步批量写入，不阻塞调用方）
         """
         try:
-            from .database_service import AppDatabaseService
+            from .telemetry_writer import TelemetryWriter
             
-            log_id = str(uuid.uuid4())[:8]
-            sql = """
-                INSERT INTO llm_call_logs 
-                (log_id, task_id, analysis_type, target_id, model, 
-                 prompt_tokens, completion_tokens, total_tokens,
-                 duration_ms, retry_count, status, error_type, error_message, created_at)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """
-            AppDatabaseService.execute_insert(sql, (
-                log_id, task_id, analysis_type, target_id, model,
-                tokens.get('prompt', 0), tokens.get('completion', 0), tokens.get('total', 0),
-                duration_ms, retry_count, status, error_type, error_message, datetime.now()
-            ))
+            TelemetryWriter.submit('llm_call_logs', {
+                'log_id': str(uuid.uuid4())[:8],
+                'task_id': task_id,
+                'analysis_type': analysis_type,
+                'target_id': target_id,
+                'model': model,
+                'prompt_tokens': tokens.get('prompt', 0),
+                'completion_tokens': tokens.get('completion', 0),
+                'total_tokens': tokens.get('total', 0),
+                'duration_ms': duration_ms,
+                'retry_count': retry_count,
+                'status': status,
+                'error_type': error_type,
+                'error_message': error_message,
+                'created_at': datetime.now()
+            })
         except Exception as e:
             print(f"[LLM] 记录日志失败: {e}")
     
@@ -598,6 +598,8 @@ class LLMService:
         """
         获取 token 使用统计
         
+        读取 llm_usage_daily 汇总表（由日志刷新增量维护），不扫描原始日志表
+        
         Args:
             days: 统计天数
             
@@ -605,66 +607,7 @@ class LLMService:
             dict: {today, week, month, by_model, by_type}
         """
         try:
-            from .database_service import AppDatabaseService
-            
-            # 今日统计
-            sql_today = """
-                SELECT COALESCE(SUM(total_tokens), 0) as tokens, COUNT(*) as calls
-                FROM llm_call_logs
-                WHERE DATE(created_at) = CURDATE() AND status = 'success'
-            """
-            today_result = AppDatabaseService.execute_query(sql_today)
-            
-            # 本周统计
-            sql_week = """
-                SELECT COALESCE(SUM(total_tokens), 0) as tokens, COUNT(*) as calls
-                FROM llm_call_logs
-                WHERE created_at >= DATE_SUB(CURDATE(), INTERVAL 7 DAY) AND status = 'success'
-            """
-            week_result = AppDatabaseService.execute_query(sql_week)
-            
-            # 本月统计
-            sql_month = """
-                SELECT COALESCE(SUM(total_tokens), 0) as tokens, COUNT(*) as calls
-                FROM llm_call_logs
-                WHERE created_at >= DATE_SUB(CURDATE(), INTERVAL 30 DAY) AND status = 'success'
-            """
-            month_result = AppDatabaseService.execute_query(sql_month)
-            
-            # 按模型统计
-            sql_by_model = """
-                SELECT model, COALESCE(SUM(total_tokens), 0) as tokens, COUNT(*) as calls
-                FROM llm_call_logs
-                WHERE created_at >= DATE_SUB(CURDATE(), INTERVAL %s DAY)
-                GROUP BY model
-            """
-            model_result = AppDatabaseService.execute_query(sql_by_model, (days,))
-            
-            # 按类型统计
-            sql_by_type = """
-                SELECT analysis_type, COALESCE(SUM(total_tokens), 0) as tokens, COUNT(*) as calls
-                FROM llm_call_logs
-                WHERE created_at >= DATE_SUB(CURDATE(), INTERVAL %s DAY)
-                GROUP BY analysis_type
-            """
-            type_result = AppDatabaseService.execute_query(sql_by_type, (days,))
-            
-            return {
-                'today': {
-                    'tokens': today_result[0]['tokens'] if today_result else 0,
-                    'calls': today_result[0]['calls'] if today_result else 0
-                },
-                'week': {
-                    'tokens': week_result[0]['tokens'] if week_result else 0,
-                    'calls': week_result[0]['calls'] if week_result else 0
-                },
-                'month': {
-                    'tokens': month_result[0]['tokens'] if month_result else 0,
-                    'calls': month_result[0]['calls'] if month_result else 0
-                },
-                'by_model': {row['model']: {'tokens': row['tokens'], 'calls': row['calls']} for row in (model_result or [])},
-                'by_type': {row['analysis_type']: {'tokens': row['tokens'], 'calls': row['calls']} for row in (type_result or [])}
-            }
+            return LLMUsageService.get_token_stats(days)
         except Exception as e:
             print(f"[LLM] 获取统计失败: {e}")
             return {'today': {'tokens': 0, 'calls': 0}, 'week': {'tokens': 0, 'calls': 0}, 'month': {'tokens': 0, 'calls': 0}}
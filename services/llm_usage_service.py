@@ -0,0 +1,205 @@
+"""
+LLM 用量汇总服务模块
+
+维护 llm_usage_hourly / llm_usage_daily 汇总表，提供：
+- 日志刷新时增量累加（TelemetryWriter 刷新回调）
+- 历史数据回填（幂等，按日期区间重建）
+- 基于汇总表的 token 统计查询，不再扫描原始日志表
+
+回填用法:
+    python -m services.llm_usage_service --days 90
+    python -m services.llm_usage_service --start 2026-01-01 --end 2026-02-01
+"""
+from datetime import datetime, date, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+
+from .database_service import AppDatabaseService
+from .telemetry_writer import TelemetryWriter
+
+
+class LLMUsageService:
+    """LLM 用量汇总服务类"""
+
+    METRIC_FIELDS = ('calls', 'prompt_tokens', 'completion_tokens', 'total_tokens', 'duration_ms')
+
+    # ========== 增量维护 ==========
+
+    @staticmethod
+    def _to_datetime(value) -> Optional[datetime]:
+        """兼容 datetime 和落盘回放时的字符串"""
+        if isinstance(value, datetime):
+            return value
+        if isinstance(value, str) and value:
+            try:
+                return datetime.fromisoformat(value)
+            except ValueError:
+                return None
+        return None
+
+    @staticmethod
+    def aggregate_rows(rows: List[Dict[str, Any]]) -> Tuple[Dict[tuple, Dict[str, int]], Dict[tuple, Dict[str, int]]]:
+        """
+        将原始日志行聚合为小时桶和日桶增量
+
+        Returns:
+            tuple: (hourly, daily)，键为 (bucket, model, analysis_type, status)
+        """
+        hourly: Dict[tuple, Dict[str, int]] = {}
+        daily: Dict[tuple, Dict[str, int]] = {}
+        for row in rows:
+            created_at = LLMUsageService._to_datetime(row.get('created_at')) or datetime.now()
+            dims = (row.get('model') or '', row.get('analysis_type') or '', row.get('status') or '')
+            delta = {
+                'calls': 1,
+                'prompt_tokens': int(row.get('prompt_tokens') or 0),
+                'completion_tokens': int(row.get('completion_tokens') or 0),
+                'total_tokens': int(row.get('total_tokens') or 0),
+                'duration_ms': int(row.get('duration_ms') or 0)
+            }
+            hour_key = (created_at.replace(minute=0, second=0, microsecond=0),) + dims
+            day_key = (created_at.date(),) + dims
+            for target, key in ((hourly, hour_key), (daily, day_key)):
+                bucket = target.setdefault(key, dict.fromkeys(LLMUsageService.METRIC_FIELDS, 0))
+                for field, value in delta.items():
+                    bucket[field] += value
+        return hourly, daily
+
+    @staticmethod
+    def _upsert(table: str, bucket_column: str, buckets: Dict[tuple, Dict[str, int]]) -> None:
+        """累加写入汇总表"""
+        if not buckets:
+            return
+        fields = LLMUsageService.METRIC_FIELDS
+        sql = f"""
+            INSERT INTO {table}
+            ({bucket_column}, model, analysis_type, status, {', '.join(fields)})
+            VALUES (%s, %s, %s, %s, {', '.join(['%s'] * len(fields))})
+            ON DUPLICATE KEY UPDATE
+            {', '.join(f'{f} = {f} + VALUES({f})' for f in fields)}
+        """
+        params = [key + tuple(metrics[f] for f in fields) for key, metrics in buckets.items()]
+        AppDatabaseService.execute_many(sql, params)
+
+    @staticmethod
+    def apply_log_rows(rows: List[Dict[str, Any]]) -> None:
+        """TelemetryWriter 刷新回调：将本批日志累加到汇总表"""
+        hourly, daily = LLMUsageService.aggregate_rows(rows)
+        LLMUsageService._upsert('llm_usage_hourly', 'bucket_hour', hourly)
+        LLMUsageService._upsert('llm_usage_daily', 'bucket_date', daily)
+
+    # ========== 回填 ==========
+
+    @staticmethod
+    def backfill(start_date: date, end_date: date) -> Dict[str, int]:
+        """
+        从 llm_call_logs 重建 [start_date, end_date) 区间的汇总数据
+
+        先删除区间内汇总行再整体重算，可重复执行。
+
+        Returns:
+            dict: {hourly_rows, daily_rows}
+        """
+        start = datetime.combine(start_date, datetime.min.time())
+        end = datetime.combine(end_date, datetime.min.time())
+        metrics_sql = """
+            COUNT(*), COALESCE(SUM(prompt_tokens), 0), COALESCE(SUM(completion_tokens), 0),
+            COALESCE(SUM(total_tokens), 0), COALESCE(SUM(duration_ms), 0)
+        """
+
+        AppDatabaseService.execute_update(
+            "DELETE FROM llm_usage_hourly WHERE bucket_hour >= %s AND bucket_hour < %s", (start, end)
+        )
+        hourly_rows = AppDatabaseService.execute_update(f"""
+            INSERT INTO llm_usage_hourly
+            (bucket_hour, model, analysis_type, status, {', '.join(LLMUsageService.METRIC_FIELDS)})
+            SELECT DATE_FORMAT(created_at, '%%Y-%%m-%%d %%H:00:00'),
+                   COALESCE(model, ''), COALESCE(analysis_type, ''), COALESCE(status, ''),
+                   {metrics_sql}
+            FROM llm_call_logs
+            WHERE created_at >= %s AND created_at < %s
+            GROUP BY 1, 2, 3, 4
+        """, (start, end))
+
+        AppDatabaseService.execute_update(
+            "DELETE FROM llm_usage_daily WHERE bucket_date >= %s AND bucket_date < %s", (start_date, end_date)
+        )
+        daily_rows = AppDatabaseService.execute_update(f"""
+            INSERT INTO llm_usage_daily
+            (bucket_date, model, analysis_type, status, {', '.join(LLMUsageService.METRIC_FIELDS)})
+            SELECT DATE(bucket_hour), model, analysis_type, status,
+                   SUM(calls), SUM(prompt_tokens), SUM(completion_tokens),
+                   SUM(total_tokens), SUM(duration_ms)
+            FROM llm_usage_hourly
+            WHERE bucket_hour >= %s AND bucket_hour < %s
+            GROUP BY 1, 2, 3, 4
+        """, (start, end))
+
+        return {'hourly_rows': hourly_rows or 0, 'daily_rows': daily_rows or 0}
+
+    # ========== 统计查询 ==========
+
+    @staticmethod
+    def get_token_stats(days: int = 7) -> dict:
+        """
+        获取 token 使用统计（只读日汇总表，一次查询）
+
+        Args:
+            days: by_model / by_type 的统计天数
+
+        Returns:
+            dict: {today, week, month, by_model, by_type}
+        """
+        today = date.today()
+        window_start = today - timedelta(days=max(days, 30))
+        rows = AppDatabaseService.execute_query("""
+            SELECT bucket_date, model, analysis_type, status, calls, total_tokens
+            FROM llm_usage_daily
+            WHERE bucket_date >= %s
+        """, (window_start,)) or []
+
+        ranges = {
+            'today': today,
+            'week': today - timedelta(days=7),
+            'month': today - timedelta(days=30)
+        }
+        stats = {name: {'tokens': 0, 'calls': 0} for name in ranges}
+        by_model: Dict[str, Dict[str, int]] = {}
+        by_type: Dict[str, Dict[str, int]] = {}
+        detail_start = today - timedelta(days=days)
+
+        for row in rows:
+            bucket_date = row['bucket_date']
+            tokens = int(row['total_tokens'] or 0)
+            calls = int(row['calls'] or 0)
+            if row['status'] == 'success':
+                for name, range_start in ranges.items():
+                    if bucket_date >= range_start:
+                        stats[name]['tokens'] += tokens
+                        stats[name]['calls'] += calls
+            if bucket_date >= detail_start:
+                for target, key in ((by_model, row['model']), (by_type, row['analysis_type'])):
+                    entry = target.setdefault(key, {'tokens': 0, 'calls': 0})
+                    entry['tokens'] += tokens
+                    entry['calls'] += calls
+
+        stats['by_model'] = by_model
+        stats['by_type'] = by_type
+        return stats
+
+
+TelemetryWriter.register_flush_hook('llm_call_logs', LLMUsageService.apply_log_rows)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='回填 LLM 用量汇总表')
+    parser.add_argument('--days', type=int, default=30, help='回填最近 N 天（含今天）')
+    parser.add_argument('--start', help='开始日期 YYYY-MM-DD（含）')
+    parser.add_argument('--end', help='结束日期 YYYY-MM-DD（不含），默认明天')
+    args = parser.parse_args()
+
+    end = date.fromisoformat(args.end) if args.end else date.today() + timedelta(days=1)
+    start = date.fromisoformat(args.start) if args.start else end - timedelta(days=args.days)
+    result = LLMUsageService.backfill(start, end)
+    print(f"[LLMUsage] 回填完成 {start} ~ {end}: {result}")
@@ -7,6 +7,7 @@ import json
 import difflib
 from datetime import datetime
 from .database_service import DatabaseService, AppDatabaseService
+from .prompt_registry import PromptRegistry
 
 
 # 学科提示词配置映射
@@ -148,6 +149,7 @@ class PromptConfigService:
         """保存提示词到本地"""
         content_hash = PromptConfigService.get_content_hash(config_value)
         now = datetime.now()
+        PromptRegistry.invalidate_db()
         
         existing = PromptConfigService.get_local_prompt(config_key)
         
@@ -193,6 +195,7 @@ class PromptConfigService:
         """增加版本号"""
         sql = "UPDATE prompt_configs SET current_version = current_version + 1 WHERE config_key = %s"
         AppDatabaseService.execute_update(sql, (config_key,))
+        PromptRegistry.invalidate_db()
         
         # 返回新版本号
         local = PromptConfigService.get_local_prompt(config_key)
@@ -519,9 +522,11 @@ class PromptConfigService:
         if not subject_config:
             return {}
         
+        # 从提示词注册表读取（同步后已失效重载），不再逐个查询
+        local_configs = PromptRegistry.get_db_prompts([p['key'] for p in subject_config['prompts']])
         versions = {}
         for prompt_info in subject_config['prompts']:
-            local = PromptConfigService.get_local_prompt(prompt_info['key'])
+            local = local_configs.get(prompt_info['key'])
             if local:
                 versions[prompt_info['key']] = {
                     'version': local['current_version'],
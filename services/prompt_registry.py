@@ -0,0 +1,271 @@
+"""
+提示词注册表
+统一加载各来源的提示词并常驻内存：
+- config.json 的 prompts 字典（recognize、compare_answer 等）
+- prompts.json 中带 key 的提示词（semantic_eval_template 等，同名时覆盖 config.json）
+- prompt_configs 表（从 zpsmart.zp_config 同步的学科提示词，带 current_version）
+
+模板预先拆分为静态片段和占位符，渲染只做拼接；
+文件按 mtime 检测变化，数据库按 current_version/updated_at 检测变化，检查均有节流间隔。
+"""
+import os
+import time
+import hashlib
+import threading
+from string import Formatter
+from typing import Dict, Any, List, Optional, Tuple
+
+from .config_service import ConfigService
+
+
+class PromptTemplate:
+    """
+    预解析的提示词模板
+
+    语义与 str.format(**kwargs) 一致；占位符含属性/下标访问或位置参数时退化为 str.format。
+    """
+
+    _formatter = Formatter()
+
+    def __init__(self, key: str, text: str, version: str = None):
+        self.key = key
+        self.text = text or ''
+        self.version = version or PromptRegistry.content_hash(self.text)
+        # 片段：str 为静态文本，tuple 为 (字段名, 转换符, 格式说明)
+        self.segments: List[Any] = []
+        self.fields: List[str] = []
+        self._simple = True
+        self._parse()
+
+    def _parse(self):
+        try:
+            parsed = list(self._formatter.parse(self.text))
+        except ValueError:
+            # 花括号不成对，按原样渲染时同样会报错，保留 str.format 的行为
+            self._simple = False
+            return
+        for literal, field_name, format_spec, conversion in parsed:
+            if literal:
+                self.segments.append(literal)
+            if field_name is None:
+                continue
+            if not field_name.isidentifier() or (format_spec and '{' in format_spec):
+                self._simple = False
+            self.segments.append((field_name, conversion, format_spec or ''))
+            if field_name not in self.fields:
+                self.fields.append(field_name)
+
+    def render(self, **kwargs) -> str:
+        """渲染模板，缺少字段时抛出 KeyError（与 str.format 一致）"""
+        if not self._simple:
+            return self.text.format(**kwargs)
+        parts = []
+        for seg in self.segments:
+            if isinstance(seg, str):
+                parts.append(seg)
+                continue
+            name, conversion, spec = seg
+            value = kwargs[name]
+            if conversion:
+                value = self._formatter.convert_field(value, conversion)
+            parts.append(value if type(value) is str and not spec else format(value, spec))
+        return ''.join(parts)
+
+    def __str__(self):
+        return self.text
+
+
+class PromptRegistry:
+    """
+    提示词注册表（进程内单例，类方法访问）
+
+    Attributes:
+        version: 全部提示词内容的整体版本，任一来源变化时改变，可用作下游缓存键的一部分
+    """
+
+    # 文件 mtime 检查间隔（秒）
+    FILE_CHECK_INTERVAL = 2.0
+    # prompt_configs 表版本检查间隔（秒）
+    DB_CHECK_INTERVAL = 30.0
+
+    _lock = threading.RLock()
+    _templates: Dict[str, PromptTemplate] = {}
+    _defaults: Dict[Tuple[str, str], PromptTemplate] = {}
+    _file_signatures: Optional[Tuple] = None
+    _file_checked_at = 0.0
+    _db_rows: Dict[str, Dict[str, Any]] = {}
+    _db_templates: Dict[str, PromptTemplate] = {}
+    _db_stamp: Optional[Tuple] = None
+    _db_checked_at = 0.0
+    _db_loaded = False
+    version = ''
+
+    # ========== 对外接口 ==========
+
+    @staticmethod
+    def content_hash(text: str) -> str:
+        return hashlib.md5((text or '').encode('utf-8')).hexdigest()[:12]
+
+    @classmethod
+    def get_template(cls, key: str, default: str = '') -> PromptTemplate:
+        """获取预解析模板，不存在时返回默认文本的模板（默认模板同样只解析一次）"""
+        cls._refresh_files()
+        template = cls._templates.get(key)
+        if template is not None:
+            return template
+        default_key = (key, default)
+        template = cls._defaults.get(default_key)
+        if template is None:
+            template = PromptTemplate(key, default)
+            with cls._lock:
+                cls._defaults[default_key] = template
+        return template
+
+    @classmethod
+    def get(cls, key: str, default: str = '') -> str:
+        """获取提示词文本"""
+        return cls.get_template(key, default).text
+
+    @classmethod
+    def render(cls, key: str, default: str = '', **kwargs) -> str:
+        """渲染提示词模板"""
+        return cls.get_template(key, default).render(**kwargs)
+
+    @classmethod
+    def get_version(cls, key: str = None, default: str = '') -> str:
+        """获取单个提示词或整体的内容版本"""
+        if key is None:
+            cls._refresh_files()
+            return cls.version
+        return cls.get_template(key, default).version
+
+    @classmethod
+    def get_db_prompts(cls, config_keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        获取 prompt_configs 表中的提示词记录
+
+        Returns:
+            dict: config_key -> 行数据（含 config_value、current_version、content_hash、synced_at）
+        """
+        cls._refresh_db()
+        return {k: cls._db_rows[k] for k in config_keys if k in cls._db_rows}
+
+    @classmethod
+    def get_db_template(cls, config_key: str) -> Optional[PromptTemplate]:
+        """获取 prompt_configs 表中提示词的预解析模板，版本号为 v{current_version}"""
+        cls._refresh_db()
+        return cls._db_templates.get(config_key)
+
+    @classmethod
+    def invalidate(cls):
+        """使文件来源失效，下次访问时重新加载"""
+        with cls._lock:
+            cls._file_signatures = None
+            cls._file_checked_at = 0.0
+
+    @classmethod
+    def invalidate_db(cls):
+        """使数据库来源失效（同步提示词后调用）"""
+        with cls._lock:
+            cls._db_stamp = None
+            cls._db_checked_at = 0.0
+            cls._db_loaded = False
+
+    @classmethod
+    def get_status(cls) -> Dict[str, Any]:
+        """注册表状态"""
+        return {
+            'version': cls.version,
+            'file_prompts': len(cls._templates),
+            'db_prompts': len(cls._db_rows),
+            'db_stamp': [str(v) for v in cls._db_stamp] if cls._db_stamp else None
+        }
+
+    # ========== 文件来源 ==========
+
+    @staticmethod
+    def _signature(path: str):
+        try:
+            st = os.stat(path)
+            return (path, st.st_mtime_ns, st.st_ino, st.st_size)
+        except OSError:
+            return (path, None)
+
+    @classmethod
+    def _refresh_files(cls):
+        now = time.monotonic()
+        if cls._file_signatures is not None and now - cls._file_checked_at < cls.FILE_CHECK_INTERVAL:
+            return
+        with cls._lock:
+            if cls._file_signatures is not None and now - cls._file_checked_at < cls.FILE_CHECK_INTERVAL:
+                return
+            signatures = (
+                cls._signature(ConfigService.CONFIG_FILE),
+                cls._signature(ConfigService.PROMPTS_FILE),
+            )
+            cls._file_checked_at = now
+            if signatures == cls._file_signatures:
+                return
+            cls._load_files()
+            cls._file_signatures = signatures
+
+    @classmethod
+    def _load_files(cls):
+        texts: Dict[str, str] = {}
+        try:
+            config_prompts = ConfigService.load_config(apply_headers=False).get('prompts') or {}
+            if isinstance(config_prompts, dict):
+                texts.update({k: v for k, v in config_prompts.items() if isinstance(v, str)})
+        except Exception as e:
+            print(f"[PromptRegistry] 加载 config.json 提示词失败: {e}")
+        try:
+            for prompt in ConfigService.load_prompts():
+                if isinstance(prompt, dict) and prompt.get('key'):
+                    texts[prompt['key']] = prompt.get('content', '')
+        except Exception as e:
+            print(f"[PromptRegistry] 加载 prompts.json 失败: {e}")
+
+        old = cls._templates
+        templates = {}
+        for key, text in texts.items():
+            existing = old.get(key)
+            templates[key] = existing if existing is not None and existing.text == text else PromptTemplate(key, text)
+        cls._templates = templates
+        cls.version = cls.content_hash(''.join(f'{k}:{t.version};' for k, t in sorted(templates.items())))
+        print(f"[PromptRegistry] 已加载 {len(templates)} 个提示词，版本 {cls.version}")
+
+    # ========== 数据库来源 ==========
+
+    @classmethod
+    def _refresh_db(cls):
+        now = time.monotonic()
+        if cls._db_loaded and now - cls._db_checked_at < cls.DB_CHECK_INTERVAL:
+            return
+        from .database_service import AppDatabaseService
+        with cls._lock:
+            if cls._db_loaded and now - cls._db_checked_at < cls.DB_CHECK_INTERVAL:
+                return
+            cls._db_checked_at = now
+            try:
+                stamp_row = AppDatabaseService.execute_one(
+                    "SELECT COUNT(*) AS cnt, SUM(current_version) AS versions, MAX(updated_at) AS updated_at "
+                    "FROM prompt_configs"
+                ) or {}
+                stamp = (stamp_row.get('cnt'), stamp_row.get('versions'), stamp_row.get('updated_at'))
+                if cls._db_loaded and stamp == cls._db_stamp:
+                    return
+                rows = AppDatabaseService.execute_query(
+                    "SELECT config_key, config_value, content_hash, description, subject_id, subject_name, "
+                    "current_version, synced_at, updated_at FROM prompt_configs"
+                )
+            except Exception as e:
+                print(f"[PromptRegistry] 加载 prompt_configs 失败: {e}")
+                return
+            cls._db_rows = {row['config_key']: row for row in rows}
+            cls._db_templates = {
+                row['config_key']: PromptTemplate(row['config_key'], row.get('config_value') or '',
+                                                  f"v{row.get('current_version') or 0}")
+                for row in rows
+            }
+            cls._db_stamp = stamp
+            cls._db_loaded = True
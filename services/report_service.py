@@ -8,17 +8,29 @@
 - 日报导出 (Word格式)
 - 历史日报查询
 
+构建流程：
+- ReportInputs 一次收集日报所需的按日输入（当日 / 昨日 / 上周同日各扫描一次，
+  只读取聚合立方体中该日期的任务文件），历史错误类型来自立方体按日汇总，按日记忆
+- Word 文档在后台线程渲染，按日报内容版本缓存在 exports/daily_reports，
+  通过 request_export / get_export_status / get_export_artifact 查询和下载；
+  导出任务状态写在文件旁的 <文件>.job 标记中，多个 worker 看到同一状态
+
 遵循 NFR-34 代码质量标准
 """
 import os
+import glob
 import uuid
 import json
+import hashlib
+import threading
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any, List, Set
 
 from .database_service import AppDatabaseService
 from .storage_service import StorageService
 from .llm_service import LLMService
+from .aggregate_cube_service import AggregateCubeService
+from .cube import counted_errors, error_type_of
 
 
 # 学科ID映射
@@ -35,6 +47,72 @@ SUBJECT_MAP = {
 # 默认AI模型版本
 DEFAULT_MODEL_VERSION = 'doubao-1-5-vision-pro-32k-250115'
 
+# 支持的导出格式
+EXPORT_FORMATS = ('docx',)
+
+# 参与渲染的日报字段（内容版本按这些字段计算）
+RENDER_FIELDS = (
+    'report_id', 'report_date', 'task_completed', 'task_planned', 'accuracy', 'accuracy_change',
+    'top_errors', 'new_error_types', 'high_freq_errors', 'anomalies', 'tomorrow_plan',
+    'model_version', 'ai_summary'
+)
+
+
+class ReportInputs:
+    """
+    一次日报构建的按日输入
+
+    每个日期的任务只扫描一次（day），错误类型集合按日记忆（error_types）：
+    已扫描的日期取扫描结果，其他日期取聚合立方体按日汇总的错误类型（一次汇总整个范围）。
+    两者按同一口径统计（counted_errors / error_type_of：只计已完成的作业项，缺失类型记为未知错误），
+    新增错误类型的对比才有意义
+    """
+
+    def __init__(self):
+        self._days: Dict[Any, Dict[str, Any]] = {}
+        self._error_types: Dict[Any, Set[str]] = {}
+
+    def day(self, date) -> Dict[str, Any]:
+        """单日汇总（见 ReportService._collect_day）"""
+        if date not in self._days:
+            self._days[date] = ReportService._collect_day(date)
+        return self._days[date]
+
+    def error_types(self, date) -> Set[str]:
+        if date not in self._error_types:
+            if date in self._days:
+                self._error_types[date] = self._days[date]['error_types']
+            else:
+                self._prefetch_error_types(date, date)
+        return self._error_types[date]
+
+    def error_types_in_range(self, start_date, end_date) -> Set[str]:
+        """日期范围（含两端）内出现过的错误类型"""
+        missing = [d for d in _date_range(start_date, end_date)
+                   if d not in self._error_types and d not in self._days]
+        if missing:
+            self._prefetch_error_types(missing[0], missing[-1])
+        result = set()
+        for date in _date_range(start_date, end_date):
+            result |= self.error_types(date)
+        return result
+
+    def _prefetch_error_types(self, start_date, end_date):
+        """一次汇总立方体中日期范围内各日的错误类型"""
+        rollup = AggregateCubeService.rollup(
+            ['date'], start_date=start_date.strftime('%Y-%m-%d'), end_date=end_date.strftime('%Y-%m-%d'))
+        by_day = {key[0]: {t for t, n in agg['errors'].items() if t and n > 0} for key, agg in rollup.items()}
+        for date in _date_range(start_date, end_date):
+            if date not in self._error_types and date not in self._days:
+                self._error_types[date] = by_day.get(date.strftime('%Y-%m-%d'), set())
+
+
+def _date_range(start_date, end_date):
+    date = start_date
+    while date <= end_date:
+        yield date
+        date += timedelta(days=1)
+
 
 class ReportService:
     """
@@ -57,6 +135,12 @@ class ReportService:
     # 导出目录
     EXPORTS_DIR = 'exports'
     
+    # 导出任务标记超过该时长仍未完成视为中断（渲染它的 worker 已退出），允许重新导出（秒）
+    EXPORT_JOB_TIMEOUT = 600
+    
+    # 同一进程内请求导出的互斥锁（跨 worker 的状态在 .job 标记文件中）
+    _export_lock = threading.Lock()
+    
     @staticmethod
     def generate_daily_report(
         date: str = None,
@@ -113,26 +197,29 @@ class ReportService:
         # 生成日报ID
         report_id = str(uuid.uuid4())[:8]
         
+        # 各步骤共用按日输入，每个日期只扫描一次
+        inputs = ReportInputs()
+        
         # 1. 获取当日任务统计
-        task_stats = ReportService._get_task_stats(report_date)
+        task_stats = ReportService._get_task_stats(report_date, inputs)
         
         # 2. 计算准确率及变化
-        accuracy_stats = ReportService._calculate_accuracy_stats(report_date)
+        accuracy_stats = ReportService._calculate_accuracy_stats(report_date, inputs)
         
         # 3. 获取主要错误类型 Top 5
-        top_errors = ReportService._get_top_errors(report_date)
+        top_errors = ReportService._get_top_errors(report_date, inputs=inputs)
         
         # 4. 获取新增错误类型
-        new_error_types = ReportService.get_new_error_types(report_date_str)
+        new_error_types = ReportService.get_new_error_types(report_date_str, inputs)
         
         # 5. 获取高频错误题目
-        high_freq_errors = ReportService.get_high_freq_errors(report_date_str)
+        high_freq_errors = ReportService.get_high_freq_errors(report_date_str, inputs=inputs)
         
         # 6. 获取明日计划（待处理任务）
         tomorrow_plan = ReportService._get_tomorrow_plan()
         
         # 7. 检测异常情况
-        anomalies = ReportService._detect_anomalies(report_date, accuracy_stats)
+        anomalies = ReportService._detect_anomalies(report_date, accuracy_stats, inputs)
         
         # 8. 获取模型版本信息
         model_version = ReportService._get_model_version(report_date)
@@ -188,7 +275,7 @@ class ReportService:
         return report_data
     
     @staticmethod
-    def get_new_error_types(date: str) -> List[str]:
+    def get_new_error_types(date: str, inputs: ReportInputs = None) -> List[str]:
         """
         获取新增错误类型 (9.1.2)
         
@@ -196,6 +283,7 @@ class ReportService:
         
         Args:
             date: 日期，格式 YYYY-MM-DD
+            inputs: 本次构建的按日输入，为空时新建
             
         Returns:
             list: 新增错误类型列表
@@ -204,13 +292,15 @@ class ReportService:
             report_date = datetime.strptime(date, '%Y-%m-%d').date()
         except ValueError:
             return []
+        inputs = inputs or ReportInputs()
         
         # 获取今日错误类型
-        today_errors = ReportService._get_error_types_for_date(report_date)
+        today_errors = ReportService._get_error_types_for_date(report_date, inputs)
         
         # 获取历史错误类型（过去30天）
         history_start = report_date - timedelta(days=30)
-        history_errors = ReportService._get_error_types_in_range(history_start, report_date - timedelta(days=1))
+        history_errors = ReportService._get_error_types_in_range(
+            history_start, report_date - timedelta(days=1), inputs)
         
         # 找出新增的错误类型
         new_types = [et for et in today_errors if et not in history_errors]
@@ -218,7 +308,8 @@ class ReportService:
         return new_types
     
     @staticmethod
-    def get_high_freq_errors(date: str, min_count: int = 3) -> List[Dict[str, Any]]:
+    def get_high_freq_errors(date: str, min_count: int = 3,
+                             inputs: ReportInputs = None) -> List[Dict[str, Any]]:
         """
         获取高频错误题目 (9.1.3)
         
@@ -227,6 +318,7 @@ class ReportService:
         Args:
             date: 日期，格式 YYYY-MM-DD
             min_count: 最小出错次数阈值，默认3
+            inputs: 本次构建的按日输入，为空时新建
             
         Returns:
             list: 高频错误题目列表，每个元素包含：
@@ -241,38 +333,8 @@ class ReportService:
         except ValueError:
             return []
         
-        # 加载当日任务
-        tasks = ReportService._load_tasks_for_date(report_date)
-        
-        # 统计每个题目的错误次数
-        # key: (book_id, page_num, index)
-        error_counts: Dict[tuple, Dict[str, Any]] = {}
-        
-        for task in tasks:
-            for hw_item in task.get('homework_items', []):
-                evaluation = hw_item.get('evaluation') or {}
-                errors = evaluation.get('errors') or []
-                book_id = hw_item.get('book_id', '')
-                book_name = hw_item.get('book_name', '')
-                page_num = hw_item.get('page_num', 0)
-                
-                for error in errors:
-                    index = error.get('index', '')
-                    error_type = error.get('error_type', '')
-                    
-                    key = (book_id, page_num, index)
-                    if key not in error_counts:
-                        error_counts[key] = {
-                            'index': index,
-                            'count': 0,
-                            'book_id': book_id,
-                            'book_name': book_name,
-                            'page_num': page_num,
-                            'error_types': set()
-                        }
-                    
-                    error_counts[key]['count'] += 1
-                    error_counts[key]['error_types'].add(error_type)
+        # 每个题目的错误次数 key: (book_id, page_num, index)
+        error_counts = (inputs or ReportInputs()).day(report_date)['questions']
         
         # 筛选高频错误（出错次数>=min_count）
         high_freq = []
@@ -309,18 +371,191 @@ class ReportService:
         Raises:
             ValueError: 日报不存在或格式不支持
         """
-        # 获取日报数据
+        report, version, path = ReportService._resolve_export(report_id, format)
+        if not os.path.exists(path):
+            ReportService._render_artifact(report_id, report, path)
+        return path
+    
+    @staticmethod
+    def request_export(report_id: str, format: str = 'docx') -> Dict[str, Any]:
+        """
+        请求导出日报（后台渲染）
+        
+        当前内容版本的文件已缓存时直接返回 ready，否则启动后台渲染并返回 pending；
+        同一版本正在渲染时不重复启动。
+        
+        Returns:
+            dict: 导出状态（见 get_export_status）
+            
+        Raises:
+            ValueError: 日报不存在或格式不支持
+        """
+        report, version, path = ReportService._resolve_export(report_id, format)
+        with ReportService._export_lock:
+            status = ReportService._export_status(report_id, version, format, path)
+            if status['status'] in ('ready', 'pending', 'running'):
+                return status
+            ReportService._write_job(path, {
+                'status': 'pending',
+                'error': None,
+                'started_at': datetime.now().isoformat(),
+                'finished_at': None,
+                'pid': os.getpid()
+            })
+        threading.Thread(
+            target=ReportService._export_worker, args=(report_id, report, path),
+            name=f'report-export-{report_id}', daemon=True
+        ).start()
+        return ReportService._export_status(report_id, version, format, path)
+    
+    @staticmethod
+    def get_export_status(report_id: str, format: str = 'docx') -> Dict[str, Any]:
+        """
+        查询日报导出状态
+        
+        Returns:
+            dict: {report_id, version, format, status, filename, error, started_at, finished_at}
+                status: ready | pending | running | failed | none（当前版本未请求导出）
+                
+        Raises:
+            ValueError: 日报不存在或格式不支持
+        """
+        report, version, path = ReportService._resolve_export(report_id, format)
+        return ReportService._export_status(report_id, version, format, path)
+    
+    @staticmethod
+    def get_export_artifact(report_id: str, format: str = 'docx') -> Optional[str]:
+        """当前内容版本已渲染完成时返回文件路径，否则返回 None"""
+        _, _, path = ReportService._resolve_export(report_id, format)
+        return path if os.path.exists(path) else None
+    
+    @staticmethod
+    def report_version(report: Dict[str, Any]) -> str:
+        """
+        日报内容版本（参与渲染的字段的哈希）
+        
+        数值字段统一为 float/int 后再计算，数据库读出的 Decimal 与生成时的 float 版本一致
+        """
+        fields = {}
+        for field in RENDER_FIELDS:
+            value = report.get(field)
+            if field in ('task_completed', 'task_planned'):
+                value = int(value or 0)
+            elif field in ('accuracy', 'accuracy_change'):
+                value = round(float(value or 0), 4)
+            fields[field] = value
+        payload = json.dumps(fields, ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:12]
+    
+    @staticmethod
+    def _resolve_export(report_id: str, format: str):
+        """校验并返回 (日报, 内容版本, 缓存文件路径)"""
+        if format not in EXPORT_FORMATS:
+            raise ValueError(f'不支持的导出格式: {format}，目前仅支持 docx')
         report = ReportService._get_report_by_id(report_id)
         if not report:
             raise ValueError(f'日报不存在: {report_id}')
-        
-        # 确保导出目录存在
-        StorageService.ensure_dir(ReportService.EXPORTS_DIR)
-        
-        if format == 'docx':
-            return ReportService._export_to_docx(report)
+        version = ReportService.report_version(report)
+        filename = f"daily_report_{report.get('report_date', '')}_{report_id}_{version}.{format}"
+        return report, version, os.path.join(ReportService.EXPORTS_DIR, 'daily_reports', filename)
+    
+    @staticmethod
+    def _job_path(path: str) -> str:
+        """导出任务标记文件路径"""
+        return f'{path}.job'
+    
+    @staticmethod
+    def _read_job(path: str) -> Dict[str, Any]:
+        """读取导出任务标记，不存在或损坏时返回空字典"""
+        try:
+            with open(ReportService._job_path(path), 'r', encoding='utf-8') as f:
+                job = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return job if isinstance(job, dict) else {}
+    
+    @staticmethod
+    def _write_job(path: str, job: Dict[str, Any]) -> None:
+        """写入导出任务标记（临时文件 + 原子替换）"""
+        job_path = ReportService._job_path(path)
+        StorageService.ensure_dir(os.path.dirname(job_path))
+        tmp_path = f'{job_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(job, f, ensure_ascii=False)
+        os.replace(tmp_path, job_path)
+    
+    @staticmethod
+    def _export_status(report_id: str, version: str, format: str, path: str) -> Dict[str, Any]:
+        """根据缓存文件和 .job 标记计算导出状态（标记与缓存文件同名，版本和格式已包含在文件名中）"""
+        job = ReportService._read_job(path)
+        if os.path.exists(path):
+            status = 'ready'
         else:
-            raise ValueError(f'不支持的导出格式: {format}，目前仅支持 docx')
+            status = job.get('status') or 'none'
+            if status == 'ready':
+                # 缓存文件已被清理
+                status = 'none'
+            elif status in ('pending', 'running') and ReportService._job_expired(job):
+                status = 'none'
+        return {
+            'report_id': report_id,
+            'version': version,
+            'format': format,
+            'status': status,
+            'filename': os.path.basename(path),
+            'error': job.get('error'),
+            'started_at': job.get('started_at'),
+            'finished_at': job.get('finished_at')
+        }
+    
+    @staticmethod
+    def _job_expired(job: Dict[str, Any]) -> bool:
+        """未完成的导出任务是否已超时"""
+        try:
+            started_at = datetime.fromisoformat(job.get('started_at') or '')
+        except ValueError:
+            return True
+        return (datetime.now() - started_at).total_seconds() > ReportService.EXPORT_JOB_TIMEOUT
+    
+    @staticmethod
+    def _export_worker(report_id: str, report: Dict[str, Any], path: str) -> None:
+        """后台渲染线程"""
+        def update(**fields):
+            try:
+                with ReportService._export_lock:
+                    job = ReportService._read_job(path)
+                    job.update(fields)
+                    ReportService._write_job(path, job)
+            except OSError as e:
+                print(f"[ReportService] 写入导出任务标记失败 {report_id}: {e}")
+        
+        update(status='running')
+        try:
+            ReportService._render_artifact(report_id, report, path)
+            update(status='ready', finished_at=datetime.now().isoformat())
+        except Exception as e:
+            print(f"[ReportService] 后台导出日报失败 {report_id}: {e}")
+            update(status='failed', error=str(e), finished_at=datetime.now().isoformat())
+    
+    @staticmethod
+    def _render_artifact(report_id: str, report: Dict[str, Any], path: str) -> None:
+        """渲染到临时文件后原子替换；替换前清理该日报旧版本的缓存文件，文件出现即表示导出完成"""
+        StorageService.ensure_dir(os.path.dirname(path))
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            ReportService._export_to_docx(report, tmp_path)
+            stale_pattern = os.path.join(os.path.dirname(path), f"daily_report_*_{report_id}_*")
+            keep = (path, ReportService._job_path(path))
+            for stale in glob.glob(stale_pattern):
+                if stale not in keep and not stale.endswith('.tmp'):
+                    try:
+                        os.remove(stale)
+                    except OSError:
+                        pass
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
     
     @staticmethod
     def get_report_history(
@@ -546,6 +781,9 @@ class ReportService:
         """
         加载指定日期的批量任务
         
+        只读取聚合立方体中该日期的任务文件（立方体日期为 created_at 的日期部分），
+        读取后再按 created_at 核对
+        
         Args:
             date: 日期
             
@@ -560,102 +798,149 @@ class ReportService:
         date_end = datetime.combine(date, datetime.max.time())
         
         try:
-            StorageService.ensure_dir(batch_tasks_dir)
-            
-            for filename in os.listdir(batch_tasks_dir):
-                if filename.endswith('.json'):
-                    filepath = os.path.join(batch_tasks_dir, filename)
-                    try:
-                        with open(filepath, 'r', encoding='utf-8') as f:
-                            task_data = json.load(f)
-                            
-                            # 检查创建时间是否在指定日期
-                            created_at = task_data.get('created_at', '')
-                            if created_at:
-                                try:
-                                    task_time = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-                                    if task_time.tzinfo:
-                                        task_time = task_time.replace(tzinfo=None)
-                                    
-                                    if date_start <= task_time <= date_end:
-                                        tasks.append(task_data)
-                                except:
-                                    continue
-                    except Exception as e:
-                        print(f"[ReportService] 加载任务文件失败 {filename}: {e}")
-                        continue
-            
+            task_ids = AggregateCubeService.task_ids(date=date.strftime('%Y-%m-%d'))
         except Exception as e:
-            print(f"[ReportService] 扫描批量任务目录失败: {e}")
+            print(f"[ReportService] 查询任务索引失败: {e}")
+            return tasks
+        
+        for task_id in task_ids:
+            filepath = os.path.join(batch_tasks_dir, f'{task_id}.json')
+            try:
+                with open(filepath, 'r', encoding='utf-8') as f:
+                    task_data = json.load(f)
+            except Exception as e:
+                print(f"[ReportService] 加载任务文件失败 {task_id}: {e}")
+                continue
+            
+            # 检查创建时间是否在指定日期
+            created_at = task_data.get('created_at', '')
+            if not created_at:
+                continue
+            try:
+                task_time = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
+            except ValueError:
+                continue
+            if task_time.tzinfo:
+                task_time = task_time.replace(tzinfo=None)
+            if date_start <= task_time <= date_end:
+                tasks.append(task_data)
         
         return tasks
     
     @staticmethod
-    def _get_task_stats(date: datetime.date) -> Dict[str, int]:
+    def _collect_day(date: datetime.date) -> Dict[str, Any]:
         """
-        获取任务统计
+        单遍汇总一天的任务
         
-        Args:
-            date: 日期
-            
         Returns:
-            dict: {completed, planned, total_questions, correct_questions}
+            dict: {completed, planned, failed, total_questions, correct_questions,
+                   error_counts: {错误类型: 次数}, error_types: 错误类型集合（与立方体同口径）,
+                   questions: {(book_id, page_num, index): {index, count, book_id, book_name, page_num, error_types}}}
         """
-        tasks = ReportService._load_tasks_for_date(date)
-        
-        completed = 0
-        planned = 0
-        total_questions = 0
-        correct_questions = 0
+        day = {
+            'completed': 0,
+            'planned': 0,
+            'failed': 0,
+            'total_questions': 0,
+            'correct_questions': 0,
+            'error_counts': {},
+            'error_types': set(),
+            'questions': {}
+        }
+        error_counts = day['error_counts']
+        questions = day['questions']
         
-        for task in tasks:
+        for task in ReportService._load_tasks_for_date(date):
             status = task.get('status', 'pending')
             if status == 'completed':
-                completed += 1
-            planned += 1
+                day['completed'] += 1
+            elif status == 'failed':
+                day['failed'] += 1
+            day['planned'] += 1
             
             # 统计题目数
             overall_report = task.get('overall_report') or {}
-            total_questions += overall_report.get('total_questions', 0)
-            correct_questions += overall_report.get('correct_questions', 0)
+            day['total_questions'] += overall_report.get('total_questions', 0)
+            day['correct_questions'] += overall_report.get('correct_questions', 0)
+            
+            for hw_item in task.get('homework_items', []):
+                # 错误类型集合与立方体同口径（历史日期的错误类型来自立方体）
+                day['error_types'].update(error_type_of(error) for error in counted_errors(hw_item))
+                
+                evaluation = hw_item.get('evaluation') or {}
+                errors = evaluation.get('errors') or []
+                if not errors:
+                    continue
+                book_id = hw_item.get('book_id', '')
+                book_name = hw_item.get('book_name', '')
+                page_num = hw_item.get('page_num', 0)
+                
+                for error in errors:
+                    top_type = error.get('error_type', '其他')
+                    error_counts[top_type] = error_counts.get(top_type, 0) + 1
+                    
+                    error_type = error.get('error_type', '')
+                    index = error.get('index', '')
+                    key = (book_id, page_num, index)
+                    question = questions.get(key)
+                    if question is None:
+                        question = questions[key] = {
+                            'index': index,
+                            'count': 0,
+                            'book_id': book_id,
+                            'book_name': book_name,
+                            'page_num': page_num,
+                            'error_types': set()
+                        }
+                    question['count'] += 1
+                    question['error_types'].add(error_type)
         
+        return day
+    
+    @staticmethod
+    def _get_task_stats(date: datetime.date, inputs: ReportInputs = None) -> Dict[str, int]:
+        """
+        获取任务统计
+        
+        Args:
+            date: 日期
+            inputs: 本次构建的按日输入，为空时新建
+            
+        Returns:
+            dict: {completed, planned, total_questions, correct_questions}
+        """
+        day = (inputs or ReportInputs()).day(date)
         return {
-            'completed': completed,
-            'planned': planned,
-            'total_questions': total_questions,
-            'correct_questions': correct_questions
+            'completed': day['completed'],
+            'planned': day['planned'],
+            'total_questions': day['total_questions'],
+            'correct_questions': day['correct_questions']
         }
     
     @staticmethod
-    def _calculate_accuracy_stats(date: datetime.date) -> Dict[str, float]:
+    def _calculate_accuracy_stats(date: datetime.date, inputs: ReportInputs = None) -> Dict[str, float]:
         """
         计算准确率统计
         
         Args:
             date: 日期
+            inputs: 本次构建的按日输入，为空时新建
             
         Returns:
             dict: {current, yesterday, last_week, day_change, week_change}
         """
-        # 当日准确率
-        today_stats = ReportService._get_task_stats(date)
-        current = 0
-        if today_stats['total_questions'] > 0:
-            current = round(today_stats['correct_questions'] / today_stats['total_questions'], 4)
-        
-        # 昨日准确率
-        yesterday = date - timedelta(days=1)
-        yesterday_stats = ReportService._get_task_stats(yesterday)
-        yesterday_acc = 0
-        if yesterday_stats['total_questions'] > 0:
-            yesterday_acc = round(yesterday_stats['correct_questions'] / yesterday_stats['total_questions'], 4)
-        
-        # 上周同日准确率
-        last_week = date - timedelta(days=7)
-        last_week_stats = ReportService._get_task_stats(last_week)
-        last_week_acc = 0
-        if last_week_stats['total_questions'] > 0:
-            last_week_acc = round(last_week_stats['correct_questions'] / last_week_stats['total_questions'], 4)
+        inputs = inputs or ReportInputs()
+        
+        def accuracy_of(day_date) -> float:
+            stats = ReportService._get_task_stats(day_date, inputs)
+            if stats['total_questions'] > 0:
+                return round(stats['correct_questions'] / stats['total_questions'], 4)
+            return 0
+        
+        # 当日、昨日、上周同日准确率
+        current = accuracy_of(date)
+        yesterday_acc = accuracy_of(date - timedelta(days=1))
+        last_week_acc = accuracy_of(date - timedelta(days=7))
         
         return {
             'current': current,
@@ -666,30 +951,20 @@ class ReportService:
         }
     
     @staticmethod
-    def _get_top_errors(date: datetime.date, limit: int = 5) -> List[Dict[str, Any]]:
+    def _get_top_errors(date: datetime.date, limit: int = 5,
+                        inputs: ReportInputs = None) -> List[Dict[str, Any]]:
         """
         获取主要错误类型 Top N
         
         Args:
             date: 日期
             limit: 返回数量
+            inputs: 本次构建的按日输入，为空时新建
             
         Returns:
             list: [{type, count}]
         """
-        tasks = ReportService._load_tasks_for_date(date)
-        
-        # 统计错误类型
-        error_counts: Dict[str, int] = {}
-        
-        for task in tasks:
-            for hw_item in task.get('homework_items', []):
-                evaluation = hw_item.get('evaluation') or {}
-                errors = evaluation.get('errors') or []
-                
-                for error in errors:
-                    error_type = error.get('error_type', '其他')
-                    error_counts[error_type] = error_counts.get(error_type, 0) + 1
+        error_counts = (inputs or ReportInputs()).day(date)['error_counts']
         
         # 排序并返回 Top N
         sorted_errors = sorted(error_counts.items(), key=lambda x: x[1], reverse=True)
@@ -698,52 +973,34 @@ class ReportService:
 
     
     @staticmethod
-    def _get_error_types_for_date(date: datetime.date) -> Set[str]:
+    def _get_error_types_for_date(date: datetime.date, inputs: ReportInputs = None) -> Set[str]:
         """
         获取指定日期的所有错误类型
         
         Args:
             date: 日期
+            inputs: 本次构建的按日输入，为空时新建
             
         Returns:
             set: 错误类型集合
         """
-        tasks = ReportService._load_tasks_for_date(date)
-        error_types = set()
-        
-        for task in tasks:
-            for hw_item in task.get('homework_items', []):
-                evaluation = hw_item.get('evaluation') or {}
-                errors = evaluation.get('errors') or []
-                
-                for error in errors:
-                    error_type = error.get('error_type', '')
-                    if error_type:
-                        error_types.add(error_type)
-        
-        return error_types
+        return (inputs or ReportInputs()).day(date)['error_types']
     
     @staticmethod
-    def _get_error_types_in_range(start_date: datetime.date, end_date: datetime.date) -> Set[str]:
+    def _get_error_types_in_range(start_date: datetime.date, end_date: datetime.date,
+                                  inputs: ReportInputs = None) -> Set[str]:
         """
-        获取日期范围内的所有错误类型
+        获取日期范围内的所有错误类型（立方体按日汇总，按日记忆）
         
         Args:
             start_date: 开始日期
             end_date: 结束日期
+            inputs: 本次构建的按日输入，为空时新建
             
         Returns:
             set: 错误类型集合
         """
-        error_types = set()
-        current_date = start_date
-        
-        while current_date <= end_date:
-            day_errors = ReportService._get_error_types_for_date(current_date)
-            error_types.update(day_errors)
-            current_date += timedelta(days=1)
-        
-        return error_types
+        return (inputs or ReportInputs()).error_types_in_range(start_date, end_date)
     
     @staticmethod
     def _get_tomorrow_plan() -> List[Dict[str, Any]]:
@@ -782,7 +1039,8 @@ class ReportService:
         return plans
     
     @staticmethod
-    def _detect_anomalies(date: datetime.date, accuracy_stats: Dict[str, float]) -> List[Dict[str, Any]]:
+    def _detect_anomalies(date: datetime.date, accuracy_stats: Dict[str, float],
+                          inputs: ReportInputs = None) -> List[Dict[str, Any]]:
         """
         检测异常情况
         
@@ -791,6 +1049,7 @@ class ReportService:
         Args:
             date: 日期
             accuracy_stats: 准确率统计
+            inputs: 本次构建的按日输入，为空时新建
             
         Returns:
             list: 异常情况列表
@@ -808,14 +1067,13 @@ class ReportService:
             })
         
         # 2. 检测失败任务
-        tasks = ReportService._load_tasks_for_date(date)
-        failed_tasks = [t for t in tasks if t.get('status') == 'failed']
-        if failed_tasks:
+        failed_count = (inputs or ReportInputs()).day(date)['failed']
+        if failed_count:
             anomalies.append({
                 'type': 'task_failed',
                 'severity': 'medium',
-                'message': f'有 {len(failed_tasks)} 个任务执行失败',
-                'value': len(failed_tasks)
+                'message': f'有 {failed_count} 个任务执行失败',
+                'value': failed_count
             })
         
         # 3. 检测准确率过低（低于60%）
@@ -1034,7 +1292,7 @@ class ReportService:
 
     
     @staticmethod
-    def _export_to_docx(report: Dict[str, Any]) -> str:
+    def _export_to_docx(report: Dict[str, Any], filepath: str = None) -> str:
         """
         导出日报为Word文档
         
@@ -1042,6 +1300,7 @@ class ReportService:
         
         Args:
             report: 日报数据
+            filepath: 输出路径，为空时写入 EXPORTS_DIR
             
         Returns:
             str: 导出文件路径
@@ -1159,8 +1418,9 @@ class ReportService:
         footer.add_run(f'  |  生成时间: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}').italic = True
         
         # 保存文件
-        filename = f'daily_report_{report_date}_{report.get("report_id", "")}.docx'
-        filepath = os.path.join(ReportService.EXPORTS_DIR, filename)
+        if filepath is None:
+            filename = f'daily_report_{report_date}_{report.get("report_id", "")}.docx'
+            filepath = os.path.join(ReportService.EXPORTS_DIR, filename)
         doc.save(filepath)
         
         return filepath
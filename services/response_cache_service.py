@@ -0,0 +1,232 @@
+"""
+响应制品缓存模块
+
+缓存大体积只读 JSON 响应的 gzip 压缩结果，命中时直接返回字节，跳过路由函数、序列化和压缩：
+- 键由端点、查询参数和数据版本戳组成（见 utils.http_cache），数据变化后旧键自然不再命中
+- 内存按字节预算做 LRU 淘汰，淘汰的条目落盘，磁盘同样有字节预算
+- 按标签（tasks / datasets / dashboard）随 DashboardService 的缓存失效钩子一起清理
+"""
+import os
+import gzip
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+
+class ResponseCacheService:
+    """
+    响应制品缓存（进程内单例，类方法访问）
+
+    Attributes:
+        ENABLED: 是否启用（环境变量 RESPONSE_CACHE=false 关闭）
+        MEMORY_BUDGET: 内存字节预算
+        DISK_BUDGET: 磁盘字节预算（0 表示不落盘）
+        MIN_SIZE: 小于该字节数的响应不缓存（压缩收益低）
+        COMPRESS_LEVEL: gzip 压缩级别（与 app.py 的 after_request 一致）
+    """
+
+    ENABLED = os.environ.get('RESPONSE_CACHE', 'true').lower() == 'true'
+    MEMORY_BUDGET = int(os.environ.get('RESPONSE_CACHE_MEMORY_MB', 64)) * 1024 * 1024
+    DISK_BUDGET = int(os.environ.get('RESPONSE_CACHE_DISK_MB', 512)) * 1024 * 1024
+    CACHE_DIR = os.environ.get('RESPONSE_CACHE_DIR', 'response_cache')
+    MIN_SIZE = 2048
+    COMPRESS_LEVEL = 6
+
+    _lock = threading.RLock()
+    # key -> {'tag', 'body'(gzip), 'raw_size', 'stored_at'}
+    _memory: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+    _memory_bytes = 0
+    _disk_bytes: Optional[int] = None
+    _stats = {
+        'memory_hits': 0,
+        'disk_hits': 0,
+        'misses': 0,
+        'stores': 0,
+        'spills': 0,
+        'evictions': 0,
+        'bytes_saved': 0
+    }
+
+    # ========== 读写 ==========
+
+    @classmethod
+    def get(cls, key: str, tag: str) -> Optional[bytes]:
+        """获取 gzip 压缩后的响应体，未命中返回 None"""
+        if not cls.ENABLED:
+            return None
+        with cls._lock:
+            entry = cls._memory.get(key)
+            if entry is not None:
+                cls._memory.move_to_end(key)
+                cls._stats['memory_hits'] += 1
+                cls._stats['bytes_saved'] += entry['raw_size']
+                return entry['body']
+
+        body = cls._read_disk(key, tag)
+        with cls._lock:
+            if body is None:
+                cls._stats['misses'] += 1
+                return None
+            cls._stats['disk_hits'] += 1
+            evicted = cls._put_memory(key, tag, body, raw_size=0)
+        cls._spill_all(evicted)
+        return body
+
+    @classmethod
+    def put(cls, key: str, tag: str, raw: bytes) -> Optional[bytes]:
+        """
+        压缩并缓存响应体
+
+        Returns:
+            bytes: gzip 压缩后的响应体；响应过小或缓存关闭时返回 None
+        """
+        if not cls.ENABLED or len(raw) < cls.MIN_SIZE:
+            return None
+        body = gzip.compress(raw, compresslevel=cls.COMPRESS_LEVEL)
+        if len(body) > cls.MEMORY_BUDGET:
+            return body
+        with cls._lock:
+            evicted = cls._put_memory(key, tag, body, raw_size=len(raw))
+            cls._stats['stores'] += 1
+        cls._spill_all(evicted)
+        return body
+
+    @classmethod
+    def invalidate(cls, tag: str = None) -> int:
+        """
+        按标签清理（tag 为 None 时清空全部），返回清理的内存条目数
+
+        键包含数据版本，清理只是为了及时释放内存和磁盘，不影响正确性。
+        """
+        with cls._lock:
+            keys = [k for k, e in cls._memory.items() if tag is None or e['tag'] == tag]
+            for key in keys:
+                cls._memory_bytes -= len(cls._memory.pop(key)['body'])
+        cls._clear_disk(tag)
+        return len(keys)
+
+    @classmethod
+    def get_stats(cls) -> Dict[str, Any]:
+        """缓存统计"""
+        with cls._lock:
+            stats = dict(cls._stats)
+            stats.update({
+                'enabled': cls.ENABLED,
+                'entries': len(cls._memory),
+                'memory_bytes': cls._memory_bytes,
+                'memory_budget': cls.MEMORY_BUDGET,
+                'disk_bytes': cls._disk_bytes,
+                'disk_budget': cls.DISK_BUDGET
+            })
+        return stats
+
+    # ========== 内存 ==========
+
+    @classmethod
+    def _put_memory(cls, key: str, tag: str, body: bytes, raw_size: int) -> list:
+        """写入内存并按预算淘汰最久未用的条目（调用方持有锁），返回被淘汰的 (key, 条目) 列表"""
+        old = cls._memory.pop(key, None)
+        if old is not None:
+            cls._memory_bytes -= len(old['body'])
+            raw_size = raw_size or old['raw_size']
+        cls._memory[key] = {'tag': tag, 'body': body, 'raw_size': raw_size, 'stored_at': time.time()}
+        cls._memory_bytes += len(body)
+
+        evicted = []
+        while cls._memory_bytes > cls.MEMORY_BUDGET and len(cls._memory) > 1:
+            evicted_key, entry = cls._memory.popitem(last=False)
+            cls._memory_bytes -= len(entry['body'])
+            cls._stats['evictions'] += 1
+            evicted.append((evicted_key, entry))
+        return evicted
+
+    # ========== 磁盘 ==========
+
+    @classmethod
+    def _disk_path(cls, key: str, tag: str) -> str:
+        digest = hashlib.md5(key.encode('utf-8')).hexdigest()
+        return os.path.join(cls.CACHE_DIR, f'{tag}-{digest}.json.gz')
+
+    @classmethod
+    def _read_disk(cls, key: str, tag: str) -> Optional[bytes]:
+        if cls.DISK_BUDGET <= 0:
+            return None
+        try:
+            with open(cls._disk_path(key, tag), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    @classmethod
+    def _spill_all(cls, evicted: list):
+        for key, entry in evicted:
+            cls._spill(key, entry)
+
+    @classmethod
+    def _spill(cls, key: str, entry: Dict[str, Any]):
+        """淘汰条目落盘（原子写入，多 worker 共享目录）"""
+        if cls.DISK_BUDGET <= 0 or len(entry['body']) > cls.DISK_BUDGET:
+            return
+        path = cls._disk_path(key, entry['tag'])
+        try:
+            os.makedirs(cls.CACHE_DIR, exist_ok=True)
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(entry['body'])
+            os.replace(tmp_path, path)
+            cls._stats['spills'] += 1
+            if cls._disk_bytes is None:
+                cls._disk_bytes = cls._scan_disk()[0]
+            else:
+                cls._disk_bytes += len(entry['body'])
+            if cls._disk_bytes > cls.DISK_BUDGET:
+                cls._trim_disk()
+        except OSError as e:
+            print(f"[ResponseCache] 落盘失败: {e}")
+
+    @classmethod
+    def _scan_disk(cls) -> Tuple[int, list]:
+        """返回 (总字节数, [(mtime, size, path)])"""
+        files = []
+        total = 0
+        try:
+            with os.scandir(cls.CACHE_DIR) as entries:
+                for entry in entries:
+                    if entry.name.endswith('.json.gz'):
+                        st = entry.stat()
+                        files.append((st.st_mtime, st.st_size, entry.path))
+                        total += st.st_size
+        except OSError:
+            pass
+        return total, files
+
+    @classmethod
+    def _trim_disk(cls):
+        """按修改时间删除最旧的文件，直到低于预算的 80%"""
+        total, files = cls._scan_disk()
+        target = cls.DISK_BUDGET * 0.8
+        for _, size, path in sorted(files):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        cls._disk_bytes = total
+
+    @classmethod
+    def _clear_disk(cls, tag: str = None):
+        if cls.DISK_BUDGET <= 0 or not os.path.isdir(cls.CACHE_DIR):
+            return
+        prefix = f'{tag}-' if tag else ''
+        for _, _, path in cls._scan_disk()[1]:
+            if os.path.basename(path).startswith(prefix):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        with cls._lock:
+            cls._disk_bytes = None
@@ -0,0 +1,633 @@
+"""
+全局搜索倒排索引模块
+
+为看板智能搜索 (US-32) 提供字符二元/三元组倒排索引，适配中文名称和答案内容：
+- 文档：任务、数据集、书本、题目四类实体，书本和题目由数据集/任务派生，按来源引用计数
+- 任务/数据集保存或删除时增量更新，不再全量扫描
+- 文档表快照落盘到本地 JSON，多个 worker 共享；增量更新按来源追加到变更日志，不重写整个快照，
+  日志超过 LOG_COMPACT_BYTES 时合并进快照；倒排表在加载时由快照和日志重建
+- 同一文档的多个来源（如多个任务引用同一本书）按来源合并，worker 之间不会互相覆盖
+- 查询先按 n-gram 取候选集再做子串校验，耗时与命中数相关而非与语料规模相关
+- 支持排序、分页和 "task:" 形式的实体类型前缀过滤
+"""
+import os
+import re
+import json
+import time
+import atexit
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows 开发环境
+    fcntl = None
+
+
+# 实体类型及同类结果的排序先后
+ENTITY_TYPES = ('task', 'dataset', 'book', 'question')
+
+# 查询前缀 -> 实体类型，如 "task:物理"、"书本:八上"
+TYPE_PREFIXES = {
+    'task': 'task', '任务': 'task',
+    'dataset': 'dataset', '数据集': 'dataset',
+    'book': 'book', '书本': 'book',
+    'question': 'question', '题号': 'question', '题目': 'question',
+}
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_text(text: Any) -> str:
+    """小写并合并空白，索引和查询使用同一规则"""
+    if text is None:
+        return ''
+    return _WHITESPACE.sub(' ', str(text)).strip().lower()
+
+
+def ngrams(text: str) -> Set[str]:
+    """字符二元组和三元组"""
+    grams = set()
+    for n in (2, 3):
+        for i in range(len(text) - n + 1):
+            grams.add(text[i:i + n])
+    return grams
+
+
+class SearchIndexService:
+    """
+    搜索倒排索引（进程内单例，类方法访问）
+
+    文档结构:
+        {type, id, name, ts, sources: {来源键: {id, name, ts, fields: [str]}}}
+        来源键为 "task:<task_id>" 或 "dataset:<dataset_id>"；文档的全部来源都被移除后删除文档。
+
+    变更日志每行一个来源的新文档集合 {source, docs: {doc_key: [type, id, name, ts, fields]}}（docs 为空表示移除），
+    按顺序重放即可得到最新状态；追加和压缩都持有文件锁
+
+    Attributes:
+        INDEX_DIR: 索引文件目录
+        PERSIST_DELAY: 增量更新后延迟落盘的秒数（合并同一批保存）
+        CHECK_INTERVAL: 检查其他 worker 是否更新了快照或变更日志的间隔（秒）
+        LOG_COMPACT_BYTES: 变更日志超过该大小时合并进快照
+    """
+
+    INDEX_DIR = 'search_index'
+    INDEX_FILE = 'search_index.json'
+    LOG_FILE = 'search_index.log'
+    INDEX_VERSION = 1
+    PERSIST_DELAY = 2.0
+    CHECK_INTERVAL = 2.0
+    LOG_COMPACT_BYTES = 4 * 1024 * 1024
+
+    _lock = threading.RLock()
+    _loaded = False
+    _docs: Dict[str, Dict[str, Any]] = {}
+    _postings: Dict[str, Set[str]] = {}
+    _doc_grams: Dict[str, Set[str]] = {}
+    _doc_text: Dict[str, str] = {}
+    _source_docs: Dict[str, Set[str]] = {}
+    # 上次落盘后变更的来源：source_key -> 新文档集合（空表示已移除）
+    _dirty: Dict[str, Dict[str, Tuple]] = {}
+    _file_signature: Optional[Tuple] = None
+    # 变更日志的 inode 和已应用的偏移
+    _log_inode: Optional[int] = None
+    _log_offset = 0
+    _checked_at = 0.0
+    _persist_timer: Optional[threading.Timer] = None
+    _atexit_registered = False
+
+    # ========== 查询 ==========
+
+    @classmethod
+    def search(cls, query: str, search_type: str = 'all', page: int = 1, page_size: int = 20) -> Dict[str, Any]:
+        """
+        搜索
+
+        Args:
+            query: 搜索关键词，可带 "task:" 等类型前缀
+            search_type: all|task|dataset|book|question，与前缀同时存在时以前缀为准
+            page: 页码（从 1 开始）
+            page_size: 每页条数
+
+        Returns:
+            dict: {results: [{type, id, name, highlight}], total, page, page_size}
+        """
+        query, search_type = cls.parse_query(query, search_type)
+        result = {'results': [], 'total': 0, 'page': page, 'page_size': page_size}
+        needle = normalize_text(query)
+        if not needle:
+            return result
+
+        cls.ensure_loaded()
+        with cls._lock:
+            matched = []
+            for key in cls._candidates(needle):
+                doc = cls._docs.get(key)
+                if doc is None or (search_type != 'all' and doc['type'] != search_type):
+                    continue
+                if needle not in cls._doc_text.get(key, ''):
+                    continue
+                matched.append((cls._rank(doc, needle), key))
+
+            matched.sort()
+            result['total'] = len(matched)
+            start = max(page - 1, 0) * page_size
+            for _, key in matched[start:start + page_size]:
+                doc = cls._docs[key]
+                result['results'].append({
+                    'type': doc['type'],
+                    'id': doc['id'],
+                    'name': doc['name'],
+                    'highlight': cls._highlight(doc, query, needle)
+                })
+        return result
+
+    @staticmethod
+    def parse_query(query: str, search_type: str = 'all') -> Tuple[str, str]:
+        """解析类型前缀，返回 (关键词, 类型)"""
+        query = (query or '').strip()
+        for sep in (':', '：'):
+            prefix, found, rest = query.partition(sep)
+            if found and prefix.strip().lower() in TYPE_PREFIXES:
+                return rest.strip(), TYPE_PREFIXES[prefix.strip().lower()]
+        return query, search_type or 'all'
+
+    @classmethod
+    def _candidates(cls, needle: str) -> Set[str]:
+        """按 n-gram 倒排取候选文档（可能有误报，由调用方做子串校验）"""
+        if len(needle) == 1:
+            keys = set()
+            for gram, postings in cls._postings.items():
+                if len(gram) == 2 and needle in gram:
+                    keys |= postings
+            return keys
+
+        n = 3 if len(needle) >= 3 else 2
+        grams = {needle[i:i + n] for i in range(len(needle) - n + 1)}
+        lists = sorted((cls._postings.get(g, set()) for g in grams), key=len)
+        if not lists or not lists[0]:
+            return set()
+        keys = set(lists[0])
+        for postings in lists[1:]:
+            keys &= postings
+            if not keys:
+                break
+        return keys
+
+    @staticmethod
+    def _rank(doc: Dict[str, Any], needle: str) -> Tuple:
+        """排序键：名称完全匹配 > 名称前缀 > 名称包含 > 其他字段包含；同级按类型、名称长度、时间倒序"""
+        name = normalize_text(doc['name'])
+        if name == needle:
+            level = 0
+        elif name.startswith(needle):
+            level = 1
+        elif needle in name:
+            level = 2
+        else:
+            level = 3
+        ts = doc.get('ts') or ''
+        return (level, ENTITY_TYPES.index(doc['type']), len(name), _Desc(ts), doc['id'])
+
+    @classmethod
+    def _highlight(cls, doc: Dict[str, Any], query: str, needle: str) -> str:
+        """优先高亮名称，名称不匹配时高亮第一个匹配的字段"""
+        from .dashboard_service import DashboardService
+        if needle in normalize_text(doc['name']):
+            return DashboardService._highlight_text(doc['name'], query)
+        for source in doc['sources'].values():
+            for field in source.get('fields', []):
+                if needle in normalize_text(field):
+                    return DashboardService._highlight_text(str(field), query)
+        return doc['name']
+
+    # ========== 增量更新 ==========
+
+    @classmethod
+    def index_task(cls, task_id: str, task_data: Dict[str, Any]) -> None:
+        """任务保存后更新：任务本身、引用的书本、评估错误中的题目"""
+        if not cls._should_update():
+            return
+        with cls._lock:
+            cls._apply_source(f'task:{task_id}', cls._task_docs(task_id, task_data))
+        cls._schedule_persist()
+
+    @classmethod
+    def index_dataset(cls, dataset_id: str, data: Dict[str, Any]) -> None:
+        """数据集保存后更新：数据集本身和所属书本"""
+        if not cls._should_update():
+            return
+        with cls._lock:
+            cls._apply_source(f'dataset:{dataset_id}', cls._dataset_docs(dataset_id, data))
+        cls._schedule_persist()
+
+    @classmethod
+    def remove_task(cls, task_id: str) -> None:
+        if not cls._should_update():
+            return
+        with cls._lock:
+            cls._apply_source(f'task:{task_id}', {})
+        cls._schedule_persist()
+
+    @classmethod
+    def remove_dataset(cls, dataset_id: str) -> None:
+        if not cls._should_update():
+            return
+        with cls._lock:
+            cls._apply_source(f'dataset:{dataset_id}', {})
+        cls._schedule_persist()
+
+    @classmethod
+    def _should_update(cls) -> bool:
+        """索引尚未建立（内存和磁盘都没有）时跳过增量更新，首次查询时全量构建会包含这些数据"""
+        if cls._loaded:
+            return True
+        if not os.path.exists(cls._index_path()):
+            return False
+        cls.ensure_loaded()
+        return True
+
+    @staticmethod
+    def _task_docs(task_id: str, task_data: Dict[str, Any]) -> Dict[str, Tuple]:
+        """任务派生的文档：doc_key -> (type, id, name, ts, fields)"""
+        ts = task_data.get('created_at', '') or ''
+        name = task_data.get('name', '') or ''
+        docs = {
+            f'task:{task_id}': ('task', task_id, name, ts, [name, task_data.get('remark', '') or ''])
+        }
+        for hw in task_data.get('homework_items', []):
+            book_id = hw.get('book_id', '')
+            book_name = hw.get('book_name', '')
+            if book_name and book_id:
+                docs.setdefault(f'book:{book_id}', ('book', book_id, book_name, ts, [book_name]))
+
+            page_num = hw.get('page_num', '')
+            for error in (hw.get('evaluation') or {}).get('errors') or []:
+                index = str(error.get('index', ''))
+                if not index:
+                    continue
+                doc_key = f'question:{book_name}_{page_num}_{index}'
+                if doc_key in docs:
+                    continue
+                fields = [index] + [str(error.get(f)) for f in ('base_answer', 'base_user', 'hw_user') if error.get(f)]
+                docs[doc_key] = ('question', task_id, f"第{index}题 - {book_name} P{page_num}", ts, fields)
+        return docs
+
+    @staticmethod
+    def _dataset_docs(dataset_id: str, data: Dict[str, Any]) -> Dict[str, Tuple]:
+        """数据集派生的文档"""
+        ts = data.get('created_at', '') or ''
+        name = data.get('name', '') or ''
+        book_name = data.get('book_name', '') or ''
+        docs = {
+            f'dataset:{dataset_id}': ('dataset', dataset_id, name, ts, [name, book_name])
+        }
+        book_id = data.get('book_id', '')
+        if book_name and book_id:
+            docs[f'book:{book_id}'] = ('book', book_id, book_name, ts, [book_name])
+        return docs
+
+    @classmethod
+    def _apply_source(cls, source_key: str, new_docs: Dict[str, Tuple], track: bool = True) -> None:
+        """用来源的新文档集合替换其旧贡献，只改动文档中该来源的部分（调用方持有锁）"""
+        old_keys = cls._source_docs.get(source_key, set())
+        for doc_key in old_keys - set(new_docs):
+            doc = cls._docs.get(doc_key)
+            if doc is None:
+                continue
+            doc['sources'].pop(source_key, None)
+            cls._put_doc(doc_key, doc if doc['sources'] else None)
+
+        for doc_key, (doc_type, doc_id, name, ts, fields) in new_docs.items():
+            doc = cls._docs.get(doc_key) or {'type': doc_type, 'sources': {}}
+            doc['sources'][source_key] = {'id': doc_id, 'ts': ts, 'name': name, 'fields': [f for f in fields if f]}
+            cls._put_doc(doc_key, doc)
+
+        if new_docs:
+            cls._source_docs[source_key] = set(new_docs)
+        else:
+            cls._source_docs.pop(source_key, None)
+        if track:
+            cls._dirty[source_key] = new_docs
+
+    @classmethod
+    def _put_doc(cls, doc_key: str, doc: Optional[Dict[str, Any]]) -> None:
+        """写入或删除文档并维护倒排表（调用方持有锁）"""
+        for gram in cls._doc_grams.pop(doc_key, ()):
+            postings = cls._postings.get(gram)
+            if postings is not None:
+                postings.discard(doc_key)
+                if not postings:
+                    del cls._postings[gram]
+        cls._doc_text.pop(doc_key, None)
+
+        if doc is None:
+            cls._docs.pop(doc_key, None)
+        else:
+            # 多个来源时，以最新来源的 id/名称作为展示
+            latest = max(doc['sources'].values(), key=lambda s: s.get('ts') or '')
+            doc['id'] = latest['id']
+            doc['name'] = latest['name']
+            doc['ts'] = latest.get('ts') or ''
+            text = '\n'.join(normalize_text(f) for s in doc['sources'].values() for f in [s['name']] + s['fields'])
+            grams = ngrams(text)
+            for gram in grams:
+                cls._postings.setdefault(gram, set()).add(doc_key)
+            cls._docs[doc_key] = doc
+            cls._doc_grams[doc_key] = grams
+            cls._doc_text[doc_key] = text
+
+    # ========== 加载、构建与落盘 ==========
+
+    @classmethod
+    def ensure_loaded(cls) -> None:
+        """确保索引已加载：优先读取索引文件，不存在时全量构建；已加载时按间隔应用其他 worker 的更新"""
+        now = time.monotonic()
+        if cls._loaded and now - cls._checked_at < cls.CHECK_INTERVAL:
+            return
+        with cls._lock:
+            if cls._loaded and now - cls._checked_at < cls.CHECK_INTERVAL:
+                return
+            cls._checked_at = now
+            signature = cls._signature()
+            if cls._loaded and signature == cls._file_signature:
+                if not cls._read_log():
+                    cls._load_file()
+                return
+            if signature is not None and cls._load_file():
+                return
+            if not cls._loaded:
+                cls.rebuild()
+
+    @classmethod
+    def rebuild(cls) -> int:
+        """
+        从全部任务和数据集全量构建索引并落盘
+
+        Returns:
+            int: 文档数
+        """
+        from .dashboard_service import DashboardService
+        from .storage_service import StorageService
+
+        start = time.perf_counter()
+        tasks = DashboardService._load_all_batch_tasks()
+        datasets = StorageService.get_all_datasets_summary()
+        with cls._lock:
+            cls._reset()
+            for task in tasks:
+                task_id = task.get('task_id')
+                if task_id:
+                    cls._apply_source(f'task:{task_id}', cls._task_docs(task_id, task))
+            for ds in datasets:
+                dataset_id = ds.get('dataset_id')
+                if dataset_id:
+                    cls._apply_source(f'dataset:{dataset_id}', cls._dataset_docs(dataset_id, ds))
+            cls._dirty.clear()
+            cls._loaded = True
+            cls._checked_at = time.monotonic()
+            count = len(cls._docs)
+            os.makedirs(cls.INDEX_DIR, exist_ok=True)
+            with cls._file_lock():
+                cls._write_snapshot()
+        print(f"[SearchIndex] 全量构建完成，{count} 个文档，耗时 {(time.perf_counter() - start) * 1000:.0f}ms")
+        return count
+
+    @classmethod
+    def persist(cls) -> None:
+        """立即把变更的来源追加到变更日志（先应用其他 worker 的更新）"""
+        with cls._lock:
+            if cls._persist_timer is not None:
+                cls._persist_timer.cancel()
+                cls._persist_timer = None
+            if cls._loaded and cls._dirty:
+                cls._append_log()
+
+    @classmethod
+    def get_status(cls) -> Dict[str, Any]:
+        """索引状态"""
+        counts = {t: 0 for t in ENTITY_TYPES}
+        for doc in list(cls._docs.values()):
+            counts[doc['type']] = counts.get(doc['type'], 0) + 1
+        return {
+            'loaded': cls._loaded,
+            'documents': counts,
+            'grams': len(cls._postings),
+            'pending_writes': len(cls._dirty)
+        }
+
+    @classmethod
+    def reset(cls) -> None:
+        """清空内存索引（测试用，不删除索引文件）"""
+        with cls._lock:
+            if cls._persist_timer is not None:
+                cls._persist_timer.cancel()
+                cls._persist_timer = None
+            cls._reset()
+            cls._loaded = False
+            cls._file_signature = None
+            cls._log_inode = None
+            cls._log_offset = 0
+            cls._checked_at = 0.0
+
+    @classmethod
+    def _reset(cls):
+        cls._docs = {}
+        cls._postings = {}
+        cls._doc_grams = {}
+        cls._doc_text = {}
+        cls._source_docs = {}
+        cls._dirty = {}
+
+    @classmethod
+    def _index_path(cls) -> str:
+        return os.path.join(cls.INDEX_DIR, cls.INDEX_FILE)
+
+    @classmethod
+    def _log_path(cls) -> str:
+        return os.path.join(cls.INDEX_DIR, cls.LOG_FILE)
+
+    @classmethod
+    def _signature(cls):
+        try:
+            st = os.stat(cls._index_path())
+            return (st.st_mtime_ns, st.st_ino, st.st_size)
+        except OSError:
+            return None
+
+    @classmethod
+    def _read_docs(cls) -> Optional[Dict[str, Dict[str, Any]]]:
+        try:
+            with open(cls._index_path(), 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[SearchIndex] 读取索引文件失败: {e}")
+            return None
+        if payload.get('version') != cls.INDEX_VERSION:
+            return None
+        return payload.get('docs') or {}
+
+    @classmethod
+    def _load_file(cls) -> bool:
+        """加载快照并重放变更日志，再重新应用本进程尚未落盘的变更（调用方持有锁）"""
+        signature = cls._signature()
+        docs = cls._read_docs()
+        if docs is None:
+            return False
+        dirty = cls._dirty
+        cls._reset()
+        for doc_key, doc in docs.items():
+            cls._put_doc(doc_key, doc)
+        cls._rebuild_source_map()
+        cls._dirty = dirty
+        cls._file_signature = signature
+        cls._log_inode, cls._log_offset = None, 0
+        cls._read_log()
+        cls._replay_dirty()
+        cls._loaded = True
+        return True
+
+    @classmethod
+    def _read_log(cls) -> bool:
+        """
+        应用变更日志中的新记录（调用方持有锁）
+
+        Returns:
+            bool: 日志被压缩（替换或截断）时返回 False，需要重新加载快照
+        """
+        inode, size = cls._log_position()
+        if inode != cls._log_inode:
+            if cls._log_inode is not None:
+                return False
+            cls._log_inode, cls._log_offset = inode, 0
+        if size < cls._log_offset:
+            return False
+        if size == cls._log_offset:
+            return True
+        try:
+            with open(cls._log_path(), 'rb') as f:
+                f.seek(cls._log_offset)
+                chunk = f.read(size - cls._log_offset)
+        except OSError:
+            return False
+        # 只应用完整的行，写到一半的记录留到下次
+        complete = chunk[:chunk.rfind(b'\n') + 1]
+        cls._log_offset += len(complete)
+        for line in complete.decode('utf-8', errors='replace').splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            cls._apply_source(entry['source'], entry.get('docs') or {}, track=False)
+        cls._replay_dirty()
+        return True
+
+    @classmethod
+    def _replay_dirty(cls):
+        """本进程尚未落盘的变更覆盖其他 worker 的同一来源（调用方持有锁）"""
+        for source_key, docs in cls._dirty.items():
+            cls._apply_source(source_key, docs, track=False)
+
+    @classmethod
+    def _log_position(cls) -> Tuple[Optional[int], int]:
+        try:
+            st = os.stat(cls._log_path())
+        except OSError:
+            return None, 0
+        return st.st_ino, st.st_size
+
+    @classmethod
+    def _rebuild_source_map(cls):
+        cls._source_docs = {}
+        for doc_key, doc in cls._docs.items():
+            for source_key in doc['sources']:
+                cls._source_docs.setdefault(source_key, set()).add(doc_key)
+
+    @classmethod
+    def _schedule_persist(cls):
+        """延迟落盘，合并短时间内的多次保存（如批量评估逐份写入任务）"""
+        with cls._lock:
+            if cls._persist_timer is not None:
+                return
+            if not cls._atexit_registered:
+                # 进程退出时落盘尚未写入的变更
+                atexit.register(cls._persist_quietly)
+                cls._atexit_registered = True
+            timer = threading.Timer(cls.PERSIST_DELAY, cls._persist_quietly)
+            timer.daemon = True
+            cls._persist_timer = timer
+            timer.start()
+
+    @classmethod
+    def _persist_quietly(cls):
+        try:
+            with cls._lock:
+                cls._persist_timer = None
+            cls.persist()
+        except Exception as e:
+            print(f"[SearchIndex] 索引落盘失败: {e}")
+
+    @classmethod
+    @contextmanager
+    def _file_lock(cls):
+        """跨进程文件锁（追加日志和压缩快照时持有）"""
+        with open(cls._index_path() + '.lock', 'w') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @classmethod
+    def _append_log(cls) -> None:
+        """把变更的来源追加到变更日志，超过 LOG_COMPACT_BYTES 时合并进快照（调用方持有锁）"""
+        os.makedirs(cls.INDEX_DIR, exist_ok=True)
+        with cls._file_lock():
+            # 先应用其他 worker 已写入的更新，使日志偏移追到文件末尾
+            if cls._signature() != cls._file_signature or not cls._read_log():
+                if not cls._load_file():
+                    cls._write_snapshot()
+                    cls._dirty = {}
+                    return
+            lines = ''.join(json.dumps({'source': source_key, 'docs': docs}, ensure_ascii=False) + '\n'
+                            for source_key, docs in cls._dirty.items())
+            with open(cls._log_path(), 'a', encoding='utf-8') as f:
+                f.write(lines)
+            cls._log_inode, cls._log_offset = cls._log_position()
+            cls._dirty = {}
+            if cls._log_offset > cls.LOG_COMPACT_BYTES:
+                cls._write_snapshot()
+
+    @classmethod
+    def _write_snapshot(cls) -> None:
+        """写入完整快照并清空变更日志（调用方持有锁和文件锁，内存中已包含日志的全部记录）"""
+        path = cls._index_path()
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': cls.INDEX_VERSION, 'docs': cls._docs}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        # 用新文件替换日志（inode 变化），其他 worker 据此重新加载快照
+        log_path = cls._log_path()
+        open(f'{log_path}.{os.getpid()}.tmp', 'w').close()
+        os.replace(f'{log_path}.{os.getpid()}.tmp', log_path)
+        cls._file_signature = cls._signature()
+        cls._log_inode, cls._log_offset = cls._log_position()
+
+
+class _Desc:
+    """排序辅助：使字符串按倒序参与元组比较"""
+
+    __slots__ = ('value',)
+
+    def __init__(self, value: str):
+        self.value = value
+
+    def __lt__(self, other):
+        return self.value > other.value
+
+    def __eq__(self, other):
+        return self.value == other.value
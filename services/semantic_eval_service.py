@@ -6,7 +6,7 @@ import json
 from typing import List, Dict, Any, Tuple, Optional
 
 from services.llm_service import LLMService
-from services.config_service import ConfigService
+from services.prompt_registry import PromptRegistry
 from utils.text_utils import normalize_answer
 
 
@@ -14,7 +14,7 @@ from utils.text_utils import normalize_answer
 
 def load_prompt(key: str, default: str = '') -> str:
     """
-    从 prompts.json 加载提示词
+    从 prompts.json 加载提示词（经 PromptRegistry 缓存，文件变化时自动重新加载）
     
     Args:
         key: 提示词的 key 字段
@@ -24,11 +24,7 @@ def load_prompt(key: str, default: str = '') -> str:
         提示词内容
     """
     try:
-        prompts = ConfigService.load_prompts()
-        for prompt in prompts:
-            if prompt.get('key') == key:
-                return prompt.get('content', default)
-        return default
+        return PromptRegistry.get(key, default)
     except Exception:
         return default
 
@@ -401,7 +397,8 @@ class SemanticEvalService:
         
         # 规则无法确定，调用 LLM
         prompts = get_prompts()
-        prompt = prompts['semantic_eval_template'].format(
+        prompt = PromptRegistry.render(
+            'semantic_eval_template', DEFAULT_SEMANTIC_EVAL_TEMPLATE,
             subject=subject,
             question_type=question_type,
             index=index,
@@ -535,7 +532,8 @@ class SemanticEvalService:
             })
         
         prompts = get_prompts()
-        prompt = prompts['batch_eval_template'].format(
+        prompt = PromptRegistry.render(
+            'batch_eval_template', DEFAULT_BATCH_EVAL_TEMPLATE,
             subject=subject,
             question_type=question_type,
             questions_json=json.dumps(questions_data, ensure_ascii=False, indent=2)
@@ -721,7 +719,8 @@ class SemanticEvalService:
     def generate_llm_summary(results: List[Dict[str, Any]], eval_model: str = 'deepseek-v3.2') -> Dict[str, Any]:
         """使用 LLM 生成更详细的汇总报告"""
         prompts = get_prompts()
-        prompt = prompts['summary_report_template'].format(
+        prompt = PromptRegistry.render(
+            'summary_report_template', DEFAULT_SUMMARY_REPORT_TEMPLATE,
             evaluation_results_json=json.dumps(results, ensure_ascii=False, indent=2)[:8000]
         )
         
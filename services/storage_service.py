@@ -180,6 +180,29 @@ class StorageService:
             DashboardService.invalidate_task_related_cache()
         except Exception as e:
             print(f"[Storage] 清除缓存失败: {e}")
+        
+        StorageService._invalidate_responses(f'task-{task_id}')
+        
+        # 增量更新搜索索引
+        try:
+            from .search_index_service import SearchIndexService
+            SearchIndexService.index_task(task_id, task_data)
+        except Exception as e:
+            print(f"[Storage] 更新搜索索引失败: {e}")
+        
+        # 增量更新聚合立方体
+        try:
+            from .aggregate_cube_service import AggregateCubeService
+            AggregateCubeService.index_task(task_id, task_data)
+        except Exception as e:
+            print(f"[Storage] 更新聚合立方体失败: {e}")
+        
+        # 提交每日统计增量（后台线程写入 daily_statistics）
+        try:
+            from .daily_statistics_service import DailyStatisticsService
+            DailyStatisticsService.submit(task_id, task_data)
+        except Exception as e:
+            print(f"[Storage] 提交每日统计增量失败: {e}")
     
     @staticmethod
     def delete_batch_task(task_id):
@@ -194,8 +217,52 @@ class StorageService:
         except Exception as e:
             print(f"[Storage] 清除缓存失败: {e}")
         
+        StorageService._invalidate_responses(f'task-{task_id}')
+        
+        # 从搜索索引中移除
+        try:
+            from .search_index_service import SearchIndexService
+            SearchIndexService.remove_task(task_id)
+        except Exception as e:
+            print(f"[Storage] 更新搜索索引失败: {e}")
+        
+        # 从聚合立方体中移除
+        try:
+            from .aggregate_cube_service import AggregateCubeService
+            AggregateCubeService.remove_task(task_id)
+        except Exception as e:
+            print(f"[Storage] 更新聚合立方体失败: {e}")
+        
+        try:
+            from .daily_statistics_service import DailyStatisticsService
+            DailyStatisticsService.submit(task_id, None)
+        except Exception as e:
+            print(f"[Storage] 提交每日统计增量失败: {e}")
+        
+        # 删除作业详情缓存
+        try:
+            from .homework_detail_service import HomeworkDetailService
+            HomeworkDetailService.delete_task(task_id)
+        except Exception as e:
+            print(f"[Storage] 删除作业详情缓存失败: {e}")
+        
         return result
     
+    @staticmethod
+    def get_batch_task_version(task_id):
+        """
+        获取批量任务的版本（文件 mtime 和大小），用于条件 GET
+        
+        Returns:
+            tuple: (版本戳, 修改时间)；任务不存在时返回 None
+        """
+        filepath = StorageService.get_file_path(StorageService.BATCH_TASKS_DIR, task_id)
+        try:
+            st = os.stat(filepath)
+        except OSError:
+            return None
+        return f'{st.st_mtime_ns}-{st.st_size}', datetime.fromtimestamp(st.st_mtime)
+    
     @staticmethod
     def list_batch_tasks():
         """列出所有批量任务"""
@@ -371,6 +438,7 @@ class StorageService:
                 DashboardService.invalidate_dataset_related_cache()
             except Exception as e:
                 print(f"[Storage] 清除缓存失败: {e}")
+            StorageService._index_dataset(dataset_id, data)
             return
         
         # 文件存储模式
@@ -383,6 +451,26 @@ class StorageService:
             DashboardService.invalidate_dataset_related_cache()
         except Exception as e:
             print(f"[Storage] 清除缓存失败: {e}")
+        StorageService._index_dataset(dataset_id, data)
+    
+    @staticmethod
+    def _invalidate_responses(tag):
+        """清理响应制品缓存中指定标签的条目"""
+        try:
+            from .response_cache_service import ResponseCacheService
+            ResponseCacheService.invalidate(tag)
+        except Exception as e:
+            print(f"[Storage] 清除响应缓存失败: {e}")
+    
+    @staticmethod
+    def _index_dataset(dataset_id, data):
+        """增量更新搜索索引中的数据集及所属书本"""
+        StorageService._invalidate_responses(f'dataset-{dataset_id}')
+        try:
+            from .search_index_service import SearchIndexService
+            SearchIndexService.index_dataset(dataset_id, data)
+        except Exception as e:
+            print(f"[Storage] 更新搜索索引失败: {e}")
     
     @staticmethod
     def delete_dataset(dataset_id):
@@ -390,14 +478,19 @@ class StorageService:
         if USE_DB_STORAGE:
             from .database_service import AppDatabaseService
             result = AppDatabaseService.delete_dataset(dataset_id)
-            # 清除数据集摘要缓存，确保列表立即更新
-            StorageService.clear_datasets_cache()
-            return result
-        
-        filepath = StorageService.get_file_path(StorageService.DATASETS_DIR, dataset_id)
-        result = StorageService.delete_file(filepath)
-        # 清除数据集摘要缓存
+        else:
+            filepath = StorageService.get_file_path(StorageService.DATASETS_DIR, dataset_id)
+            result = StorageService.delete_file(filepath)
+        # 清除数据集摘要缓存，确保列表立即更新
         StorageService.clear_datasets_cache()
+        StorageService._invalidate_responses(f'dataset-{dataset_id}')
+        
+        # 从搜索索引中移除
+        try:
+            from .search_index_service import SearchIndexService
+            SearchIndexService.remove_dataset(dataset_id)
+        except Exception as e:
+            print(f"[Storage] 更新搜索索引失败: {e}")
         return result
     
     @staticmethod
@@ -408,6 +501,7 @@ class StorageService:
             DashboardService.clear_cache('datasets_summary')
         except Exception as e:
             print(f"[Storage] 清除数据集缓存失败: {e}")
+        StorageService._invalidate_responses('datasets')
     
     @staticmethod
     def list_datasets():
@@ -506,6 +600,91 @@ class StorageService:
                 })
         return result
     
+    @staticmethod
+    def get_datasets_version():
+        """
+        获取数据集摘要的版本，用于条件 GET
+        
+        已缓存时取缓存写入时间（与返回的数据一致）；文件存储模式下取数据集文件的数量和最大 mtime。
+        
+        Returns:
+            tuple: (版本戳, 修改时间)；数据库模式且未缓存时返回 None
+        """
+        from .dashboard_service import DashboardService
+        version = DashboardService.get_cache_version('datasets_summary')
+        if version is not None or USE_DB_STORAGE:
+            return version
+        return StorageService.get_all_datasets_version()
+    
+    @staticmethod
+    def get_all_datasets_version():
+        """
+        获取全部数据集内容的版本（不经过缓存）
+        
+        文件存储模式下取数据集文件的数量、最大 mtime 和总大小；
+        数据库模式下取数据集数量、最大 updated_at 以及基准效果的行数和最大自增 ID。
+        
+        Returns:
+            tuple: (版本戳, 修改时间)；无法获取时返回 None
+        """
+        if USE_DB_STORAGE:
+            from .database_service import AppDatabaseService
+            row = AppDatabaseService.execute_one(
+                """SELECT (SELECT COUNT(*) FROM datasets) AS dataset_count,
+                          (SELECT MAX(updated_at) FROM datasets) AS updated_at,
+                          (SELECT COUNT(*) FROM baseline_effects) AS effect_count,
+                          (SELECT MAX(id) FROM baseline_effects) AS max_effect_id"""
+            )
+            if not row:
+                return None
+            updated_at = row.get('updated_at')
+            return (f"{row.get('dataset_count')}-{updated_at}-{row.get('effect_count')}-{row.get('max_effect_id')}",
+                    updated_at)
+        
+        count, latest, total_size = 0, 0, 0
+        try:
+            with os.scandir(StorageService.DATASETS_DIR) as entries:
+                for entry in entries:
+                    if entry.name.endswith('.json'):
+                        st = entry.stat()
+                        count += 1
+                        total_size += st.st_size
+                        latest = max(latest, st.st_mtime_ns)
+        except OSError:
+            return None
+        return f'{count}-{latest}-{total_size}', datetime.fromtimestamp(latest / 1e9) if latest else None
+    
+    @staticmethod
+    def get_dataset_version(dataset_id):
+        """
+        获取单个数据集的版本，用于条件 GET 和响应缓存
+        
+        数据库模式下基准效果按页删除后重新插入，因此同时取行数和最大自增 ID。
+        
+        Returns:
+            tuple: (版本戳, 修改时间)；数据集不存在时返回 None
+        """
+        if USE_DB_STORAGE:
+            from .database_service import AppDatabaseService
+            row = AppDatabaseService.execute_one(
+                """SELECT d.updated_at,
+                          (SELECT COUNT(*) FROM baseline_effects WHERE dataset_id = %s) AS effect_count,
+                          (SELECT MAX(id) FROM baseline_effects WHERE dataset_id = %s) AS max_effect_id
+                   FROM datasets d WHERE d.dataset_id = %s""",
+                (dataset_id, dataset_id, dataset_id)
+            )
+            if not row:
+                return None
+            updated_at = row.get('updated_at')
+            return f"{updated_at}-{row.get('effect_count')}-{row.get('max_effect_id')}", updated_at
+        
+        filepath = StorageService.get_file_path(StorageService.DATASETS_DIR, dataset_id)
+        try:
+            st = os.stat(filepath)
+        except OSError:
+            return None
+        return f'{st.st_mtime_ns}-{st.st_size}', datetime.fromtimestamp(st.st_mtime)
+    
     @staticmethod
     def get_matching_datasets(book_id: str, page_num: int) -> List[Dict[str, Any]]:
         """
@@ -0,0 +1,322 @@
+"""
+遥测日志异步写入模块
+
+为 llm_call_logs、automation_logs 等日志类表提供进程内缓冲写入：
+- 有界队列缓冲，调用方入队即返回，不阻塞 LLM 调用热路径
+- 后台线程按时间间隔或行数阈值批量刷新，使用多行 INSERT
+- 进程退出时自动刷新剩余数据
+- 数据库不可达时落盘到本地 JSONL 文件，恢复后自动回放
+- 支持按表注册刷新回调（用于增量维护汇总表）
+"""
+import os
+import json
+import time
+import queue
+import atexit
+import threading
+from typing import Dict, Any, List, Callable, Tuple
+
+from .database_service import AppDatabaseService
+
+
+class TelemetryWriter:
+    """
+    遥测日志缓冲写入器
+
+    所有方法均为类方法，进程内共享一个队列和一个后台刷新线程。
+
+    Attributes:
+        QUEUE_MAX_SIZE: 队列最大长度，满时直接落盘
+        FLUSH_INTERVAL_MS: 刷新间隔（毫秒）
+        FLUSH_BATCH_SIZE: 单次刷新最大行数
+        SPILL_DIR: 落盘目录
+    """
+
+    QUEUE_MAX_SIZE = int(os.environ.get('TELEMETRY_QUEUE_SIZE', 10000))
+    FLUSH_INTERVAL_MS = int(os.environ.get('TELEMETRY_FLUSH_INTERVAL_MS', 500))
+    FLUSH_BATCH_SIZE = int(os.environ.get('TELEMETRY_BATCH_SIZE', 200))
+    SPILL_DIR = os.environ.get('TELEMETRY_SPILL_DIR', 'telemetry_spill')
+    SPILL_FILE = 'pending.jsonl'
+    # 落盘文件回放最小间隔（秒），避免数据库故障期间反复重试
+    SPILL_REPLAY_INTERVAL = 30
+
+    _queue: 'queue.Queue[Tuple[str, Dict[str, Any]]]' = queue.Queue(maxsize=QUEUE_MAX_SIZE)
+    _thread = None
+    _lock = threading.Lock()
+    _write_lock = threading.Lock()
+    _spill_lock = threading.Lock()
+    _stats_lock = threading.Lock()
+    _stop_event = threading.Event()
+    _flush_hooks: Dict[str, List[Callable[[List[Dict[str, Any]]], None]]] = {}
+    _last_replay_at = 0.0
+    _stats = {
+        'submitted': 0,
+        'written': 0,
+        'spilled': 0,
+        'replayed': 0,
+        'flushes': 0,
+        'failures': 0
+    }
+
+    # ========== 公共接口 ==========
+
+    @classmethod
+    def submit(cls, table: str, row: Dict[str, Any]) -> None:
+        """
+        提交一行日志（非阻塞）
+
+        Args:
+            table: 目标表名
+            row: 列名 -> 值 的字典，同一张表的行应使用相同的列集合
+        """
+        cls._ensure_started()
+        cls._count('submitted')
+        try:
+            cls._queue.put_nowait((table, row))
+        except queue.Full:
+            # 队列已满说明数据库写入跟不上，直接落盘避免阻塞调用方
+            cls._spill([(table, row)])
+
+    @classmethod
+    def register_flush_hook(cls, table: str, hook: Callable[[List[Dict[str, Any]]], None]) -> None:
+        """
+        注册刷新回调
+
+        每批数据成功写入指定表后调用 hook(rows)，回调异常不会影响写入。
+
+        Args:
+            table: 表名
+            hook: 回调函数，参数为本批成功写入的行列表
+        """
+        with cls._lock:
+            hooks = cls._flush_hooks.setdefault(table, [])
+            if hook not in hooks:
+                hooks.append(hook)
+
+    @classmethod
+    def flush(cls) -> int:
+        """
+        同步刷新队列中的所有数据
+
+        Returns:
+            int: 本次处理的行数
+        """
+        processed = 0
+        while True:
+            batch = cls._drain_nowait(cls.FLUSH_BATCH_SIZE)
+            if not batch:
+                break
+            cls._write(batch)
+            processed += len(batch)
+        return processed
+
+    @classmethod
+    def shutdown(cls, timeout: float = 5.0) -> None:
+        """停止后台线程并刷新剩余数据（进程退出时自动调用）"""
+        cls._stop_event.set()
+        thread = cls._thread
+        if thread and thread.is_alive():
+            thread.join(timeout)
+        try:
+            cls.flush()
+        except Exception as e:
+            print(f"[Telemetry] 退出刷新失败: {e}")
+
+    @classmethod
+    def get_stats(cls) -> Dict[str, Any]:
+        """获取写入统计"""
+        with cls._stats_lock:
+            stats = dict(cls._stats)
+        stats['queue_size'] = cls._queue.qsize()
+        stats['spill_pending'] = os.path.exists(cls._spill_path())
+        stats['running'] = bool(cls._thread and cls._thread.is_alive())
+        return stats
+
+    # ========== 后台线程 ==========
+
+    @classmethod
+    def _ensure_started(cls) -> None:
+        """懒启动后台刷新线程"""
+        if cls._thread is not None and cls._thread.is_alive():
+            return
+        with cls._lock:
+            if cls._thread is not None and cls._thread.is_alive():
+                return
+            if cls._thread is None:
+                atexit.register(cls.shutdown)
+            cls._stop_event.clear()
+            cls._thread = threading.Thread(
+                target=cls._run, name='telemetry-writer', daemon=True
+            )
+            cls._thread.start()
+
+    @classmethod
+    def _run(cls) -> None:
+        """后台刷新循环"""
+        interval = cls.FLUSH_INTERVAL_MS / 1000.0
+        while not cls._stop_event.is_set():
+            try:
+                batch = cls._drain(interval)
+                if batch:
+                    cls._write(batch)
+                elif time.time() - cls._last_replay_at >= cls.SPILL_REPLAY_INTERVAL:
+                    cls._replay_spill()
+            except Exception as e:
+                print(f"[Telemetry] 刷新线程异常: {e}")
+
+    @classmethod
+    def _drain(cls, interval: float) -> List[Tuple[str, Dict[str, Any]]]:
+        """等待最多 interval 秒，收集一批数据（达到批量大小立即返回）"""
+        batch = []
+        deadline = time.monotonic() + interval
+        while len(batch) < cls.FLUSH_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(cls._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    @classmethod
+    def _drain_nowait(cls, limit: int) -> List[Tuple[str, Dict[str, Any]]]:
+        """非阻塞取出最多 limit 条数据"""
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(cls._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    # ========== 写入与落盘 ==========
+
+    @staticmethod
+    def _group_rows(batch: List[Tuple[str, Dict[str, Any]]]) -> Dict[Tuple[str, Tuple[str, ...]], List[Dict[str, Any]]]:
+        """按 (表名, 列集合) 分组，保持提交顺序"""
+        groups: Dict[Tuple[str, Tuple[str, ...]], List[Dict[str, Any]]] = {}
+        for table, row in batch:
+            groups.setdefault((table, tuple(row.keys())), []).append(row)
+        return groups
+
+    @classmethod
+    def _write(cls, batch: List[Tuple[str, Dict[str, Any]]], replay: bool = False) -> bool:
+        """
+        写入一批数据，失败的分组落盘
+
+        Returns:
+            bool: 是否全部写入成功
+        """
+        all_ok = True
+        with cls._write_lock:
+            for (table, columns), rows in cls._group_rows(batch).items():
+                placeholders = ', '.join(['%s'] * len(columns))
+                sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+                params = [tuple(row[c] for c in columns) for row in rows]
+                try:
+                    AppDatabaseService.execute_many(sql, params)
+                except Exception as e:
+                    all_ok = False
+                    cls._count('failures')
+                    if replay and not cls._is_transient_error(e):
+                        # 回放时遇到数据本身的错误（如主键冲突），丢弃避免反复重试
+                        print(f"[Telemetry] 回放 {table} 失败（{len(rows)} 行），已丢弃: {e}")
+                        continue
+                    print(f"[Telemetry] 写入 {table} 失败（{len(rows)} 行），已落盘: {e}")
+                    cls._spill([(table, row) for row in rows])
+                    continue
+
+                cls._count('written', len(rows))
+                if replay:
+                    cls._count('replayed', len(rows))
+                cls._run_hooks(table, rows)
+            cls._count('flushes')
+
+        # 写入成功后顺带回放之前落盘的数据
+        if (all_ok and not replay and os.path.exists(cls._spill_path())
+                and time.time() - cls._last_replay_at >= cls.SPILL_REPLAY_INTERVAL):
+            cls._replay_spill()
+        return all_ok
+
+    @classmethod
+    def _count(cls, name: str, n: int = 1) -> None:
+        """累加写入统计（提交方线程和后台线程都会调用）"""
+        with cls._stats_lock:
+            cls._stats[name] += n
+
+    @staticmethod
+    def _is_transient_error(error: Exception) -> bool:
+        """判断是否为连接类（可重试）错误"""
+        if isinstance(error, (OSError, TimeoutError)):
+            return True
+        return type(error).__name__ in ('OperationalError', 'InterfaceError')
+
+    @classmethod
+    def _run_hooks(cls, table: str, rows: List[Dict[str, Any]]) -> None:
+        """执行刷新回调"""
+        for hook in list(cls._flush_hooks.get(table, [])):
+            try:
+                hook(rows)
+            except Exception as e:
+                print(f"[Telemetry] 刷新回调失败 {table}: {e}")
+
+    @classmethod
+    def _spill_path(cls) -> str:
+        return os.path.join(cls.SPILL_DIR, cls.SPILL_FILE)
+
+    @classmethod
+    def _spill(cls, items: List[Tuple[str, Dict[str, Any]]]) -> None:
+        """将数据追加写入本地落盘文件"""
+        try:
+            with cls._spill_lock:
+                os.makedirs(cls.SPILL_DIR, exist_ok=True)
+                with open(cls._spill_path(), 'a', encoding='utf-8') as f:
+                    for table, row in items:
+                        f.write(json.dumps({'table': table, 'row': row}, ensure_ascii=False, default=str))
+                        f.write('\n')
+            cls._count('spilled', len(items))
+        except Exception as e:
+            print(f"[Telemetry] 落盘失败，丢弃 {len(items)} 行: {e}")
+
+    @classmethod
+    def _replay_spill(cls) -> None:
+        """回放落盘文件中的数据，失败的行会重新落盘"""
+        cls._last_replay_at = time.time()
+        path = cls._spill_path()
+        if not os.path.exists(path):
+            return
+
+        # 先改名再读取，回放期间新落盘的数据写入新文件
+        replay_path = f"{path}.{os.getpid()}.{int(time.time() * 1000)}.replay"
+        with cls._spill_lock:
+            try:
+                os.replace(path, replay_path)
+            except OSError:
+                return
+
+        items = []
+        try:
+            with open(replay_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                        items.append((record['table'], record['row']))
+                    except (ValueError, KeyError):
+                        continue
+        except OSError as e:
+            print(f"[Telemetry] 读取回放文件失败，保留 {replay_path}: {e}")
+            return
+
+        # 全部行写入或重新落盘后才删除回放文件，回放中途进程退出时数据仍留在磁盘上
+        for start in range(0, len(items), cls.FLUSH_BATCH_SIZE):
+            cls._write(items[start:start + cls.FLUSH_BATCH_SIZE], replay=True)
+        try:
+            os.remove(replay_path)
+        except OSError:
+            pass
+        if items:
+            print(f"[Telemetry] 已回放落盘数据 {len(items)} 行")
@@ -28,6 +28,7 @@ except ImportError:
     print("[UnifiedScheduleService] APScheduler 未安装，调度功能将不可用")
 
 from .database_service import AppDatabaseService
+from .telemetry_writer import TelemetryWriter
 
 
 # 学科映射
@@ -279,27 +280,29 @@ class UnifiedScheduleService:
         retry_count: int = 0
     ) -> str:
         """
-        记录执行日志到 automation_logs 表
+        记录执行日志到 automation_logs 表（经 TelemetryWriter 异步批量写入）
         
         Returns:
             str: 日志ID
         """
         log_id = str(uuid.uuid4())[:8]
         try:
-            sql = """
-                INSERT INTO automation_logs 
-                (log_id, task_type, related_id, status, message, details, 
-                 duration_seconds, retry_count, created_at, completed_at)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """
             now = datetime.now()
             completed_at = now if status in ('completed', 'failed', 'skipped') else None
             
-            AppDatabaseService.execute_insert(sql, (
-                log_id, task_type, related_id, status, message,
-                json.dumps(details or {}, ensure_ascii=False, default=str),
-                duration_seconds, retry_count, now, completed_at
-            ))
+            # 通过遥测写入器异步批量落库，避免每条日志一次数据库往返
+            TelemetryWriter.submit('automation_logs', {
+                'log_id': log_id,
+                'task_type': task_type,
+                'related_id': related_id,
+                'status': status,
+                'message': message,
+                'details': json.dumps(details or {}, ensure_ascii=False, default=str),
+                'duration_seconds': duration_seconds,
+                'retry_count': retry_count,
+                'created_at': now,
+                'completed_at': completed_at
+            })
         except Exception as e:
             print(f"[UnifiedSchedule] 记录日志失败: {e}")
         
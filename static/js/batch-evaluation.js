@@ -2693,7 +2693,7 @@ async function batchAiEvaluation() {
 async function evaluateSingleHomework(item) {
     try {
         // 获取作业详情
-        const detailRes = await fetch(`/api/batch/tasks/${selectedTask.task_id}/homework/${item.homework_id}`);
+        const detailRes = await fetch(`/api/batch/tasks/${selectedTask.task_id}/homework/${item.homework_id}?fields=base_effect,ai_result`);
         const detailData = await detailRes.json();
         
         if (!detailData.success || !detailData.data) {
@@ -1721,11 +1721,31 @@ function onReportDetailModalBackdropClick(event) {
 }
 
 /**
- * 导出日报
+ * 导出日报（后台渲染，完成后下载）
  */
-function exportDailyReport() {
+async function exportDailyReport() {
     if (!currentReportId) return;
-    window.open(DashboardAPI.exportDailyReport(currentReportId, 'docx'), '_blank');
+    const reportId = currentReportId;
+    let res = await DashboardAPI.requestDailyReportExport(reportId, 'docx');
+    if (res.success && res.data.status !== 'ready') {
+        showToast('正在生成 Word 文档...', 'info');
+    }
+    let retries = 0;
+    for (let i = 0; i < 60 && res.success && ['pending', 'running', 'none'].includes(res.data.status); i++) {
+        if (res.data.status === 'none') {
+            // 任务中断或缓存文件已清理，重新请求导出
+            if (++retries > 3) break;
+            res = await DashboardAPI.requestDailyReportExport(reportId, 'docx');
+            continue;
+        }
+        await new Promise(resolve => setTimeout(resolve, 1000));
+        res = await DashboardAPI.getDailyReportExportStatus(reportId, 'docx');
+    }
+    if (res.success && res.data.status === 'ready') {
+        window.location.href = DashboardAPI.exportDailyReport(reportId, 'docx');
+    } else {
+        showToast((res.data && res.data.error) || res.error || '导出日报失败，请稍后重试', 'error');
+    }
 }
 
 // ========== 趋势分析 (US-15) ==========
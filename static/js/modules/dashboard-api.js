@@ -377,6 +377,24 @@ export const DashboardAPI = {
     exportDailyReport: (reportId, format = 'docx') => 
         `/api/dashboard/daily-report/${reportId}/export?format=${format}`,
     
+    /**
+     * 请求后台导出日报
+     * @param {string} reportId - 日报ID
+     * @param {string} format - 导出格式
+     * @returns {Promise<Object>} 导出状态
+     */
+    requestDailyReportExport: (reportId, format = 'docx') => 
+        post(`/api/dashboard/daily-report/${reportId}/export?format=${format}`),
+    
+    /**
+     * 查询日报导出状态
+     * @param {string} reportId - 日报ID
+     * @param {string} format - 导出格式
+     * @returns {Promise<Object>} 导出状态
+     */
+    getDailyReportExportStatus: (reportId, format = 'docx') => 
+        get(`/api/dashboard/daily-report/${reportId}/export/status?format=${format}`, false),
+    
     // ========== 搜索 ==========
     
     /**
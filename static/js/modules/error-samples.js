@@ -128,6 +128,8 @@ export class ErrorSamplesManager {
         this.filters = {};
         this.selectedIds = new Set();
         this.samples = [];
+        // 页码 -> keyset 游标（由上一页的 next_cursor 得到）
+        this.pageCursors = {};
     }
     
     /**
@@ -163,10 +165,17 @@ export class ErrorSamplesManager {
                 page_size: this.pageSize,
                 ...this.filters
             };
+            const cursor = this.pageCursors[this.currentPage];
+            if (cursor) {
+                params.cursor = cursor;
+            }
             
             const result = await ErrorSamplesAPI.getSamples(params);
             if (result.success) {
                 this.samples = result.data.items;
+                if (result.data.next_cursor) {
+                    this.pageCursors[this.currentPage + 1] = result.data.next_cursor;
+                }
                 this.renderSamples(result.data);
                 this.renderPagination(result.data);
             }
@@ -446,6 +455,7 @@ export class ErrorSamplesManager {
             delete this.filters[key];
         }
         this.currentPage = 1;
+        this.pageCursors = {};
         this.loadSamples();
     }
     
@@ -0,0 +1,62 @@
+"""
+测试公共配置：导入 app 时不启动后台工作线程
+
+聚合立方体相关测试共用的夹具和构造函数（测试模块通过 from conftest import ... 使用）：
+- cube: 任务目录和立方体目录指向临时目录，每次查询都检查变化
+- save: 保存任务（触发立方体增量更新）
+- make_item / make_task: 构造已评估的作业和批量任务
+"""
+import os
+
+os.environ.setdefault('APP_BACKGROUND_WORKERS', 'false')
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from services.storage_service import StorageService
+from services.aggregate_cube_service import AggregateCubeService
+
+
+def days_ago(n):
+    return (datetime.now() - timedelta(days=n)).strftime('%Y-%m-%dT%H:%M:%S')
+
+
+def make_item(page, errors, total=10, book='数学七上', homework_id=None):
+    """构造已评估的作业，errors 为 [(题号, 错误类型)]"""
+    return {
+        'homework_id': homework_id or f'h{page}',
+        'book_name': book,
+        'page_num': page,
+        'status': 'completed',
+        'evaluation': {
+            'total_questions': total,
+            'correct_count': total - len(errors),
+            'errors': [{
+                'index': idx,
+                'error_type': error_type,
+                'base_effect': {'userAnswer': 'A'},
+                'ai_result': {'userAnswer': 'B'}
+            } for idx, error_type in errors]
+        }
+    }
+
+
+def make_task(task_id, items, created_at='2026-03-01T10:00:00', subject_id=2, **fields):
+    """构造批量任务，fields 为额外的任务字段"""
+    return {'task_id': task_id, 'subject_id': subject_id, 'created_at': created_at, 'homework_items': items,
+            **fields}
+
+
+def save(task):
+    StorageService.save_batch_task(task['task_id'], task)
+
+
+@pytest.fixture
+def cube(tmp_path, monkeypatch):
+    monkeypatch.setattr(StorageService, 'BATCH_TASKS_DIR', str(tmp_path / 'batch_tasks'))
+    monkeypatch.setattr(AggregateCubeService, 'CUBE_DIR', str(tmp_path / 'analytics_cube'))
+    monkeypatch.setattr(AggregateCubeService, 'CHECK_INTERVAL', 0)
+    AggregateCubeService.reset()
+    yield tmp_path
+    AggregateCubeService.reset()
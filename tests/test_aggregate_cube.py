@@ -0,0 +1,153 @@
+"""
+聚合立方体与数据下钻测试
+
+测试 AggregateCubeService 及基于它的 DrilldownService：
+- 总体 / 学科 / 书本 / 页码 / 题目各层级汇总
+- 日期筛选
+- 保存（重新评估）、删除任务时增量更新
+- 其他 worker 写入的贡献文件直接加载，不重新解析任务；变更日志只同步变化的任务；存储版本变化只重新计算该存储；离线重建
+
+运行方式:
+    pytest tests/test_aggregate_cube.py -v
+"""
+import os
+import json
+
+from conftest import make_item, make_task, save
+from services.storage_service import StorageService
+from services.aggregate_cube_service import AggregateCubeService
+from services.drilldown_service import DrilldownService
+
+
+def bump_dir_mtime():
+    """推后任务目录的 mtime（避免与上次检查落在同一个时间刻度内）"""
+    later = os.stat(StorageService.BATCH_TASKS_DIR).st_mtime + 5
+    os.utime(StorageService.BATCH_TASKS_DIR, (later, later))
+
+
+class TestDrilldownLevels:
+    """测试各层级汇总"""
+
+    def test_levels(self, cube):
+        save(make_task('t1', [make_item(76, [('3', '识别错误-判断错误')]), make_item(77, [])]))
+        save(make_task('t2', [make_item(76, [('3', '识别错误-判断错误'), ('10', '缺失题目')])]))
+
+        overall = DrilldownService.get_drilldown_data('overall')
+        assert overall['data'][0]['id'] == '2'
+        assert overall['data'][0]['task_count'] == 2
+        assert overall['summary']['total_questions'] == 30
+        assert overall['data'][0]['correct_count'] == 27
+
+        subject = DrilldownService.get_drilldown_data('subject', '2')
+        assert subject['data'][0]['name'] == '数学七上'
+        assert subject['data'][0]['task_ids'] == ['t1', 't2']
+
+        book = DrilldownService.get_drilldown_data('book', '数学七上')
+        assert [p['id'] for p in book['data']] == ['数学七上_76', '数学七上_77']
+        assert book['data'][0]['error_count'] == 3
+        assert book['breadcrumb'][1]['name'] == '数学'
+
+        page = DrilldownService.get_drilldown_data('page', '数学七上_76')
+        assert [q['question_number'] for q in page['data']] == ['3', '10']
+        q3 = page['data'][0]
+        assert q3['question_count'] == 2 and q3['error_count'] == 2 and not q3['is_correct']
+        assert q3['ai_answer'] == 'B' and q3['expected_answer'] == 'A'
+        assert page['summary']['total_questions'] == 20
+
+        question = DrilldownService.get_drilldown_data('question', q3['id'])
+        assert question['data']['error_types'] == {'识别错误-判断错误': 2}
+        assert question['breadcrumb'][-2]['id'] == '数学七上_76'
+
+    def test_date_filter(self, cube):
+        save(make_task('t1', [make_item(76, [])], created_at='2026-03-01T10:00:00'))
+        save(make_task('t2', [make_item(76, [])], created_at='2026-03-05T10:00:00'))
+        result = DrilldownService.get_drilldown_data('overall', filters={'start_date': '2026-03-02'})
+        assert result['data'][0]['task_count'] == 1
+        assert result['summary']['total_questions'] == 10
+
+
+class TestIncremental:
+    """测试增量维护"""
+
+    def test_reevaluate_and_delete(self, cube):
+        task = make_task('t1', [make_item(76, [('3', '缺失题目')])])
+        save(task)
+        assert DrilldownService.get_drilldown_data('book', '数学七上')['data'][0]['error_count'] == 1
+
+        task['homework_items'] = [make_item(76, [])]
+        save(task)
+        page = DrilldownService.get_drilldown_data('page', '数学七上_76')
+        assert page['data'] == []
+        assert page['summary']['error_count'] == 0
+
+        StorageService.delete_batch_task('t1')
+        assert DrilldownService.get_drilldown_data('overall')['data'] == []
+        assert AggregateCubeService.get_status()['cells'] == 0
+
+    def test_loads_other_worker_contributions(self, cube, monkeypatch):
+        save(make_task('t1', [make_item(76, [('3', '缺失题目')])]))
+        AggregateCubeService.reset()
+
+        import services.aggregate_cube_service as module
+        calls = []
+        original = module.build_contribution
+        monkeypatch.setattr(module, 'build_contribution', lambda *a, **k: calls.append(1) or original(*a, **k))
+        assert DrilldownService.get_drilldown_data('overall')['summary']['total_questions'] == 10
+        assert calls == []
+
+    def test_detects_task_files_written_directly(self, cube):
+        save(make_task('t1', [make_item(76, [])]))
+        assert DrilldownService.get_drilldown_data('overall')['data'][0]['task_count'] == 1
+
+        path = os.path.join(StorageService.BATCH_TASKS_DIR, 't2.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(make_task('t2', [make_item(77, [])]), f)
+        bump_dir_mtime()
+        assert DrilldownService.get_drilldown_data('overall')['data'][0]['task_count'] == 2
+
+        os.remove(path)
+        bump_dir_mtime()
+        assert DrilldownService.get_drilldown_data('overall')['data'][0]['task_count'] == 1
+
+    def test_change_log_syncs_only_changed_tasks(self, cube, monkeypatch):
+        save(make_task('t1', [make_item(76, [])]))
+        save(make_task('t2', [make_item(77, [])]))
+        AggregateCubeService.ensure_fresh(force=True)
+
+        loads = []
+        original = AggregateCubeService._load.__func__
+        monkeypatch.setattr(AggregateCubeService, '_load',
+                            classmethod(lambda cls, task_id, *a: loads.append(task_id) or original(cls, task_id, *a)))
+        assert DrilldownService.get_drilldown_data('overall')['summary']['total_questions'] == 20
+        assert loads == []
+
+        # 其他 worker 原地改写任务文件并追加变更日志
+        path = os.path.join(StorageService.BATCH_TASKS_DIR, 't2.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(make_task('t2', [make_item(77, [], total=30)]), f)
+        with open(os.path.join(AggregateCubeService.CUBE_DIR, 'changes.log'), 'a', encoding='utf-8') as f:
+            f.write('t2\n')
+        assert DrilldownService.get_drilldown_data('overall')['summary']['total_questions'] == 40
+        assert loads == ['t2']
+
+    def test_store_version_recomputes_only_that_store(self, cube, monkeypatch):
+        save(make_task('t1', [make_item(76, [('3', '缺失题目')])]))
+        AggregateCubeService.reset()
+
+        from services.cube import CellStore, HeatStore
+        calls = []
+        monkeypatch.setattr(CellStore, 'VERSION', CellStore.VERSION + 1)
+        monkeypatch.setattr(HeatStore, 'build', classmethod(lambda cls, *a: calls.append('heat')))
+        assert DrilldownService.get_drilldown_data('book', '数学七上')['data'][0]['error_count'] == 1
+        assert calls == []
+
+        with open(os.path.join(AggregateCubeService.CUBE_DIR, 'tasks', 't1.json'), encoding='utf-8') as f:
+            parts = json.load(f)['parts']
+        assert parts['cells']['version'] == CellStore.VERSION
+        assert parts['heat']['version'] == HeatStore.VERSION
+
+    def test_rebuild(self, cube):
+        save(make_task('t1', [make_item(76, [])]))
+        status = AggregateCubeService.rebuild()
+        assert status['tasks'] == 1
+        assert os.path.exists(os.path.join(AggregateCubeService.CUBE_DIR, 'tasks', 't1.json'))
@@ -0,0 +1,120 @@
+"""
+问题热点图测试
+
+测试 AnalysisService 基于聚合立方体热点日桶的查询：
+- 书本 / 页码 / 题号聚合、题号排序和热点等级
+- 学科（数据集优先、书名推断）筛选
+- 最近 N 天窗口只合并窗口内的日桶
+- 题目错误详情按错误引用从任务文件读取，随任务保存 / 删除增量更新
+- 热点日桶超过保留期后过期
+
+运行方式:
+    pytest tests/test_analysis_heatmap.py -v
+"""
+import json
+import os
+from unittest.mock import patch
+
+from conftest import days_ago, make_task, save
+from services.storage_service import StorageService
+from services.aggregate_cube_service import AggregateCubeService
+from services.cube import HeatStore
+from services.analysis_service import AnalysisService
+
+
+def heat_item(homework_id, indexes, book_id='b1', book_name='数学七上', page_num=76, dataset=None):
+    return {
+        'homework_id': homework_id,
+        'student_name': f'学生{homework_id}',
+        'book_id': book_id,
+        'book_name': book_name,
+        'page_num': page_num,
+        'matched_dataset': dataset,
+        'status': 'completed',
+        'evaluation': {
+            'total_questions': 10,
+            'correct_count': 10 - len(indexes),
+            'errors': [{'index': idx, 'error_type': '识别错误', 'hw_user': 'B', 'base_user': 'A'} for idx in indexes]
+        }
+    }
+
+
+def heat_task(task_id, items, created_at):
+    return make_task(task_id, items, created_at, name=f'任务{task_id}')
+
+
+def test_heatmap_aggregation(cube):
+    save(heat_task('t1', [heat_item('h1', ['10', '2']), heat_item('h2', ['2'])], days_ago(1)))
+    save(heat_task('t2', [heat_item('h3', ['1'], book_id='b2', book_name='英语七上', page_num=5)], days_ago(1)))
+
+    result = AnalysisService._compute_heatmap(None, 7)
+    assert result['total_errors'] == 4
+    book = result['heatmap'][0]
+    assert (book['book_id'], book['subject_id'], book['error_count']) == ('b1', 2, 3)
+    questions = book['pages'][0]['questions']
+    assert [q['index'] for q in questions] == ['2', '10']
+    assert questions[0]['error_count'] == 2 and questions[0]['error_types'] == {'识别错误': 2}
+    assert questions[0]['heat_level'] == 'medium'
+
+    assert [b['book_id'] for b in AnalysisService._compute_heatmap(0, 7)['heatmap']] == ['b2']
+
+
+def test_dataset_subject(cube):
+    save(heat_task('t1', [heat_item('h1', ['1'], dataset='ds1')], days_ago(1)))
+    with patch.object(StorageService, 'get_all_datasets_summary', return_value=[{'dataset_id': 'ds1', 'subject_id': 3}]):
+        result = AnalysisService._compute_heatmap(3, 7)
+    assert result['heatmap'][0]['subject_name'] == '物理'
+
+
+def test_window(cube):
+    save(heat_task('t1', [heat_item('h1', ['1'])], days_ago(1)))
+    save(heat_task('t2', [heat_item('h2', ['1'])], days_ago(20)))
+    assert AnalysisService._compute_heatmap(None, 7)['total_errors'] == 1
+    assert AnalysisService._compute_heatmap(None, 30)['total_errors'] == 2
+    assert AnalysisService._compute_heatmap(None, 0)['total_errors'] == 2
+
+
+def test_question_error_details(cube):
+    save(heat_task('t1', [heat_item('h1', ['1'])], days_ago(2)))
+    save(heat_task('t2', [heat_item('h2', ['1']), heat_item('h3', ['2'])], days_ago(1)))
+    save(heat_task('t3', [heat_item('h4', ['1'])], days_ago(20)))
+
+    details = AnalysisService.get_question_error_details('b1', 76, '1', days=7)
+    assert details['total'] == 2
+    first = details['errors'][0]
+    assert (first['task_id'], first['task_name'], first['homework_id']) == ('t2', '任务t2', 'h2')
+    assert (first['student_name'], first['hw_user'], first['base_user']) == ('学生h2', 'B', 'A')
+    assert AnalysisService.get_question_error_details('b1', 76, '1', days=0)['total'] == 3
+
+    StorageService.delete_batch_task('t2')
+    assert AnalysisService.get_question_error_details('b1', 76, '1', days=7)['total'] == 1
+    assert AnalysisService._compute_heatmap(None, 7)['total_errors'] == 1
+
+
+def test_heat_refs_only_point_to_errors(cube):
+    save(heat_task('t1', [heat_item('h1', ['1', '2'])], days_ago(1)))
+
+    with open(os.path.join(AggregateCubeService.CUBE_DIR, 'tasks', 't1.json'), encoding='utf-8') as f:
+        heat = json.load(f)['parts']['heat']['data']
+    assert sorted(row[6] for row in heat) == [[['h1', 0]], [['h1', 1]]]
+    assert '学生h1' not in json.dumps(heat, ensure_ascii=False)
+
+    # 详情按引用从任务文件读取
+    AggregateCubeService.reset()
+    details = AnalysisService.get_question_error_details('b1', 76, '2', days=7)
+    assert [(e['homework_id'], e['student_name'], e['hw_user']) for e in details['errors']] == [('h1', '学生h1', 'B')]
+
+
+def test_heat_buckets_expire(cube, monkeypatch):
+    save(heat_task('t1', [heat_item('h1', ['1'])], days_ago(1)))
+    save(heat_task('t2', [heat_item('h2', ['1'])], days_ago(20)))
+    assert AnalysisService._compute_heatmap(None, 0)['total_errors'] == 2
+
+    monkeypatch.setattr(HeatStore, 'RETENTION_DAYS', 10)
+    assert AnalysisService._compute_heatmap(None, 0)['total_errors'] == 1
+    assert AnalysisService.get_question_error_details('b1', 76, '1', days=0)['total'] == 1
+    assert AggregateCubeService.get_status()['heat_days'] == 1
+
+    # 保留期外的任务重新保存后不再计入
+    save(heat_task('t3', [heat_item('h3', ['1'])], days_ago(15)))
+    assert AnalysisService._compute_heatmap(None, 0)['total_errors'] == 1
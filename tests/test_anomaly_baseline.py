@@ -0,0 +1,144 @@
+"""
+异常检测基线测试
+
+测试流式统计和基于它的任务准确率异常检测：
+- RunningStats 的增删、合并与 statistics 模块结果一致
+- 聚合立方体按日分桶的准确率矩：时间窗口、排除任务、重新评估、过期
+- detect_task_anomaly 使用历史统计量判断偏离
+- get_statistics 读取汇总表，写入 / 确认异常时增量更新汇总
+
+运行方式:
+    pytest tests/test_anomaly_baseline.py -v
+"""
+import random
+import statistics
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from conftest import days_ago, make_task, save
+from services.storage_service import StorageService
+from services.aggregate_cube_service import AggregateCubeService
+from services.cube import MomentStore
+from services.anomaly_service import AnomalyService
+from utils.running_stats import RunningStats
+
+
+def accuracy_task(task_id, accuracy, created_at=None, subject_id=2, book='数学七上'):
+    return make_task(task_id, [], created_at or days_ago(1), subject_id, book_name=book,
+                     overall_report={'overall_accuracy': accuracy})
+
+
+class TestRunningStats:
+    """测试流式统计"""
+
+    def test_matches_statistics(self):
+        rng = random.Random(7)
+        values = [rng.uniform(0.5, 1.0) for _ in range(50)]
+        stats = RunningStats.of(values)
+        assert stats.mean == pytest.approx(statistics.mean(values))
+        assert stats.stdev == pytest.approx(statistics.stdev(values))
+
+        merged = RunningStats.of(values[:20]).merge(RunningStats.of(values[20:]))
+        assert merged.variance == pytest.approx(statistics.variance(values))
+
+        stats.remove(values[0])
+        assert stats.n == 49
+        assert stats.stdev == pytest.approx(statistics.stdev(values[1:]))
+
+    def test_remove_last(self):
+        stats = RunningStats.of([0.9])
+        stats.remove(0.9)
+        assert (stats.n, stats.mean, stats.m2, stats.stdev) == (0, 0.0, 0.0, 0.0)
+
+
+class TestAccuracyMoments:
+    """测试准确率矩分桶"""
+
+    def test_window_filters_and_exclude(self, cube):
+        save(accuracy_task('t1', 0.8, days_ago(1)))
+        save(accuracy_task('t2', 0.9, days_ago(2), subject_id=3, book='物理八上'))
+        save(accuracy_task('t3', 0.5, days_ago(40)))
+
+        window = AggregateCubeService.accuracy_moments((datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d'))
+        assert window.n == 2 and window.mean == pytest.approx(0.85)
+        assert AggregateCubeService.accuracy_moments().n == 3
+        assert AggregateCubeService.accuracy_moments(subject=2).n == 2
+        assert AggregateCubeService.accuracy_moments(book='物理八上').mean == pytest.approx(0.9)
+        assert AggregateCubeService.accuracy_moments(exclude_task_id='t1').mean == pytest.approx(0.7)
+
+    def test_reevaluate_and_delete(self, cube):
+        save(accuracy_task('t1', 0.8))
+        save(accuracy_task('t2', 0.6))
+        save(accuracy_task('t2', 0.9))
+        stats = AggregateCubeService.accuracy_moments()
+        assert stats.n == 2 and stats.mean == pytest.approx(0.85)
+        StorageService.delete_batch_task('t1')
+        assert AggregateCubeService.accuracy_moments().mean == pytest.approx(0.9)
+
+    def test_expiry(self, cube, monkeypatch):
+        monkeypatch.setattr(MomentStore, 'RETENTION_DAYS', 10)
+        save(accuracy_task('t1', 0.8, days_ago(20)))
+        save(accuracy_task('t2', 0.9, days_ago(1)))
+        assert AggregateCubeService.accuracy_moments().n == 1
+        assert AggregateCubeService.get_status()['moment_days'] == 1
+
+
+class TestDetectTaskAnomaly:
+    """测试任务准确率异常检测"""
+
+    def test_detects_drop_from_history(self, cube):
+        for i, accuracy in enumerate([0.90, 0.92, 0.88, 0.91, 0.89, 0.90]):
+            save(accuracy_task(f'h{i}', accuracy))
+        save(accuracy_task('current', 0.5))
+        with patch.object(AnomalyService, '_save_anomaly') as save_anomaly:
+            anomaly = AnomalyService.detect_task_anomaly('current')
+        assert anomaly['anomaly_type'] == 'accuracy_drop'
+        assert anomaly['expected_value'] == pytest.approx(0.9)
+        save_anomaly.assert_called_once()
+
+        with patch.object(AnomalyService, '_save_anomaly') as save_anomaly:
+            assert AnomalyService.detect_task_anomaly('h0') is None
+
+    def test_not_enough_samples(self, cube):
+        save(accuracy_task('h1', 0.9))
+        save(accuracy_task('current', 0.1))
+        assert AnomalyService.detect_task_anomaly('current') is None
+
+
+class TestSummary:
+    """测试异常统计汇总"""
+
+    def test_get_statistics(self):
+        today = datetime.now().date()
+        rows = [
+            {'log_date': today, 'anomaly_type': 'accuracy_drop', 'severity': 'high', 'total': 2, 'unacknowledged': 1},
+            {'log_date': today - timedelta(days=3), 'anomaly_type': 'accuracy_drop', 'severity': 'medium',
+             'total': 3, 'unacknowledged': 0}
+        ]
+        with patch('services.anomaly_service.AppDatabaseService.execute_query', return_value=rows):
+            result = AnomalyService.get_statistics()
+        assert result == {'unacknowledged': 1, 'today_count': 2, 'by_type': {'accuracy_drop': 5},
+                          'by_severity': {'high': 2, 'medium': 3}}
+
+    def test_save_and_acknowledge_update_summary(self):
+        anomaly = {'anomaly_id': 'a1', 'anomaly_type': 'accuracy_drop', 'severity': 'high', 'task_id': 't1'}
+        with patch('services.anomaly_service.AppDatabaseService.execute_insert'), \
+                patch('services.anomaly_service.AppDatabaseService.execute_update') as update:
+            AnomalyService._save_anomaly(anomaly)
+        assert 'anomaly_log_summary' in update.call_args[0][0]
+        assert update.call_args[0][1][1:] == ('accuracy_drop', 'high', 1, 1)
+
+        row = {'anomaly_type': 'accuracy_drop', 'severity': 'high', 'log_date': datetime.now().date()}
+        with patch('services.anomaly_service.AppDatabaseService.execute_one', return_value=row), \
+                patch('services.anomaly_service.AppDatabaseService.execute_update', return_value=1) as update:
+            assert AnomalyService.acknowledge_anomaly('a1', 3)
+        assert 'is_acknowledged = 0' in update.call_args_list[0][0][0]
+        assert update.call_args[0][1][1:] == ('accuracy_drop', 'high', 0, -1)
+
+        # 并发确认中落后的一方不再扣减
+        with patch('services.anomaly_service.AppDatabaseService.execute_one', return_value=row), \
+                patch('services.anomaly_service.AppDatabaseService.execute_update', return_value=0) as update:
+            assert not AnomalyService.acknowledge_anomaly('a1', 3)
+        assert update.call_count == 1
@@ -0,0 +1,143 @@
+"""
+批次对比测试
+
+测试基于任务指纹的 BatchCompareService：
+- 指纹内容（题目数、错误类型直方图、逐题结果、模型、提示词版本）
+- 趋势 / 时间段 / 模型对比
+- 基线对比的逐题进步与退步
+- 多任务对比的差异位图
+- 指纹随任务重新评估、删除更新，查询不读取任务文件
+
+运行方式:
+    pytest tests/test_batch_compare.py -v
+"""
+import builtins
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import days_ago, make_item, make_task, save
+from services.storage_service import StorageService
+from services.aggregate_cube_service import AggregateCubeService
+from services.batch_compare_service import BatchCompareService
+
+
+def compare_task(task_id, items, created_at=None, model='doubao', prompt_version=1):
+    """带模型、提示词版本和总体报告的批量任务"""
+    total = sum(i['evaluation']['total_questions'] for i in items)
+    correct = sum(i['evaluation']['correct_count'] for i in items)
+    return make_task(
+        task_id, items, created_at or days_ago(1), book_name='数学七上', model=model,
+        prompt_versions={'recognize': {'version': prompt_version, 'content_hash': 'x'}},
+        overall_report={'total_questions': total, 'correct_questions': correct,
+                        'overall_accuracy': correct / total if total else 0}
+    )
+
+
+@pytest.fixture
+def three_tasks(cube):
+    save(compare_task('t1', [make_item(76, [('1', '识别错误-判断错误'), ('2', '缺失题目')], total=4),
+                              make_item(77, [], total=4)],
+                      created_at=days_ago(3), prompt_version=1))
+    save(compare_task('t2', [make_item(76, [('2', '缺失题目'), ('3', '识别正确-判断错误')], total=4)],
+                      created_at=days_ago(2), model='qwen', prompt_version=2))
+    save(compare_task('t3', [make_item(77, [('1', '缺失题目')], total=4)], created_at=days_ago(1)))
+    return cube
+
+
+class TestFingerprint:
+    """测试任务指纹"""
+
+    def test_contents(self, three_tasks):
+        fp = AggregateCubeService.fingerprints(['t1', 'missing'])['t1']
+        assert (fp['total_questions'], fp['correct_count'], fp['model']) == (8, 6, 'doubao')
+        assert fp['prompts'] == (('recognize', 1),)
+        assert fp['errors'] == {'识别错误-判断错误': 1, '缺失题目': 1}
+        assert fp['pages'] == {('数学七上', '76'): 1, ('数学七上', '77'): 1}
+        assert fp['questions'] == {('数学七上', '76', '1'): 1, ('数学七上', '76', '2'): 1}
+
+    def test_reevaluate_and_delete(self, three_tasks):
+        save(compare_task('t1', [make_item(76, [], total=4)], created_at=days_ago(3)))
+        assert AggregateCubeService.fingerprints(['t1'])['t1']['questions'] == {}
+        StorageService.delete_batch_task('t1')
+        assert 't1' not in AggregateCubeService.fingerprints()
+
+
+class TestAggregates:
+    """测试趋势 / 时间段 / 模型对比"""
+
+    def test_trend_periods_models(self, three_tasks):
+        trend = BatchCompareService.get_batch_trend(days=30)
+        assert trend['task_counts'] == [1, 1, 1]
+        assert trend['accuracy_data'] == [75.0, 50.0, 75.0]
+
+        today = datetime.now().date()
+        periods = BatchCompareService.compare_periods(
+            (today - timedelta(days=10)).isoformat(), (today - timedelta(days=2)).isoformat(),
+            (today - timedelta(days=2)).isoformat(), (today + timedelta(days=1)).isoformat())
+        assert periods['period1']['task_count'] == 1
+        assert periods['period2']['task_count'] == 2
+        assert periods['change'] == -12.5
+
+        models = BatchCompareService.get_model_comparison(30)['models']
+        assert [(m['name'], m['task_count']) for m in models] == [('doubao', 2), ('qwen', 1)]
+
+    def test_no_task_file_reads(self, three_tasks, monkeypatch):
+        AggregateCubeService.fingerprints()
+        real_open = builtins.open
+
+        def guarded_open(path, *args, **kwargs):
+            assert 'batch_tasks' not in str(path), path
+            return real_open(path, *args, **kwargs)
+
+        monkeypatch.setattr(builtins, 'open', guarded_open)
+        BatchCompareService.get_batch_trend()
+        BatchCompareService.get_model_comparison()
+        BatchCompareService.compare_tasks(['t1', 't2', 't3'])
+
+
+class TestBaseline:
+    """测试基线对比"""
+
+    def test_earliest_same_book(self, three_tasks):
+        result = BatchCompareService.compare_with_baseline('t2')
+        assert result['baseline']['task_id'] == 't1'
+        assert result['change'] == -25.0
+        assert [(e['page'], e['question']) for e in result['improvements']] == [('76', '1')]
+        assert result['improvements'][0]['baseline_answer'] == 'B'
+        assert result['improvements'][0]['current_answer'] == 'A'
+        assert [(e['page'], e['question']) for e in result['regressions']] == [('76', '3')]
+
+    def test_missing(self, cube):
+        assert BatchCompareService.compare_with_baseline('nope') == {'error': '任务不存在'}
+
+
+class TestCompareTasks:
+    """测试多任务对比"""
+
+    def test_diff_bitmaps(self, three_tasks):
+        result = BatchCompareService.compare_tasks(['t1', 't2', 't3'])
+        assert result['question_count'] == 4
+        questions = {(q['page'], q['question']): q for q in result['questions']}
+        # 76-2 所有评估过该页的任务都出错，不算差异
+        assert set(questions) == {('76', '1'), ('76', '3'), ('77', '1')}
+
+        q1 = questions[('76', '1')]
+        assert (q1['covered_bitmap'], q1['wrong_bitmap'], q1['diff_bitmap']) == (0b011, 0b001, 0b010)
+        q77 = questions[('77', '1')]
+        assert (q77['covered_bitmap'], q77['wrong_bitmap'], q77['diff_bitmap']) == (0b101, 0b100, 0b100)
+
+        tasks = {t['task_id']: t for t in result['tasks']}
+        assert (tasks['t2']['improvement_count'], tasks['t2']['regression_count']) == (1, 1)
+        assert tasks['t2']['model'] == 'qwen' and tasks['t2']['prompts'] == {'recognize': 2}
+        assert result['error_types']['缺失题目'] == [1, 1, 1]
+
+    def test_reference_and_validation(self, three_tasks):
+        result = BatchCompareService.compare_tasks(['t1', 't2'], reference_task_id='t2')
+        q1 = next(q for q in result['questions'] if q['question'] == '1')
+        assert q1['diff_bitmap'] == 0b001
+        assert result['tasks'][0]['change'] == 25.0
+
+        assert 'error' in BatchCompareService.compare_tasks(['t1'])
+        assert 'error' in BatchCompareService.compare_tasks(['t1', 'nope'])
+        assert 'error' in BatchCompareService.compare_tasks(['t1', 't2'], reference_task_id='t3')
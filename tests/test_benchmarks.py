@@ -0,0 +1,93 @@
+"""
+基准测试工具测试
+
+测试 benchmarks.harness 与 benchmarks.bench_evaluation：
+- 合成数据可复现
+- 基线比较检测回退
+- 小规模运行全部阶段
+
+运行方式:
+    pytest tests/test_benchmarks.py -v
+"""
+import os
+os.environ.setdefault('USE_DB_STORAGE', 'false')
+
+from benchmarks.harness import BenchResult, compare_with_baseline, build_report, finish
+from benchmarks.synthetic import SyntheticEvalData
+from benchmarks import bench_evaluation
+
+
+class TestSynthetic:
+    """测试合成数据"""
+
+    def test_seeded_data_is_deterministic(self):
+        a = SyntheticEvalData(seed=7).make_pairs(3, 5)
+        b = SyntheticEvalData(seed=7).make_pairs(3, 5)
+        assert a == b
+
+    def test_error_injection(self):
+        data = SyntheticEvalData(seed=1, error_rates={'missing': 1.0})
+        pair = data.make_pairs(1, 5)[0]
+        assert len(pair['base_effect']) == 5
+        assert len(pair['homework_result']) <= 1
+
+
+class TestBaselineCompare:
+    """测试基线比较"""
+
+    def test_regression_detected(self):
+        baseline = build_report('s', {}, [BenchResult('x', 100, [1.0], 0)])
+        report = build_report('s', {}, [BenchResult('x', 100, [2.0], 0)])
+        assert len(compare_with_baseline(report, baseline, tolerance=0.25)) == 1
+        assert compare_with_baseline(report, baseline, tolerance=0.6) == []
+
+    def test_finish_exit_code(self, tmp_path):
+        path = str(tmp_path / 'baseline.json')
+        assert finish('s', {}, [BenchResult('x', 100, [1.0], 0)], path, save_baseline=True) == 0
+        assert finish('s', {}, [BenchResult('x', 100, [3.0], 0)], path) == 1
+
+
+class TestEvaluationBench:
+    """小规模运行评估基准"""
+
+    def test_all_stages_run(self):
+        params, results = bench_evaluation.run(scale=2, questions_per_page=4, warmup=0, repeats=1)
+        names = [r.name for r in results]
+        assert 'classify_error' in names
+        assert 'do_evaluation[physics]' in names
+        assert names[-1] == 'build_overall_report'
+        assert all(r.ops > 0 for r in results)
+
+
+class TestAnalyticsBench:
+    """小规模运行看板聚合基准"""
+
+    def test_fabricated_task_shape(self):
+        from benchmarks.bench_analytics import TaskFabricator
+        from datetime import datetime
+
+        fab = TaskFabricator(seed=3, pool_size=2, questions_per_page=4)
+        task = fab.make_task('t1', datetime(2026, 1, 20, 12), items_per_task=3)
+        assert len(task['homework_items']) == 3
+        assert task['overall_report']['total_homework'] == 3
+        assert all(item['evaluation']['total_questions'] > 0 for item in task['homework_items'])
+
+    def test_cold_and_warm_measured(self):
+        from benchmarks.bench_analytics import run
+
+        params, results = run(tasks=3, items_per_task=2, cold_repeats=1, warm_repeats=1, only='get_overview')
+        assert [r.name for r in results] == [
+            'DashboardService.get_overview[cold]', 'DashboardService.get_overview[warm]'
+        ]
+        assert results[0].rss_bytes > 0
+
+
+class TestAnomalyBench:
+    """小规模运行题目异常检测基准"""
+
+    def test_largest_tasks_measured(self):
+        from benchmarks.bench_anomaly import run
+
+        params, results = run(tasks=2, items_per_task=3, top=1, warmup=0, repeats=1)
+        assert [r.name for r in results] == ['detect_question_anomalies[#1 3 items]']
+        assert results[0].ops == 3
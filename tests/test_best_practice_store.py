@@ -0,0 +1,135 @@
+"""
+最佳实践库内存索引测试：索引查询、mtime 重新加载、追加式使用日志与后台合并
+"""
+import json
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.best_practice_service import BestPracticeService
+
+
+def _practice(pid, category='数学', tags=(), starred=False, usage=0):
+    return {'id': pid, 'name': pid, 'category': category, 'prompt_content': f'prompt {pid}',
+            'tags': list(tags), 'metrics': {}, 'version': 1, 'is_starred': starred,
+            'usage_count': usage}
+
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    monkeypatch.setattr(BestPracticeService, 'PRACTICES_DIR', str(tmp_path))
+    monkeypatch.setattr(BestPracticeService, '_index', None)
+    practices = [
+        _practice('p1', tags=['a'], usage=3),
+        _practice('p2', category='英语', tags=['a', 'b'], starred=True),
+        _practice('p3', tags=['b'], usage=3),
+        _practice('p4', category='英语', usage=1),
+    ]
+    (tmp_path / 'practices.json').write_text(json.dumps(practices, ensure_ascii=False), encoding='utf-8')
+    return tmp_path
+
+
+def _ids(practices):
+    return [p['id'] for p in practices]
+
+
+def _read(tmp_path):
+    return json.loads((tmp_path / 'practices.json').read_text(encoding='utf-8'))
+
+
+def test_index_queries(store):
+    assert _ids(BestPracticeService.get_practices()) == ['p2', 'p1', 'p3', 'p4']
+    assert _ids(BestPracticeService.get_practices(category='数学')) == ['p1', 'p3']
+    assert _ids(BestPracticeService.get_practices(tag='b')) == ['p2', 'p3']
+    assert _ids(BestPracticeService.get_practices(category='英语', tag='a')) == ['p2']
+    assert _ids(BestPracticeService.get_practices(starred_only=True, tag='b')) == ['p2']
+    assert BestPracticeService.get_practices(category='物理') == []
+    assert BestPracticeService.get_categories() == ['数学', '英语']
+    assert BestPracticeService.get_tags() == ['a', 'b']
+
+
+def test_results_are_copies(store):
+    BestPracticeService.get_practice('p1')['name'] = 'changed'
+    BestPracticeService.get_practices()[0]['usage_count'] = 99
+    assert BestPracticeService.get_practice('p1')['name'] == 'p1'
+    assert BestPracticeService.get_practice('p2')['usage_count'] == 0
+
+
+def test_mutations_reindex_and_persist(store):
+    BestPracticeService.update_practice('p1', {'category': '英语', 'tags': ['c'], 'prompt_content': 'new'})
+    assert BestPracticeService.toggle_star('p3') == {'success': True, 'is_starred': True}
+    assert BestPracticeService.delete_practice('p4') == {'success': True}
+
+    assert BestPracticeService.get_categories() == ['数学', '英语']
+    assert BestPracticeService.get_tags() == ['a', 'b', 'c']
+    assert _ids(BestPracticeService.get_practices(tag='a')) == ['p2']
+    assert _ids(BestPracticeService.get_practices(starred_only=True)) == ['p3', 'p2']
+
+    saved = {p['id']: p for p in _read(store)}
+    assert list(saved) == ['p1', 'p2', 'p3']
+    assert saved['p1']['version'] == 2 and saved['p1']['category'] == '英语'
+    assert saved['p3']['is_starred'] is True
+    assert BestPracticeService.update_practice('missing', {})['success'] is False
+
+
+def test_reload_when_file_changes(store):
+    assert BestPracticeService.get_practice('p1')['name'] == 'p1'
+
+    practices = _read(store)
+    practices[0]['name'] = 'edited'
+    path = store / 'practices.json'
+    path.write_text(json.dumps(practices, ensure_ascii=False), encoding='utf-8')
+    later = time.time() + 5
+    os.utime(path, (later, later))
+
+    assert BestPracticeService.get_practice('p1')['name'] == 'edited'
+
+
+def test_record_usage_appends_without_rewriting(store):
+    before = os.stat(store / 'practices.json').st_mtime_ns
+
+    for _ in range(3):
+        result = BestPracticeService.record_usage('p4')
+    assert result == {'success': True, 'usage_count': 4}
+    assert BestPracticeService.record_usage('missing')['success'] is False
+
+    assert os.stat(store / 'practices.json').st_mtime_ns == before
+    lines = (store / 'usage.jsonl').read_text(encoding='utf-8').splitlines()
+    assert [json.loads(line)['id'] for line in lines] == ['p4'] * 3
+    assert _ids(BestPracticeService.get_practices(category='英语')) == ['p2', 'p4']
+    assert BestPracticeService.get_practice('p4')['last_used_at']
+
+    # 其他进程追加的记录在下次读取时生效
+    with open(store / 'usage.jsonl', 'a', encoding='utf-8') as f:
+        f.write(json.dumps({'id': 'p1', 'at': '2026-01-01T00:00:00'}) + '\n')
+    assert BestPracticeService.get_practice('p1')['usage_count'] == 4
+
+
+def test_compaction_folds_log_into_file(store):
+    BestPracticeService.record_usage('p1')
+    BestPracticeService.record_usage('p2')
+
+    assert BestPracticeService.compact_usage() == 2
+    assert not (store / 'usage.jsonl').exists()
+    saved = {p['id']: p['usage_count'] for p in _read(store)}
+    assert saved == {'p1': 4, 'p2': 1, 'p3': 3, 'p4': 1}
+
+    # 重新从文件加载后计数不重复
+    BestPracticeService._index = None
+    assert BestPracticeService.get_practice('p1')['usage_count'] == 4
+    assert BestPracticeService.compact_usage() == 0
+
+
+def test_threshold_schedules_background_compaction(store, monkeypatch):
+    monkeypatch.setattr(BestPracticeService, 'USAGE_COMPACT_THRESHOLD', 2)
+
+    BestPracticeService.record_usage('p3')
+    BestPracticeService.record_usage('p3')
+    BestPracticeService._compact_thread.join(5)
+
+    assert {p['id']: p['usage_count'] for p in _read(store)}['p3'] == 5
+    assert BestPracticeService.get_practice('p3')['usage_count'] == 5
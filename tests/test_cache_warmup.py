@@ -0,0 +1,133 @@
+"""
+缓存预热测试
+
+测试 CacheWarmupService：
+- 按优先级顺序执行预热项
+- 单项失败或超出预算不影响后续项，结束后 ready
+- 关闭预热时直接视为 ready
+- /api/health 报告预热状态，?ready=1 在未就绪时返回 503
+
+运行方式:
+    pytest tests/test_cache_warmup.py -v
+"""
+import threading
+import pytest
+from flask import Flask
+
+from services.cache_warmup_service import CacheWarmupService
+
+
+@pytest.fixture(autouse=True)
+def reset_warmup():
+    CacheWarmupService.reset()
+    yield
+    CacheWarmupService.reset()
+
+
+class TestWarmupRun:
+    """测试预热执行"""
+
+    def test_runs_in_priority_order(self):
+        order = []
+        warmables = [
+            {'name': 'late', 'target': lambda: order.append('late'), 'priority': 20, 'budget': 5},
+            {'name': 'early', 'target': lambda: order.append('early'), 'priority': 10, 'budget': 5},
+        ]
+        assert CacheWarmupService.start(warmables, delay=0)
+        assert CacheWarmupService.wait(5)
+        assert order == ['early', 'late']
+        status = CacheWarmupService.get_status()
+        assert status['status'] == 'ready'
+        assert status['items']['early']['status'] == 'ok'
+        assert status['items']['late']['duration_ms'] is not None
+
+    def test_start_only_once(self):
+        warmables = [{'name': 'noop', 'target': lambda: None, 'priority': 1, 'budget': 5}]
+        assert CacheWarmupService.start(warmables, delay=0)
+        assert not CacheWarmupService.start(warmables, delay=0)
+        assert CacheWarmupService.wait(5)
+
+    def test_error_and_timeout_do_not_block(self):
+        release = threading.Event()
+        ran = []
+
+        def fail():
+            raise RuntimeError('db down')
+
+        warmables = [
+            {'name': 'fail', 'target': fail, 'priority': 1, 'budget': 5},
+            {'name': 'slow', 'target': lambda: release.wait(5), 'priority': 2, 'budget': 0.1},
+            {'name': 'last', 'target': lambda: ran.append(1), 'priority': 3, 'budget': 5},
+        ]
+        CacheWarmupService.start(warmables, delay=0)
+        assert CacheWarmupService.wait(5)
+        items = CacheWarmupService.get_status()['items']
+        assert items['fail']['status'] == 'error'
+        assert 'db down' in items['fail']['error']
+        assert items['slow']['status'] == 'timeout'
+        assert items['last']['status'] == 'ok'
+        assert ran == [1]
+        release.set()
+
+    def test_resolves_string_targets(self):
+        warmables = [{'name': 'stats', 'target': 'services.dashboard_service:DashboardService.get_cache_stats',
+                      'priority': 1, 'budget': 5}]
+        CacheWarmupService.start(warmables, delay=0)
+        assert CacheWarmupService.wait(5)
+        assert CacheWarmupService.get_status()['items']['stats']['status'] == 'ok'
+
+    def test_disabled_is_ready(self, monkeypatch):
+        monkeypatch.setattr(CacheWarmupService, 'ENABLED', False)
+        assert not CacheWarmupService.start([])
+        assert CacheWarmupService.is_ready()
+        assert CacheWarmupService.get_status()['status'] == 'disabled'
+
+
+@pytest.mark.skipif(not hasattr(threading, 'get_native_id'), reason='需要线程级 nice')
+def test_lower_priority_does_not_stack():
+    """嵌套线程重复降低优先级时 nice 值不叠加"""
+    import os
+    base = os.getpriority(os.PRIO_PROCESS, os.getpid())
+    seen = []
+
+    def worker():
+        CacheWarmupService._lower_priority()
+
+        def nested():
+            CacheWarmupService._lower_priority()
+            seen.append(os.getpriority(os.PRIO_PROCESS, 0))
+
+        t = threading.Thread(target=nested)
+        t.start()
+        t.join()
+
+    t = threading.Thread(target=worker)
+    t.start()
+    t.join()
+    assert seen == [min(19, base + CacheWarmupService.NICE_INCREMENT)]
+
+
+class TestHealthEndpoint:
+    """测试健康检查接口"""
+
+    @pytest.fixture
+    def client(self):
+        from routes.common import common_bp
+        app = Flask(__name__)
+        app.register_blueprint(common_bp)
+        return app.test_client()
+
+    def test_reports_not_ready_before_warmup(self, client):
+        resp = client.get('/api/health')
+        assert resp.status_code == 200
+        assert resp.get_json()['data']['ready'] is False
+        assert client.get('/api/health?ready=1').status_code == 503
+
+    def test_reports_ready_after_warmup(self, client):
+        CacheWarmupService.start([{'name': 'noop', 'target': lambda: None, 'priority': 1, 'budget': 5}], delay=0)
+        CacheWarmupService.wait(5)
+        resp = client.get('/api/health?ready=1')
+        assert resp.status_code == 200
+        data = resp.get_json()['data']
+        assert data['ready'] is True
+        assert data['warmup']['items']['noop']['status'] == 'ok'
@@ -0,0 +1,127 @@
+"""
+配置缓存测试
+
+测试 ConfigService.load_config 的缓存：
+- config.json 签名不变时不重复读取
+- 文件修改后重新加载
+- 用户API密钥 TTL 缓存及保存时失效
+- 返回副本，调用方修改不影响缓存
+
+运行方式:
+    pytest tests/test_config_service.py -v
+"""
+import os
+import json
+import pytest
+from unittest.mock import patch
+
+from services.config_service import ConfigService
+
+
+@pytest.fixture
+def config_file(tmp_path, monkeypatch):
+    """使用临时 config.json 并重置缓存"""
+    path = tmp_path / 'config.json'
+    path.write_text(json.dumps({'api_key': 'file-key', 'model': 'm1'}), encoding='utf-8')
+    monkeypatch.setattr(ConfigService, 'CONFIG_FILE', str(path))
+    monkeypatch.setattr(ConfigService, 'USER_KEYS_STAMP_FILE', str(tmp_path / 'user_keys.stamp'))
+    monkeypatch.delenv('DOUBAO_API_KEY', raising=False)
+    ConfigService.invalidate_config_cache()
+    ConfigService.invalidate_user_keys()
+    for key in ConfigService._cache_stats:
+        ConfigService._cache_stats[key] = 0
+    yield path
+    ConfigService.invalidate_config_cache()
+    ConfigService.invalidate_user_keys()
+
+
+class TestConfigFileCache:
+    """测试 config.json 缓存"""
+
+    def test_repeated_loads_hit_cache(self, config_file):
+        for _ in range(5):
+            assert ConfigService.load_config(apply_headers=False)['api_key'] == 'file-key'
+
+        stats = ConfigService.get_cache_stats()
+        assert stats['config_misses'] == 1
+        assert stats['config_hits'] == 4
+
+    def test_reload_after_file_change(self, config_file):
+        ConfigService.load_config(apply_headers=False)
+        config_file.write_text(json.dumps({'api_key': 'new-key', 'extra': 1}), encoding='utf-8')
+        st = os.stat(config_file)
+        os.utime(config_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+        assert ConfigService.load_config(apply_headers=False)['api_key'] == 'new-key'
+
+    def test_returned_config_is_a_copy(self, config_file):
+        config = ConfigService.load_config(apply_headers=False)
+        config['api_key'] = 'mutated'
+        config.setdefault('mysql', {})['host'] = 'x'
+
+        again = ConfigService.load_config(apply_headers=False)
+        assert again['api_key'] == 'file-key'
+        assert 'mysql' not in again
+
+    def test_env_override_applied_on_cached_config(self, config_file, monkeypatch):
+        ConfigService.load_config(apply_headers=False)
+        monkeypatch.setenv('DOUBAO_API_KEY', 'env-key')
+        assert ConfigService.load_config(apply_headers=False)['api_key'] == 'env-key'
+
+
+class TestUserKeysCache:
+    """测试用户API密钥缓存"""
+
+    def test_user_keys_fetched_once(self, config_file):
+        with patch('services.database_service.AppDatabaseService.get_user_api_keys',
+                   return_value={'deepseek_api_key': 'user-key'}) as mock_get:
+            for _ in range(3):
+                config = ConfigService.load_config(apply_headers=False, user_id=7)
+                assert config['deepseek_api_key'] == 'user-key'
+
+        assert mock_get.call_count == 1
+        assert ConfigService.get_cache_stats()['user_keys_hits'] == 2
+
+    def test_saving_keys_invalidates(self, config_file):
+        from services.database_service import AppDatabaseService
+
+        with patch.object(AppDatabaseService, 'get_user_api_keys', return_value={'api_key': 'old'}) as mock_get, \
+                patch.object(AppDatabaseService, 'execute_update', return_value=1):
+            assert ConfigService.load_config(apply_headers=False, user_id=7)['api_key'] == 'old'
+            mock_get.return_value = {'api_key': 'new'}
+            AppDatabaseService.update_user_api_keys(7, {'api_key': 'new'})
+            assert ConfigService.load_config(apply_headers=False, user_id=7)['api_key'] == 'new'
+
+        assert mock_get.call_count == 2
+
+    def test_save_in_other_worker_invalidates(self, config_file):
+        with patch('services.database_service.AppDatabaseService.get_user_api_keys',
+                   return_value={'api_key': 'old'}) as mock_get:
+            assert ConfigService.load_config(apply_headers=False, user_id=7)['api_key'] == 'old'
+            assert ConfigService.load_config(apply_headers=False, user_id=7)['api_key'] == 'old'
+
+            # 其他 worker 保存密钥只会追加戳文件，本进程的缓存条目仍在
+            mock_get.return_value = {'api_key': 'new'}
+            with open(ConfigService.USER_KEYS_STAMP_FILE, 'a', encoding='utf-8') as f:
+                f.write('7 0\n')
+            assert ConfigService.load_config(apply_headers=False, user_id=7)['api_key'] == 'new'
+
+        assert mock_get.call_count == 2
+
+    def test_stamp_file_is_bounded(self, config_file, monkeypatch):
+        monkeypatch.setattr(ConfigService, 'USER_KEYS_STAMP_MAX_BYTES', 64)
+        for uid in range(20):
+            ConfigService.invalidate_user_keys(uid)
+        assert os.path.getsize(ConfigService.USER_KEYS_STAMP_FILE) < 128
+
+    def test_ttl_expiry_and_bound(self, config_file, monkeypatch):
+        monkeypatch.setattr(ConfigService, 'USER_KEYS_CACHE_TTL', 0)
+        monkeypatch.setattr(ConfigService, 'USER_KEYS_CACHE_MAX', 2)
+        with patch('services.database_service.AppDatabaseService.get_user_api_keys', return_value={}) as mock_get:
+            ConfigService.load_config(apply_headers=False, user_id=1)
+            ConfigService.load_config(apply_headers=False, user_id=1)
+            assert mock_get.call_count == 2
+
+            for uid in (2, 3, 4):
+                ConfigService.load_config(apply_headers=False, user_id=uid)
+        assert ConfigService.get_cache_stats()['cached_users'] == 2
@@ -0,0 +1,197 @@
+"""
+每日统计增量维护测试
+
+测试 DailyStatisticsService（数据库调用用 mock 代替）：
+- 任务贡献口径（整体行、学科行、错误分布）
+- 重新评估 / 删除时只写入差值，读旧贡献和写入在同一个事务中（FOR UPDATE 锁定旧贡献，死锁时重试）
+- 增量 SQL 累加指标并用 JSON_SET 累加错误类型
+- 对账只校正与贡献表不一致的行
+- 未启动后台线程时保存任务不访问数据库
+
+运行方式:
+    pytest tests/test_daily_statistics.py -v
+"""
+from contextlib import contextmanager
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+from services.daily_statistics_service import (
+    DailyStatisticsService, build_task_rows, diff_rows, SUBJECT_OVERALL
+)
+
+
+def make_item(book_name, errors, total=10):
+    return {
+        'book_name': book_name,
+        'evaluation': {
+            'total_questions': total,
+            'correct_count': total - len(errors),
+            'errors': [{'error_type': e} for e in errors]
+        }
+    }
+
+
+def make_task(items, created_at='2026-03-01T10:00:00'):
+    return {'task_id': 't1', 'created_at': created_at, 'homework_items': items}
+
+
+KEY = ('2026-03-01', SUBJECT_OVERALL)
+
+
+def fake_transaction(cursor, events=None):
+    """代替 AppDatabaseService.transaction，产出 mock 游标并记录提交 / 回滚"""
+    @contextmanager
+    def transaction():
+        try:
+            yield cursor
+        except Exception:
+            if events is not None:
+                events.append('rollback')
+            raise
+        if events is not None:
+            events.append('commit')
+    return transaction
+
+
+class TestContribution:
+    """测试任务贡献"""
+
+    def test_build_task_rows(self):
+        rows = build_task_rows(make_task([
+            make_item('数学七上', ['识别错误']),
+            make_item('英语七上', []),
+            make_item('未知书本', ['缺失题目'])
+        ]), {})
+        assert rows[KEY] == {'task_count': 1, 'homework_count': 3, 'question_count': 30, 'correct_count': 28,
+                             'error_distribution': {'识别错误': 1, '缺失题目': 1}}
+        assert rows[('2026-03-01', 2)]['homework_count'] == 1
+        assert rows[('2026-03-01', 0)]['task_count'] == 1
+        assert len(rows) == 3
+        assert build_task_rows(make_task([], created_at=''), {}) == {}
+
+    def test_dataset_subject_takes_priority(self):
+        item = make_item('数学七上', [])
+        item['matched_dataset'] = 'ds1'
+        rows = build_task_rows(make_task([item]), {'ds1': 3})
+        assert ('2026-03-01', 3) in rows and ('2026-03-01', 2) not in rows
+
+    def test_diff_rows(self):
+        old = build_task_rows(make_task([make_item('数学七上', ['识别错误', '识别错误'])]), {})
+        new = build_task_rows(make_task([make_item('数学七上', ['识别错误'])]), {})
+        delta = diff_rows(new, old)
+        assert delta[KEY] == {'task_count': 0, 'homework_count': 0, 'question_count': 0, 'correct_count': 1,
+                              'error_distribution': {'识别错误': -1}}
+        assert diff_rows(new, new) == {}
+        assert diff_rows({}, new)[KEY]['task_count'] == -1
+
+
+class TestApplyTask:
+    """测试增量写入"""
+
+    def test_reevaluation_writes_delta(self):
+        old = build_task_rows(make_task([make_item('数学七上', ['识别错误'])]), {})
+        new_task = make_task([make_item('数学七上', [])])
+        cursor, events = MagicMock(), []
+        with patch('services.daily_statistics_service.AppDatabaseService.transaction',
+                   fake_transaction(cursor, events)), \
+                patch.object(DailyStatisticsService, '_load_task_rows', return_value=old), \
+                patch.object(DailyStatisticsService, '_replace_task_rows') as replace:
+            delta = DailyStatisticsService.apply_task('t1', new_task, {})
+
+        assert set(delta) == {KEY, ('2026-03-01', 2)}
+        assert events == ['commit']
+        assert replace.call_args[0][0] is cursor
+        assert replace.call_args[0][2] == build_task_rows(new_task, {})
+        upserts = [c for c in cursor.execute.call_args_list if 'ON DUPLICATE KEY UPDATE' in c[0][0]]
+        assert len(upserts) == 2
+        sql, params = upserts[0][0]
+        assert 'correct_count = correct_count + %s' in sql
+        assert 'JSON_SET(COALESCE(error_distribution, JSON_OBJECT()), %s' in sql
+        assert params[-3:] == ('$."识别错误"', '$."识别错误"', -1)
+        assert 'task_count <= 0' in cursor.execute.call_args_list[-1][0][0]
+
+    def test_old_rows_locked_in_same_transaction(self):
+        cursor = MagicMock()
+        cursor.fetchall.return_value = []
+        with patch('services.daily_statistics_service.AppDatabaseService.transaction', fake_transaction(cursor)):
+            DailyStatisticsService.apply_task('t1', make_task([make_item('数学七上', [])]), {})
+
+        statements = [c[0][0] for c in cursor.execute.call_args_list]
+        assert 'FOR UPDATE' in statements[0]
+        assert statements[1].startswith('DELETE FROM daily_statistics_tasks')
+        assert cursor.executemany.call_count == 1
+
+    def test_deadlock_is_retried(self):
+        class OperationalError(Exception):
+            pass
+
+        calls, events = [], []
+
+        def load(cursor, task_id):
+            calls.append(task_id)
+            if len(calls) == 1:
+                raise OperationalError(1213, 'Deadlock found when trying to get lock')
+            return {}
+
+        with patch('services.daily_statistics_service.AppDatabaseService.transaction',
+                   fake_transaction(MagicMock(), events)), \
+                patch.object(DailyStatisticsService, '_load_task_rows', side_effect=load):
+            delta = DailyStatisticsService.apply_task('t1', make_task([make_item('数学七上', [])]), {})
+
+        assert calls == ['t1', 't1']
+        assert events == ['rollback', 'commit']
+        assert delta[KEY]['task_count'] == 1
+
+    def test_unchanged_task_writes_nothing(self):
+        task = make_task([make_item('数学七上', ['识别错误'])])
+        cursor = MagicMock()
+        with patch('services.daily_statistics_service.AppDatabaseService.transaction', fake_transaction(cursor)), \
+                patch.object(DailyStatisticsService, '_load_task_rows', return_value=build_task_rows(task, {})):
+            assert DailyStatisticsService.apply_task('t1', task, {}) == {}
+        cursor.execute.assert_not_called()
+
+    def test_submit_without_worker_is_noop(self, tmp_path, monkeypatch):
+        from services.storage_service import StorageService
+        monkeypatch.setattr(StorageService, 'BATCH_TASKS_DIR', str(tmp_path))
+        monkeypatch.setattr(DailyStatisticsService, '_thread', None)
+        monkeypatch.setattr(DailyStatisticsService, '_pending', {})
+        with patch.object(DailyStatisticsService, 'apply_task') as apply_task:
+            StorageService.save_batch_task('t1', make_task([]))
+        apply_task.assert_not_called()
+        assert DailyStatisticsService._pending == {}
+
+
+class TestReconcile:
+    """测试对账"""
+
+    def test_repairs_drift(self):
+        contrib = {'subject_key': SUBJECT_OVERALL, 'task_count': 2, 'homework_count': 4, 'question_count': 40,
+                   'correct_count': 30, 'error_distribution': '{"识别错误": 10}'}
+        actual = [
+            {'subject_id': None, 'task_count': 2, 'homework_count': 4, 'question_count': 40,
+             'correct_count': 31, 'error_distribution': '{"识别错误": 9, "缺失题目": 0}'},
+            {'subject_id': 5, 'task_count': 1, 'homework_count': 1, 'question_count': 1,
+             'correct_count': 1, 'error_distribution': None}
+        ]
+        with patch('services.daily_statistics_service.AppDatabaseService.execute_query',
+                   side_effect=[[contrib], actual]), \
+                patch('services.daily_statistics_service.AppDatabaseService.execute_update') as update:
+            result = DailyStatisticsService.reconcile('2026-03-01')
+
+        assert result['repaired'] == 2
+        assert result['overall']['accuracy'] == 0.75
+        written = update.call_args_list[0][0]
+        assert written[1][:6] == ('2026-03-01', None, 2, 4, 40, 30)
+        assert 'subject_id = %s' in update.call_args_list[1][0][0]
+
+    def test_consistent_day_is_untouched(self):
+        row = {'task_count': 1, 'homework_count': 1, 'question_count': 10, 'correct_count': 9,
+               'error_distribution': {'识别错误': 1}}
+        with patch('services.daily_statistics_service.AppDatabaseService.execute_query',
+                   side_effect=[[{**row, 'subject_key': 2}], [{**row, 'subject_id': 2}]]), \
+                patch('services.daily_statistics_service.AppDatabaseService.execute_update') as update:
+            result = DailyStatisticsService.reconcile('2026-03-01')
+        assert result['repaired'] == 0
+        assert result['by_subject'][2]['accuracy'] == 0.9
+        update.assert_not_called()
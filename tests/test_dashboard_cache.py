@@ -0,0 +1,122 @@
+"""
+看板缓存测试
+
+测试 DashboardService.get_or_compute：
+- 同一键并发未命中时只计算一次
+- 过期后宽限期内返回旧值并后台刷新
+- 计算失败的兜底结果不写入缓存
+- 计算期间发生失效时结果不写入缓存
+
+运行方式:
+    pytest tests/test_dashboard_cache.py -v
+"""
+import time
+import threading
+import pytest
+
+from services.dashboard_service import DashboardService
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    DashboardService.clear_cache()
+    DashboardService._cache_stats.clear()
+    yield
+    DashboardService.clear_cache()
+    DashboardService._cache_stats.clear()
+
+
+class TestSingleFlight:
+    """测试单飞计算"""
+
+    def test_concurrent_misses_compute_once(self):
+        calls = []
+        gate = threading.Event()
+
+        def compute():
+            calls.append(1)
+            gate.wait(2)
+            return {'value': 42}
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(DashboardService.get_or_compute('k', compute)))
+            for _ in range(8)
+        ]
+        for t in threads:
+            t.start()
+        time.sleep(0.1)
+        gate.set()
+        for t in threads:
+            t.join(5)
+
+        assert len(calls) == 1
+        assert results == [{'value': 42}] * 8
+        stats = DashboardService.get_cache_stats()['keys']['k']
+        assert stats['computes'] == 1
+        assert stats['waits'] == 7
+
+    def test_error_propagates_to_waiters(self):
+        def compute():
+            raise ValueError('boom')
+
+        with pytest.raises(ValueError):
+            DashboardService.get_or_compute('k', compute)
+        assert DashboardService.get_cache_stats()['keys']['k']['errors'] == 1
+        assert DashboardService.get_cache_stats()['inflight'] == []
+
+
+class TestStaleWhileRevalidate:
+    """测试宽限期内返回旧值"""
+
+    def test_stale_value_served_and_refreshed(self):
+        DashboardService.get_or_compute('k', lambda: 'old', ttl=60)
+        entry = DashboardService._cache['k']
+        entry['expires_at'] = time.time() - 1
+        entry['stale_until'] = time.time() + 60
+
+        refreshed = threading.Event()
+
+        def compute():
+            refreshed.set()
+            return 'new'
+
+        assert DashboardService.get_or_compute('k', compute, ttl=60) == 'old'
+        assert refreshed.wait(2)
+        for _ in range(50):
+            if DashboardService.get_cached('k') == 'new':
+                break
+            time.sleep(0.02)
+        assert DashboardService.get_or_compute('k', lambda: 'unused') == 'new'
+        assert DashboardService.get_cache_stats()['keys']['k']['stale_served'] == 1
+
+    def test_past_grace_recomputes_synchronously(self):
+        DashboardService.get_or_compute('k', lambda: 'old', ttl=60)
+        DashboardService._cache['k']['expires_at'] = time.time() - 10
+        DashboardService._cache['k']['stale_until'] = time.time() - 1
+
+        assert DashboardService.get_or_compute('k', lambda: 'new') == 'new'
+
+    def test_jittered_expiry_within_ttl(self):
+        DashboardService.set_cached('k', 1, ttl=100)
+        entry = DashboardService._cache['k']
+        remaining = entry['expires_at'] - time.time()
+        assert 100 * (1 - DashboardService.CACHE_JITTER_RATIO) - 1 <= remaining <= 100
+        assert entry['stale_until'] > entry['expires_at']
+
+
+class TestCacheability:
+    """测试不写入缓存的情况"""
+
+    def test_uncacheable_result_not_stored(self):
+        value = DashboardService.get_or_compute('k', lambda: DashboardService.uncacheable({'fallback': True}))
+        assert value == {'fallback': True}
+        assert DashboardService.get_cached('k') is None
+
+    def test_invalidation_during_compute_discards_result(self):
+        def compute():
+            DashboardService.invalidate_task_related_cache()
+            return 'computed-before-change'
+
+        assert DashboardService.get_or_compute('overview_today', compute) == 'computed-before-change'
+        assert DashboardService.get_cached('overview_today') is None
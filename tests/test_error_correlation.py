@@ -0,0 +1,111 @@
+"""
+错误关联分析测试
+
+测试 ErrorCorrelationService 基于聚合立方体共现计数的查询：
+- 错误类型共现（同一份作业内）和错题共现（同一页内）
+- 时间窗口、学科、书本筛选与 top-k
+- 重新评估、删除任务后计数增量更新
+- 错误模式示例和错误链
+
+运行方式:
+    pytest tests/test_error_correlation.py -v
+"""
+from conftest import make_item, make_task, save
+from services.storage_service import StorageService
+from services.aggregate_cube_service import AggregateCubeService, build_contribution
+from services.error_correlation_service import ErrorCorrelationService
+
+
+ERRORS = [('3', '识别错误'), ('4', '识别错误'), ('10', '缺失题目')]
+
+
+def test_contribution_pairs():
+    pairs = build_contribution(make_task('t1', [make_item(76, ERRORS)]), 't1')['parts']['pairs']['data']
+    type_pairs = {tuple(row[:-1]): row[-1] for row in pairs['type']}
+    assert type_pairs == {('数学七上', '识别错误', '识别错误'): 1, ('数学七上', '缺失题目', '识别错误'): 2}
+    question_pairs = {tuple(row[2:4]) for row in pairs['question']}
+    assert question_pairs == {('3', '4'), ('3', '10'), ('4', '10')}
+
+
+class TestAnalyzeCorrelations:
+    """测试关联分析"""
+
+    def test_type_and_question_correlations(self, cube):
+        save(make_task('t1', [make_item(76, ERRORS)]))
+        save(make_task('t2', [make_item(76, ERRORS[:2])]))
+        result = ErrorCorrelationService.analyze_correlations(min_occurrence=1)
+
+        assert result['error_types'] == {'识别错误': 4, '缺失题目': 1}
+        assert result['total_pages_analyzed'] == 1
+        top = result['correlations'][0]
+        assert (top['error1'], top['error2'], top['co_occurrence']) == ('缺失题目', '识别错误', 2)
+        assert top['strength'] == 2.0
+
+        pair = result['question_correlations'][0]
+        assert (pair['question1'], pair['question2'], pair['co_occurrence']) == ('3', '4', 2)
+        assert pair['strength'] == 1.0
+        assert len(ErrorCorrelationService.analyze_correlations(min_occurrence=1, limit=1)['question_correlations']) == 1
+        assert ErrorCorrelationService.analyze_correlations(min_occurrence=2)['question_correlations'][0]['question2'] == '4'
+
+    def test_filters(self, cube):
+        save(make_task('t1', [make_item(76, ERRORS)], created_at='2026-03-01T10:00:00'))
+        save(make_task('t2', [make_item(5, ERRORS, book='英语七上')], created_at='2026-03-05T10:00:00', subject_id=0))
+
+        assert ErrorCorrelationService.analyze_correlations(start_date='2026-03-02', min_occurrence=1)['error_types'] \
+            == {'识别错误': 2, '缺失题目': 1}
+        by_subject = ErrorCorrelationService.analyze_correlations(subject_id=2, min_occurrence=1)
+        assert {c['book'] for c in by_subject['question_correlations']} == {'数学七上'}
+        by_book = ErrorCorrelationService.analyze_correlations(book_name='英语', min_occurrence=1)
+        assert by_book['total_pages_analyzed'] == 1
+        assert by_book['correlations'][0]['co_occurrence'] == 2
+
+    def test_incremental(self, cube):
+        task = make_task('t1', [make_item(76, ERRORS)])
+        save(task)
+        assert ErrorCorrelationService.analyze_correlations(min_occurrence=1)['correlations']
+
+        task['homework_items'] = [make_item(76, ERRORS[:1])]
+        save(task)
+        result = ErrorCorrelationService.analyze_correlations(min_occurrence=1)
+        assert result['correlations'] == [] and result['question_correlations'] == []
+
+        save(make_task('t2', [make_item(76, ERRORS)]))
+        StorageService.delete_batch_task('t2')
+        assert ErrorCorrelationService.analyze_correlations(min_occurrence=1)['correlations'] == []
+        assert AggregateCubeService.get_status()['pairs'] == 0
+
+
+class TestPatternsAndChains:
+    """测试错误模式和错误链"""
+
+    def test_find_error_patterns(self, cube):
+        save(make_task('t1', [make_item(76, ERRORS)]))
+        result = ErrorCorrelationService.find_error_patterns('识别错误', limit=1)
+        assert result['total_count'] == 2
+        assert result['contexts'] == {'数学七上': 2}
+        assert result['examples'] == [{
+            'book': '数学七上', 'page': '76', 'question': result['examples'][0]['question'],
+            'ai_answer': 'B', 'expected': 'A', 'task_id': 't1'
+        }]
+
+    def test_patterns_keep_masked_error_types(self, cube):
+        # 同一题先后出现两种错误，较早的类型也要有示例
+        save(make_task('t1', [make_item(76, [('3', '识别错误'), ('3', '缺失题目')])], created_at='2026-03-01T10:00:00'))
+        save(make_task('t2', [make_item(77, [('5', '识别错误')])], created_at='2026-03-02T10:00:00'))
+
+        result = ErrorCorrelationService.find_error_patterns('识别错误')
+        assert [(e['task_id'], e['page'], e['question']) for e in result['examples']] == [('t2', '77', '5'),
+                                                                                             ('t1', '76', '3')]
+        assert [e['question'] for e in ErrorCorrelationService.find_error_patterns('缺失题目')['examples']] == ['3']
+
+        StorageService.delete_batch_task('t2')
+        assert [e['task_id'] for e in ErrorCorrelationService.find_error_patterns('识别错误')['examples']] == ['t1']
+
+    def test_error_chain(self, cube):
+        save(make_task('t1', [make_item(76, ERRORS), make_item(77, [('1', '缺失题目')])]))
+        result = ErrorCorrelationService.get_error_chain('t1')
+        assert result['total_chains'] == 1
+        chain = result['chains'][0]
+        assert chain['page'] == '76' and [e['question'] for e in chain['errors']] == ['3', '4']
+        assert ErrorCorrelationService.get_error_chain('t1', page_num=77)['chains'] == []
+        assert ErrorCorrelationService.get_error_chain('missing')['error'] == '任务不存在'
@@ -0,0 +1,170 @@
+"""
+错误样本查询引擎测试：keyset 分页、计数表、增量计数、流式导出
+"""
+import csv
+import json
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import error_sample_service
+from services.error_sample_service import ErrorSampleService, NO_SUBJECT
+from services.storage_service import StorageService
+
+
+def _row(row_id, status='pending', error_type='识别错误-判断错误', subject_id=2):
+    return {
+        'id': row_id, 'sample_id': f's{row_id}', 'task_id': 't1', 'homework_id': f'h{row_id}',
+        'dataset_id': None, 'book_id': 'b1', 'book_name': '数学练习', 'page_num': 1,
+        'question_index': str(row_id), 'subject_id': subject_id, 'error_type': error_type,
+        'base_answer': 'A', 'base_user': 'A', 'hw_user': 'B', 'pic_path': '', 'status': status,
+        'notes': '', 'cluster_id': None, 'created_at': datetime(2026, 1, 1), 'updated_at': None
+    }
+
+
+class FakeDB:
+    """记录 SQL 的 AppDatabaseService 替身"""
+
+    def __init__(self, rows=None, counts=None):
+        self.rows = rows or []
+        self.counts = counts or []
+        self.calls = []
+
+    def execute_query(self, sql, params=None):
+        self.calls.append(('query', sql, params))
+        if 'FROM error_sample_counts' in sql:
+            return self.counts
+        if 'GROUP BY status, subject_id, error_type' in sql:
+            return [{'status': 'pending', 'subject_id': None, 'error_type': 'E1', 'count': 2}]
+        if 'SELECT homework_id, question_index' in sql:
+            return [{'homework_id': 'h1', 'question_index': '1'}]
+        limit = params[-2] if 'OFFSET' in sql else params[-1]
+        rows = self.rows
+        if 'id < %s' in sql:
+            rows = [r for r in rows if r['id'] < params[-2]]
+        return rows[:limit]
+
+    def execute_one(self, sql, params=None):
+        self.calls.append(('one', sql, params))
+        if 'error_sample_counts' in sql:
+            return {'total': 42}
+        return {'total': 7}
+
+    def execute_update(self, sql, params=None):
+        self.calls.append(('update', sql, params))
+        return 2
+
+    def execute_many(self, sql, rows):
+        self.calls.append(('many', sql, rows))
+        return len(rows)
+
+    def iter_query(self, sql, params=None, chunk_size=1000):
+        self.calls.append(('iter', sql, params))
+        for i in range(0, len(self.rows), chunk_size):
+            yield self.rows[i:i + chunk_size]
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    db = FakeDB(rows=[_row(i) for i in range(10, 0, -1)])
+    for name in ('execute_query', 'execute_one', 'execute_update', 'execute_many', 'iter_query'):
+        monkeypatch.setattr(error_sample_service.AppDatabaseService, name, getattr(db, name))
+    return db
+
+
+class TestPagination:
+    def test_first_page_returns_cursor_and_counted_total(self, fake_db):
+        result = ErrorSampleService.get_samples(page_size=4, status='pending', subject_id=2)
+
+        assert [item['sample_id'] for item in result['items']] == ['s10', 's9', 's8', 's7']
+        assert result['next_cursor'] == '7'
+        # 只按计数维度筛选：总数来自计数表，不扫描样本表
+        assert result['total'] == 42
+        assert not any(kind == 'one' and 'COUNT(*)' in sql for kind, sql, _ in fake_db.calls)
+
+    def test_cursor_page_uses_keyset(self, fake_db):
+        result = ErrorSampleService.get_samples(page=2, page_size=4, cursor='7')
+
+        sql = [sql for kind, sql, _ in fake_db.calls if kind == 'query'][-1]
+        assert 'id < %s' in sql and 'OFFSET' not in sql
+        assert [item['sample_id'] for item in result['items']] == ['s6', 's5', 's4', 's3']
+        assert result['next_cursor'] == '3'
+
+    def test_last_page_has_no_cursor(self, fake_db):
+        result = ErrorSampleService.get_samples(page_size=4, cursor='3')
+        assert [item['sample_id'] for item in result['items']] == ['s2', 's1']
+        assert result['next_cursor'] is None
+
+    def test_other_filters_fall_back_to_count(self, fake_db):
+        result = ErrorSampleService.get_samples(task_id='t1', keyword='数学')
+        assert result['total'] == 7
+        count_sql = [sql for kind, sql, _ in fake_db.calls if kind == 'one'][-1]
+        assert 'COUNT(*)' in count_sql and 'task_id = %s' in count_sql
+
+
+def test_statistics_read_counts_table(fake_db):
+    fake_db.counts = [
+        {'status': 'pending', 'subject_id': 2, 'error_type': 'E1', 'sample_count': 3},
+        {'status': 'fixed', 'subject_id': 2, 'error_type': 'E2', 'sample_count': 5},
+        {'status': 'pending', 'subject_id': NO_SUBJECT, 'error_type': 'E1', 'sample_count': 1},
+    ]
+
+    stats = ErrorSampleService.get_statistics()
+
+    assert stats == {
+        'total': 9,
+        'by_status': {'pending': 4, 'fixed': 5},
+        'by_error_type': {'E2': 5, 'E1': 4},
+        'by_subject': {2: 8}
+    }
+    assert list(stats['by_error_type']) == ['E2', 'E1']
+
+
+def test_update_status_moves_counts(fake_db):
+    assert ErrorSampleService.update_status(['s1', 's2'], 'fixed') == 2
+
+    many = [(sql, rows) for kind, sql, rows in fake_db.calls if kind == 'many']
+    assert len(many) == 1
+    assert sorted(many[0][1]) == [('fixed', NO_SUBJECT, 'E1', 2), ('pending', NO_SUBJECT, 'E1', -2)]
+
+
+def test_collect_batches_inserts_and_counts(fake_db, monkeypatch, tmp_path):
+    monkeypatch.setattr(StorageService, 'BATCH_TASKS_DIR', str(tmp_path))
+    task = {'homework_items': [
+        {'homework_id': 'h1', 'book_name': '数学练习', 'evaluation': {'errors': [
+            {'index': '1', 'error_type': 'E1'}, {'index': '2', 'error_type': 'E1'}]}},
+        {'homework_id': 'h2', 'book_name': '英语', 'evaluation': {'errors': [
+            {'index': '1', 'error_type': 'E2'}, {'index': '1', 'error_type': 'E2'}]}},
+    ]}
+    (tmp_path / 't1.json').write_text(json.dumps(task), encoding='utf-8')
+
+    result = ErrorSampleService.collect_from_task('t1')
+
+    assert result == {'collected': 2, 'skipped': 2, 'errors': []}
+    inserts = [rows for kind, sql, rows in fake_db.calls if kind == 'many' and 'INTO error_samples' in sql]
+    assert [(r[2], r[7]) for r in inserts[0]] == [('h1', '2'), ('h2', '1')]
+    counts = [rows for kind, sql, rows in fake_db.calls if kind == 'many' and 'error_sample_counts' in sql]
+    assert sorted(counts[0]) == [('pending', 0, 'E2', 1), ('pending', 2, 'E1', 1)]
+
+
+def test_export_streams_rows(fake_db, monkeypatch, tmp_path):
+    monkeypatch.setattr(StorageService, 'EXPORTS_DIR', str(tmp_path))
+    monkeypatch.setattr(error_sample_service, 'EXPORT_CHUNK_SIZE', 3)
+
+    path = ErrorSampleService.export_samples({'status': 'pending'}, 'csv')
+
+    kind, sql, params = fake_db.calls[-1]
+    assert kind == 'iter' and 'status = %s' in sql and params == ('pending',)
+    with open(path, encoding='utf-8-sig') as f:
+        rows = list(csv.reader(f))
+    assert len(rows) == 11
+    assert rows[1][0] == 's10'
+
+    xlsx = ErrorSampleService.export_samples({}, 'xlsx')
+    from openpyxl import load_workbook
+    ws = load_workbook(xlsx).active
+    assert ws.max_row == 11 and ws.title == '错误样本'
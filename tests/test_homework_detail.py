@@ -0,0 +1,147 @@
+"""
+作业评估详情缓存测试
+
+测试 HomeworkDetailService 及 get_homework_detail：
+- 首次查看计算并缓存，再次查看不重新评估
+- 作业重新评估（识别结果变化）、更换数据集、数据集内容修改后缓存失效
+- 批量预计算后查看详情直接命中，数据集只加载一次
+- 删除任务时删除详情缓存
+
+运行方式:
+    pytest tests/test_homework_detail.py -v
+"""
+import os
+import json
+
+import pytest
+from flask import Flask
+
+import services.storage_service as storage_module
+from services.storage_service import StorageService
+from services.homework_detail_service import HomeworkDetailService
+
+
+BASE_EFFECT = [{'index': '1', 'answer': 'A', 'userAnswer': 'A', 'correct': 'yes'}]
+
+
+def write_dataset(tmp_path, dataset_id, base_effect, page='76'):
+    with open(os.path.join(str(tmp_path / 'datasets'), f'{dataset_id}.json'), 'w', encoding='utf-8') as f:
+        json.dump({'dataset_id': dataset_id, 'book_id': 'b1', 'base_effects': {page: base_effect}}, f)
+
+
+def write_task(tmp_path, items):
+    task = {'task_id': 't1', 'subject_id': 2, 'homework_items': items}
+    with open(os.path.join(str(tmp_path / 'batch_tasks'), 't1.json'), 'w', encoding='utf-8') as f:
+        json.dump(task, f)
+    return task
+
+
+def make_item(homework_id, answer='A', dataset_id='d1'):
+    return {
+        'homework_id': homework_id,
+        'book_id': 'b1',
+        'page_num': 76,
+        'matched_dataset': dataset_id,
+        'status': 'completed',
+        'homework_result': json.dumps([{'index': '1', 'userAnswer': answer}]),
+        'data_value': '[]'
+    }
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    import routes.batch_evaluation as be
+    for name in ('datasets', 'batch_tasks'):
+        os.makedirs(str(tmp_path / name))
+    monkeypatch.setattr(storage_module, 'USE_DB_STORAGE', False)
+    monkeypatch.setattr(StorageService, 'DATASETS_DIR', str(tmp_path / 'datasets'))
+    monkeypatch.setattr(StorageService, 'BATCH_TASKS_DIR', str(tmp_path / 'batch_tasks'))
+    monkeypatch.setattr(StorageService, 'BASELINE_EFFECTS_DIR', str(tmp_path / 'baseline_effects'))
+    monkeypatch.setattr(HomeworkDetailService, 'DETAIL_DIR', str(tmp_path / 'homework_details'))
+
+    calls = []
+
+    def fake_evaluation(base_effect, homework_result, **kwargs):
+        calls.append(homework_result[0]['userAnswer'])
+        correct = homework_result[0]['userAnswer'] == base_effect[0]['answer']
+        return {'accuracy': 1.0 if correct else 0.0, 'total_questions': 1,
+                'correct_count': int(correct), 'error_count': int(not correct), 'errors': []}
+
+    monkeypatch.setattr(be, 'do_evaluation', fake_evaluation)
+    write_dataset(tmp_path, 'd1', BASE_EFFECT)
+    app = Flask(__name__)
+    app.register_blueprint(be.batch_evaluation_bp, url_prefix='/api/batch')
+    return {'client': app.test_client(), 'calls': calls, 'tmp_path': tmp_path}
+
+
+def get_detail(env, homework_id='h1'):
+    resp = env['client'].get(f'/api/batch/tasks/t1/homework/{homework_id}').get_json()
+    assert resp['success'], resp
+    return resp['data']
+
+
+class TestMemoizedDetail:
+    """测试详情缓存命中与失效"""
+
+    def test_second_view_uses_cache(self, env):
+        write_task(env['tmp_path'], [make_item('h1')])
+        assert get_detail(env)['accuracy'] == 1.0
+        assert get_detail(env)['evaluation']['correct_count'] == 1
+        assert env['calls'] == ['A']
+
+    def test_reevaluated_item_recomputes(self, env):
+        write_task(env['tmp_path'], [make_item('h1')])
+        get_detail(env)
+        write_task(env['tmp_path'], [make_item('h1', answer='B')])
+        assert get_detail(env)['accuracy'] == 0.0
+        assert env['calls'] == ['A', 'B']
+
+    def test_item_fields_not_stale(self, env):
+        item = make_item('h1')
+        write_task(env['tmp_path'], [item])
+        get_detail(env)
+        item['student_name'] = '张三'
+        write_task(env['tmp_path'], [item])
+        assert get_detail(env)['student_name'] == '张三'
+        assert len(env['calls']) == 1
+
+    def test_dataset_change_invalidates(self, env):
+        write_task(env['tmp_path'], [make_item('h1')])
+        get_detail(env)
+        write_dataset(env['tmp_path'], 'd1', [{'index': '1', 'answer': 'C'}])
+        os.utime(os.path.join(str(env['tmp_path'] / 'datasets'), 'd1.json'), ns=(1, 1))
+        detail = get_detail(env)
+        assert detail['base_effect'][0]['answer'] == 'C'
+        assert detail['accuracy'] == 0.0
+        assert len(env['calls']) == 2
+
+    def test_projection_served_from_cache(self, env):
+        write_task(env['tmp_path'], [make_item('h1')])
+        get_detail(env)
+        resp = env['client'].get('/api/batch/tasks/t1/homework/h1?fields=evaluation.accuracy').get_json()
+        assert resp['data'] == {'evaluation': {'accuracy': 1.0}}
+        assert len(env['calls']) == 1
+
+
+class TestPrecompute:
+    """测试批量预计算"""
+
+    def test_precompute_then_lookup(self, env, monkeypatch):
+        from routes.batch_evaluation import precompute_homework_details
+        task = write_task(env['tmp_path'], [make_item('h1'), make_item('h2', answer='B')])
+        loads = []
+        original = StorageService.load_dataset
+        monkeypatch.setattr(StorageService, 'load_dataset',
+                            staticmethod(lambda dataset_id: loads.append(dataset_id) or original(dataset_id)))
+
+        assert precompute_homework_details('t1', task) == 2
+        assert loads == ['d1']
+        assert get_detail(env, 'h2')['accuracy'] == 0.0
+        assert env['calls'] == ['A', 'B']
+
+    def test_delete_task_removes_details(self, env):
+        from routes.batch_evaluation import precompute_homework_details
+        task = write_task(env['tmp_path'], [make_item('h1')])
+        precompute_homework_details('t1', task)
+        StorageService.delete_batch_task('t1')
+        assert not os.path.exists(os.path.join(HomeworkDetailService.DETAIL_DIR, 't1'))
@@ -0,0 +1,112 @@
+"""
+作业列表查询测试
+
+测试 HomeworkQueryService 及使用它的列表接口（数据库调用用 mock 代替）：
+- 列表 SQL 不查询 homework_result，题目数量由 JSON_LENGTH 计算
+- 按 (create_time, id) 的键集分页：多取一行判断下一页，游标还原为查询条件
+- 大字段按需加载
+- /api/batch/homework 和 /api/dataset/available-homework 的响应格式和错误游标
+
+运行方式:
+    pytest tests/test_homework_query.py -v
+"""
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+from flask import Flask
+
+from services.homework_query_service import HomeworkQueryService
+
+
+def make_rows(n, start=100):
+    return [{
+        'id': start - i,
+        'student_id': f's{i}',
+        'student_name': f'学生{i}',
+        'hw_publish_id': 9,
+        'subject_id': 2,
+        'page_num': 76,
+        'pic_path': f'/p/{i}.jpg',
+        'create_time': datetime(2026, 1, 1, 10, 0, 0),
+        'question_count': 12,
+        'homework_name': '作业',
+        'book_id': 7,
+        'book_name': '数学七上'
+    } for i in range(n)]
+
+
+class TestListHomework:
+    """测试列表查询"""
+
+    def test_light_columns_and_question_count(self):
+        with patch('services.homework_query_service.DatabaseService.execute_query', return_value=make_rows(2)) as query:
+            rows, next_cursor = HomeworkQueryService.list_homework(hours=6, subject_id=2, limit=5)
+        sql, params = query.call_args[0]
+        select_list = sql.split('FROM')[0]
+        assert 'h.homework_result,' not in select_list and 'data_value' not in select_list
+        assert 'JSON_LENGTH(h.homework_result)' in sql
+        assert 'ORDER BY h.create_time DESC, h.id DESC' in sql
+        assert params == (6, 2, 6)
+        assert next_cursor is None
+        assert rows[0]['question_count'] == 12
+
+    def test_keyset_pagination(self):
+        with patch('services.homework_query_service.DatabaseService.execute_query', return_value=make_rows(3)):
+            rows, next_cursor = HomeworkQueryService.list_homework(limit=2)
+        assert [r['id'] for r in rows] == [100, 99]
+        assert next_cursor
+
+        with patch('services.homework_query_service.DatabaseService.execute_query', return_value=[]) as query:
+            HomeworkQueryService.list_homework(limit=2, cursor=next_cursor)
+        sql, params = query.call_args[0]
+        assert '(h.create_time < %s OR (h.create_time = %s AND h.id < %s))' in sql
+        assert params == ('2026-01-01 10:00:00.000000', '2026-01-01 10:00:00.000000', 99, 3)
+
+    def test_book_filter_joins_publish_only(self):
+        with patch('services.homework_query_service.DatabaseService.execute_query', return_value=[]) as query:
+            HomeworkQueryService.list_homework(book_id='7', page_num=76, require_pic=True, with_names=False)
+        sql = query.call_args[0][0]
+        assert 'zp_homework_publish' in sql and 'zp_make_book' not in sql
+        assert 'p.book_id = %s' in sql
+
+    def test_invalid_cursor(self):
+        with pytest.raises(ValueError):
+            HomeworkQueryService.list_homework(cursor='bad')
+
+    def test_load_blobs(self):
+        rows = [{'id': 1, 'homework_result': '[]'}]
+        with patch('services.homework_query_service.DatabaseService.execute_query', return_value=rows) as query:
+            blobs = HomeworkQueryService.load_blobs([1], ('homework_result', 'password'))
+        assert blobs == {'1': {'homework_result': '[]'}}
+        assert 'password' not in query.call_args[0][0]
+
+
+class TestRoutes:
+    """测试列表接口"""
+
+    @pytest.fixture
+    def client(self):
+        from routes.batch_evaluation import batch_evaluation_bp
+        from routes.dataset_manage import dataset_manage_bp
+        app = Flask(__name__)
+        app.register_blueprint(batch_evaluation_bp, url_prefix='/api/batch')
+        app.register_blueprint(dataset_manage_bp)
+        return app.test_client()
+
+    def test_batch_homework(self, client):
+        with patch('services.homework_query_service.DatabaseService.execute_query', return_value=make_rows(3)):
+            resp = client.get('/api/batch/homework?hw_publish_ids=9&limit=2').get_json()
+        assert resp['success']
+        assert [r['id'] for r in resp['data']] == [100, 99]
+        assert resp['data'][0]['book_id'] == '7'
+        assert resp['next_cursor']
+        assert client.get('/api/batch/homework?cursor=bad').status_code == 400
+
+    def test_available_homework(self, client):
+        with patch('services.homework_query_service.DatabaseService.execute_query', return_value=make_rows(1)), \
+                patch('routes.dataset_manage.ConfigService.load_config', return_value={'pic_base_url': 'http://img'}):
+            resp = client.get('/api/dataset/available-homework?book_id=7&page_num=76').get_json()
+        assert resp['data'][0]['pic_url'] == 'http://img/p/0.jpg'
+        assert resp['data'][0]['question_count'] == 12
+        assert resp['next_cursor'] is None
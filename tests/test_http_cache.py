@@ -0,0 +1,143 @@
+"""
+条件 GET 测试
+
+测试 utils.http_cache.conditional_get：
+- 版本一致时返回 304，且不执行路由函数
+- If-Modified-Since 校验
+- 版本变化、查询参数不同时返回 200 和新的 ETag
+- 路由执行前无版本时，执行后补充 ETag
+- 非 GET 请求不受影响
+- batch_task_detail 按任务文件版本返回 304
+
+运行方式:
+    pytest tests/test_http_cache.py -v
+"""
+import os
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask, Blueprint, jsonify
+
+from utils.http_cache import conditional_get
+
+
+@pytest.fixture
+def env():
+    state = {'version': ('v1', datetime(2026, 1, 1, 8, 0, 0)), 'calls': 0}
+    bp = Blueprint('demo', __name__)
+
+    @bp.route('/api/demo', methods=['GET', 'POST'])
+    @conditional_get(lambda: state['version'])
+    def demo():
+        state['calls'] += 1
+        return jsonify({'success': True, 'calls': state['calls']})
+
+    app = Flask(__name__)
+    app.register_blueprint(bp)
+    state['client'] = app.test_client()
+    return state
+
+
+class TestConditionalGet:
+    """测试条件 GET 装饰器"""
+
+    def test_matching_etag_returns_304_without_handler(self, env):
+        client = env['client']
+        first = client.get('/api/demo')
+        assert first.status_code == 200
+        etag = first.headers['ETag']
+        assert etag.startswith('W/"')
+        assert first.headers['Cache-Control'] == 'private, no-cache'
+        assert 'Last-Modified' in first.headers
+
+        second = client.get('/api/demo', headers={'If-None-Match': etag})
+        assert second.status_code == 304
+        assert second.headers['ETag'] == etag
+        assert env['calls'] == 1
+
+    def test_if_modified_since(self, env):
+        client = env['client']
+        last_modified = client.get('/api/demo').headers['Last-Modified']
+        assert client.get('/api/demo', headers={'If-Modified-Since': last_modified}).status_code == 304
+
+        env['version'] = ('v2', datetime(2026, 1, 1, 8, 0, 0) + timedelta(minutes=5))
+        assert client.get('/api/demo', headers={'If-Modified-Since': last_modified}).status_code == 200
+
+    def test_version_or_params_change_returns_200(self, env):
+        client = env['client']
+        etag = client.get('/api/demo').headers['ETag']
+
+        other = client.get('/api/demo?range=week', headers={'If-None-Match': etag})
+        assert other.status_code == 200
+        assert other.headers['ETag'] != etag
+
+        env['version'] = ('v2', None)
+        changed = client.get('/api/demo', headers={'If-None-Match': etag})
+        assert changed.status_code == 200
+        assert changed.headers['ETag'] != etag
+        assert 'Last-Modified' not in changed.headers
+
+    def test_version_after_handler(self):
+        version = {'value': None}
+        bp = Blueprint('lazy', __name__)
+
+        @bp.route('/api/lazy')
+        @conditional_get(lambda: version['value'])
+        def lazy():
+            # 模拟路由函数计算并写入缓存
+            version['value'] = ('computed', None)
+            return jsonify({'success': True})
+
+        app = Flask(__name__)
+        app.register_blueprint(bp)
+        client = app.test_client()
+        etag = client.get('/api/lazy').headers['ETag']
+        assert client.get('/api/lazy', headers={'If-None-Match': etag}).status_code == 304
+
+    def test_non_get_not_affected(self, env):
+        client = env['client']
+        etag = client.get('/api/demo').headers['ETag']
+        resp = client.post('/api/demo', headers={'If-None-Match': etag})
+        assert resp.status_code == 200
+        assert 'ETag' not in resp.headers
+
+
+class TestBatchTaskDetail:
+    """测试任务详情的条件 GET"""
+
+    def test_task_detail_304_until_saved(self, tmp_path, monkeypatch):
+        from services.storage_service import StorageService
+        from routes.batch_evaluation import batch_evaluation_bp
+        monkeypatch.setattr(StorageService, 'BATCH_TASKS_DIR', str(tmp_path))
+        task = {'task_id': 't1', 'name': '任务', 'homework_items': []}
+        with open(os.path.join(str(tmp_path), 't1.json'), 'w', encoding='utf-8') as f:
+            json.dump(task, f)
+
+        app = Flask(__name__)
+        app.register_blueprint(batch_evaluation_bp, url_prefix='/api/batch')
+        client = app.test_client()
+
+        first = client.get('/api/batch/tasks/t1')
+        etag = first.headers['ETag']
+        assert first.get_json()['data']['name'] == '任务'
+        assert client.get('/api/batch/tasks/t1', headers={'If-None-Match': etag}).status_code == 304
+        # slim 模式是不同的表示
+        assert client.get('/api/batch/tasks/t1?slim=1', headers={'If-None-Match': etag}).status_code == 200
+
+        task['name'] = '任务-改'
+        with open(os.path.join(str(tmp_path), 't1.json'), 'w', encoding='utf-8') as f:
+            json.dump(task, f, ensure_ascii=False)
+        resp = client.get('/api/batch/tasks/t1', headers={'If-None-Match': etag})
+        assert resp.status_code == 200
+        assert resp.get_json()['data']['name'] == '任务-改'
+
+    def test_missing_task_has_no_etag(self, tmp_path, monkeypatch):
+        from services.storage_service import StorageService
+        from routes.batch_evaluation import batch_evaluation_bp
+        monkeypatch.setattr(StorageService, 'BATCH_TASKS_DIR', str(tmp_path))
+        app = Flask(__name__)
+        app.register_blueprint(batch_evaluation_bp, url_prefix='/api/batch')
+        resp = app.test_client().get('/api/batch/tasks/missing', headers={'If-None-Match': '*'})
+        assert resp.status_code == 200
+        assert 'ETag' not in resp.headers
@@ -0,0 +1,149 @@
+"""
+LLM 替身服务器测试
+
+测试 benchmarks.llm_standin：
+- 合成响应与流式输出
+- 429 注入
+- 回放录制文件；录制模式上游失败时返回 502
+- LLM_BASE_URL 改写服务商地址
+
+运行方式:
+    pytest tests/test_llm_standin.py -v
+"""
+import json
+import threading
+import pytest
+import requests
+
+from benchmarks.llm_standin import StandinConfig, Cassette, LatencyModel, create_server
+from services.config_service import ConfigService
+
+
+@pytest.fixture
+def standin(tmp_path):
+    """启动替身服务器，返回 (base_url, config) 工厂"""
+    servers = []
+
+    def start(**kwargs):
+        kwargs.setdefault('cassette_dir', str(tmp_path))
+        config = StandinConfig(**kwargs)
+        server = create_server(config, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f'http://127.0.0.1:{server.server_address[1]}', config
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+PAYLOAD = {'model': 'deepseek-chat', 'messages': [{'role': 'user', 'content': '你好'}]}
+
+
+class TestSynth:
+    """测试合成模式"""
+
+    def test_synth_response_is_openai_compatible(self, standin):
+        base_url, _ = standin(synth_content='{"ok": true}')
+        resp = requests.post(f'{base_url}/deepseek/chat/completions', json=PAYLOAD, timeout=5)
+
+        assert resp.status_code == 200
+        body = resp.json()
+        assert body['choices'][0]['message']['content'] == '{"ok": true}'
+        assert body['usage']['total_tokens'] > 0
+
+    def test_stream_response(self, standin):
+        base_url, _ = standin(synth_content='abcdefghijklmnopqrstuvwxyz')
+        resp = requests.post(f'{base_url}/v1/chat/completions', json=dict(PAYLOAD, stream=True),
+                             stream=True, timeout=5)
+
+        lines = [l.decode('utf-8') for l in resp.iter_lines() if l]
+        assert lines[-1] == 'data: [DONE]'
+        content = ''.join(
+            json.loads(l[6:])['choices'][0]['delta'].get('content', '') for l in lines[:-1]
+        )
+        assert content == 'abcdefghijklmnopqrstuvwxyz'
+
+    def test_rate_limit_injection(self, standin):
+        base_url, config = standin(rate_429=1.0)
+        resp = requests.post(f'{base_url}/qwen/chat/completions', json=PAYLOAD, timeout=5)
+
+        assert resp.status_code == 429
+        assert config.stats['rate_limited'] == 1
+
+
+class TestReplay:
+    """测试回放模式"""
+
+    def test_replay_recorded_response(self, standin, tmp_path):
+        cassette = Cassette(str(tmp_path))
+        key = Cassette.fingerprint('deepseek', PAYLOAD)
+        cassette.save(key, {'response': {'choices': [{'message': {'content': '录制内容'}}]}, 'status': 200})
+
+        base_url, config = standin(mode='replay')
+        resp = requests.post(f'{base_url}/deepseek/chat/completions', json=PAYLOAD, timeout=5)
+
+        assert resp.json()['choices'][0]['message']['content'] == '录制内容'
+        assert config.stats['replayed'] == 1
+
+    def test_replay_miss_error(self, standin):
+        base_url, config = standin(mode='replay', miss='error')
+        resp = requests.post(f'{base_url}/deepseek/chat/completions', json=PAYLOAD, timeout=5)
+
+        assert resp.status_code == 404
+        assert config.stats['misses'] == 1
+
+    def test_record_upstream_failure_returns_502(self, standin, monkeypatch):
+        from benchmarks import llm_standin
+        monkeypatch.setitem(llm_standin.UPSTREAM_URLS, 'deepseek', 'http://127.0.0.1:1/chat/completions')
+        base_url, config = standin(mode='record')
+        resp = requests.post(f'{base_url}/deepseek/chat/completions', json=PAYLOAD, timeout=5)
+
+        assert resp.status_code == 502
+        assert '上游请求失败' in resp.json()['error']['message']
+        assert config.stats['recorded'] == 0
+
+    def test_fingerprint_ignores_stream_flag(self):
+        assert Cassette.fingerprint('gpt', PAYLOAD) == Cassette.fingerprint('gpt', dict(PAYLOAD, stream=True))
+        assert Cassette.fingerprint('gpt', PAYLOAD) != Cassette.fingerprint('qwen', PAYLOAD)
+
+
+class TestLatencyModel:
+    """测试延迟分布"""
+
+    def test_seeded_distribution_is_deterministic(self):
+        import random
+        a = [LatencyModel('lognormal:5,0.5', random.Random(1)).sample() for _ in range(3)]
+        b = [LatencyModel('lognormal:5,0.5', random.Random(1)).sample() for _ in range(3)]
+        assert a == b
+
+    def test_recorded_latency(self):
+        assert LatencyModel('recorded').sample(123.0) == 123.0
+
+
+class TestProviderUrl:
+    """测试服务商地址配置"""
+
+    def test_base_url_overrides_all_providers(self, monkeypatch):
+        monkeypatch.setenv('LLM_BASE_URL', 'http://127.0.0.1:8900/')
+        assert ConfigService.get_llm_api_url('deepseek', {}) == 'http://127.0.0.1:8900/deepseek/chat/completions'
+        assert ConfigService.get_llm_api_url('doubao', {'api_url': 'https://x'}) == 'http://127.0.0.1:8900/doubao/chat/completions'
+
+    def test_config_and_default(self, monkeypatch):
+        monkeypatch.delenv('LLM_BASE_URL', raising=False)
+        assert ConfigService.get_llm_api_url('doubao', {'api_url': 'https://x'}) == 'https://x'
+        assert ConfigService.get_llm_api_url('qwen', {}).startswith('https://dashscope')
+
+    def test_validate_api_key_uses_base_url(self, monkeypatch, standin):
+        from flask import Flask
+        from routes.common import common_bp
+        base_url, _ = standin()
+        monkeypatch.setenv('LLM_BASE_URL', base_url)
+        monkeypatch.setattr(ConfigService, 'load_config', staticmethod(lambda **kwargs: {}))
+        app = Flask(__name__)
+        app.register_blueprint(common_bp)
+
+        for key_type in ('doubao', 'deepseek', 'qwen'):
+            resp = app.test_client().post('/api/validate-api-key', json={'type': key_type, 'api_key': 'k'})
+            assert resp.get_json() == {'valid': True}
@@ -0,0 +1,84 @@
+"""
+LLM 用量汇总服务测试
+
+测试 LLMUsageService：
+- 日志行聚合为小时/日桶
+- 汇总表累加写入
+- 基于日汇总表的 token 统计
+
+运行方式:
+    pytest tests/test_llm_usage_service.py -v
+"""
+from datetime import datetime, date, timedelta
+from unittest.mock import patch
+
+from services.llm_usage_service import LLMUsageService
+from services.telemetry_writer import TelemetryWriter
+
+
+def _log(created_at, model='deepseek-v3.2', analysis_type='cluster', status='success', total=100):
+    return {
+        'log_id': 'x', 'model': model, 'analysis_type': analysis_type, 'status': status,
+        'prompt_tokens': total // 2, 'completion_tokens': total - total // 2,
+        'total_tokens': total, 'duration_ms': 10, 'created_at': created_at
+    }
+
+
+class TestAggregateRows:
+    """测试日志聚合"""
+
+    def test_rows_bucketed_by_hour_and_day(self):
+        rows = [
+            _log(datetime(2026, 3, 1, 9, 5)),
+            _log(datetime(2026, 3, 1, 9, 55)),
+            _log(datetime(2026, 3, 1, 10, 1)),
+        ]
+        hourly, daily = LLMUsageService.aggregate_rows(rows)
+
+        assert len(hourly) == 2
+        nine = hourly[(datetime(2026, 3, 1, 9), 'deepseek-v3.2', 'cluster', 'success')]
+        assert nine['calls'] == 2
+        assert nine['total_tokens'] == 200
+        day = daily[(date(2026, 3, 1), 'deepseek-v3.2', 'cluster', 'success')]
+        assert day['calls'] == 3
+        assert day['duration_ms'] == 30
+
+    def test_replayed_string_timestamp(self):
+        """落盘回放后 created_at 为字符串"""
+        _, daily = LLMUsageService.aggregate_rows([_log('2026-03-01 09:05:00.123456', model=None)])
+        assert (date(2026, 3, 1), '', 'cluster', 'success') in daily
+
+    @patch('services.llm_usage_service.AppDatabaseService')
+    def test_apply_log_rows_upserts_both_tables(self, mock_db):
+        LLMUsageService.apply_log_rows([_log(datetime(2026, 3, 1, 9))])
+
+        tables = [call[0][0] for call in mock_db.execute_many.call_args_list]
+        assert 'llm_usage_hourly' in tables[0]
+        assert 'llm_usage_daily' in tables[1]
+        assert 'ON DUPLICATE KEY UPDATE' in tables[0]
+
+    def test_registered_as_flush_hook(self):
+        assert LLMUsageService.apply_log_rows in TelemetryWriter._flush_hooks['llm_call_logs']
+
+
+class TestGetTokenStats:
+    """测试统计查询"""
+
+    @patch('services.llm_usage_service.AppDatabaseService')
+    def test_stats_from_daily_rollup(self, mock_db):
+        today = date.today()
+        mock_db.execute_query.return_value = [
+            {'bucket_date': today, 'model': 'm1', 'analysis_type': 't1', 'status': 'success', 'calls': 2, 'total_tokens': 200},
+            {'bucket_date': today, 'model': 'm1', 'analysis_type': 't1', 'status': 'failed', 'calls': 1, 'total_tokens': 0},
+            {'bucket_date': today - timedelta(days=3), 'model': 'm2', 'analysis_type': 't1', 'status': 'success', 'calls': 1, 'total_tokens': 50},
+            {'bucket_date': today - timedelta(days=20), 'model': 'm2', 'analysis_type': 't2', 'status': 'success', 'calls': 4, 'total_tokens': 400},
+        ]
+
+        stats = LLMUsageService.get_token_stats(days=7)
+
+        assert mock_db.execute_query.call_count == 1
+        assert stats['today'] == {'tokens': 200, 'calls': 2}
+        assert stats['week'] == {'tokens': 250, 'calls': 3}
+        assert stats['month'] == {'tokens': 650, 'calls': 7}
+        assert stats['by_model'] == {'m1': {'tokens': 200, 'calls': 3}, 'm2': {'tokens': 50, 'calls': 1}}
+        assert 't2' not in stats['by_type']
@@ -0,0 +1,124 @@
+"""
+字段投影与分页测试
+
+测试 utils.projection 以及任务详情 / 作业详情接口的 fields、过滤和游标分页：
+- 嵌套路径解析与投影（列表逐元素投影）
+- 游标编码、解析和错误游标
+- only_errors / page_num 过滤在分页之前执行
+- 作业详情不需要评估结果时跳过重新评估
+
+运行方式:
+    pytest tests/test_projection.py -v
+"""
+import os
+import json
+
+import pytest
+from flask import Flask
+
+from utils.projection import parse_fields, project, paginate, decode_cursor, encode_cursor
+
+
+class TestProjection:
+    """测试字段投影"""
+
+    def test_parse_nested_paths(self):
+        tree = parse_fields('name, homework_items.accuracy,homework_items.evaluation.errors')
+        assert tree == {'name': {}, 'homework_items': {'accuracy': {}, 'evaluation': {'errors': {}}}}
+        assert parse_fields('') is None
+        # 同时选择整体和子字段时保留整体
+        assert parse_fields('a,a.b') == {'a': {}}
+        assert parse_fields('a.b,a') == {'a': {}}
+        with pytest.raises(ValueError):
+            parse_fields('a..b')
+
+    def test_project_lists_and_missing_fields(self):
+        data = {
+            'name': '任务',
+            'homework_items': [
+                {'homework_id': 'h1', 'homework_result': '[...]', 'evaluation': {'errors': [1], 'accuracy': 0.5}},
+                {'homework_id': 'h2'}
+            ]
+        }
+        result = project(data, parse_fields('homework_items.homework_id,homework_items.evaluation.errors,missing'))
+        assert result == {'homework_items': [
+            {'homework_id': 'h1', 'evaluation': {'errors': [1]}},
+            {'homework_id': 'h2'}
+        ]}
+        assert project(data, None) is data
+
+    def test_paginate(self):
+        items = list(range(5))
+        page, paging = paginate(items, None, 2)
+        assert page == [0, 1]
+        page, paging = paginate(items, paging['next_cursor'], 2)
+        assert page == [2, 3]
+        page, paging = paginate(items, paging['next_cursor'], 2)
+        assert page == [4]
+        assert paging == {'total': 5, 'limit': 2, 'next_cursor': None}
+        assert decode_cursor(encode_cursor(3)) == 3
+        with pytest.raises(ValueError):
+            decode_cursor('not-a-cursor')
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    from services.storage_service import StorageService
+    from routes.batch_evaluation import batch_evaluation_bp
+    monkeypatch.setattr(StorageService, 'BATCH_TASKS_DIR', str(tmp_path))
+    items = []
+    for i in range(6):
+        items.append({
+            'homework_id': f'h{i}',
+            'page_num': 76 + i % 2,
+            'status': 'completed',
+            'homework_result': json.dumps([{'index': '1', 'userAnswer': 'A'}]),
+            'data_value': '[]',
+            'evaluation': {'error_count': i % 3, 'errors': [{'index': '1'}] * (i % 3)}
+        })
+    task = {'task_id': 't1', 'name': '任务', 'subject_id': 2, 'homework_items': items}
+    with open(os.path.join(str(tmp_path), 't1.json'), 'w', encoding='utf-8') as f:
+        json.dump(task, f)
+    app = Flask(__name__)
+    app.register_blueprint(batch_evaluation_bp, url_prefix='/api/batch')
+    return app.test_client()
+
+
+class TestTaskDetail:
+    """测试任务详情投影、过滤和分页"""
+
+    def test_fields_skip_heavy_data(self, client):
+        resp = client.get('/api/batch/tasks/t1?fields=name,homework_items.homework_id').get_json()
+        assert resp['data'] == {'name': '任务', 'homework_items': [{'homework_id': f'h{i}'} for i in range(6)]}
+        assert 'paging' not in resp
+
+    def test_filter_then_page(self, client):
+        url = '/api/batch/tasks/t1?only_errors=1&page_num=76&limit=1&fields=homework_items.homework_id'
+        first = client.get(url).get_json()
+        # 有错题且在第 76 页的作业：h2、h4
+        assert first['data']['homework_items'] == [{'homework_id': 'h2'}]
+        assert first['paging']['total'] == 2
+        second = client.get(url + '&cursor=' + first['paging']['next_cursor']).get_json()
+        assert second['data']['homework_items'] == [{'homework_id': 'h4'}]
+        assert second['paging']['next_cursor'] is None
+
+    def test_invalid_params(self, client):
+        assert client.get('/api/batch/tasks/t1?cursor=bad').status_code == 400
+        assert client.get('/api/batch/tasks/t1?limit=0').status_code == 400
+
+    def test_slim_mode_pages(self, client):
+        resp = client.get('/api/batch/tasks/t1?slim=1&limit=4').get_json()
+        assert len(resp['data']['homework_items']) == 4
+        assert 'homework_result' not in resp['data']['homework_items'][0]
+
+
+class TestHomeworkDetail:
+    """测试作业详情投影"""
+
+    def test_fields_skip_evaluation(self, client, monkeypatch):
+        import routes.batch_evaluation as be
+        calls = []
+        monkeypatch.setattr(be, 'do_evaluation', lambda *a, **k: calls.append(1) or {})
+        resp = client.get('/api/batch/tasks/t1/homework/h1?fields=homework_id,ai_result').get_json()
+        assert resp['data'] == {'homework_id': 'h1', 'ai_result': [{'index': '1', 'userAnswer': 'A'}]}
+        assert calls == []
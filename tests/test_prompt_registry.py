@@ -0,0 +1,120 @@
+"""
+提示词注册表测试
+
+测试 services.prompt_registry：
+- 预解析模板的渲染结果与 str.format 一致
+- 文件变化后重新加载，版本号随内容变化
+- prompt_configs 表按版本戳重新加载
+
+运行方式:
+    pytest tests/test_prompt_registry.py -v
+"""
+import os
+import json
+import pytest
+from unittest.mock import patch
+
+from services.config_service import ConfigService
+from services.prompt_registry import PromptRegistry, PromptTemplate
+from services import semantic_eval_service
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    """使用临时 config.json / prompts.json"""
+    config_path = tmp_path / 'config.json'
+    prompts_path = tmp_path / 'prompts.json'
+    config_path.write_text(json.dumps({'prompts': {'recognize': '识别提示词', 'compare_answer': '比对'}}), encoding='utf-8')
+    prompts_path.write_text(json.dumps([
+        {'name': '模板', 'key': 'semantic_eval_template', 'content': '学科 {subject}，题号 {index}，{{JSON}}'},
+        {'name': '无 key', 'content': '忽略'}
+    ]), encoding='utf-8')
+    monkeypatch.setattr(ConfigService, 'CONFIG_FILE', str(config_path))
+    monkeypatch.setattr(ConfigService, 'PROMPTS_FILE', str(prompts_path))
+    monkeypatch.setattr(PromptRegistry, 'FILE_CHECK_INTERVAL', 0)
+    ConfigService.invalidate_config_cache()
+    PromptRegistry.invalidate()
+    PromptRegistry.invalidate_db()
+    yield prompts_path
+    ConfigService.invalidate_config_cache()
+    PromptRegistry.invalidate()
+    PromptRegistry.invalidate_db()
+
+
+class TestPromptTemplate:
+    """测试模板预解析"""
+
+    @pytest.mark.parametrize('template', [
+        semantic_eval_service.DEFAULT_SEMANTIC_EVAL_TEMPLATE,
+        semantic_eval_service.DEFAULT_BATCH_EVAL_TEMPLATE,
+        semantic_eval_service.DEFAULT_SUMMARY_REPORT_TEMPLATE,
+    ])
+    def test_render_matches_str_format(self, template):
+        fields = PromptTemplate('t', template).fields
+        kwargs = {name: f'<{name}>' for name in fields}
+        assert PromptTemplate('t', template).render(**kwargs) == template.format(**kwargs)
+
+    def test_format_spec_and_conversion(self):
+        text = '{a!r} {b:>5} {c:.2f} {{x}}'
+        kwargs = {'a': 'q', 'b': 'z', 'c': 1.234}
+        assert PromptTemplate('t', text).render(**kwargs) == text.format(**kwargs)
+
+    def test_positional_falls_back(self):
+        template = PromptTemplate('t', '{0}-{x.real}')
+        assert not template._simple
+        with pytest.raises(IndexError):
+            template.render(x=1)
+
+    def test_missing_field_raises(self):
+        with pytest.raises(KeyError):
+            PromptTemplate('t', 'a {b}').render()
+
+
+class TestFileSources:
+    """测试文件来源"""
+
+    def test_merges_config_and_prompts_file(self, registry):
+        assert PromptRegistry.get('recognize') == '识别提示词'
+        assert PromptRegistry.render('semantic_eval_template', subject='物理', index='1') == '学科 物理，题号 1，{JSON}'
+        assert PromptRegistry.get('missing', '默认') == '默认'
+
+    def test_semantic_eval_load_prompt_uses_registry(self, registry):
+        assert semantic_eval_service.load_prompt('semantic_eval_template').startswith('学科')
+
+    def test_reload_on_file_change(self, registry):
+        version = PromptRegistry.get_version()
+        with patch.object(ConfigService, 'load_prompts', wraps=ConfigService.load_prompts) as mock_load:
+            PromptRegistry.get('semantic_eval_template')
+            PromptRegistry.get('semantic_eval_template')
+            assert mock_load.call_count == 0
+
+            registry.write_text(json.dumps([{'key': 'semantic_eval_template', 'content': '新 {subject}'}]), encoding='utf-8')
+            st = os.stat(registry)
+            os.utime(registry, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+            assert PromptRegistry.render('semantic_eval_template', subject='化学') == '新 化学'
+            assert mock_load.call_count == 1
+
+        assert PromptRegistry.get_version() != version
+        assert PromptRegistry.get_version('recognize') == PromptRegistry.content_hash('识别提示词')
+
+
+class TestDbSource:
+    """测试 prompt_configs 来源"""
+
+    def test_reload_only_when_stamp_changes(self, registry, monkeypatch):
+        from services.database_service import AppDatabaseService
+        monkeypatch.setattr(PromptRegistry, 'DB_CHECK_INTERVAL', 0)
+        rows = [{'config_key': 'HomeWorkPrompt', 'config_value': '数学 {x}', 'current_version': 3,
+                 'content_hash': 'h', 'synced_at': None}]
+        stamp = {'cnt': 1, 'versions': 3, 'updated_at': None}
+
+        with patch.object(AppDatabaseService, 'execute_one', return_value=stamp), \
+                patch.object(AppDatabaseService, 'execute_query', return_value=rows) as mock_query:
+            assert PromptRegistry.get_db_template('HomeWorkPrompt').version == 'v3'
+            assert PromptRegistry.get_db_prompts(['HomeWorkPrompt', 'Other']).keys() == {'HomeWorkPrompt'}
+            assert mock_query.call_count == 1
+
+            stamp['versions'] = 4
+            rows[0]['current_version'] = 4
+            assert PromptRegistry.get_db_template('HomeWorkPrompt').version == 'v4'
+            assert mock_query.call_count == 2
@@ -0,0 +1,103 @@
+"""
+任务题目异常检测测试
+
+测试 AnomalyService.detect_question_anomalies：
+- 全员错误 / 高异常 / 低异常 / 正常分类与一致性
+- 每个数据集只加载一次
+- 正确样例的 AI 答案按题号、题号数字、tempIndex 查找（含子题）
+
+运行方式:
+    pytest tests/test_question_anomalies.py -v
+"""
+import json
+from unittest.mock import patch
+
+from services.anomaly_service import AnomalyService, _index_homework_result
+
+
+DATASET = {
+    'base_effects': {
+        '76': [
+            {'index': '1', 'tempIndex': 0, 'answer': 'A', 'userAnswer': 'A'},
+            {'index': '2', 'tempIndex': 1, 'answer': 'B', 'userAnswer': 'B'},
+            {'index': '3', 'tempIndex': 2, 'answer': 'C', 'userAnswer': 'C'},
+            {'index': '4', 'tempIndex': 3, 'answer': 'D', 'userAnswer': 'D'}
+        ]
+    }
+}
+
+
+def make_item(student, errors):
+    homework_result = [
+        {'index': '第1题', 'userAnswer': 'A'},
+        {'tempIndex': 1, 'userAnswer': 'B'},
+        {'index': '3', 'userAnswer': 'C'},
+        {'index': '4', 'userAnswer': 'D'}
+    ]
+    return {
+        'homework_id': student,
+        'student_name': student,
+        'page_num': 76,
+        'matched_dataset': 'ds1',
+        'status': 'completed',
+        'homework_result': json.dumps(homework_result, ensure_ascii=False),
+        'evaluation': {
+            'errors': [{'index': idx, 'error_type': error_type, 'base_effect': {'answer': 'X'},
+                        'ai_result': {'userAnswer': 'Y'}} for idx, error_type in errors]
+        }
+    }
+
+
+class TestDetectQuestionAnomalies:
+    """测试题目异常分类"""
+
+    def test_classification(self):
+        task = {'homework_items': [
+            make_item('s1', [('1', '识别错误-判断错误'), ('2', '识别正确-判断错误')]),
+            make_item('s2', [('1', '缺失题目'), ('3', '识别错误-判断错误')]),
+            make_item('s3', [('1', '缺失题目')]),
+            {'status': 'failed'}
+        ]}
+        with patch('services.anomaly_service.StorageService.load_dataset', return_value=DATASET) as load:
+            result = AnomalyService.detect_question_anomalies(task)
+        load.assert_called_once_with('ds1')
+
+        summary = result['summary']
+        assert (summary['universal_errors'], summary['high_anomaly'], summary['low_anomaly'],
+                summary['normal']) == (1, 1, 1, 1)
+        assert summary['total_questions'] == 4
+        assert summary['consistency_rate'] == round(1 / 3, 4)
+
+        types = [(a['type'], a['question_index']) for a in result['anomalies']]
+        assert types == [('universal_error', '1'), ('high_anomaly', '2'), ('low_anomaly', '3')]
+        universal = result['anomalies'][0]
+        assert universal['description'] == '全部3人判错'
+        assert universal['error_type_summary'] == '缺失题目(2)、识别错误-判断错误(1)'
+
+        high = result['anomalies'][1]
+        assert high['description'] == '2对/1错，含识别正确-判断错误'
+        assert [s['hw_answer'] for s in high['samples']] == ['Y', 'B', 'B']
+
+    def test_empty_task(self):
+        result = AnomalyService.detect_question_anomalies({'homework_items': []})
+        assert result['summary']['total_questions'] == 0
+        assert result['anomalies'] == []
+
+
+class TestIndexHomeworkResult:
+    """测试 homework_result 题号映射"""
+
+    def test_keys(self):
+        result = _index_homework_result(json.dumps([
+            {'index': '第1题', 'userAnswer': 'A'},
+            {'index': '2', 'tempIndex': 5, 'children': [{'index': '2(1)', 'userAnswer': 'B'}]}
+        ], ensure_ascii=False))
+        assert result['第1题']['userAnswer'] == 'A'
+        assert result['1']['userAnswer'] == 'A'
+        assert result['temp_5']['index'] == '2'
+        # 子题在父题之后写入，数字键被子题覆盖
+        assert result['2']['userAnswer'] == 'B'
+
+    def test_invalid(self):
+        assert _index_homework_result('not json') == {}
+        assert _index_homework_result(None) == {}
@@ -0,0 +1,199 @@
+"""
+日报构建流程测试
+
+测试 ReportService：
+- 单遍收集按日输入：任务统计、准确率变化、错误类型 Top、新增错误类型、高频错题、失败任务
+- 每个任务文件最多读取一次，且只读取相关日期的任务
+- 后台渲染 Word 文档、按内容版本缓存、清理旧版本
+
+运行方式:
+    pytest tests/test_report_pipeline.py -v
+"""
+import os
+import builtins
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+
+from services.storage_service import StorageService
+from services.aggregate_cube_service import AggregateCubeService
+from services.report_service import ReportService, ReportInputs
+
+
+REPORT_DATE = datetime(2026, 3, 10).date()
+
+
+def make_task(task_id, day, errors, status='completed', total=10, correct=8):
+    created = datetime.combine(day, datetime.min.time()) + timedelta(hours=10)
+    return {
+        'task_id': task_id, 'subject_id': 2, 'status': status, 'created_at': created.isoformat(),
+        'overall_report': {'total_questions': total, 'correct_questions': correct},
+        'homework_items': [{
+            'book_id': 'b1', 'book_name': '数学七上', 'page_num': 76, 'status': 'completed',
+            'evaluation': {'total_questions': total, 'correct_count': correct,
+                           'errors': [{'index': idx, 'error_type': t} for idx, t in errors]}
+        }]
+    }
+
+
+@pytest.fixture
+def tasks(tmp_path, monkeypatch):
+    monkeypatch.setattr(StorageService, 'BATCH_TASKS_DIR', str(tmp_path / 'batch_tasks'))
+    monkeypatch.setattr(AggregateCubeService, 'CUBE_DIR', str(tmp_path / 'analytics_cube'))
+    monkeypatch.setattr(AggregateCubeService, 'CHECK_INTERVAL', 0)
+    AggregateCubeService.reset()
+    for task in [
+        make_task('today1', REPORT_DATE, [('1', '缺失题目'), ('2', '新错误')] + [('3', '缺失题目')] * 3),
+        make_task('today2', REPORT_DATE, [], status='failed', total=0, correct=0),
+        make_task('yesterday', REPORT_DATE - timedelta(days=1), [('1', '缺失题目')], total=10, correct=9),
+        make_task('lastweek', REPORT_DATE - timedelta(days=7), [], total=10, correct=10),
+        make_task('history', REPORT_DATE - timedelta(days=20), [('5', '识别错误-判断错误')]),
+        make_task('old', REPORT_DATE - timedelta(days=40), [('5', '新错误')]),
+    ]:
+        StorageService.save_batch_task(task['task_id'], task)
+    yield tmp_path
+    AggregateCubeService.reset()
+
+
+class TestInputs:
+    """测试按日输入"""
+
+    def test_report_fields(self, tasks):
+        with patch.object(ReportService, '_get_report_by_date', return_value=None), \
+                patch.object(ReportService, '_save_report'), \
+                patch.object(ReportService, '_get_tomorrow_plan', return_value=[]), \
+                patch.object(ReportService, '_generate_ai_summary', return_value='总结'):
+            report = ReportService.generate_daily_report(REPORT_DATE.isoformat())
+
+        assert (report['task_completed'], report['task_planned']) == (1, 2)
+        assert report['accuracy'] == 0.8
+        assert report['accuracy_change'] == pytest.approx(-0.1)
+        assert report['accuracy_week_change'] == pytest.approx(-0.2)
+        assert report['top_errors'] == [{'type': '缺失题目', 'count': 4}, {'type': '新错误', 'count': 1}]
+        # 「新错误」只在 30 天以前出现过
+        assert report['new_error_types'] == ['新错误']
+        assert [(e['index'], e['count']) for e in report['high_freq_errors']] == [('3', 3)]
+        assert [a['type'] for a in report['anomalies']] == ['task_failed']
+
+    def test_new_error_types_use_cube_rules_on_both_sides(self, tasks):
+        # 历史日：缺失类型的错误（立方体记为未知错误）；当日：同样缺失类型 + 未完成作业项中的类型
+        history = make_task('history2', REPORT_DATE - timedelta(days=3), [('7', '')])
+        today = make_task('today3', REPORT_DATE, [('8', '')])
+        today['homework_items'].append({
+            'book_id': 'b1', 'book_name': '数学七上', 'page_num': 77, 'status': 'failed',
+            'evaluation': {'errors': [{'index': '1', 'error_type': '未完成项错误'}]}
+        })
+        for task in (history, today):
+            StorageService.save_batch_task(task['task_id'], task)
+
+        assert ReportService.get_new_error_types(REPORT_DATE.isoformat(), ReportInputs()) == ['新错误']
+
+    def test_each_task_file_read_once(self, tasks, monkeypatch):
+        AggregateCubeService.ensure_fresh(force=True)
+        reads = Counter()
+        real_open = builtins.open
+
+        def counting_open(path, *args, **kwargs):
+            if 'batch_tasks' in str(path):
+                reads[os.path.basename(str(path))] += 1
+            return real_open(path, *args, **kwargs)
+
+        monkeypatch.setattr(builtins, 'open', counting_open)
+        inputs = ReportInputs()
+        ReportService._calculate_accuracy_stats(REPORT_DATE, inputs)
+        ReportService._get_top_errors(REPORT_DATE, inputs=inputs)
+        ReportService.get_new_error_types(REPORT_DATE.isoformat(), inputs)
+        ReportService.get_high_freq_errors(REPORT_DATE.isoformat(), inputs=inputs)
+        ReportService._detect_anomalies(REPORT_DATE, {}, inputs)
+        assert reads == Counter({'today1.json': 1, 'today2.json': 1, 'yesterday.json': 1, 'lastweek.json': 1})
+
+
+REPORT = {
+    'report_id': 'r1', 'report_date': '2026-03-10', 'task_completed': 1, 'task_planned': 2,
+    'accuracy': 0.8, 'accuracy_change': -0.1, 'accuracy_week_change': -0.2,
+    'top_errors': [{'type': '缺失题目', 'count': 4}], 'new_error_types': ['新错误'],
+    'high_freq_errors': [], 'tomorrow_plan': [], 'anomalies': [], 'model_version': 'm',
+    'ai_summary': '总结', 'raw_content': ''
+}
+
+
+def wait_for(report_id, status='ready'):
+    # 等到后台线程写完 .job 标记（finished_at）再返回
+    for _ in range(100):
+        result = ReportService.get_export_status(report_id)
+        if result['status'] == status and result['finished_at']:
+            return result
+        time.sleep(0.05)
+    raise AssertionError(result)
+
+
+class TestExport:
+    """测试后台导出和缓存"""
+
+    @pytest.fixture(autouse=True)
+    def exports(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(ReportService, 'EXPORTS_DIR', str(tmp_path / 'exports'))
+        self.report = dict(REPORT)
+        monkeypatch.setattr(ReportService, '_get_report_by_id',
+                            lambda report_id: dict(self.report) if report_id == 'r1' else None)
+
+    def test_background_render_and_cache(self):
+        assert ReportService.get_export_status('r1')['status'] == 'none'
+        assert ReportService.get_export_artifact('r1') is None
+
+        status = ReportService.request_export('r1')
+        assert status['status'] in ('pending', 'running', 'ready')
+        wait_for('r1')
+        path = ReportService.get_export_artifact('r1')
+        assert path and os.path.getsize(path) > 0
+
+        with patch.object(ReportService, '_export_to_docx') as render:
+            assert ReportService.request_export('r1')['status'] == 'ready'
+            assert ReportService.export_report('r1') == path
+        render.assert_not_called()
+
+        # 数据库读出的 Decimal 不改变版本
+        self.report['accuracy'] = Decimal('0.8000')
+        assert ReportService.get_export_artifact('r1') == path
+
+        # 内容变化后生成新版本并清理旧文件
+        self.report['ai_summary'] = '新的总结'
+        assert ReportService.request_export('r1')['version'] != os.path.basename(path).rsplit('_', 1)[1][:12]
+        wait_for('r1')
+        assert not os.path.exists(path)
+        assert not os.path.exists(path + '.job')
+        assert sorted(os.listdir(os.path.dirname(path))) == [
+            ReportService.get_export_status('r1')['filename'],
+            ReportService.get_export_status('r1')['filename'] + '.job'
+        ]
+
+    def test_job_marker_shared_across_workers(self, monkeypatch):
+        # 其他 worker 启动的导出只留下 .job 标记，本进程据此返回状态且不重复渲染
+        _, _, path = ReportService._resolve_export('r1', 'docx')
+        ReportService._write_job(path, {'status': 'running', 'started_at': datetime.now().isoformat()})
+        with patch.object(ReportService, '_export_to_docx') as render:
+            assert ReportService.get_export_status('r1')['status'] == 'running'
+            assert ReportService.request_export('r1')['status'] == 'running'
+        render.assert_not_called()
+
+        # 超时未完成的标记视为中断，可以重新导出
+        monkeypatch.setattr(ReportService, 'EXPORT_JOB_TIMEOUT', 0)
+        ReportService._write_job(path, {'status': 'running', 'started_at': '2020-01-01T00:00:00'})
+        assert ReportService.get_export_status('r1')['status'] == 'none'
+        ReportService.request_export('r1')
+        monkeypatch.setattr(ReportService, 'EXPORT_JOB_TIMEOUT', 600)
+        wait_for('r1')
+
+    def test_failure_and_validation(self):
+        with patch.object(ReportService, '_export_to_docx', side_effect=RuntimeError('boom')):
+            ReportService.request_export('r1')
+            assert wait_for('r1', 'failed')['error'] == 'boom'
+
+        with pytest.raises(ValueError):
+            ReportService.request_export('missing')
+        with pytest.raises(ValueError):
+            ReportService.get_export_status('r1', 'pdf')
@@ -0,0 +1,151 @@
+"""
+响应制品缓存测试
+
+测试 ResponseCacheService 及 conditional_get(artifact_tag=...)：
+- 命中时返回缓存的 gzip 字节，不执行路由函数
+- 不支持 gzip 的客户端得到解压后的内容
+- 失败响应和小响应不缓存
+- 内存超出预算时淘汰落盘，之后从磁盘命中
+- 按标签失效；保存任务时清理该任务的条目
+
+运行方式:
+    pytest tests/test_response_cache.py -v
+"""
+import os
+import json
+import gzip
+
+import pytest
+from flask import Flask, Blueprint, jsonify
+
+from services.response_cache_service import ResponseCacheService
+from utils.http_cache import conditional_get
+
+
+@pytest.fixture(autouse=True)
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(ResponseCacheService, 'CACHE_DIR', str(tmp_path / 'response_cache'))
+    monkeypatch.setattr(ResponseCacheService, 'ENABLED', True)
+    ResponseCacheService.invalidate()
+    for key in ResponseCacheService._stats:
+        ResponseCacheService._stats[key] = 0
+    yield
+    ResponseCacheService.invalidate()
+
+
+@pytest.fixture
+def env():
+    state = {'version': ('v1', None), 'calls': 0, 'success': True}
+    bp = Blueprint('artifact', __name__)
+
+    @bp.route('/api/big')
+    @conditional_get(lambda: state['version'], artifact_tag='demo')
+    def big():
+        state['calls'] += 1
+        return jsonify({'success': state['success'], 'rows': [{'id': i, 'name': '作业' * 10} for i in range(200)]})
+
+    app = Flask(__name__)
+    app.register_blueprint(bp)
+    state['client'] = app.test_client()
+    return state
+
+
+GZIP = {'Accept-Encoding': 'gzip, deflate'}
+
+
+class TestArtifactCache:
+    """测试响应制品缓存"""
+
+    def test_hit_skips_handler_and_compression(self, env):
+        client = env['client']
+        first = client.get('/api/big', headers=GZIP)
+        assert first.headers['Content-Encoding'] == 'gzip'
+        payload = json.loads(gzip.decompress(first.data))
+        assert len(payload['rows']) == 200
+
+        second = client.get('/api/big', headers=GZIP)
+        assert env['calls'] == 1
+        assert second.data == first.data
+        assert second.headers['ETag'] == first.headers['ETag']
+        assert ResponseCacheService.get_stats()['memory_hits'] == 1
+
+    def test_plain_client_gets_decompressed_body(self, env):
+        client = env['client']
+        client.get('/api/big', headers=GZIP)
+        plain = client.get('/api/big')
+        assert 'Content-Encoding' not in plain.headers
+        assert len(plain.get_json()['rows']) == 200
+        assert env['calls'] == 1
+
+    def test_version_change_misses(self, env):
+        client = env['client']
+        client.get('/api/big', headers=GZIP)
+        env['version'] = ('v2', None)
+        client.get('/api/big', headers=GZIP)
+        assert env['calls'] == 2
+
+    def test_failed_response_not_cached(self, env):
+        env['success'] = False
+        client = env['client']
+        client.get('/api/big', headers=GZIP)
+        client.get('/api/big', headers=GZIP)
+        assert env['calls'] == 2
+        assert ResponseCacheService.get_stats()['stores'] == 0
+
+    def test_small_payload_not_cached(self):
+        assert ResponseCacheService.put('k', 'demo', b'{"success": true}') is None
+        assert ResponseCacheService.get('k', 'demo') is None
+
+
+class TestBudgetAndInvalidation:
+    """测试预算淘汰与失效"""
+
+    def test_eviction_spills_to_disk(self, monkeypatch):
+        raw = os.urandom(4096)  # 随机字节压缩后几乎不变小
+        monkeypatch.setattr(ResponseCacheService, 'MEMORY_BUDGET', 6000)
+        ResponseCacheService.put('a', 'demo', raw)
+        ResponseCacheService.put('b', 'demo', raw)
+        stats = ResponseCacheService.get_stats()
+        assert stats['entries'] == 1
+        assert stats['spills'] == 1
+
+        assert gzip.decompress(ResponseCacheService.get('a', 'demo')) == raw
+        assert ResponseCacheService.get_stats()['disk_hits'] == 1
+
+    def test_invalidate_by_tag(self, monkeypatch):
+        raw = b'x' * 4096
+        ResponseCacheService.put('a', 'task-t1', raw)
+        ResponseCacheService.put('b', 'task-t2', raw)
+        assert ResponseCacheService.invalidate('task-t1') == 1
+        assert ResponseCacheService.get('a', 'task-t1') is None
+        assert ResponseCacheService.get('b', 'task-t2') is not None
+
+    def test_save_batch_task_invalidates_task_artifacts(self, cube):
+        from services.storage_service import StorageService
+        ResponseCacheService.put('detail', 'task-t1', b'x' * 4096)
+        StorageService.save_batch_task('t1', {'task_id': 't1', 'homework_items': []})
+        assert ResponseCacheService.get('detail', 'task-t1') is None
+
+    def test_batch_compare_route_cached_by_task_versions(self, cube):
+        from unittest.mock import patch
+        from routes.dashboard import dashboard_bp
+        from services.dashboard_service import DashboardService
+        from services.storage_service import StorageService
+        for task_id in ('t1', 't2'):
+            StorageService.save_batch_task(task_id, {'task_id': task_id, 'homework_items': []})
+        app = Flask(__name__)
+        app.register_blueprint(dashboard_bp)
+        client = app.test_client()
+        url = '/api/dashboard/batch-compare?task_id_1=t1&task_id_2=t2'
+        data = {'rows': [{'index': i, 'name': '题目' * 10} for i in range(200)]}
+
+        with patch.object(DashboardService, 'get_batch_compare', return_value=data) as compare:
+            first = client.get(url, headers=GZIP)
+            second = client.get(url, headers=GZIP)
+            assert compare.call_count == 1
+            assert second.data == first.data
+
+            StorageService.save_batch_task('t2', {'task_id': 't2', 'homework_items': [], 'name': '改'})
+            third = client.get(url, headers=GZIP)
+            assert compare.call_count == 2
+            assert third.headers['ETag'] != first.headers['ETag']
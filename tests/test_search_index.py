@@ -0,0 +1,242 @@
+"""
+搜索倒排索引测试
+
+测试 SearchIndexService：
+- 中文 n-gram 匹配、单字查询、答案内容匹配
+- 排序、分页、类型前缀过滤
+- 任务/数据集保存和删除时的增量更新（书本按来源引用计数）
+- 快照和变更日志落盘、加载、日志压缩以及多 worker 更新按来源合并
+- StorageService 保存任务时触发增量更新
+
+运行方式:
+    pytest tests/test_search_index.py -v
+"""
+import pytest
+
+from services.search_index_service import SearchIndexService
+
+
+def make_task(task_id, name, book_id='b1', book_name='物理八年级上册', errors=None, created_at='2026-01-01T10:00:00'):
+    return {
+        'task_id': task_id,
+        'name': name,
+        'created_at': created_at,
+        'homework_items': [{
+            'book_id': book_id,
+            'book_name': book_name,
+            'page_num': 76,
+            'evaluation': {'errors': errors or []}
+        }]
+    }
+
+
+def make_dataset(name, book_id='b2', book_name='化学九年级', created_at='2026-01-02T10:00:00'):
+    return {'name': name, 'book_id': book_id, 'book_name': book_name, 'created_at': created_at}
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    monkeypatch.setattr(SearchIndexService, 'INDEX_DIR', str(tmp_path / 'search_index'))
+    monkeypatch.setattr(SearchIndexService, 'PERSIST_DELAY', 60)
+    SearchIndexService.reset()
+    corpus = {'tasks': [], 'datasets': []}
+    monkeypatch.setattr('services.dashboard_service.DashboardService._load_all_batch_tasks',
+                        staticmethod(lambda: corpus['tasks']))
+    monkeypatch.setattr('services.storage_service.StorageService.get_all_datasets_summary',
+                        staticmethod(lambda: corpus['datasets']))
+    yield corpus
+    SearchIndexService.reset()
+
+
+def names(result):
+    return [r['name'] for r in result['results']]
+
+
+class TestQuery:
+    """测试查询"""
+
+    def test_chinese_ngram_and_single_char(self, index):
+        index['tasks'] = [make_task('t1', '批量评估-物理八上'), make_task('t2', '数学周测')]
+        SearchIndexService.rebuild()
+
+        result = SearchIndexService.search('物理')
+        # 书本名前缀匹配排在任务名包含匹配之前
+        assert names(result) == ['物理八年级上册', '批量评估-物理八上']
+        assert result['results'][1]['highlight'] == '批量评估-<mark>物理</mark>八上'
+        assert '数学周测' in names(SearchIndexService.search('数'))
+        assert SearchIndexService.search('生物')['total'] == 0
+
+    def test_answer_content_matches_question(self, index):
+        errors = [{'index': '3', 'base_answer': '冷热程度 摄氏度', 'hw_user': '热量'}]
+        index['tasks'] = [make_task('t1', '任务A', errors=errors)]
+        SearchIndexService.rebuild()
+
+        result = SearchIndexService.search('question:摄氏度')
+        assert result['total'] == 1
+        assert result['results'][0]['type'] == 'question'
+        assert result['results'][0]['id'] == 't1'
+        assert '<mark>摄氏度</mark>' in result['results'][0]['highlight']
+
+    def test_ranking_and_pagination(self, index):
+        index['tasks'] = [
+            make_task('t1', '期中物理测试', created_at='2026-01-01'),
+            make_task('t2', '物理', created_at='2026-01-02'),
+            make_task('t3', '物理周测', created_at='2026-01-03'),
+        ]
+        SearchIndexService.rebuild()
+
+        result = SearchIndexService.search('物理', 'task', page=1, page_size=2)
+        assert result['total'] == 3
+        assert names(result) == ['物理', '物理周测']
+        assert names(SearchIndexService.search('物理', 'task', page=2, page_size=2)) == ['期中物理测试']
+
+    def test_type_prefix(self, index):
+        index['tasks'] = [make_task('t1', '化学任务')]
+        index['datasets'] = [dict(make_dataset('化学九年级_P1-5'), dataset_id='d1')]
+        SearchIndexService.rebuild()
+
+        assert {r['type'] for r in SearchIndexService.search('化学')['results']} == {'task', 'dataset', 'book'}
+        assert [r['type'] for r in SearchIndexService.search('数据集：化学')['results']] == ['dataset']
+        assert SearchIndexService.parse_query('book: 八上') == ('八上', 'book')
+        assert SearchIndexService.parse_query('12:30', 'task') == ('12:30', 'task')
+
+
+class TestIncremental:
+    """测试增量更新"""
+
+    def test_task_save_and_delete(self, index):
+        SearchIndexService.rebuild()
+        SearchIndexService.index_task('t1', make_task('t1', '英语听力'))
+        assert names(SearchIndexService.search('task:听力')) == ['英语听力']
+
+        SearchIndexService.index_task('t1', make_task('t1', '英语阅读'))
+        assert SearchIndexService.search('听力')['total'] == 0
+        assert names(SearchIndexService.search('task:阅读')) == ['英语阅读']
+
+        SearchIndexService.remove_task('t1')
+        assert SearchIndexService.search('英语')['total'] == 0
+
+    def test_book_kept_until_last_source_removed(self, index):
+        SearchIndexService.rebuild()
+        SearchIndexService.index_task('t1', make_task('t1', '任务', book_id='b1', book_name='物理八上'))
+        SearchIndexService.index_dataset('d1', make_dataset('物理数据集', book_id='b1', book_name='物理八上'))
+
+        SearchIndexService.remove_task('t1')
+        assert names(SearchIndexService.search('book:八上')) == ['物理八上']
+        SearchIndexService.remove_dataset('d1')
+        assert SearchIndexService.search('book:八上')['total'] == 0
+
+    def test_skips_updates_before_index_exists(self, index):
+        SearchIndexService.index_task('t1', make_task('t1', '英语听力'))
+        assert not SearchIndexService.get_status()['loaded']
+
+
+class TestPersistence:
+    """测试落盘与加载"""
+
+    def test_persist_and_reload(self, index):
+        SearchIndexService.rebuild()
+        SearchIndexService.index_task('t1', make_task('t1', '英语听力'))
+        SearchIndexService.persist()
+        assert SearchIndexService.get_status()['pending_writes'] == 0
+
+        SearchIndexService.reset()
+        index['tasks'] = []  # 加载索引文件，不再全量构建
+        assert names(SearchIndexService.search('task:听力')) == ['英语听力']
+
+    def test_merges_updates_from_other_worker(self, index):
+        import os
+        import json
+        index['tasks'] = [make_task('t2', '数学周测')]
+        SearchIndexService.rebuild()
+        path = SearchIndexService._index_path()
+        with open(path, 'r', encoding='utf-8') as f:
+            other_worker = json.load(f)['docs']
+
+        # 当前 worker 有未落盘的变更
+        SearchIndexService.index_task('t1', make_task('t1', '英语听力'))
+
+        # 另一个 worker 在此期间落盘了自己的更新
+        other_worker['task:t3'] = {'type': 'task', 'sources': {'task:t3': {
+            'id': 't3', 'name': '化学实验', 'ts': '2026-01-03', 'fields': ['化学实验']}}}
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'version': SearchIndexService.INDEX_VERSION, 'docs': other_worker}, f, ensure_ascii=False)
+        os.utime(path, ns=(1, 1))
+
+        SearchIndexService.persist()
+        SearchIndexService.reset()
+        assert names(SearchIndexService.search('task:周测')) == ['数学周测']
+        assert names(SearchIndexService.search('task:听力')) == ['英语听力']
+        assert names(SearchIndexService.search('task:实验')) == ['化学实验']
+
+
+    def test_persist_appends_log_without_rewriting_snapshot(self, index):
+        import os
+        SearchIndexService.rebuild()
+        before = os.stat(SearchIndexService._index_path()).st_mtime_ns
+
+        SearchIndexService.index_task('t1', make_task('t1', '英语听力'))
+        SearchIndexService.remove_task('t1')
+        SearchIndexService.index_task('t2', make_task('t2', '英语阅读'))
+        SearchIndexService.persist()
+
+        assert os.stat(SearchIndexService._index_path()).st_mtime_ns == before
+        with open(SearchIndexService._log_path(), encoding='utf-8') as f:
+            assert len(f.readlines()) == 2
+        SearchIndexService.reset()
+        assert names(SearchIndexService.search('task:英语')) == ['英语阅读']
+
+    def test_merges_sources_of_shared_docs(self, index):
+        import json
+        SearchIndexService.rebuild()
+        SearchIndexService.index_task('t1', make_task('t1', '任务一', book_id='b1', book_name='物理八上'))
+
+        # 另一个 worker 在此期间追加了引用同一本书的任务
+        entry = {'source': 'task:t3', 'docs': {
+            'task:t3': ['task', 't3', '任务三', '2026-01-03', ['任务三']],
+            'book:b1': ['book', 'b1', '物理八上', '2026-01-03', ['物理八上']]}}
+        with open(SearchIndexService._log_path(), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+        SearchIndexService.persist()
+        SearchIndexService.reset()
+        SearchIndexService.ensure_loaded()
+        assert set(SearchIndexService._docs['book:b1']['sources']) == {'task:t1', 'task:t3'}
+
+        # 任一来源移除后书本仍在
+        SearchIndexService.remove_task('t1')
+        assert names(SearchIndexService.search('book:八上')) == ['物理八上']
+
+    def test_picks_up_other_worker_log_and_compaction(self, index, monkeypatch):
+        import json
+        SearchIndexService.rebuild()
+        SearchIndexService.search('任务')
+        with open(SearchIndexService._log_path(), 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'source': 'task:t5', 'docs': {
+                'task:t5': ['task', 't5', '生物观察', '2026-01-05', ['生物观察']]}}, ensure_ascii=False) + '\n')
+        monkeypatch.setattr(SearchIndexService, '_checked_at', 0.0)
+        assert names(SearchIndexService.search('生物')) == ['生物观察']
+
+        monkeypatch.setattr(SearchIndexService, 'LOG_COMPACT_BYTES', 0)
+        SearchIndexService.index_task('t6', make_task('t6', '地理填图'))
+        SearchIndexService.persist()
+        with open(SearchIndexService._log_path(), encoding='utf-8') as f:
+            assert f.read() == ''
+
+        SearchIndexService.reset()
+        assert names(SearchIndexService.search('task:生物')) == ['生物观察']
+        assert names(SearchIndexService.search('task:地理')) == ['地理填图']
+
+
+class TestStorageHooks:
+    """测试存储层钩子"""
+
+    def test_save_batch_task_updates_index(self, index, tmp_path, monkeypatch):
+        from services.storage_service import StorageService
+        monkeypatch.setattr(StorageService, 'BATCH_TASKS_DIR', str(tmp_path / 'batch_tasks'))
+        SearchIndexService.rebuild()
+
+        StorageService.save_batch_task('t9', make_task('t9', '语文古诗默写'))
+        assert names(SearchIndexService.search('古诗')) == ['语文古诗默写']
+        StorageService.delete_batch_task('t9')
+        assert SearchIndexService.search('古诗')['total'] == 0
@@ -0,0 +1,131 @@
+"""
+遥测日志异步写入模块测试
+
+测试 TelemetryWriter 的核心功能：
+- 批量多行写入
+- 刷新回调
+- 数据库不可达时落盘与回放
+
+运行方式:
+    pytest tests/test_telemetry_writer.py -v
+"""
+import os
+import json
+import pytest
+from datetime import datetime
+from unittest.mock import patch
+
+from services.telemetry_writer import TelemetryWriter
+
+
+@pytest.fixture
+def writer(tmp_path):
+    """隔离落盘目录和刷新回调，测试结束后清空队列"""
+    with patch.object(TelemetryWriter, 'SPILL_DIR', str(tmp_path)), \
+         patch.object(TelemetryWriter, '_flush_hooks', {}), \
+         patch.object(TelemetryWriter, '_ensure_started'), \
+         patch.object(TelemetryWriter, '_last_replay_at', 0.0):
+        TelemetryWriter._drain_nowait(TelemetryWriter.QUEUE_MAX_SIZE)
+        yield TelemetryWriter
+        TelemetryWriter._drain_nowait(TelemetryWriter.QUEUE_MAX_SIZE)
+
+
+def _row(i):
+    return {'log_id': f'log{i}', 'status': 'success', 'created_at': datetime(2026, 1, 1, 12, 0, i)}
+
+
+class TestBatchWrite:
+    """测试批量写入"""
+
+    @patch('services.telemetry_writer.AppDatabaseService')
+    def test_rows_grouped_into_single_insert(self, mock_db, writer):
+        """同一张表的多行合并为一次 executemany"""
+        for i in range(5):
+            writer.submit('llm_call_logs', _row(i))
+
+        assert writer.flush() == 5
+
+        mock_db.execute_many.assert_called_once()
+        sql, params = mock_db.execute_many.call_args[0]
+        assert sql.startswith('INSERT INTO llm_call_logs (log_id, status, created_at)')
+        assert len(params) == 5
+        assert params[0][0] == 'log0'
+
+    @patch('services.telemetry_writer.AppDatabaseService')
+    def test_different_tables_written_separately(self, mock_db, writer):
+        """不同表分别写入"""
+        writer.submit('llm_call_logs', _row(1))
+        writer.submit('automation_logs', {'log_id': 'a1', 'task_type': 'x'})
+
+        writer.flush()
+
+        assert mock_db.execute_many.call_count == 2
+
+    @patch('services.telemetry_writer.AppDatabaseService')
+    def test_flush_hook_receives_written_rows(self, mock_db, writer):
+        """写入成功后调用刷新回调"""
+        received = []
+        writer.register_flush_hook('llm_call_logs', received.extend)
+        writer.submit('llm_call_logs', _row(1))
+        writer.flush()
+
+        assert [r['log_id'] for r in received] == ['log1']
+
+
+class TestSpill:
+    """测试落盘与回放"""
+
+    @patch('services.telemetry_writer.AppDatabaseService')
+    def test_spill_when_db_unreachable(self, mock_db, writer, tmp_path):
+        """数据库不可达时写入本地文件"""
+        mock_db.execute_many.side_effect = OSError('connection refused')
+
+        writer.submit('llm_call_logs', _row(1))
+        writer.flush()
+
+        spill_file = tmp_path / TelemetryWriter.SPILL_FILE
+        assert spill_file.exists()
+        record = json.loads(spill_file.read_text(encoding='utf-8').strip())
+        assert record['table'] == 'llm_call_logs'
+        assert record['row']['log_id'] == 'log1'
+
+    @patch('services.telemetry_writer.AppDatabaseService')
+    def test_spill_replayed_after_recovery(self, mock_db, writer, tmp_path):
+        """数据库恢复后回放落盘数据"""
+        mock_db.execute_many.side_effect = OSError('connection refused')
+        writer.submit('llm_call_logs', _row(1))
+        writer.flush()
+
+        mock_db.execute_many.side_effect = None
+        writer.submit('llm_call_logs', _row(2))
+        writer.flush()
+
+        written = [p[0] for call in mock_db.execute_many.call_args_list[1:] for p in call[0][1]]
+        assert written == ['log2', 'log1']
+        assert not os.path.exists(tmp_path / TelemetryWriter.SPILL_FILE)
+
+    @patch('services.telemetry_writer.AppDatabaseService')
+    def test_replay_drops_rows_on_data_error(self, mock_db, writer, tmp_path):
+        """回放遇到非连接类错误时丢弃，避免反复重试"""
+        mock_db.execute_many.side_effect = OSError('connection refused')
+        writer.submit('llm_call_logs', _row(1))
+        writer.flush()
+
+        mock_db.execute_many.side_effect = ValueError('duplicate key')
+        writer._replay_spill()
+
+        assert not os.path.exists(tmp_path / TelemetryWriter.SPILL_FILE)
+
+    @patch('services.telemetry_writer.AppDatabaseService')
+    def test_replay_file_kept_until_rows_written(self, mock_db, writer, tmp_path):
+        """回放文件在全部行写入后才删除"""
+        mock_db.execute_many.side_effect = OSError('connection refused')
+        writer.submit('llm_call_logs', _row(1))
+        writer.flush()
+
+        pending = []
+        mock_db.execute_many.side_effect = lambda sql, params: pending.extend(tmp_path.glob('*.replay'))
+        writer._replay_spill()
+
+        assert len(pending) == 1
+        assert not list(tmp_path.glob('*.replay'))
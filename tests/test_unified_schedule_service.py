@@ -24,6 +24,13 @@ os.environ['USE_DB_STORAGE'] = 'false'
 from services.unified_schedule_service import UnifiedScheduleService, APSCHEDULER_AVAILABLE
 
 
+@pytest.fixture(autouse=True)
+def mock_telemetry_writer():
+    """日志经 TelemetryWriter 异步写入，测试中替换掉避免真实落库"""
+    with patch('services.unified_schedule_service.TelemetryWriter') as mock_writer:
+        yield mock_writer
+
+
 class TestUnifiedScheduleServiceInit:
     """测试调度器初始化"""
     
@@ -135,11 +142,8 @@ class TestRetryMechanism:
 class TestLogExecution:
     """测试日志记录"""
     
-    @patch('services.unified_schedule_service.AppDatabaseService')
-    def test_log_execution_success(self, mock_db):
+    def test_log_execution_success(self, mock_telemetry_writer):
         """测试成功记录日志"""
-        mock_db.execute_insert.return_value = None
-        
         log_id = UnifiedScheduleService.log_execution(
             task_type='test_plan',
             related_id='plan_123',
@@ -152,12 +156,15 @@ class TestLogExecution:
         
         assert log_id is not None
         assert len(log_id) == 8
-        mock_db.execute_insert.assert_called_once()
+        mock_telemetry_writer.submit.assert_called_once()
+        table, row = mock_telemetry_writer.submit.call_args[0]
+        assert table == 'automation_logs'
+        assert row['log_id'] == log_id
+        assert row['completed_at'] is not None
     
-    @patch('services.unified_schedule_service.AppDatabaseService')
-    def test_log_execution_handles_error(self, mock_db):
+    def test_log_execution_handles_error(self, mock_telemetry_writer):
         """测试日志记录失败时不抛异常"""
-        mock_db.execute_insert.side_effect = Exception('DB Error')
+        mock_telemetry_writer.submit.side_effect = Exception('Queue Error')
         
         # 不应该抛出异常
         log_id = UnifiedScheduleService.log_execution(
@@ -0,0 +1,148 @@
+"""
+HTTP 条件请求工具
+基于数据版本戳为只读接口提供 ETag / Last-Modified，匹配时在执行路由函数之前直接返回 304
+"""
+import os
+import gzip
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Callable, Optional, Tuple, Any
+
+from flask import request, make_response, Response
+from werkzeug.http import http_date, parse_date
+
+
+# 版本函数返回值：(版本戳, 最后修改时间)；返回 None 表示无法确定版本（如数据不存在），按普通请求处理
+VersionStamp = Optional[Tuple[Any, Optional[datetime]]]
+
+# 部署版本，参与 ETag 计算，使接口输出格式变化后旧的验证器失效
+ETAG_SALT = os.environ.get('APP_VERSION', '')
+
+
+def make_etag(stamp: Any) -> str:
+    """由端点、查询参数和版本戳生成弱 ETag（同一数据的 gzip 与非 gzip 响应共用）"""
+    args = '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True)))
+    raw = f'{ETAG_SALT}|{request.endpoint}|{args}|{stamp}'
+    return 'W/"' + hashlib.md5(raw.encode('utf-8')).hexdigest()[:20] + '"'
+
+
+def _to_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        value = value.astimezone()
+    return value.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def _is_not_modified(etag: str, last_modified: Optional[datetime]) -> bool:
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match:
+        # If-None-Match 优先于 If-Modified-Since；弱比较，忽略 W/ 前缀
+        candidates = [tag.strip() for tag in if_none_match.split(',')]
+        bare = etag[2:] if etag.startswith('W/') else etag
+        return '*' in candidates or any(
+            (tag[2:] if tag.startswith('W/') else tag) == bare for tag in candidates
+        )
+    if last_modified is not None:
+        since = parse_date(request.headers.get('If-Modified-Since'))
+        if since is not None:
+            return _to_utc(last_modified) <= since.astimezone(timezone.utc)
+    return False
+
+
+def _set_validators(response, etag: str, last_modified: Optional[datetime]):
+    response.headers['ETag'] = etag
+    if last_modified is not None:
+        response.headers['Last-Modified'] = http_date(_to_utc(last_modified))
+    # 允许浏览器保存副本，但每次使用前必须携带验证器重新校验
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def _accepts_gzip() -> bool:
+    return 'gzip' in request.headers.get('Accept-Encoding', '')
+
+
+def _artifact_response(body: bytes) -> Response:
+    """由缓存的 gzip 响应体构造响应（客户端不支持 gzip 时解压）"""
+    if _accepts_gzip():
+        response = Response(body, mimetype='application/json')
+        response.headers['Content-Encoding'] = 'gzip'
+        response.headers['Vary'] = 'Accept-Encoding'
+        return response
+    return Response(gzip.decompress(body), mimetype='application/json')
+
+
+def _store_artifact(response, key: str, tag: str):
+    """缓存成功的 JSON 响应，并直接复用压缩结果作为本次响应体"""
+    from services.response_cache_service import ResponseCacheService
+    if response.direct_passthrough or not response.is_json or 'Content-Encoding' in response.headers:
+        return response
+    payload = response.get_json(silent=True)
+    if not isinstance(payload, dict) or payload.get('success') is False:
+        return response
+    body = ResponseCacheService.put(key, tag, response.get_data())
+    if body is not None and _accepts_gzip():
+        response.set_data(body)
+        response.headers['Content-Encoding'] = 'gzip'
+        response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+
+def conditional_get(version_func: Callable[..., VersionStamp], artifact_tag=None):
+    """
+    条件 GET 装饰器（各蓝图按路由显式启用）
+
+    version_func 接收与路由函数相同的参数，返回 (版本戳, 最后修改时间) 或 None。
+    版本戳应当廉价（文件 mtime、updated_at、缓存写入时间等），不要对响应体做哈希。
+
+    - 请求携带的 If-None-Match / If-Modified-Since 与当前版本一致：直接返回 304，不执行路由函数
+    - 否则执行路由函数，并为 200 响应附加 ETag / Last-Modified
+    - 路由执行前拿不到版本（如缓存未命中）时，执行后再取一次用于响应头
+
+    artifact_tag 不为空时，同时启用响应制品缓存（ResponseCacheService）：
+    以 ETag 为键缓存 gzip 压缩后的响应体，命中时跳过路由函数、序列化和压缩。
+    artifact_tag 为字符串或接收路由参数的函数，用于按标签失效。
+
+    非 GET 请求（同一路由上的 POST/DELETE）不受影响。
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if request.method != 'GET':
+                return f(*args, **kwargs)
+
+            try:
+                version = version_func(*args, **kwargs)
+            except Exception as e:
+                print(f"[HttpCache] 获取版本失败 {request.endpoint}: {e}")
+                version = None
+
+            tag = artifact_tag(*args, **kwargs) if callable(artifact_tag) else artifact_tag
+            if version is not None:
+                etag = make_etag(version[0])
+                if _is_not_modified(etag, version[1]):
+                    return _set_validators(make_response('', 304), etag, version[1])
+                if tag:
+                    from services.response_cache_service import ResponseCacheService
+                    body = ResponseCacheService.get(etag, tag)
+                    if body is not None:
+                        return _set_validators(_artifact_response(body), etag, version[1])
+
+            response = make_response(f(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+            if version is None:
+                # 路由函数可能刚写入缓存，此时的版本即本次响应的数据版本
+                try:
+                    version = version_func(*args, **kwargs)
+                except Exception:
+                    version = None
+                if version is None:
+                    return response
+            etag = make_etag(version[0])
+            if tag:
+                response = _store_artifact(response, etag, tag)
+            return _set_validators(response, etag, version[1])
+        return decorated_function
+    return decorator
@@ -0,0 +1,128 @@
+"""
+响应投影与分页工具
+为大体积只读接口提供 fields= 字段投影（支持嵌套路径）和基于游标的列表分页
+"""
+import json
+import base64
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# 字段树：{字段名: 子字段树}，子字段树为空表示保留该字段的完整值
+FieldTree = Dict[str, 'FieldTree']
+
+
+def parse_fields(spec: Optional[str]) -> Optional[FieldTree]:
+    """
+    解析 fields 参数
+
+    'name,homework_items.accuracy,homework_items.evaluation.errors' ->
+    {'name': {}, 'homework_items': {'accuracy': {}, 'evaluation': {'errors': {}}}}
+
+    Returns:
+        字段树；参数为空时返回 None（不投影）
+
+    Raises:
+        ValueError: 路径中存在空字段名
+    """
+    if spec is None or not spec.strip():
+        return None
+    tree: FieldTree = {}
+    for path in spec.split(','):
+        path = path.strip()
+        if not path:
+            continue
+        parts = path.split('.')
+        if any(not p.strip() for p in parts):
+            raise ValueError(f'无效的字段路径: {path}')
+        node = tree
+        for i, part in enumerate(parts):
+            part = part.strip()
+            if part in node and not node[part] and i < len(parts) - 1:
+                # 已选择完整字段（如 a 和 a.b 同时出现），保留完整值
+                break
+            if i == len(parts) - 1:
+                node[part] = {}
+            else:
+                node = node.setdefault(part, {})
+    return tree
+
+
+def project(value: Any, tree: Optional[FieldTree]) -> Any:
+    """按字段树投影数据，列表按元素逐个投影，不存在的字段忽略"""
+    if not tree:
+        return value
+    if isinstance(value, list):
+        return [project(item, tree) for item in value]
+    if not isinstance(value, dict):
+        return value
+    return {key: project(value[key], sub) for key, sub in tree.items() if key in value}
+
+
+def wants(tree: Optional[FieldTree], field: str) -> bool:
+    """字段树是否需要某个顶层字段（不投影时总是需要）"""
+    return tree is None or field in tree
+
+
+def encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({'o': offset}).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str]) -> int:
+    """
+    解析游标，返回起始位置
+
+    Raises:
+        ValueError: 游标格式错误
+    """
+    if not cursor:
+        return 0
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        offset = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))['o']
+    except Exception:
+        raise ValueError('无效的游标')
+    if not isinstance(offset, int) or offset < 0:
+        raise ValueError('无效的游标')
+    return offset
+
+
+def paginate(items: List[Any], cursor: Optional[str], limit: Optional[int]) -> Tuple[List[Any], Dict[str, Any]]:
+    """
+    按游标截取列表
+
+    Returns:
+        (当前页元素, {'total', 'limit', 'next_cursor'})；limit 为空时返回剩余全部元素
+    """
+    start = decode_cursor(cursor)
+    end = len(items) if not limit else start + limit
+    page = items[start:end]
+    next_cursor = encode_cursor(end) if end < len(items) else None
+    return page, {'total': len(items), 'limit': limit, 'next_cursor': next_cursor}
+
+
+def encode_keyset_cursor(values: List[Any]) -> str:
+    """编码键集分页游标（上一页最后一行的排序键）"""
+    raw = json.dumps({'k': values}, ensure_ascii=False, default=str)
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_keyset_cursor(cursor: Optional[str], size: int) -> Optional[List[Any]]:
+    """
+    解析键集分页游标
+
+    Returns:
+        排序键列表；游标为空时返回 None（第一页）
+
+    Raises:
+        ValueError: 游标格式错误或排序键个数不符
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))['k']
+    except Exception:
+        raise ValueError('无效的游标')
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError('无效的游标')
+    return values
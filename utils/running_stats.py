@@ -0,0 +1,72 @@
+"""
+流式统计工具
+Welford 在线均值 / 方差，支持撤销单个样本和合并多个分桶（Chan 并行合并公式）
+"""
+import math
+from typing import Iterable, List
+
+
+class RunningStats:
+    """样本数、均值和离差平方和（M2）"""
+
+    __slots__ = ('n', 'mean', 'm2')
+
+    def __init__(self, n: int = 0, mean: float = 0.0, m2: float = 0.0):
+        self.n = n
+        self.mean = mean
+        self.m2 = m2
+
+    @classmethod
+    def of(cls, values: Iterable[float]) -> 'RunningStats':
+        stats = cls()
+        for value in values:
+            stats.add(value)
+        return stats
+
+    def add(self, value: float) -> None:
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (value - self.mean)
+
+    def remove(self, value: float) -> None:
+        """撤销一个之前加入的样本"""
+        if self.n <= 1:
+            self.n, self.mean, self.m2 = 0, 0.0, 0.0
+            return
+        mean = (self.n * self.mean - value) / (self.n - 1)
+        self.m2 = max(0.0, self.m2 - (value - self.mean) * (value - mean))
+        self.mean = mean
+        self.n -= 1
+
+    def merge(self, other: 'RunningStats') -> 'RunningStats':
+        """合并另一个分桶（原地修改并返回自身）"""
+        if other.n == 0:
+            return self
+        if self.n == 0:
+            self.n, self.mean, self.m2 = other.n, other.mean, other.m2
+            return self
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / n
+        self.m2 += other.m2 + delta * delta * self.n * other.n / n
+        self.n = n
+        return self
+
+    def copy(self) -> 'RunningStats':
+        return RunningStats(self.n, self.mean, self.m2)
+
+    @property
+    def variance(self) -> float:
+        """样本方差（与 statistics.variance 一致），样本不足 2 个时为 0"""
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    @property
+    def stdev(self) -> float:
+        return math.sqrt(self.variance)
+
+    def to_list(self) -> List[float]:
+        return [self.n, self.mean, self.m2]
+
+    def __repr__(self) -> str:
+        return f'RunningStats(n={self.n}, mean={self.mean:.6f}, stdev={self.stdev:.6f})'